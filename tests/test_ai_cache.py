@@ -0,0 +1,214 @@
+"""
+Tests for the shared AI response cache.
+"""
+
+import asyncio
+import json
+import os
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from velocitytree.ai import AIAssistant
+from velocitytree.ai_cache import AIResponseCache, get_ai_cache, make_prompt_key
+from velocitytree.claude_integration.cache import CACHE_DB_NAME, ResponseCache
+from velocitytree.claude_integration.provider import ClaudeConfig, LocalClaudeProvider
+from velocitytree.config import Config
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an on-disk cache."""
+    cache = AIResponseCache(tmp_path)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Create a file that answers depend on."""
+    path = tmp_path / "payments.py"
+    path.write_text("def charge(amount):\n    return amount\n")
+    return path
+
+
+class TestPromptKeys:
+    
+    def test_touch_keeps_key(self, cache, source):
+        """Test that files are keyed on content, not mtime."""
+        key = cache.make_key("ns", "explain", "Explain charge", files=[source])
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        
+        assert cache.make_key("ns", "explain", "Explain charge", files=[source]) == key
+    
+    def test_variables_are_normalized(self):
+        """Test that variable order and trailing whitespace do not matter."""
+        first = make_prompt_key("ns", "t", "prompt", {"a": 1, "b": "x  \r\ny"})
+        second = make_prompt_key("ns", "t", "prompt\n", {"b": "x\ny", "a": 1})
+        
+        assert first.digest == second.digest
+        assert make_prompt_key("ns", "t", "prompt", {"a": 2}).digest != first.digest
+
+
+class TestAIResponseCache:
+    
+    def test_exact_hit_survives_restart(self, tmp_path, source):
+        """Test that answers persist across cache instances."""
+        cache = AIResponseCache(tmp_path)
+        key = cache.make_key("ns", "explain", "Explain charge", files=[source])
+        cache.set(key, "It charges.")
+        cache.close()
+        
+        reopened = AIResponseCache(tmp_path)
+        assert reopened.get(reopened.make_key("ns", "explain", "Explain charge", files=[source])) == "It charges."
+        reopened.close()
+    
+    def test_file_change_invalidates(self, cache, source):
+        """Test that changing a dependency drops dependent answers."""
+        key = cache.make_key("ns", "explain", "Explain charge", files=[source])
+        cache.set(key, "It charges.")
+        other = cache.make_key("ns", "explain", "Explain refunds")
+        cache.set(other, "It refunds.")
+        
+        source.write_text("def charge(amount):\n    return amount * 2\n")
+        assert cache.get(cache.make_key("ns", "explain", "Explain charge", files=[source])) is None
+        
+        assert cache.invalidate_changed() == 1
+        assert len(cache) == 1
+        assert cache.get(other) == "It refunds."
+    
+    def test_new_version_replaces_old(self, cache, source):
+        """Test that storing an answer for new file content drops the old one."""
+        cache.set(cache.make_key("ns", "explain", "Explain charge", files=[source]), "v1")
+        source.write_text("changed = True\n")
+        cache.set(cache.make_key("ns", "explain", "Explain charge", files=[source]), "v2")
+        
+        assert len(cache) == 1
+        assert cache.get_stats()["invalidations"] == 1
+    
+    def test_explicit_invalidation(self, cache, source):
+        """Test dropping answers by path."""
+        cache.set(cache.make_key("ns", "explain", "Explain charge", files=[source]), "answer")
+        
+        assert cache.invalidate([source]) == 1
+        assert len(cache) == 0
+    
+    def test_near_duplicate_reuse(self, cache, source):
+        """Test that similar prompts reuse answers within the same scope."""
+        prompt = "Summarize the responsibilities of the payments module and list its public functions"
+        cache.set(cache.make_key("ns", "summary", prompt, files=[source]), "summary")
+        
+        similar = cache.make_key("ns", "summary", prompt + ".", files=[source])
+        assert cache.get(similar) is None
+        assert cache.get(similar, similarity_threshold=0.8) == "summary"
+        assert cache.get_stats()["similar_hits"] == 1
+        
+        # Different template or files never share answers
+        assert cache.get(cache.make_key("ns", "review", prompt), similarity_threshold=0.8) is None
+        assert cache.get(cache.make_key("ns", "summary", prompt), similarity_threshold=0.8) is None
+        assert cache.get(
+            cache.make_key("ns", "summary", "Write a poem about the sea"), similarity_threshold=0.8
+        ) is None
+    
+    def test_ttl_and_size_limit(self, cache):
+        """Test expiry and eviction of the least recently used answers."""
+        cache.set(cache.make_key("ns", "t", "short lived"), "x", ttl=0.05)
+        time.sleep(0.1)
+        assert cache.get(cache.make_key("ns", "t", "short lived")) is None
+        
+        cache.max_size = 3
+        for i in range(5):
+            cache.set(cache.make_key("ns", "t", f"prompt {i}"), str(i))
+        assert len(cache) == 3
+        assert cache.get(cache.make_key("ns", "t", "prompt 4")) == "4"
+    
+    def test_shared_instance(self, tmp_path):
+        """Test that clients share one cache per database."""
+        assert get_ai_cache(tmp_path / "shared") is get_ai_cache(tmp_path / "shared")
+    
+    def test_stored_by_response_cache_backend(self, tmp_path, source):
+        """Test that answers share the ResponseCache database, compression and eviction."""
+        legacy = tmp_path / "legacy.json"
+        legacy.write_text(json.dumps({"key": "legacy", "value": "old answer", "timestamp": time.time()}))
+        
+        cache = AIResponseCache(tmp_path, max_size=2, compression="zlib", compress_min_size=10)
+        assert not legacy.exists()
+        assert ResponseCache.get(cache, "legacy") == "old answer"
+        
+        cache.set(cache.make_key("ns", "explain", "Explain charge", files=[source]), "charges " * 100)
+        cache.set(cache.make_key("ns", "explain", "Explain refund"), "refunds")
+        stats = cache.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["stored_bytes"] < stats["raw_bytes"]
+        assert cache._conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0] == 2
+        cache.close()
+        
+        reopened = ResponseCache(cache_dir=tmp_path)
+        assert len(reopened) == 2
+        assert (tmp_path / CACHE_DB_NAME).exists()
+        reopened.close()
+
+
+class TestCachedClients:
+    
+    def test_assistant_reuses_answers(self, tmp_path, source):
+        """Test that AIAssistant serves repeated prompts from the cache."""
+        config = Config()
+        config.config.ai.provider = "openai"
+        config.config.ai.model = "gpt-4"
+        config.config.ai.api_key = "test-key"
+        shared = AIResponseCache(persist=False)
+        
+        with patch("velocitytree.ai.get_ai_cache", return_value=shared):
+            assistant = AIAssistant(config)
+        async def slow_complete(messages, system_prompt=None):
+            await asyncio.sleep(0.05)
+            return "analysis"
+        
+        with patch.object(assistant, "_complete", AsyncMock(side_effect=slow_complete)) as complete:
+            first = assistant.analyze_code(source, "security")
+            second = assistant.analyze_code(source, "security")
+            # Concurrent duplicates share one request
+            assert assistant.generate_many(["a", "a", "a"]) == ["analysis"] * 3
+            
+            source.write_text("import os\n")
+            assistant.analyze_code(source, "security")
+        
+        assert first == second
+        assert complete.await_count == 3
+    
+    def test_helper_inputs_must_match_exactly(self):
+        """Test that near-duplicate reuse is opt-in and ignores helper prompts."""
+        config = Config()
+        assert config.config.ai.cache_similarity is None
+        assert ClaudeConfig().cache_similarity is None
+        
+        config.config.ai.provider = "openai"
+        config.config.ai.model = "gpt-4"
+        config.config.ai.api_key = "test-key"
+        config.config.ai.cache_similarity = 0.5
+        code = "\n".join(f"total_{i} = compute(values[{i}]) * factor" for i in range(40))
+        
+        with patch("velocitytree.ai.get_ai_cache", return_value=AIResponseCache(persist=False)):
+            assistant = AIAssistant(config)
+        with patch.object(assistant, "_complete", AsyncMock(side_effect=["go", "rust", "again"])) as complete:
+            assert assistant.translate_code(code, "python", "go") == "go"
+            assert assistant.translate_code(code, "python", "rust") == "rust"
+            assert assistant.translate_code(code + "\nfinal = 1", "python", "go") == "again"
+            assert assistant.translate_code(code, "python", "go") == "go"
+        
+        assert complete.await_count == 3
+    
+    def test_provider_key_ignores_touch_and_context_order(self, source):
+        """Test LocalClaudeProvider cache keys."""
+        with patch.object(LocalClaudeProvider, "_find_claude_cli", return_value=None), \
+                patch.object(LocalClaudeProvider, "_validate_setup"):
+            provider = LocalClaudeProvider(ClaudeConfig(use_cache=False))
+        
+        key = provider._generate_cache_key("Review", {"a": 1, "b": [1, 2]}, [source])
+        os.utime(source, None)
+        again = provider._generate_cache_key("Review", {"b": [1, 2], "a": 1}, [source])
+        
+        assert key.digest == again.digest
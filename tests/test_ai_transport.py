@@ -0,0 +1,140 @@
+"""
+Tests for pooled AI transport and concurrent generation.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from velocitytree.ai import AIAssistant
+from velocitytree.ai_transport import RateLimiter
+from velocitytree.config import Config
+
+
+class FakeOpenAI:
+    """Chat completions server that records concurrency and connections."""
+    
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.requests = []
+        self.peers = set()
+        self.fail_first = 0
+    
+    async def handle(self, request):
+        payload = await request.json()
+        self.requests.append(payload)
+        self.peers.add(request.transport.get_extra_info('peername'))
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            return web.json_response({"error": "slow down"}, status=429, headers={"Retry-After": "0"})
+        
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        prompt = payload["messages"][-1]["content"]
+        return web.json_response({"choices": [{"message": {"content": f"re: {prompt}"}}]})
+
+
+@pytest.fixture
+def server():
+    """Run the fake API on its own event loop thread."""
+    fake = FakeOpenAI()
+    loop = asyncio.new_event_loop()
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", fake.handle)
+    runner = web.AppRunner(app)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    
+    fake.url = f"http://127.0.0.1:{port}/v1"
+    yield fake
+    
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+
+def make_assistant(url, max_concurrency=3):
+    """Create an OpenAI assistant pointed at the fake server."""
+    config = Config()
+    config.config.ai.provider = "openai"
+    config.config.ai.model = "gpt-4"
+    config.config.ai.api_key = "test-key"
+    config.config.ai.base_url = url
+    config.config.ai.max_concurrency = max_concurrency
+    config.config.ai.requests_per_minute = 60000
+    config.config.ai.cache = False
+    return AIAssistant(config)
+
+
+class TestPooledTransport:
+    
+    def test_generate_many_is_concurrent_and_bounded(self, server):
+        """Test fan-out within the provider's concurrency limit."""
+        assistant = make_assistant(server.url, max_concurrency=3)
+        prompts = [f"prompt {i}" for i in range(9)]
+        
+        start = time.time()
+        responses = assistant.generate_many(prompts)
+        elapsed = time.time() - start
+        
+        assert responses == [f"re: {p}" for p in prompts]
+        assert server.max_active == 3
+        assert elapsed < 9 * server.delay
+        # Keep-alive connections are reused across requests
+        assert len(server.peers) <= 3
+    
+    def test_sync_and_async_calls_share_the_session(self, server):
+        """Test that generate works from sync code and foreign event loops."""
+        assistant = make_assistant(server.url)
+        assert assistant.explain_code("x = 1").startswith("re: ")
+        
+        async def from_other_loop():
+            return await asyncio.gather(assistant.generate("a"), assistant.generate("b"))
+        
+        assert asyncio.run(from_other_loop()) == ["re: a", "re: b"]
+        assert assistant.transport is make_assistant(server.url).transport
+    
+    def test_rate_limited_response_is_retried(self, server):
+        """Test that 429 responses are retried."""
+        server.fail_first = 1
+        assistant = make_assistant(server.url)
+        
+        assert assistant.generate_many(["retry me"]) == ["re: retry me"]
+        assert len(server.requests) == 2
+    
+    def test_chat_sends_history_as_messages(self, server, tmp_path, monkeypatch):
+        """Test that chat sends the conversation as separate messages."""
+        monkeypatch.chdir(tmp_path)
+        assistant = make_assistant(server.url)
+        history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+        
+        assert assistant.chat("next", history) == "re: next"
+        roles = [m["role"] for m in server.requests[-1]["messages"]]
+        assert roles[-3:] == ["user", "assistant", "user"]
+
+
+class TestRateLimiter:
+    
+    def test_token_bucket(self):
+        """Test that requests beyond the burst are spaced out."""
+        async def acquire_all():
+            limiter = RateLimiter(requests_per_minute=600, burst=2)
+            start = time.monotonic()
+            for _ in range(4):
+                await limiter.acquire()
+            return time.monotonic() - start
+        
+        # Two immediately, then one every 0.1s
+        assert 0.15 < asyncio.run(acquire_all()) < 0.5
@@ -0,0 +1,159 @@
+"""Test the persistent analysis cache."""
+
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from velocitytree.code_analysis import CodeAnalyzer
+from velocitytree.code_analysis.cache import AnalysisCache, content_hash
+
+
+SAMPLE_CODE = '''
+def add(x: int, y: int) -> int:
+    """Add two numbers."""
+    return x + y
+'''
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Path for the cache database."""
+    return tmp_path / ".velocitytree" / "analysis_cache.db"
+
+
+class TestAnalysisCache:
+    """Test the AnalysisCache class."""
+
+    def test_hit_survives_new_analyzer(self, tmp_path, cache_path):
+        """Test that results are reused by a fresh analyzer instance."""
+        source = tmp_path / "module.py"
+        source.write_text(SAMPLE_CODE)
+
+        first = CodeAnalyzer({'cache_path': cache_path})
+        result1 = first.analyze_file(source)
+        assert first.get_cache_stats()['writes'] == 1
+
+        second = CodeAnalyzer({'cache_path': cache_path})
+        with patch.object(second, '_analyze_content') as mock_analyze:
+            result2 = second.analyze_file(source)
+
+        mock_analyze.assert_not_called()
+        assert result2.file_path == result1.file_path
+        assert [f.name for f in result2.functions] == ["add"]
+        assert second.get_cache_stats()['hits'] == 1
+
+    def test_content_change_invalidates(self, tmp_path, cache_path):
+        """Test that edited files are re-analyzed."""
+        source = tmp_path / "module.py"
+        source.write_text(SAMPLE_CODE)
+
+        analyzer = CodeAnalyzer({'cache_path': cache_path})
+        analyzer.analyze_file(source)
+
+        source.write_text(SAMPLE_CODE + "\ndef sub(x, y):\n    return x - y\n")
+        result = CodeAnalyzer({'cache_path': cache_path}).analyze_file(source)
+
+        assert [f.name for f in result.functions] == ["add", "sub"]
+
+    def test_version_mismatch_is_miss(self, tmp_path, cache_path):
+        """Test that entries from another analyzer version are ignored."""
+        source = tmp_path / "module.py"
+        source.write_text(SAMPLE_CODE)
+        result = CodeAnalyzer().analyze_file(source)
+        digest = content_hash(SAMPLE_CODE)
+
+        AnalysisCache(cache_path, version="old").set(str(source), digest, result)
+        cache = AnalysisCache(cache_path, version="new")
+
+        assert cache.get(str(source), digest) is None
+        assert cache.evict() == 1
+        assert cache.get_stats()['entries'] == 0
+
+    def test_eviction_by_age_and_size(self, tmp_path, cache_path):
+        """Test eviction of stale and least recently used entries."""
+        source = tmp_path / "module.py"
+        source.write_text(SAMPLE_CODE)
+        result = CodeAnalyzer().analyze_file(source)
+
+        cache = AnalysisCache(cache_path, max_age=3600)
+        for i in range(3):
+            cache.set(f"file{i}.py", "hash", result)
+        cache._conn.execute(
+            "UPDATE analysis_cache SET last_accessed = ? WHERE path = 'file0.py'",
+            (time.time() - 7200,)
+        )
+        cache._conn.commit()
+
+        assert cache.evict() == 1
+
+        entry_size = cache.get_stats()['size_bytes'] // 2
+        cache.max_size = entry_size
+        assert cache.evict() == 1
+        assert cache.get_stats()['entries'] == 1
+
+    def test_directory_rerun_uses_cache(self, tmp_path, cache_path):
+        """Test that unchanged files are not re-analyzed on a second run."""
+        project = tmp_path / "project"
+        project.mkdir()
+        for i in range(3):
+            (project / f"file{i}.py").write_text(SAMPLE_CODE)
+
+        CodeAnalyzer({'cache_path': cache_path}).analyze_directory(project)
+
+        (project / "file1.py").write_text(SAMPLE_CODE + "\nX = 1\n")
+        analyzer = CodeAnalyzer({'cache_path': cache_path})
+        result = analyzer.analyze_directory(project)
+        stats = analyzer.get_cache_stats()
+
+        assert result.files_analyzed == 3
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+
+    def test_entries_round_trip_as_json(self, tmp_path, cache_path):
+        """Test that cached results match the originals field for field."""
+        from dataclasses import asdict
+
+        source = tmp_path / "module.py"
+        source.write_text(SAMPLE_CODE + "\nclass Calculator:\n    def add(self, x, y):\n        return x + y\n")
+        result = CodeAnalyzer().analyze_file(source)
+
+        cache = AnalysisCache(cache_path)
+        cache.set(str(source), "hash", result)
+
+        assert asdict(cache.get(str(source), "hash")) == asdict(result)
+
+    def test_pickled_entries_are_not_loaded(self, cache_path):
+        """Test that a crafted pickle in the database is never unpickled."""
+        import pickle
+        import zlib
+
+        cache = AnalysisCache(cache_path)
+        payload = zlib.compress(pickle.dumps(SystemExit("unpickled")))
+        cache._conn.execute(
+            "INSERT INTO analysis_cache VALUES ('evil.py', 'hash', ?, ?, 1, 0, 0)",
+            (cache.version, payload)
+        )
+        cache._conn.commit()
+
+        assert cache.get('evil.py', 'hash') is None
+        assert cache.get_stats()['entries'] == 0
+
+    def test_hits_do_not_write(self, tmp_path, cache_path):
+        """Test that lookups only read, and access times are written on eviction."""
+        source = tmp_path / "module.py"
+        source.write_text(SAMPLE_CODE)
+        result = CodeAnalyzer().analyze_file(source)
+
+        cache = AnalysisCache(cache_path, max_age=3600)
+        cache.set("file.py", "hash", result)
+        cache._conn.execute("UPDATE analysis_cache SET last_accessed = ?", (time.time() - 7200,))
+        cache._conn.commit()
+
+        changes = cache._conn.total_changes
+        assert cache.get("file.py", "hash") is not None
+        assert cache._conn.total_changes == changes
+
+        assert cache.evict() == 0
+        assert cache.get_stats()['entries'] == 1
@@ -303,6 +303,35 @@ class TestAnalyzeCommand:
             assert "Files analyzed: 10" in result.output
             assert "Total lines: 1000" in result.output
     
+    def test_directory_analysis_with_jobs(self, runner):
+        """Test that --jobs is passed through to directory analysis."""
+        with patch('velocitytree.code_analysis.analyzer.CodeAnalyzer') as mock_analyzer:
+            mock_result = Mock()
+            mock_result.files_analyzed = 2
+            mock_result.total_lines = 10
+            mock_result.all_issues = []
+            
+            mock_analyzer.return_value.analyze_directory.return_value = mock_result
+            
+            result = runner.invoke(cli, ['code', 'analyze', '.', '--jobs', '4'])
+            
+            assert result.exit_code == 0
+            _, kwargs = mock_analyzer.return_value.analyze_directory.call_args
+            assert kwargs['jobs'] == 4
+            assert callable(kwargs['progress_callback'])
+    
+    def test_stream_rejects_report_formats(self, runner):
+        """Test that --stream cannot be combined with report formats."""
+        with patch('velocitytree.code_analysis.analyzer.CodeAnalyzer') as mock_analyzer:
+            for format in ['report', 'html']:
+                result = runner.invoke(cli, ['code', 'analyze', '.', '--stream', 'out.jsonl',
+                                             '--format', format])
+                
+                assert result.exit_code == 2
+                assert "--stream cannot be combined" in result.output
+            
+            mock_analyzer.return_value.analyze_directory_streaming.assert_not_called()
+    
     def test_severity_filter(self, runner):
         """Test severity filtering."""
         with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
@@ -9,9 +9,27 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 import pytest
 
+from velocitytree.code_analysis import CodeMetrics
 from velocitytree.monitoring import BackgroundMonitor, MonitoringConfig, MonitoringStatus
 
 
+def mock_module(complexity, maintainability, documented=1, undocumented=0):
+    """Create a module analysis mock with the given metrics and functions."""
+    analysis = Mock()
+    analysis.metrics = CodeMetrics(
+        lines_of_code=10,
+        lines_of_comments=0,
+        cyclomatic_complexity=complexity,
+        cognitive_complexity=0,
+        maintainability_index=maintainability,
+        test_coverage=None
+    )
+    analysis.functions = [Mock(docstring="Doc.")] * documented + [Mock(docstring=None)] * undocumented
+    analysis.classes = []
+    analysis.issues = []
+    return analysis
+
+
 class TestBackgroundMonitor:
     """Test cases for BackgroundMonitor."""
     
@@ -70,14 +88,11 @@ class TestBackgroundMonitor:
     @patch('velocitytree.monitoring.monitor.CodeAnalyzer')
     def test_initialize_baselines(self, mock_analyzer, tmp_path):
         """Test baseline initialization."""
-        # Setup mocks
-        mock_analysis = Mock()
-        mock_analysis.metrics.average_complexity = 5.0
-        mock_analysis.metrics.maintainability_index = 80.0
-        mock_analysis.metrics.test_coverage = 75.0
-        mock_analysis.metrics.documentation_coverage = 60.0
+        (tmp_path / "a.py").write_text("def a(): pass")
+        (tmp_path / "notes.txt").write_text("notes")
         
-        mock_analyzer.return_value.analyze_project.return_value = mock_analysis
+        # Setup mocks
+        mock_analyzer.return_value.analyze_file.return_value = mock_module(5.0, 80.0, 3, 2)
         
         monitor = BackgroundMonitor(tmp_path)
         monitor._initialize_baselines()
@@ -85,6 +100,9 @@ class TestBackgroundMonitor:
         assert 'code_metrics' in monitor.baselines
         assert monitor.baselines['code_metrics']['complexity'] == 5.0
         assert monitor.baselines['code_metrics']['maintainability'] == 80.0
+        assert monitor.baselines['code_metrics']['documentation_coverage'] == 60.0
+        assert monitor.known_files == {tmp_path / "a.py", tmp_path / "notes.txt"}
+        mock_analyzer.return_value.analyze_file.assert_called_once_with(tmp_path / "a.py")
     
     def test_check_git_state(self, tmp_path):
         """Test git state monitoring."""
@@ -112,6 +130,9 @@ class TestBackgroundMonitor:
     @patch('velocitytree.monitoring.monitor.CodeAnalyzer')
     def test_check_code_quality(self, mock_analyzer, tmp_path):
         """Test code quality monitoring."""
+        code_file = tmp_path / "test.py"
+        code_file.write_text("def test(): pass")
+        
         # Setup baseline
         monitor = BackgroundMonitor(tmp_path)
         monitor.baselines['code_metrics'] = {
@@ -122,16 +143,12 @@ class TestBackgroundMonitor:
         }
         
         # Setup mock for degraded metrics
-        mock_analysis = Mock()
-        mock_analysis.metrics.average_complexity = 6.0  # 20% increase
-        mock_analysis.metrics.maintainability_index = 70.0  # 12.5% decrease
-        mock_analysis.metrics.test_coverage = 65.0  # 10% decrease
-        mock_analysis.metrics.documentation_coverage = 60.0
-        mock_analysis.security_issues = []
-        
-        mock_analyzer.return_value.analyze_project.return_value = mock_analysis
+        mock_analyzer.return_value.analyze_file.return_value = mock_module(
+            6.0,  # 20% increase
+            70.0  # 12.5% decrease
+        )
         
-        monitor._check_code_quality()
+        monitor._check_code_quality({code_file})
         
         # Should detect complexity increase, maintainability decrease, and coverage decrease
         assert len(monitor.issues) >= 3
@@ -139,14 +156,14 @@ class TestBackgroundMonitor:
         assert any(issue['type'] == 'code_maintainability_decrease' for issue in monitor.issues)
         assert any(issue['type'] == 'test_coverage_decrease' for issue in monitor.issues)
     
-    @patch('velocitytree.monitoring.monitor.psutil')
-    def test_measure_performance(self, mock_psutil, tmp_path):
+    @patch('psutil.Process')
+    def test_measure_performance(self, mock_process_class, tmp_path):
         """Test performance measurement."""
         # Setup mocks
         mock_process = Mock()
         mock_process.memory_info.return_value.rss = 1024 * 1024 * 100  # 100 MB
         mock_process.cpu_percent.return_value = 25.0
-        mock_psutil.Process.return_value = mock_process
+        mock_process_class.return_value = mock_process
         
         monitor = BackgroundMonitor(tmp_path)
         perf = monitor._measure_performance()
@@ -155,6 +172,100 @@ class TestBackgroundMonitor:
         assert perf['cpu_percent'] == 25.0
         assert 'file_io_time' in perf
     
+    @patch('velocitytree.monitoring.monitor.CodeAnalyzer')
+    def test_check_only_analyzes_changed_files(self, mock_analyzer, tmp_path):
+        """Test that checks re-analyze dirty files and reuse cached metrics."""
+        for name in ("a.py", "b.py", "c.py"):
+            (tmp_path / name).write_text("def f(): pass")
+        analyze_file = mock_analyzer.return_value.analyze_file
+        analyze_file.return_value = mock_module(2.0, 90.0)
+        
+        monitor = BackgroundMonitor(tmp_path)
+        monitor._initialize_baselines()
+        assert analyze_file.call_count == 3
+        
+        analyze_file.reset_mock()
+        analyze_file.return_value = mock_module(5.0, 90.0)
+        monitor.mark_dirty(tmp_path / "b.py")
+        monitor._check_code_quality()
+        
+        analyze_file.assert_called_once_with(tmp_path / "b.py")
+        assert monitor._project_code_metrics()['complexity'] == 3.0
+        
+        # Nothing changed since
+        analyze_file.reset_mock()
+        monitor._check_code_quality()
+        analyze_file.assert_not_called()
+    
+    @patch('velocitytree.monitoring.monitor.CodeAnalyzer')
+    def test_deleted_files_leave_metrics(self, mock_analyzer, tmp_path):
+        """Test that deleted files are dropped from cached metrics and known files."""
+        (tmp_path / "a.py").write_text("def a(): pass")
+        (tmp_path / "b.py").write_text("def b(): pass")
+        mock_analyzer.return_value.analyze_file.return_value = mock_module(2.0, 90.0)
+        
+        monitor = BackgroundMonitor(tmp_path)
+        monitor._initialize_baselines()
+        
+        (tmp_path / "b.py").unlink()
+        monitor.mark_dirty(tmp_path / "b.py")
+        monitor._check_code_quality()
+        
+        assert set(monitor.file_metrics) == {tmp_path / "a.py"}
+        assert monitor.known_files == {tmp_path / "a.py"}
+    
+    def test_mark_dirty_skips_ignored_files(self, tmp_path):
+        """Test that ignored and skipped directories never become dirty."""
+        (tmp_path / ".gitignore").write_text("build/\n")
+        monitor = BackgroundMonitor(tmp_path)
+        
+        monitor.mark_dirty(tmp_path / "build" / "out.py")
+        monitor.mark_dirty(tmp_path / "__pycache__" / "a.pyc")
+        monitor.mark_dirty(tmp_path / "src" / "a.py")
+        
+        assert monitor.dirty_files == {tmp_path / "src" / "a.py"}
+    
+    def test_file_events_mark_files_dirty(self, tmp_path):
+        """Test that file system events feed the dirty set while running."""
+        monitor = BackgroundMonitor(tmp_path, MonitoringConfig(check_interval=60))
+        
+        with patch.object(monitor, '_perform_check'):
+            monitor.start()
+            try:
+                (tmp_path / "new.py").write_text("def new(): pass")
+                deadline = time.time() + 5
+                while tmp_path / "new.py" not in monitor.dirty_files and time.time() < deadline:
+                    time.sleep(0.05)
+            finally:
+                monitor.stop()
+        
+        assert tmp_path / "new.py" in monitor.dirty_files
+        assert monitor.observer is None
+    
+    def test_git_changes_since_last_checked_commit(self, tmp_path):
+        """Test that files changed in new commits are collected from git."""
+        import git
+        
+        repo = git.Repo.init(tmp_path)
+        with repo.config_writer() as writer:
+            writer.set_value("user", "name", "Test")
+            writer.set_value("user", "email", "test@example.com")
+        (tmp_path / "a.py").write_text("a = 1")
+        (tmp_path / "b.py").write_text("b = 1")
+        repo.index.add(["a.py", "b.py"])
+        repo.index.commit("Initial")
+        
+        monitor = BackgroundMonitor(tmp_path)
+        monitor.last_checked_commit = repo.head.commit.hexsha
+        
+        (tmp_path / "b.py").write_text("b = 2")
+        repo.index.add(["b.py"])
+        repo.index.commit("Change b")
+        
+        assert monitor._collect_changed_files() == {tmp_path / "b.py"}
+        assert monitor.last_checked_commit == repo.head.commit.hexsha
+        assert monitor._collect_changed_files() == set()
+    
     def test_add_issue(self, tmp_path):
         """Test adding issues."""
         monitor = BackgroundMonitor(tmp_path)
@@ -0,0 +1,149 @@
+"""Tests for concurrent Claude batch queries."""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from velocitytree.claude_integration import LocalClaudeProvider, ClaudeConfig, BatchResult
+
+
+FAKE_CLI = '''#!{python}
+import os, sys, time
+if sys.argv[1] in ("auth", "version"):
+    sys.exit(0)
+log = os.environ["FAKE_CLAUDE_LOG"]
+with open(log, "a") as f:
+    f.write(sys.argv[-1] + "\\n")
+prompt = sys.argv[-1]
+if prompt.startswith("flaky"):
+    with open(log) as f:
+        if sum(1 for line in f if line.strip() == prompt) < 2:
+            sys.exit("temporary failure")
+if prompt == "broken":
+    sys.exit("permanent failure")
+with open(log + ".pids", "a") as f:
+    f.write(str(os.getpid()) + "\\n")
+time.sleep(0.3)
+print("answer: " + prompt)
+'''
+
+
+@pytest.fixture
+def fake_cli(tmp_path, monkeypatch):
+    """Put a fake claude executable on PATH that logs every invocation."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    cli = bin_dir / "claude"
+    cli.write_text(FAKE_CLI.format(python=sys.executable))
+    cli.chmod(0o755)
+    log = tmp_path / "calls.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_CLAUDE_LOG", str(log))
+    return log
+
+
+@pytest.fixture
+def provider(fake_cli):
+    """Provider with fast retries and no response cache."""
+    return LocalClaudeProvider(ClaudeConfig(use_cache=False, retry_delay=0.01, max_concurrency=4))
+
+
+def calls(log):
+    """Prompts the fake CLI was invoked with."""
+    return log.read_text().splitlines()
+
+
+def running(log):
+    """Fake CLI processes that are still alive."""
+    pids = log.parent / (log.name + ".pids")
+    alive = []
+    for pid in pids.read_text().split():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            continue
+        alive.append(int(pid))
+    return alive
+
+
+class TestBatchQueries:
+    """Test query_batch and aquery."""
+    
+    def test_batch_runs_concurrently(self, provider, fake_cli):
+        """Test that requests overlap instead of running one by one."""
+        prompts = [f"prompt{i}" for i in range(8)]
+        start = time.time()
+        results = list(provider.query_batch(prompts))
+        elapsed = time.time() - start
+        
+        assert sorted(r.index for r in results) == list(range(8))
+        assert all(r.ok and r.response == f"answer: {r.prompt}" for r in results)
+        assert elapsed < 8 * 0.3
+        assert sorted(calls(fake_cli)) == sorted(prompts)
+    
+    def test_identical_requests_share_one_process(self, provider, fake_cli):
+        """Test single-flight deduplication of in-flight requests."""
+        results = list(provider.query_batch(["same"] * 5 + [{"prompt": "other"}]))
+        
+        assert len(results) == 6
+        assert all(r.ok for r in results)
+        assert calls(fake_cli).count("same") == 1
+    
+    def test_retry_and_errors(self, provider, fake_cli):
+        """Test that failures are retried and errors reported per request."""
+        results = {r.prompt: r for r in provider.query_batch(["flaky1", "broken", "fine"])}
+        
+        assert results["flaky1"].response == "answer: flaky1"
+        assert calls(fake_cli).count("flaky1") == 2
+        assert isinstance(results["broken"].error, RuntimeError)
+        assert calls(fake_cli).count("broken") == provider.config.retry_attempts
+        assert results["fine"].ok
+    
+    def test_results_stream_in_completion_order(self, provider):
+        """Test that the first result arrives before the batch finishes."""
+        results = provider.query_batch([f"prompt{i}" for i in range(8)], max_concurrency=2)
+        start = time.time()
+        first = next(results)
+        first_elapsed = time.time() - start
+        results.close()
+        
+        assert isinstance(first, BatchResult)
+        assert first_elapsed < 4 * 0.3
+    
+    def test_aquery(self, provider, fake_cli):
+        """Test the async query with a shared in-flight request."""
+        async def run():
+            return await asyncio.gather(*(provider.aquery("async prompt") for _ in range(3)))
+        
+        assert asyncio.run(run()) == ["answer: async prompt"] * 3
+        assert calls(fake_cli) == ["async prompt"]
+    
+    def test_closing_batch_stops_processes(self, provider, fake_cli):
+        """Test that closing a batch early kills its running CLI processes."""
+        async def run():
+            batch = provider.aquery_batch([f"prompt{i}" for i in range(4)], max_concurrency=2)
+            first = await batch.__anext__()
+            await batch.aclose()
+            return first, running(fake_cli)
+        
+        first, alive = asyncio.run(run())
+        
+        assert first.ok
+        assert len(calls(fake_cli)) >= 2
+        assert alive == []
+    
+    def test_cancelled_waiter_keeps_shared_request(self, provider, fake_cli):
+        """Test that a shared request survives while another caller waits."""
+        async def run():
+            cancelled = asyncio.ensure_future(provider.aquery("shared"))
+            waiting = asyncio.ensure_future(provider.aquery("shared"))
+            await asyncio.sleep(0.1)
+            cancelled.cancel()
+            return await waiting
+        
+        assert asyncio.run(run()) == "answer: shared"
+        assert calls(fake_cli) == ["shared"]
@@ -0,0 +1,81 @@
+"""Startup performance tests for the command-line interface."""
+
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+
+# Cold start budget for `vtree --help`, generous enough for slow CI machines
+STARTUP_BUDGET = 1.0
+
+# Modules that only specific commands need
+HEAVY_MODULES = [
+    'aiohttp', 'anthropic', 'openai', 'flask', 'git', 'networkx', 'numpy',
+    'pydantic', 'prompt_toolkit', 'watchdog', 'velocitytree.ai',
+    'velocitytree.config', 'velocitytree.continuous_eval', 'velocitytree.web_server',
+]
+
+HELP_SCRIPT = """
+import json, sys
+from velocitytree.cli import main
+sys.argv = ['vtree'] + sys.argv[1:]
+try:
+    main()
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def run_cli(*args, tmp_path):
+    """Run the CLI in a fresh interpreter and return its output and loaded modules."""
+    result = subprocess.run(
+        [sys.executable, '-c', HELP_SCRIPT, *args],
+        capture_output=True,
+        text=True,
+        # An existing config directory skips the first-run wizard
+        env={'HOME': str(tmp_path), 'PATH': '', 'PYTHONPATH': ':'.join(sys.path)},
+        timeout=60
+    )
+    return result.stdout, set(json.loads(result.stderr.strip().splitlines()[-1]))
+
+
+@pytest.fixture
+def home(tmp_path):
+    """Home directory with an existing Velocitytree config directory."""
+    (tmp_path / '.velocitytree').mkdir()
+    return tmp_path
+
+
+class TestCLIStartup:
+    """Test that starting the CLI stays cheap."""
+    
+    def test_help_does_not_import_heavy_modules(self, home):
+        """Test that --help only loads the CLI itself."""
+        output, modules = run_cli('--help', tmp_path=home)
+        
+        assert 'onboard' in output
+        assert 'flatten' in output
+        assert sorted(m for m in HEAVY_MODULES if m in modules) == []
+    
+    def test_group_help_does_not_import_heavy_modules(self, home):
+        """Test that help for a command group loads no more than the config."""
+        output, modules = run_cli('code', '--help', tmp_path=home)
+        
+        # The root group's callback loads the configuration for every subcommand
+        expected = {'pydantic', 'velocitytree.config'}
+        assert 'analyze' in output
+        assert sorted(m for m in HEAVY_MODULES if m in modules and m not in expected) == []
+    
+    def test_help_cold_start_budget(self, home):
+        """Test the wall clock time of `vtree --help` in a new interpreter."""
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            run_cli('--help', tmp_path=home)
+            timings.append(time.perf_counter() - start)
+        
+        assert min(timings) < STARTUP_BUDGET, f"vtree --help took {min(timings):.2f}s"
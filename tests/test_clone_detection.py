@@ -0,0 +1,206 @@
+"""Test repository-wide clone detection."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from velocitytree.code_analysis import CodeAnalyzer
+from velocitytree.code_analysis.clones import (
+    CloneIndex,
+    MinHasher,
+    band_keys,
+    candidate_pairs,
+    estimate_similarity,
+    normalize_tokens,
+    shingle_hashes
+)
+
+
+ORIGINAL = '''
+def summarize_orders(orders, tax_rate):
+    """Summarize a list of orders."""
+    total = 0
+    count = 0
+    for order in orders:
+        if order.status == "cancelled":
+            continue
+        subtotal = order.quantity * order.price
+        total += subtotal + subtotal * tax_rate
+        count += 1
+    average = total / count if count else 0
+    return {"total": total, "count": count, "average": average}
+'''
+
+# Same body with renamed identifiers, a changed literal and a comment
+RENAMED = '''
+def invoice_totals(invoices, vat):
+    """Copied from orders.py."""
+    # totals per invoice
+    amount = 0
+    n = 0
+    for inv in invoices:
+        if inv.status == "void":
+            continue
+        line = inv.quantity * inv.price
+        amount += line + line * vat
+        n += 1
+    mean = amount / n if n else 0
+    return {"total": amount, "count": n, "average": mean}
+'''
+
+UNRELATED = '''
+def parse_config(path):
+    with open(path) as handle:
+        lines = [line.strip() for line in handle if line.strip()]
+    settings = {}
+    for line in lines:
+        if line.startswith("#") or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        settings[key.strip()] = value.strip()
+    return settings
+'''
+
+
+def fingerprint(code):
+    """Compute the MinHash signature of a code snippet."""
+    return MinHasher().signature(shingle_hashes(normalize_tokens(code)))
+
+
+class TestMinHash:
+    """Test normalization and MinHash signatures."""
+
+    def test_normalization_ignores_names_and_comments(self):
+        """Test that renamed copies normalize to the same tokens."""
+        assert normalize_tokens(ORIGINAL) == normalize_tokens(RENAMED)
+
+    def test_similarity_estimate(self):
+        """Test that clones score high and unrelated code scores low."""
+        assert estimate_similarity(fingerprint(ORIGINAL), fingerprint(RENAMED)) == 1.0
+        assert estimate_similarity(fingerprint(ORIGINAL), fingerprint(UNRELATED)) < 0.3
+
+    def test_candidate_pairs_scale(self):
+        """Test that LSH finds a planted clone among many functions."""
+        bodies = [
+            f"def f{i}(x):\n    return x * {i} + call_{i}(x, 'v{i}') - other_{i}.attr_{i}\n"
+            for i in range(2000)
+        ]
+        bodies[1500] = ORIGINAL
+        bodies[30] = RENAMED
+
+        hasher = MinHasher()
+        start = time.time()
+        keys = []
+        for i, body in enumerate(bodies):
+            if i in (30, 1500):
+                tokens = normalize_tokens(body)
+            else:
+                # Keep identifiers so the generated functions differ
+                tokens = body.replace('(', ' ( ').split()
+            keys.append(band_keys(hasher.signature(shingle_hashes(tokens))))
+        pairs = candidate_pairs(keys)
+
+        assert time.time() - start < 10
+        assert (30, 1500) in pairs
+        assert len(pairs) < 100
+
+
+class TestCloneIndex:
+    """Test the persistent clone index."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        """Create a project with a function copied across files."""
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "orders.py").write_text(ORIGINAL)
+        (project / "invoices.py").write_text(RENAMED)
+        (project / "config.py").write_text(UNRELATED)
+        return project
+
+    def test_index_finds_cross_file_clone(self, tmp_path):
+        """Test finding a clone pair through the index."""
+        index = CloneIndex(tmp_path / "clones.db")
+        index.update_file("a.py", "h1", [("summarize_orders", 2, 14, ORIGINAL)])
+        index.update_file("b.py", "h2", [("invoice_totals", 2, 14, RENAMED)])
+        index.update_file("c.py", "h3", [("parse_config", 2, 12, UNRELATED)])
+
+        clones = index.find_clones()
+
+        assert len(clones) == 1
+        names = {clones[0].first.name, clones[0].second.name}
+        assert names == {"summarize_orders", "invoice_totals"}
+        assert clones[0].similarity >= 0.8
+
+    def test_index_persists_and_updates_incrementally(self, tmp_path):
+        """Test that unchanged files are skipped after reopening the index."""
+        db_path = tmp_path / "clones.db"
+        CloneIndex(db_path).update_file("a.py", "h1", [("summarize_orders", 2, 14, ORIGINAL)])
+
+        index = CloneIndex(db_path)
+        assert index.is_current("a.py", "h1")
+        assert index.update_file("a.py", "h1", [("summarize_orders", 2, 14, ORIGINAL)]) == 0
+        assert index.get_stats()["files_skipped"] == 1
+
+        index.update_file("b.py", "h2", [("invoice_totals", 2, 14, RENAMED)])
+        assert len(index.find_clones()) == 1
+
+        index.remove_file("b.py")
+        assert index.find_clones() == []
+        assert index.get_stats()["functions"] == 1
+
+    def test_analyze_directory_reports_clones(self, project, tmp_path):
+        """Test that cross-file clones flow into all_patterns."""
+        analyzer = CodeAnalyzer({'clone_index_path': tmp_path / "clones.db"})
+        result = analyzer.analyze_directory(project)
+
+        clones = [
+            p for p in result.all_patterns
+            if p.metadata.get("scope") == "cross_file"
+        ]
+        assert len(clones) == 1
+        assert clones[0].name == "Duplicate Code"
+        files = {clones[0].location.file_path, clones[0].metadata["duplicate_location"]["file"]}
+        assert files == {str(project / "orders.py"), str(project / "invoices.py")}
+
+    def test_rerun_only_fingerprints_changed_files(self, project, tmp_path):
+        """Test that a second run re-indexes only edited files."""
+        config = {'clone_index_path': tmp_path / "clones.db"}
+        CodeAnalyzer(config).analyze_directory(project)
+
+        (project / "invoices.py").unlink()
+        with patch("velocitytree.code_analysis.clones.normalize_tokens",
+                   wraps=normalize_tokens) as mock_normalize:
+            result = CodeAnalyzer(config).analyze_directory(project)
+
+        mock_normalize.assert_not_called()
+        assert not any(p.metadata.get("scope") == "cross_file" for p in result.all_patterns)
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_fingerprints_come_from_analyzed_source(self, project, tmp_path, jobs):
+        """Test that files are not read again to fingerprint them."""
+        config = {'clone_index_path': tmp_path / "clones.db", 'chunk_size': 1}
+        with patch("velocitytree.code_analysis.analyzer.ParsedUnit.from_file",
+                   side_effect=AssertionError("file read again")):
+            result = CodeAnalyzer(config).analyze_directory(project, jobs=jobs)
+
+        assert any(p.metadata.get("scope") == "cross_file" for p in result.all_patterns)
+
+    def test_index_persists_under_directory_by_default(self, project):
+        """Test that the default index is stored in the analyzed directory."""
+        CodeAnalyzer().analyze_directory(project)
+        assert (project / ".velocitytree" / "clone_index.db").exists()
+
+        with patch("velocitytree.code_analysis.clones.normalize_tokens",
+                   wraps=normalize_tokens) as mock_normalize:
+            result = CodeAnalyzer().analyze_directory(project)
+
+        mock_normalize.assert_not_called()
+        assert any(p.metadata.get("scope") == "cross_file" for p in result.all_patterns)
+
+    def test_clone_detection_can_be_disabled(self, project):
+        """Test the clone_detection setting."""
+        result = CodeAnalyzer({'clone_detection': False}).analyze_directory(project)
+
+        assert not any(p.metadata.get("scope") == "cross_file" for p in result.all_patterns)
@@ -211,6 +211,29 @@ def long_function(data: List[int]) -> int:
             assert result.language_breakdown[LanguageSupport.PYTHON] == 3
             assert len(result.modules) == 3
     
+    def test_analyze_directory_parallel(self, analyzer, sample_python_code):
+        """Test that parallel analysis matches the serial result order."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            
+            for i in range(6):
+                (temp_path / f"file{i}.py").write_text(sample_python_code)
+            (temp_path / "broken.py").write_text("def broken(\n")
+            
+            serial = analyzer.analyze_directory(temp_path)
+            
+            progress = []
+            parallel = CodeAnalyzer({'chunk_size': 2}).analyze_directory(
+                temp_path,
+                jobs=2,
+                progress_callback=lambda done, total: progress.append((done, total))
+            )
+            
+            assert parallel.files_analyzed == serial.files_analyzed
+            assert [m.file_path for m in parallel.modules] == [m.file_path for m in serial.modules]
+            assert [i.rule_id for i in parallel.all_issues] == [i.rule_id for i in serial.all_issues]
+            assert progress[-1] == (7, 7)
+    
     def test_cache_functionality(self, analyzer, temp_python_file):
         """Test that caching works correctly."""
         # First analysis
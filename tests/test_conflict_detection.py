@@ -0,0 +1,134 @@
+"""
+Tests for bucketed conflict detection.
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from velocitytree.workflow_memory.conflict_detector import ConflictDetector
+from velocitytree.workflow_memory.memory_store import DecisionType, WorkflowDecision
+
+
+class InMemoryStore:
+    """Minimal stand-in for MemoryStore holding decisions in a list."""
+    
+    def __init__(self, decisions):
+        self.decisions = decisions
+        self.by_id = {d.id: d for d in decisions}
+    
+    def get_decisions(self, decision_type=None, project_id=None, start_date=None, **kwargs):
+        return [
+            d for d in self.decisions
+            if (decision_type is None or d.decision_type == decision_type)
+            and (project_id is None or d.project_id == project_id)
+            and (start_date is None or d.timestamp >= start_date)
+        ]
+    
+    def get_decision(self, decision_id):
+        return self.by_id.get(decision_id)
+
+
+def random_decisions(count, seed=0, link_ids=None, spread=1):
+    """Decisions whose contexts, resources, entities and links overlap.
+    
+    Larger spreads draw entities, resources and context values from
+    proportionally more distinct values, so that overlaps get rarer.
+    """
+    rng = random.Random(seed)
+    values = ["on", "off", "enable cache", "disable cache", 1, -1, True, False, ["x", "y"]]
+    decisions = []
+    for i in range(count):
+        context = {
+            f"key{k}": rng.choice(values) if rng.random() < 1 / spread else f"value{rng.randrange(10 * spread)}"
+            for k in rng.sample(range(6), rng.randint(0, 4))
+        }
+        if rng.random() < 0.3:
+            context['name'] = f"service{rng.randrange(20 * spread)}"
+        if rng.random() < 0.3:
+            context['resources'] = [f"host{rng.randrange(30 * spread)}" for _ in range(rng.randint(1, 2))]
+        if rng.random() < 0.2:
+            context['state'] = f"state{rng.randrange(2 * spread)}"
+        
+        candidates = link_ids if link_ids is not None else [d.id for d in decisions[-20:]]
+        decision = WorkflowDecision(
+            id=f"d{seed}-{i}",
+            timestamp=datetime.now() - timedelta(minutes=rng.randrange(1000)),
+            decision_type=DecisionType.ARCHITECTURE,
+            context=context,
+            decision=rng.choice(["Keep it", "Remove the cache", "Scale up"]),
+            outcome=rng.choice([None, "success", "failed badly", "conflict found"]),
+            confidence=rng.choice([0.1, 0.5, 0.95]),
+            precedents=rng.sample(candidates, min(len(candidates), rng.randint(0, 2)))
+        )
+        decisions.append(decision)
+    return decisions
+
+
+def all_pairs(detector, decisions):
+    """Reference result comparing every pair with every rule."""
+    conflicts = []
+    for i, decision1 in enumerate(decisions):
+        for decision2 in decisions[i + 1:]:
+            for check_func in detector.conflict_rules.values():
+                conflict = check_func(decision1, decision2)
+                if conflict and conflict.severity >= detector.severity_threshold:
+                    conflicts.append(conflict.id)
+    return conflicts
+
+
+class TestBucketedConflictDetection:
+    
+    def test_consistency_matches_all_pairs(self):
+        """Test that bucketing finds exactly the conflicts of the full comparison."""
+        decisions = random_decisions(400)
+        detector = ConflictDetector(InMemoryStore(decisions), precedent_engine=object())
+        
+        expected = all_pairs(detector, decisions)
+        report = detector.check_consistency()
+        
+        assert expected
+        assert report['total_conflicts'] == len(expected)
+    
+    def test_batch_matches_single_checks(self):
+        """Test that the batch API agrees with one check per decision."""
+        existing = random_decisions(300, seed=1)
+        new = random_decisions(50, seed=2, link_ids=[d.id for d in existing])
+        detector = ConflictDetector(InMemoryStore(existing), precedent_engine=object())
+        
+        batch = detector.detect_conflicts_batch(new)
+        
+        for decision in new:
+            expected = [
+                conflict.id
+                for existing_decision in existing
+                for check_func in detector.conflict_rules.values()
+                for conflict in [check_func(decision, existing_decision)]
+                if conflict and conflict.severity >= detector.severity_threshold
+            ]
+            found = [conflict.id for conflict in batch[decision.id]]
+            assert sorted(found) == sorted(expected)
+            assert found == [c.id for c in detector.detect_conflicts(decision)]
+    
+    @pytest.mark.slow
+    def test_benchmark_100k_decisions(self):
+        """Test that 100k decisions are checked without comparing all pairs."""
+        existing = random_decisions(100_000, seed=3, spread=1000)
+        new = random_decisions(1000, seed=4, link_ids=[d.id for d in existing[:1000]], spread=1000)
+        detector = ConflictDetector(InMemoryStore(existing), precedent_engine=object())
+        
+        start = time.perf_counter()
+        results = detector.detect_conflicts_batch(new)
+        elapsed = time.perf_counter() - start
+        
+        assert len(results) == len(new)
+        assert elapsed < 30
+        
+        start = time.perf_counter()
+        report = detector.check_consistency()
+        elapsed = time.perf_counter() - start
+        
+        assert report['total_decisions'] == len(existing)
+        assert elapsed < 60
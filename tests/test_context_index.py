@@ -0,0 +1,120 @@
+"""
+Tests for the decision context similarity index.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from velocitytree.workflow_memory.context_index import ContextIndex, context_features
+from velocitytree.workflow_memory.decision_tracker import DecisionTracker
+from velocitytree.workflow_memory.memory_store import DecisionType, MemoryStore, WorkflowDecision
+from velocitytree.workflow_memory.precedent_engine import PrecedentEngine
+
+
+@pytest.fixture
+def memory(tmp_path):
+    """Memory store in a temporary database."""
+    store = MemoryStore(tmp_path / "memory.db")
+    yield store
+    store.store.close()
+
+
+class TestContextIndex:
+    
+    def test_features(self):
+        """Test that partially matching values share features."""
+        a = set(context_features({'service': 'user api', 'replicas': 3, 'tags': ['a', 'b']}).tolist())
+        b = set(context_features({'service': 'billing api', 'replicas': 2, 'tags': ['b']}).tolist())
+        
+        assert len(a & b) >= 5
+        assert a != b
+        assert len(context_features({})) == 0
+        assert np.array_equal(context_features({'x': 1}), context_features({'x': 1}))
+    
+    def test_search_ranks_and_filters(self):
+        """Test ranking by overlap with type and project filters."""
+        index = ContextIndex()
+        index.add("exact", context_features({'env': 'prod', 'service': 'api'}), "deployment", "p1")
+        index.add("partial", context_features({'env': 'prod', 'service': 'web'}), "deployment", "p1")
+        index.add("other-type", context_features({'env': 'prod', 'service': 'api'}), "testing", "p1")
+        index.add("unrelated", context_features({'coverage': 'unit'}), "deployment", "p1")
+        
+        results = index.search({'env': 'prod', 'service': 'api'}, decision_type="deployment")
+        
+        assert [decision_id for decision_id, _ in results] == ["exact", "partial"]
+        assert results[0][1] == pytest.approx(1.0)
+        assert index.search({'env': 'prod'}, project_id="p2") == []
+        assert len(index.search({'env': 'prod'}, limit=2)) == 2
+
+
+class TestMemoryStoreSimilarity:
+    
+    def test_old_precedents_are_found(self, memory):
+        """Test that a matching decision older than the last 100 is found."""
+        old = WorkflowDecision(
+            decision_type=DecisionType.ARCHITECTURE,
+            context={'scale': 'large', 'technology': 'rust'},
+            decision='Use actors',
+            confidence=0.9,
+            timestamp=datetime.now() - timedelta(days=30)
+        )
+        noise = [
+            WorkflowDecision(
+                decision_type=DecisionType.ARCHITECTURE,
+                context={'scale': 'small', 'technology': f'tech{i}'},
+                decision=f'Decision {i}',
+                confidence=0.9
+            )
+            for i in range(300)
+        ]
+        memory.add_decision(old)
+        memory.add_decisions(noise)
+        
+        precedents = PrecedentEngine(memory).find_precedents(
+            DecisionType.ARCHITECTURE, {'scale': 'large', 'technology': 'rust'}
+        )
+        assert precedents[0].decision.id == old.id
+        
+        similar = DecisionTracker(memory).get_similar_decisions(
+            {'scale': 'large', 'technology': 'rust'}, threshold=0.9
+        )
+        assert [d.id for d in similar] == [old.id]
+    
+    def test_recent_precedents_without_shared_context(self, memory):
+        """Test that recent successful decisions remain candidates."""
+        decision = WorkflowDecision(
+            decision_type=DecisionType.ARCHITECTURE,
+            context={'language': 'python', 'team': 'platform'},
+            decision='Use a monorepo',
+            confidence=0.9,
+            outcome='Successful rollout'
+        )
+        memory.add_decision(decision)
+        engine = PrecedentEngine(memory)
+        
+        for context in ({'framework': 'django'}, {}):
+            precedents = engine.find_precedents(DecisionType.ARCHITECTURE, context)
+            assert [p.decision.id for p in precedents] == [decision.id]
+            assert precedents[0].context_similarity == 0.0
+    
+    def test_index_updates_incrementally(self, memory):
+        """Test that decisions added after the first search are found."""
+        assert memory.find_similar({'env': 'prod'}) == []
+        
+        decision = WorkflowDecision(decision_type=DecisionType.DEPLOYMENT, context={'env': 'prod'})
+        memory.add_decision(decision)
+        
+        results = memory.find_similar({'env': 'prod'}, decision_type=DecisionType.DEPLOYMENT)
+        assert [(d.id, score) for d, score in results] == [(decision.id, 1.0)]
+        assert memory.find_similar({'env': 'prod'}, decision_type=DecisionType.TESTING) == []
+    
+    def test_existing_decisions_are_backfilled(self, memory):
+        """Test that decisions stored without features are indexed."""
+        decision = WorkflowDecision(decision_type=DecisionType.TESTING, context={'coverage': 'unit'})
+        memory.add_decision(decision)
+        memory.store.execute("DELETE FROM decision_features")
+        
+        reopened = MemoryStore(memory.db_path)
+        assert [d.id for d, _ in reopened.find_similar({'coverage': 'unit'})] == [decision.id]
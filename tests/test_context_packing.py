@@ -0,0 +1,173 @@
+"""Tests for token-budgeted context packing."""
+
+import pytest
+from unittest.mock import patch
+
+from velocitytree.claude_integration import ContextStreamer, StreamConfig, ContextPacker, ChunkCache
+from velocitytree.claude_integration.packing import (
+    chunk_source,
+    estimate_tokens,
+    extract_terms,
+    select_within_budget
+)
+
+
+SOURCE = '''"""Payment helpers."""
+
+import os
+
+RATE = 3
+
+
+def charge_card(card, amount):
+    """Charge a card."""
+    return card.charge(amount * RATE)
+
+
+@cached
+def refund_payment(payment):
+    return payment.refund()
+
+
+class Ledger:
+    """Keeps entries."""
+
+    def add(self, entry):
+        self.entries.append(entry)
+'''
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Files with one clearly relevant function."""
+    (tmp_path / "payments.py").write_text(SOURCE)
+    for i in range(6):
+        body = "\n\n".join(
+            f"def unrelated_{i}_{j}(value):\n    return value + {j}" for j in range(20)
+        )
+        (tmp_path / f"other{i}.py").write_text(body)
+    (tmp_path / "README.md").write_text("# Title\n\nSome text about refunds.\n")
+    return tmp_path
+
+
+class TestChunking:
+    """Test AST-aware chunking."""
+    
+    def test_python_units(self):
+        """Test that functions and classes become whole chunks."""
+        chunks = chunk_source("payments.py", SOURCE)
+        
+        assert [(c.name, c.kind) for c in chunks] == [
+            ("<module>", "module"),
+            ("charge_card", "function"),
+            ("refund_payment", "function"),
+            ("Ledger", "class"),
+        ]
+        refund = chunks[2]
+        assert refund.content.startswith("@cached")
+        assert refund.end_line - refund.start_line == 2
+    
+    def test_large_units_are_split(self):
+        """Test that classes and functions over the limit are split."""
+        chunks = chunk_source("payments.py", SOURCE, max_tokens=20)
+        
+        assert "Ledger.add" in [c.name for c in chunks]
+        assert all(c.tokens <= 20 for c in chunks)
+    
+    def test_syntax_error_falls_back_to_text(self):
+        """Test that unparsable files are chunked by paragraphs."""
+        chunks = chunk_source("broken.py", "def broken(:\n    pass\n")
+        assert [c.kind for c in chunks] == ["text"]
+    
+    def test_terms_and_tokens(self):
+        """Test identifier splitting and token estimates."""
+        assert {"parse_config", "parse", "config"} <= set(extract_terms("parse_config(x)"))
+        assert {"configparser", "config", "parser"} <= set(extract_terms("ConfigParser"))
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("a = b + 1") == 5
+
+
+class TestPacking:
+    """Test budgeted selection."""
+    
+    def test_knapsack_beats_greedy(self):
+        """Test that the exact solver finds the better combination."""
+        # Greedy by density takes item 0 and cannot fit anything else
+        chosen = select_within_budget([6, 5, 5], [7.0, 5.0, 5.0], 10)
+        assert chosen == [1, 2]
+    
+    def test_budget_is_hard_limit(self):
+        """Test that scaled weights never exceed the budget."""
+        weights = [137, 291, 503, 77, 1999, 64] * 50
+        values = [float(i % 7 + 1) for i in range(len(weights))]
+        chosen = select_within_budget(weights, values, 5000)
+        
+        assert sum(weights[i] for i in chosen) <= 5000
+        assert sum(weights[i] for i in chosen) > 4500
+    
+    def test_relevant_chunks_selected(self, project):
+        """Test that the chunks matching the query are packed first."""
+        packer = ContextPacker(ChunkCache())
+        files = sorted(project.iterdir())
+        packed = packer.pack("Why does refund_payment fail?", files, max_tokens=60)
+        
+        assert packed.tokens <= 60
+        assert "refund_payment" in [c.name for c in packed.chunks]
+        assert list(packed.by_file())[0] == str(project / "payments.py")
+        assert packed.candidates > len(packed.chunks)
+    
+    def test_unchanged_files_not_reread(self, project):
+        """Test that repeated packing uses the chunk cache."""
+        cache = ChunkCache()
+        packer = ContextPacker(cache)
+        files = sorted(project.iterdir())
+        packer.pack("refund", files, max_tokens=200)
+        
+        with patch("velocitytree.claude_integration.packing.open", side_effect=AssertionError("read")):
+            packer.pack("charge", files, max_tokens=200)
+        
+        assert cache.get_stats()["chunked"] == len(files)
+        assert cache.get_stats()["hits"] == len(files)
+    
+    def test_optimize_context(self, project):
+        """Test that the streamer packs chunks into the window."""
+        streamer = ContextStreamer(StreamConfig(), chunk_cache=ChunkCache())
+        files = sorted(project.iterdir())
+        prompt = "Explain refund_payment"
+        optimized = streamer.optimize_context(prompt, files, max_context=1100)
+        
+        assert optimized["truncated"]
+        assert optimized["tokens"] <= 1100 - streamer._estimate_tokens(prompt) - 1000
+        first = optimized["files"][0]
+        assert first["path"] == str(project / "payments.py")
+        assert "def refund_payment" in first["content"]
+    
+    def test_optimize_context_keeps_file_layout(self, tmp_path):
+        """Test that complete files are verbatim and partial ones keep blank lines."""
+        source_file = tmp_path / "payments.py"
+        source_file.write_text(SOURCE)
+        streamer = ContextStreamer(StreamConfig(), chunk_cache=ChunkCache())
+        prompt = "charge_card refund_payment"
+        reserve = streamer._estimate_tokens(prompt) + 1000
+        
+        complete = streamer.optimize_context(prompt, [source_file], max_context=reserve + 1000)
+        assert not complete["truncated"]
+        assert complete["files"][0]["content"] == SOURCE
+        
+        # Room for the two functions only
+        partial = streamer.optimize_context(prompt, [source_file], max_context=reserve + 58)
+        lines = SOURCE.splitlines()
+        assert partial["truncated"]
+        assert partial["files"][0]["content"] == "\n".join(
+            ["... (lines 1-7 omitted)"] + lines[7:15] + ["... (lines 16-22 omitted)"]
+        )
+    
+    def test_summary_covers_all_files(self, project):
+        """Test that summaries are not limited to the first files."""
+        streamer = ContextStreamer(chunk_cache=ChunkCache())
+        files = sorted(project.iterdir())
+        summary = streamer.create_context_summary(files, focus_areas=["refund"])
+        
+        assert summary.startswith(f"File: {project / 'payments.py'}")
+        for file_path in files:
+            assert f"File: {file_path}" in summary
@@ -2,9 +2,13 @@
 Tests for core functionality.
 """
 
+import errno
+import os
+import shutil
 import pytest
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 from velocitytree.core import TreeFlattener, ContextManager
 
@@ -84,6 +88,65 @@ class TestTreeFlattener:
         
         # Check structure is preserved
         assert (output_dir / "a" / "b" / "c" / "file.py").exists()
+    
+    def test_hardlink_mode(self, tmp_path):
+        """Test linking files instead of copying them."""
+        source_dir = tmp_path / "source"
+        source_dir.mkdir()
+        (source_dir / "file.py").write_text("code")
+        
+        output_dir = tmp_path / "output"
+        flattener = TreeFlattener(output_dir=str(output_dir), link_mode="hardlink")
+        result = flattener.flatten(source_dir)
+        
+        assert result['files_linked'] == 1
+        assert (output_dir / "file.py").samefile(source_dir / "file.py")
+    
+    def test_auto_mode_falls_back_to_copy(self, tmp_path):
+        """Test that auto mode copies when reflinks are unsupported."""
+        source_dir = tmp_path / "source"
+        source_dir.mkdir()
+        (source_dir / "file.py").write_text("code")
+        
+        output_dir = tmp_path / "output"
+        flattener = TreeFlattener(output_dir=str(output_dir), link_mode="auto")
+        with patch('velocitytree.core.reflink_file', side_effect=OSError(errno.EOPNOTSUPP, "no")):
+            result = flattener.flatten(source_dir)
+        
+        assert result['files_processed'] == 1
+        assert result['files_linked'] == 0
+        assert (output_dir / "file.py").read_text() == "code"
+        assert not (output_dir / "file.py").samefile(source_dir / "file.py")
+    
+    def test_incremental_skips_unchanged(self, tmp_path):
+        """Test that re-runs only copy changed files and drop removed ones."""
+        source_dir = tmp_path / "source"
+        source_dir.mkdir()
+        for i in range(4):
+            (source_dir / f"file{i}.py").write_text(f"x = {i}")
+        
+        output_dir = tmp_path / "output"
+        TreeFlattener(output_dir=str(output_dir), incremental=True, workers=4).flatten(source_dir)
+        
+        (source_dir / "file1.py").write_text("x = 'changed'")
+        (source_dir / "file2.py").touch()
+        os.utime(source_dir / "file2.py", ns=(1, 1))
+        (source_dir / "file3.py").unlink()
+        
+        with patch('velocitytree.core.shutil.copy2', wraps=shutil.copy2) as mock_copy:
+            result = TreeFlattener(output_dir=str(output_dir), incremental=True).flatten(source_dir)
+        
+        assert mock_copy.call_count == 1
+        assert result['files_processed'] == 3
+        assert result['files_unchanged'] == 2
+        assert result['files_removed'] == 1
+        assert (output_dir / "file1.py").read_text() == "x = 'changed'"
+        assert not (output_dir / "file3.py").exists()
+    
+    def test_invalid_link_mode(self):
+        """Test that unknown link modes are rejected."""
+        with pytest.raises(ValueError):
+            TreeFlattener(link_mode="symlink")
 
 
 class TestContextManager:
@@ -0,0 +1,130 @@
+"""
+Tests for shared file discovery.
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from velocitytree.discovery import FileDiscovery, FileMatcher, IgnoreRules, discover_files
+from velocitytree.code_analysis.analyzer import CodeAnalyzer
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Project tree with ignored and dependency directories."""
+    root = tmp_path / "project"
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "main.py").write_text("print('main')")
+    (root / "src" / "pkg" / "util.py").write_text("X = 1")
+    (root / "src" / "pkg" / "app.js").write_text("let x = 1;")
+    (root / "src" / "pkg" / "generated.py").write_text("Y = 2")
+    (root / "src" / "pkg" / ".gitignore").write_text("generated.py\n")
+    (root / "node_modules" / "lib").mkdir(parents=True)
+    (root / "node_modules" / "lib" / "index.js").write_text("module.exports = 1;")
+    (root / "build").mkdir()
+    (root / "build" / "out.py").write_text("Z = 3")
+    (root / "logs").mkdir()
+    (root / "logs" / "debug.log").write_text("log")
+    (root / "logs" / "keep.log").write_text("log")
+    (root / "Dockerfile").write_text("FROM python")
+    (root / ".gitignore").write_text("build/\n*.log\n!keep.log\n")
+    return root
+
+
+def relative(paths, root):
+    """Convert paths to sorted posix strings relative to root."""
+    return sorted(p.relative_to(root).as_posix() for p in paths)
+
+
+class TestFileDiscovery:
+
+    def test_gitignore_and_skip_dirs(self, project):
+        """Test that ignored and dependency directories are pruned."""
+        files = FileDiscovery(project).find_files()
+        
+        assert relative(files, project) == [
+            ".gitignore",
+            "Dockerfile",
+            "logs/keep.log",
+            "src/main.py",
+            "src/pkg/.gitignore",
+            "src/pkg/app.js",
+            "src/pkg/util.py",
+        ]
+    
+    def test_patterns_in_one_pass(self, project):
+        """Test extension, name and glob patterns together."""
+        files = discover_files(project, ['*.py', 'Dockerfile', 'a*.js'])
+        assert relative(files, project) == ["Dockerfile", "src/main.py", "src/pkg/app.js", "src/pkg/util.py"]
+        
+        top_level = discover_files(project, ['*.py', 'Dockerfile'], recursive=False)
+        assert relative(top_level, project) == ["Dockerfile"]
+    
+    def test_without_gitignore(self, project):
+        """Test that .gitignore can be disabled while keeping skip dirs."""
+        files = FileDiscovery(project, use_gitignore=False).find_files(['*.py'])
+        assert relative(files, project) == [
+            "build/out.py", "src/main.py", "src/pkg/generated.py", "src/pkg/util.py"
+        ]
+    
+    def test_parent_gitignore_applies_to_subdirectory(self, project):
+        """Test that rules above the root are honored inside a work tree."""
+        (project / ".git").mkdir()
+        (project / ".gitignore").write_text("build/\n/src/pkg/app.js\n")
+        
+        files = FileDiscovery(project / "src").find_files()
+        assert relative(files, project / "src") == ["main.py", "pkg/.gitignore", "pkg/util.py"]
+    
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+    def test_git_ls_files_matches_walk(self, project):
+        """Test that the git file list agrees with the walk."""
+        subprocess.run(["git", "init", "-q"], cwd=project, check=True)
+        
+        walked = FileDiscovery(project).find_files(['*.py', '*.js'])
+        listed = FileDiscovery(project, use_git=True).find_files(['*.py', '*.js'])
+        assert listed == walked
+    
+    def test_is_ignored_single_files(self, project):
+        """Test checking single files without walking the tree."""
+        discovery = FileDiscovery(project)
+        
+        assert not discovery.is_ignored(project / "src" / "main.py")
+        assert not discovery.is_ignored(project / "logs" / "keep.log")
+        assert not discovery.is_ignored(project / "src" / "new.py")
+        assert discovery.is_ignored(project / "build" / "out.py")
+        assert discovery.is_ignored(project / "logs" / "debug.log")
+        assert discovery.is_ignored(project / "node_modules" / "lib" / "index.js")
+        assert discovery.is_ignored(project.parent / "elsewhere.py")
+    
+    def test_analyzer_uses_discovery(self, project):
+        """Test that directory analysis skips ignored files."""
+        analyzer = CodeAnalyzer({'clone_detection': False})
+        files = analyzer._find_files(project, True, None)
+        
+        assert relative(files, project) == ["src/main.py", "src/pkg/app.js", "src/pkg/util.py"]
+
+
+class TestMatchers:
+
+    def test_ignore_rules(self):
+        """Test fast-path and pathspec matching of ignore patterns."""
+        rules = IgnoreRules(["node_modules", "dist/", "*.pyc", "docs/*.md"], base="sub")
+        
+        assert rules.matches("a/node_modules", "node_modules", True)
+        assert rules.matches("dist", "dist", True)
+        assert not rules.matches("dist", "dist", False)
+        assert rules.matches("x.pyc", "x.pyc", False)
+        assert rules.matches("sub/docs/a.md", "a.md", False)
+        assert not rules.matches("docs/a.md", "a.md", False)
+    
+    def test_file_matcher(self):
+        """Test file name selection."""
+        matcher = FileMatcher(['*.py', '.env', 'test_*.txt'])
+        
+        assert matcher("module.PY")
+        assert matcher(".env")
+        assert matcher("test_data.txt")
+        assert not matcher("data.txt")
+        assert FileMatcher()("anything")
@@ -0,0 +1,195 @@
+"""Tests for function-level incremental re-analysis of edited modules."""
+
+from dataclasses import asdict
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from velocitytree.code_analysis import CodeAnalyzer
+from velocitytree.code_analysis.incremental import LineMap, diff_lines, plan_edits
+
+
+SOURCE = '''"""Sample module."""
+
+import os
+
+LIMIT = 5
+
+
+def first(x):
+    return x + 1
+
+
+@decorated
+def second(a, b):
+    """Add two numbers."""
+    if a > b:
+        return a
+    return b
+
+
+class Holder:
+    def value(self):
+        return 1
+
+    def other(self, flag):
+        if flag:
+            return 2
+        return 3
+
+
+def last(items):
+    total = 0
+    for item in items:
+        if item:
+            total += item
+    return total
+'''
+
+
+def comparable(module):
+    """Reduce a module analysis to a dict, ignoring the order of issues and patterns."""
+    result = asdict(module)
+    for key in ('issues', 'patterns'):
+        result[key] = sorted(map(repr, result[key]))
+    return result
+
+
+def edit(content, old, new):
+    """Replace exactly one occurrence of old in content."""
+    assert content.count(old) == 1
+    return content.replace(old, new)
+
+
+@pytest.fixture
+def analyzer():
+    return CodeAnalyzer()
+
+
+class TestLineMap:
+    """Test mapping old lines to new ones."""
+
+    def test_maps_lines_around_an_edit(self):
+        """Test that lines before and after an insertion keep their text."""
+        old = ['a', 'b', 'c', 'd']
+        new = ['a', 'b', 'x', 'y', 'c', 'd']
+        line_map = LineMap(diff_lines(old, new))
+
+        assert line_map.map(0) == 0
+        assert line_map.map(2) == 2
+        assert line_map.map(3) == 5
+        assert line_map.map_range(2, 3) == (2, 5)
+
+    def test_changed_line_raises(self):
+        """Test that a replaced line has no new number."""
+        line_map = LineMap(diff_lines(['a', 'b', 'c'], ['a', 'B', 'c']))
+
+        with pytest.raises(ValueError):
+            line_map.map(2)
+        assert line_map.map_range(2, 2) == (2, 2)
+
+
+class TestPlanEdits:
+    """Test mapping hunks onto top-level definitions."""
+
+    def plan(self, analyzer, new_content):
+        previous = analyzer.analyze_source('sample.py', SOURCE)
+        new_lines = new_content.splitlines()
+        opcodes = diff_lines(SOURCE.splitlines(), new_lines)
+        return plan_edits(SOURCE, new_lines, opcodes, previous)
+
+    def test_edit_inside_function(self, analyzer):
+        """Test that an edit in a function touches only that function."""
+        edits = self.plan(analyzer, edit(SOURCE, 'return x + 1', 'y = x\n    return y + 1'))
+
+        assert [(e.old_start, e.old_end, e.new_start, e.new_end) for e in edits] == [(8, 9, 8, 10)]
+
+    def test_blank_lines_touch_nothing(self, analyzer):
+        """Test that inserting blank lines between definitions needs no re-analysis."""
+        assert self.plan(analyzer, edit(SOURCE, 'LIMIT = 5\n', 'LIMIT = 5\n\n\n')) == []
+
+    def test_module_level_edit_needs_full_analysis(self, analyzer):
+        """Test that changing module-level statements is not planned."""
+        assert self.plan(analyzer, edit(SOURCE, 'LIMIT = 5', 'LIMIT = 6')) is None
+
+    def test_new_definition_needs_full_analysis(self, analyzer):
+        """Test that adding a top-level definition is not planned."""
+        new_content = edit(SOURCE, 'class Holder:', 'def added():\n    pass\n\n\nclass Holder:')
+
+        assert self.plan(analyzer, new_content) is None
+
+
+class TestAnalyzeIncremental:
+    """Test splicing re-analyzed definitions into a previous analysis."""
+
+    @pytest.mark.parametrize('old, new', [
+        ('return x + 1', 'y = x\n    return y + 1'),
+        ('return a\n', 'return a\n    if b:\n        return b\n'),
+        ('        return 1\n', '        value = 1\n        return value\n'),
+        ('            total += item\n', '            total += item\n        else:\n            total -= 1\n'),
+        ('    if a > b:\n        return a\n', ''),
+        ('    def value(self):', '    # Comment\n    def value(self):'),
+        ('LIMIT = 5\n', 'LIMIT = 5\n\n\n'),
+    ])
+    def test_matches_full_analysis(self, analyzer, old, new):
+        """Test that incremental results equal a full analysis of the new version."""
+        new_content = edit(SOURCE, old, new)
+        previous = analyzer.analyze_source('sample.py', SOURCE)
+
+        result = analyzer.analyze_incremental('sample.py', SOURCE, new_content, previous)
+        expected = CodeAnalyzer().analyze_source('sample.py', new_content)
+
+        assert comparable(result) == comparable(expected)
+
+    @pytest.mark.parametrize('old, new', [
+        ('LIMIT = 5', 'LIMIT = 6'),
+        ('import os\n', 'import os\nimport sys\n'),
+        ('def first(x):', 'def first(x:'),
+        ('class Holder:', 'def added():\n    pass\n\n\nclass Holder:'),
+    ])
+    def test_falls_back_to_full_analysis(self, analyzer, old, new):
+        """Test that module-level and structural edits are analyzed in full."""
+        new_content = edit(SOURCE, old, new)
+        previous = analyzer.analyze_source('sample.py', SOURCE)
+
+        with patch.object(analyzer, 'analyze_source', wraps=analyzer.analyze_source) as full:
+            result = analyzer.analyze_incremental('sample.py', SOURCE, new_content, previous)
+
+        full.assert_called_once_with(Path('sample.py'), new_content)
+        assert comparable(result) == comparable(CodeAnalyzer().analyze_source('sample.py', new_content))
+
+    def test_reanalyzes_only_the_edited_definition(self, analyzer):
+        """Test that only the edited function's source is parsed again."""
+        new_content = edit(SOURCE, 'return x + 1', 'return x + 2')
+        previous = analyzer.analyze_source('sample.py', SOURCE)
+
+        with patch.object(analyzer, '_analyze_content', wraps=analyzer._analyze_content) as analyze:
+            result = analyzer.analyze_incremental('sample.py', SOURCE, new_content, previous)
+
+        analyze.assert_called_once()
+        assert analyze.call_args[0][1] == 'def first(x):\n    return x + 2'
+        assert [f.name for f in result.functions] == ['first', 'second', 'last']
+
+    def test_result_is_cached(self, analyzer):
+        """Test that the spliced result is served from the cache afterwards."""
+        new_content = edit(SOURCE, 'return x + 1', 'return x + 2')
+        result = analyzer.analyze_incremental('sample.py', SOURCE, new_content)
+
+        assert analyzer.analyze_source('sample.py', new_content) is result
+
+    def test_large_module_edits_match_full_analysis(self, analyzer):
+        """Test single-line edits across a real module against full analyses."""
+        path = Path(__file__).parent.parent / 'velocitytree' / 'code_analysis' / 'analyzer.py'
+        content = path.read_text()
+        lines = content.splitlines()
+        previous = analyzer.analyze_source(path, content)
+
+        for index in range(40, len(lines), len(lines) // 12):
+            new_lines = lines[:index] + [lines[index] + '  # edited'] + lines[index + 1:]
+            new_content = '\n'.join(new_lines) + '\n'
+
+            result = analyzer.analyze_incremental(path, content, new_content, previous)
+            expected = CodeAnalyzer().analyze_source(path, new_content)
+
+            assert comparable(result) == comparable(expected)
@@ -7,7 +7,7 @@ import time
 from pathlib import Path
 
 from velocitytree.documentation import IncrementalDocUpdater, DocConfig, DocFormat
-from velocitytree.documentation.incremental import FileChange, DocChange, ChangeSet
+from velocitytree.documentation.incremental import FileChange, ChangeSet
 
 
 class TestIncrementalDocUpdater:
@@ -54,7 +54,6 @@ class Calculator:
         """Test initialization."""
         assert updater.cache_dir.exists()
         assert updater.cache_file.exists()
-        assert updater.hash_file.exists()
         
     def test_file_hash_calculation(self, updater, sample_python_file):
         """Test file hash calculation."""
@@ -209,47 +208,6 @@ class MyClass:
         assert elements['MyClass.method1']['type'] == 'method'
         assert elements['MyClass.method1']['docstring'] == 'Method 1 docstring.'
         
-    def test_can_update_incrementally(self, updater):
-        """Test checking if changes can be updated incrementally."""
-        # Only docstring changes - can update incrementally
-        changes = [
-            DocChange(
-                element='func1',
-                element_type='function',
-                old_doc='Old doc',
-                new_doc='New doc',
-                change_type='modified',
-                location='file.py:10',
-            )
-        ]
-        assert updater._can_update_incrementally(changes)
-        
-        # Structural changes - cannot update incrementally
-        changes = [
-            DocChange(
-                element='func2',
-                element_type='function',
-                old_doc=None,
-                new_doc='New function',
-                change_type='added',
-                location='file.py:20',
-            )
-        ]
-        assert not updater._can_update_incrementally(changes)
-        
-        # Module-level changes - cannot update incrementally
-        changes = [
-            DocChange(
-                element='module',
-                element_type='module',
-                old_doc='Old module doc',
-                new_doc='New module doc',
-                change_type='modified',
-                location='file.py:1',
-            )
-        ]
-        assert not updater._can_update_incrementally(changes)
-        
     def test_update_documentation(self, updater, sample_python_file):
         """Test updating documentation."""
         # Initial scan
@@ -335,4 +293,172 @@ class MyClass:
         
         # Should have captured changes
         assert len(results_captured) > 0
-        assert len(changes_captured) > 0
\ No newline at end of file
+        assert len(changes_captured) > 0
+    
+    def test_unchanged_stat_skips_hashing(self, updater, sample_python_file, monkeypatch):
+        """Test that files with an unchanged size and mtime are not hashed."""
+        past = time.time() - 3600
+        os.utime(sample_python_file, (past, past))
+        updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        
+        def fail(file_path):
+            raise AssertionError(f"{file_path} was hashed")
+        monkeypatch.setattr(updater, '_calculate_file_hash', fail)
+        
+        change_set = updater.detect_changes([str(sample_python_file)])
+        assert change_set.file_changes == []
+        assert updater.get_cached_documentation(str(sample_python_file)) is not None
+    
+    def test_touched_file_is_not_reported(self, updater, sample_python_file):
+        """Test that a new mtime with the same content is not a change."""
+        updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        
+        past = time.time() - 3600
+        os.utime(sample_python_file, (past, past))
+        assert updater.detect_changes([str(sample_python_file)]).file_changes == []
+        assert str(sample_python_file) in updater.file_stats
+    
+    def test_cache_persists_per_file(self, updater, sample_python_file, temp_dir):
+        """Test that a new updater picks up the cached files."""
+        other_file = temp_dir / "other.py"
+        other_file.write_text('def other():\n    """Other function."""\n')
+        change_set = updater.detect_changes([str(sample_python_file), str(other_file)])
+        updater.update_documentation(change_set)
+        
+        reopened = IncrementalDocUpdater(DocConfig())
+        reopened.cache_dir = updater.cache_dir
+        reopened._init_cache()
+        
+        assert set(reopened.file_hashes) == {str(sample_python_file), str(other_file)}
+        assert reopened.detect_changes([str(sample_python_file), str(other_file)]).file_changes == []
+        
+        # Changes are analyzed against the cached elements and line hashes
+        sample_python_file.write_text(sample_python_file.read_text().replace(
+            '"""Add two numbers."""', '"""Add two numbers together."""'
+        ))
+        change_set = reopened.detect_changes([str(sample_python_file)])
+        assert [c.change_type for c in change_set.file_changes] == ['modified']
+        assert change_set.file_changes[0].change_lines == [4]
+        assert [(c.element, c.change_type) for c in change_set.doc_changes] == [('add', 'modified')]
+    
+    def test_unchanged_elements_reuse_fragments(self, updater, sample_python_file, monkeypatch):
+        """Test that only changed functions and classes are documented again."""
+        from velocitytree.documentation.generator import DocGenerator
+        
+        # Without a template the structured module layout is assembled from fragments
+        selector = updater.generator.template_selector
+        monkeypatch.setattr(selector, 'select_template', lambda **kwargs: None)
+        monkeypatch.setattr(selector, 'suggest_improvements', lambda **kwargs: [])
+        generated = []
+        original = DocGenerator._generate_function_doc
+        
+        def spy(generator, func, style):
+            generated.append(func.name)
+            return original(generator, func, style)
+        monkeypatch.setattr(DocGenerator, '_generate_function_doc', spy)
+        
+        updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        assert sorted(generated) == ['add', 'multiply']
+        
+        generated.clear()
+        sample_python_file.write_text(sample_python_file.read_text().replace(
+            '"""Add two numbers."""', '"""Add two numbers together."""'
+        ))
+        results = updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        
+        assert generated == ['add']
+        content = results[str(sample_python_file)].content
+        assert 'Add two numbers together.' in content
+        assert 'Multiply two numbers.' in content
+    
+    def test_selected_template_reuses_rendering(self, updater, sample_python_file, monkeypatch):
+        """Test that the template picked for a module is kept and its rendering reused."""
+        from velocitytree.documentation.generator import DocGenerator
+        
+        rendered = []
+        original = DocGenerator._generate_with_template
+        
+        def spy(generator, analysis, template, style):
+            rendered.append(template.name)
+            return original(generator, analysis, template, style)
+        monkeypatch.setattr(DocGenerator, '_generate_with_template', spy)
+        
+        expected = updater.generator.generate_documentation(str(sample_python_file))
+        rendered.clear()
+        first = updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        assert first[str(sample_python_file)].content == expected.content
+        assert len(rendered) == 1
+        
+        # A change outside the template context reuses the rendering
+        rendered.clear()
+        sample_python_file.write_text(sample_python_file.read_text().replace(
+            '"""Add two numbers."""', '"""Add two numbers together."""'
+        ))
+        second = updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        assert rendered == []
+        assert second[str(sample_python_file)].content == expected.content
+        
+        sample_python_file.write_text(sample_python_file.read_text().replace(
+            '"""Sample module for testing."""', '"""Sample calculator module."""'
+        ))
+        third = updater.update_documentation(updater.detect_changes([str(sample_python_file)]))
+        assert len(rendered) == 1
+        assert 'Sample calculator module.' in third[str(sample_python_file)].content
+    
+    def test_watch_files_uses_events(self, updater, sample_python_file, temp_dir):
+        """Test that watching reports changed and deleted files from events."""
+        import threading
+        
+        other_file = temp_dir / "notes.txt"
+        nested_file = temp_dir / "pkg" / "nested.py"
+        captured = []
+        
+        def callback(results, change_set):
+            captured.append({c.path: c.change_type for c in change_set.file_changes})
+        
+        def wait_for(change):
+            deadline = time.time() + 10
+            while change not in captured:
+                assert time.time() < deadline, captured
+                time.sleep(0.05)
+        
+        watch_thread = threading.Thread(
+            target=updater.watch_files,
+            args=([str(temp_dir / "**" / "*.py")],),
+            kwargs={'callback': callback, 'interval': 0.05}
+        )
+        watch_thread.daemon = True
+        watch_thread.start()
+        
+        try:
+            wait_for({str(sample_python_file): 'added'})
+            
+            other_file.write_text("not watched")
+            nested_file.parent.mkdir()
+            nested_file.write_text('def nested():\n    """Nested function."""\n')
+            wait_for({str(nested_file): 'added'})
+            
+            sample_python_file.unlink()
+            wait_for({str(sample_python_file): 'deleted'})
+        finally:
+            updater.stop_watching()
+            watch_thread.join(timeout=10)
+        
+        assert all(str(other_file) not in changes for changes in captured)
+        assert not watch_thread.is_alive()
+    
+    def test_glob_regex(self):
+        """Test matching event paths against watch patterns."""
+        import re
+        from velocitytree.documentation.incremental import _glob_regex
+        
+        pattern = re.compile(_glob_regex("/src/**/*.py"))
+        assert pattern.fullmatch("/src/a.py")
+        assert pattern.fullmatch("/src/pkg/sub/a.py")
+        assert not pattern.fullmatch("/src/a.pyc")
+        assert not pattern.fullmatch("/other/a.py")
+        
+        pattern = re.compile(_glob_regex("/src/test_?.[!c]*"))
+        assert pattern.fullmatch("/src/test_a.py")
+        assert not pattern.fullmatch("/src/test_a.cfg")
+        assert not pattern.fullmatch("/src/pkg/test_a.py")
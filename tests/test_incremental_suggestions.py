@@ -0,0 +1,206 @@
+"""Tests for in-memory, block-incremental real-time suggestions."""
+
+import ast
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from velocitytree.code_analysis import CodeAnalyzer
+from velocitytree.code_analysis.cache import content_hash
+from velocitytree.code_analysis.source import top_level_spans
+from velocitytree.realtime_suggestions import RealTimeSuggestionEngine
+
+
+SOURCE = '''"""Sample module."""
+
+import os
+
+LIMIT = 5
+
+
+def first(x):
+    return x + 1
+
+
+@decorated
+def second(a, b):
+    """Add two numbers."""
+    if a > b:
+        return a
+    return b
+
+
+class Holder:
+    def value(self):
+        return 1
+'''
+
+
+def suggestion_keys(suggestions):
+    """Reduce suggestions to comparable (message, start line, end line) triples."""
+    return sorted((s.message, s.range.start.line, s.range.end.line) for s in suggestions)
+
+
+class TestTopLevelSpans:
+    """Test splitting source into top-level blocks."""
+
+    def test_definitions_and_statement_runs(self):
+        """Test that each definition gets a span and statements are grouped."""
+        assert top_level_spans(SOURCE) == [(1, 5), (8, 9), (12, 17), (20, 22)]
+
+    def test_multiline_strings_and_brackets(self):
+        """Test that column 0 lines inside strings and brackets do not split."""
+        code = (
+            'def f():\n'
+            '    return """\n'
+            'def not_a_function():\n'
+            '""".strip()\n'
+            '\n'
+            'VALUES = [\n'
+            '1,\n'
+            ']\n'
+            'if VALUES:\n'
+            '    pass\n'
+            'else:\n'
+            '    pass\n'
+            'x = 1 + \\\n'
+            '2\n'
+        )
+
+        spans = top_level_spans(code)
+
+        assert spans == [(1, 4), (6, 14)]
+        lines = code.splitlines()
+        for start, end in spans:
+            ast.parse('\n'.join(lines[start - 1:end]))
+
+    def test_spans_of_real_modules_parse(self):
+        """Test that every span of the package's own modules parses on its own."""
+        package = Path(__file__).parent.parent / 'velocitytree'
+        for path in list(package.rglob('*.py'))[:40]:
+            content = path.read_text()
+            lines = content.splitlines()
+            for start, end in top_level_spans(content):
+                ast.parse('\n'.join(lines[start - 1:end]))
+
+
+class TestAnalyzeSource:
+    """Test analysis of in-memory source."""
+
+    def test_does_not_read_the_file(self, tmp_path):
+        """Test that source is analyzed without the file existing."""
+        analyzer = CodeAnalyzer()
+
+        analysis = analyzer.analyze_source(tmp_path / 'missing.py', SOURCE)
+
+        assert analysis is not None
+        assert [f.name for f in analysis.functions] == ['first', 'second']
+
+    def test_analyze_file_shares_the_cache(self, tmp_path):
+        """Test that analyze_file reuses the result for the same content."""
+        file_path = tmp_path / 'sample.py'
+        file_path.write_text(SOURCE)
+        analyzer = CodeAnalyzer()
+
+        from_source = analyzer.analyze_source(file_path, SOURCE)
+        with patch.object(analyzer, '_analyze_content') as mock_analyze:
+            from_file = analyzer.analyze_file(file_path)
+
+        assert from_file is from_source
+        mock_analyze.assert_not_called()
+
+    def test_uncached_analysis(self, tmp_path):
+        """Test that cache=False leaves the caches alone."""
+        analyzer = CodeAnalyzer()
+
+        analyzer.analyze_source(tmp_path / 'sample.py', SOURCE, cache=False)
+
+        assert analyzer.cache == {}
+
+
+class TestIncrementalSuggestions:
+    """Test the block-incremental suggestion engine."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create a suggestion engine."""
+        return RealTimeSuggestionEngine()
+
+    @pytest.fixture
+    def file_path(self, tmp_path):
+        """Create a file whose saved content differs from the buffer."""
+        path = tmp_path / 'sample.py'
+        path.write_text('x = 1\n')
+        return path
+
+    def test_buffer_content_is_analyzed(self, engine, file_path):
+        """Test that unsaved edits are analyzed instead of the file on disk."""
+        suggestions = engine._analyze_sync(file_path, SOURCE)
+
+        messages = ' '.join(s.message for s in suggestions)
+        assert "'first'" in messages
+
+    def test_matches_whole_file_analysis(self, engine, file_path):
+        """Test that block results add up to those of the whole file."""
+        incremental = engine._analyze_sync(file_path, SOURCE)
+
+        whole_file = RealTimeSuggestionEngine(analyzer=engine.analyzer)
+        with patch('velocitytree.realtime_suggestions.top_level_spans', return_value=[]):
+            expected = whole_file._analyze_sync(file_path, SOURCE)
+
+        assert suggestion_keys(incremental) == suggestion_keys(expected)
+
+    def test_only_changed_blocks_are_reanalyzed(self, engine, file_path):
+        """Test that an edit reanalyzes only the definition it touches."""
+        engine._analyze_sync(file_path, SOURCE)
+        edited = SOURCE.replace('return x + 1', 'return x + 2')
+
+        with patch.object(engine.analyzer, 'analyze_source', wraps=engine.analyzer.analyze_source) as spy:
+            engine._analyze_sync(file_path, edited)
+
+        assert spy.call_count == 1
+        assert 'x + 2' in spy.call_args[0][1]
+
+    def test_suggestions_follow_moved_blocks(self, engine, file_path):
+        """Test that cached block suggestions are shifted to their new lines."""
+        before = engine._analyze_sync(file_path, SOURCE)
+        moved = SOURCE.replace('LIMIT = 5\n', 'LIMIT = 5\n\n\n\n')
+
+        with patch.object(engine.analyzer, 'analyze_source', wraps=engine.analyzer.analyze_source) as spy:
+            after = engine._analyze_sync(file_path, moved)
+
+        assert spy.call_count == 0
+
+        def lines_of(suggestions):
+            return sorted(s.range.start.line for s in suggestions if "'first'" in s.message)
+
+        assert lines_of(after) == [line + 3 for line in lines_of(before)]
+
+    def test_syntax_error_is_local(self, engine, file_path):
+        """Test that a broken definition does not hide the other blocks' suggestions."""
+        broken = SOURCE.replace('    return b\n', '    return b +\n')
+
+        suggestions = engine._analyze_sync(file_path, broken)
+
+        errors = [s for s in suggestions if s.message.startswith('Syntax error')]
+        assert [s.range.start.line for s in errors] == [17]
+        assert any("'first'" in s.message for s in suggestions)
+
+    @pytest.mark.asyncio
+    async def test_cache_is_keyed_by_content_hash(self, engine, file_path):
+        """Test that the file cache stores a hash rather than the content."""
+        engine.debounce_delay = 0
+
+        await engine.analyze_file_async(file_path, content=SOURCE)
+
+        assert engine.cache[file_path][0] == content_hash(SOURCE)
+
+    def test_clear_cache_drops_blocks(self, engine, file_path):
+        """Test that clearing a file's cache also drops its blocks."""
+        engine._analyze_sync(file_path, SOURCE)
+        assert engine.block_cache
+
+        engine.clear_cache(file_path)
+
+        assert not engine.block_cache
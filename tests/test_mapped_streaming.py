@@ -0,0 +1,90 @@
+"""Tests for memory-mapped file streaming."""
+
+import pytest
+from unittest.mock import patch
+
+from velocitytree.claude_integration import ContextStreamer, StreamConfig
+from velocitytree.claude_integration import streaming
+from velocitytree.claude_integration.streaming import MappedFile
+
+
+@pytest.fixture
+def small_blocks():
+    """Use tiny index blocks so that block boundaries are exercised."""
+    with patch.object(streaming, "LINE_INDEX_BLOCK", 16):
+        yield
+
+
+class TestMappedFile:
+    """Test the mmap-backed line reader."""
+    
+    def test_line_offsets(self, tmp_path, small_blocks):
+        """Test line lookup across index blocks."""
+        path = tmp_path / "data.txt"
+        lines = [f"row {i}" for i in range(100)]
+        path.write_text("\n".join(lines) + "\n")
+        
+        with MappedFile(path) as source:
+            assert source.lines(0, 3) == "row 0\nrow 1\nrow 2"
+            assert source.lines(57, 59) == "row 57\nrow 58"
+            assert source.lines(98, 150) == "row 98\nrow 99"
+            assert source.line_offset(100) is None
+    
+    def test_index_is_lazy(self, tmp_path, small_blocks):
+        """Test that reading the first lines does not scan the whole file."""
+        path = tmp_path / "data.txt"
+        path.write_text("line\n" * 1000)
+        
+        with MappedFile(path) as source:
+            source.lines(0, 2)
+            assert len(source._block_newlines) <= 2
+    
+    def test_empty_file(self, tmp_path):
+        """Test that empty files can be opened and yield nothing."""
+        path = tmp_path / "empty.txt"
+        path.write_text("")
+        
+        assert list(ContextStreamer().stream_file(path)) == []
+        with MappedFile(path) as source:
+            assert source.lines(0, 10) == ""
+
+
+class TestMappedStreaming:
+    """Test ContextStreamer.stream_file on mapped files."""
+    
+    def test_chunks_match_line_windows(self, tmp_path, small_blocks):
+        """Test that chunks are overlapping windows of whole lines."""
+        path = tmp_path / "data.sql"
+        lines = [f"INSERT INTO t VALUES ({i});" for i in range(200)]
+        path.write_text("\n".join(lines))
+        streamer = ContextStreamer(StreamConfig(chunk_size=1000, overlap=100))
+        
+        chunks = list(streamer.stream_file(path))
+        
+        assert chunks[0] == "\n".join(lines[0:20])
+        assert chunks[1] == "\n".join(lines[18:38])
+        assert chunks[-1].endswith(lines[-1])
+    
+    def test_focus_window(self, tmp_path, small_blocks):
+        """Test focused context without reading the whole file."""
+        path = tmp_path / "data.txt"
+        path.write_text("\n".join(f"Line {i}" for i in range(1, 501)))
+        
+        chunks = list(ContextStreamer().stream_file(path, focus_line=400, context_lines=20))
+        
+        assert chunks[0].splitlines()[0] == "Line 390"
+        assert chunks[0].splitlines()[-1] == "Line 410"
+        assert chunks[1].splitlines()[0] == "Line 380"
+        assert chunks[2].splitlines()[-1] == "Line 420"
+    
+    def test_huge_line_is_split(self, tmp_path):
+        """Test that a single long line is streamed in bounded pieces."""
+        path = tmp_path / "fixture.json"
+        path.write_text("[" + ", ".join('"élément"' for _ in range(5000)) + "]")
+        streamer = ContextStreamer(StreamConfig(chunk_size=100, overlap=0))
+        
+        chunks = list(streamer.stream_file(path))
+        
+        assert len(chunks) > 1
+        assert all(len(chunk.encode()) <= 100 * streaming.BYTES_PER_TOKEN for chunk in chunks)
+        assert "".join(chunks) == path.read_text()
@@ -381,4 +381,67 @@ def math_function(x, y):
         assert 'x' in visitor.operands
         assert 'y' in visitor.operands
         assert '2' in visitor.operands
-        assert '3' in visitor.operands
\ No newline at end of file
+        assert '3' in visitor.operands
+    
+    def test_single_pass_matches_per_function_walks(self, calculator):
+        """Test that the single-pass visitor matches separate walks."""
+        code = '''
+def outer(items):
+    if items:
+        def inner(x):
+            return [y for y in x if y and y > 1]
+        for item in items:
+            while item:
+                item -= 1
+    return lambda: None
+'''
+        
+        import ast
+        tree = ast.parse(code)
+        module_metrics, function_metrics = calculator.calculate_function_metrics(tree)
+        
+        assert module_metrics.cyclomatic_complexity == calculator.calculate_cyclomatic_complexity(tree)
+        assert module_metrics.cognitive_complexity == calculator.calculate_cognitive_complexity(tree)
+        
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef):
+                metrics = next(m for m in function_metrics.values() if m.line_start == node.lineno)
+                halstead = calculator.calculate_halstead_metrics(node)
+                
+                assert metrics.cyclomatic_complexity == calculator.calculate_cyclomatic_complexity(node)
+                assert metrics.cognitive_complexity == calculator.calculate_cognitive_complexity(node)
+                assert metrics.halstead.N1 == halstead.N1
+                assert metrics.halstead.N2 == halstead.N2
+        
+        assert ('outer.inner', 4, 5) in function_metrics
+    
+    def test_same_method_name_in_different_classes(self, analyzer):
+        """Test that methods sharing a name get their own complexity."""
+        code = '''
+class Simple:
+    def process(self):
+        return 1
+
+
+class Complex:
+    def process(self, items):
+        for item in items:
+            if item:
+                return item
+        return None
+'''
+        
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+            f.write(code)
+            temp_path = Path(f.name)
+        
+        try:
+            result = analyzer.analyze_file(temp_path)
+            complexities = {
+                cls.name: cls.methods[0].complexity for cls in result.classes
+            }
+            
+            assert complexities['Simple'] == 1
+            assert complexities['Complex'] == 3
+        finally:
+            temp_path.unlink()
@@ -0,0 +1,68 @@
+"""Test the shared parsed source unit."""
+
+import ast
+from unittest.mock import patch
+
+from velocitytree.code_analysis import CodeAnalyzer
+from velocitytree.code_analysis.source import ParsedUnit
+
+
+class TestParsedUnit:
+    """Test the ParsedUnit class."""
+
+    def test_from_source_parses_once(self):
+        """Test that a unit holds the parsed tree and line index."""
+        unit = ParsedUnit.from_source("test.py", "x = 1\ny = 2\n")
+
+        assert isinstance(unit.tree, ast.Module)
+        assert unit.syntax_error is None
+        assert unit.lines == ["x = 1", "y = 2"]
+        assert unit.line_offsets == [0, 6, 12]
+
+    def test_syntax_error_is_recorded(self):
+        """Test that syntax errors are kept instead of raised."""
+        unit = ParsedUnit.from_source("test.py", "def broken(\n")
+
+        assert unit.tree is None
+        assert isinstance(unit.syntax_error, SyntaxError)
+
+    def test_offsets_to_positions(self):
+        """Test line and column lookup from character offsets."""
+        code = "import os\npassword = 'x'\n"
+        unit = ParsedUnit.from_source("test.py", code, parse=False)
+        offset = code.index("password")
+
+        assert unit.line_number(offset) == code[:offset].count("\n") + 1
+        assert unit.column(offset) == 1
+        assert unit.get_line(2) == "password = 'x'"
+        assert unit.get_line(99) == ""
+
+    def test_get_lines(self):
+        """Test extracting an inclusive line range."""
+        unit = ParsedUnit.from_source("test.py", "a\nb\nc", parse=False)
+
+        assert unit.get_lines(2, 3) == "b\nc"
+        assert unit.get_lines(2, 4) is None
+
+    def test_tokens(self):
+        """Test lazy tokenization."""
+        unit = ParsedUnit.from_source("test.py", "x = 1\n")
+
+        assert any(tok.string == "x" for tok in unit.tokens)
+
+    def test_analyze_file_parses_once(self, tmp_path):
+        """Test that the analyzer parses each file a single time."""
+        test_file = tmp_path / "module.py"
+        test_file.write_text(
+            "import pickle\n\n"
+            "def load(data):\n"
+            "    assert data\n"
+            "    return pickle.loads(data)\n"
+        )
+
+        with patch("ast.parse", wraps=ast.parse) as mock_parse:
+            result = CodeAnalyzer().analyze_file(test_file)
+
+        assert result is not None
+        assert mock_parse.call_count == 1
+        assert any(i.rule_id.startswith("security-") for i in result.issues)
@@ -1,11 +1,21 @@
 """Test pattern detection functionality."""
 
+import ast
 import pytest
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
 from velocitytree.code_analysis import CodeAnalyzer
 from velocitytree.code_analysis.models import PatternType
+from velocitytree.code_analysis.patterns import (
+    CompiledDetectors,
+    PatternDetector,
+    PatternDetectorRegistry,
+    SHARED_PASS
+)
+from velocitytree.code_analysis.advanced_patterns import register_advanced_patterns
+from velocitytree.code_analysis.source import ParsedUnit
 
 
 class TestPatternDetection:
@@ -563,4 +573,97 @@ class UserService:
             assert strategy.metadata['interface'] == 'DatabaseConnection'
             assert len(strategy.metadata['implementations']) >= 2
         finally:
-            temp_path.unlink()
\ No newline at end of file
+            temp_path.unlink()
+
+class TestCompiledDetection:
+    """Test the single-pass detection engine."""
+    
+    CODE = '''
+import functools
+
+def timed(func):
+    @functools.wraps(func)
+    def wrapper(*args):
+        return func(*args)
+    return wrapper
+
+@timed
+def compute(values):
+    return sum(values) * 42
+'''
+    
+    @pytest.fixture
+    def module(self, tmp_path):
+        """Analyze the sample module without pattern detection."""
+        path = tmp_path / "module.py"
+        path.write_text(self.CODE)
+        analyzer = CodeAnalyzer()
+        with patch.object(analyzer, '_detect_patterns', return_value=[]):
+            return analyzer.analyze_file(path)
+    
+    @pytest.fixture
+    def registry(self):
+        """Create a registry with all built-in detectors."""
+        registry = PatternDetectorRegistry()
+        register_advanced_patterns(registry)
+        return registry
+    
+    def test_single_traversal_for_all_detectors(self, module, registry):
+        """Test that one AST walk feeds every detector."""
+        parsed = ParsedUnit.from_source(module.file_path, self.CODE)
+        
+        with patch("velocitytree.code_analysis.patterns.ast.walk", wraps=ast.walk) as mock_walk:
+            patterns = registry.detect_patterns(module, self.CODE, parsed)
+        
+        assert mock_walk.call_count == 1
+        assert "Decorator" in {p.name for p in patterns}
+    
+    def test_trigger_gating_and_timings(self, module, registry):
+        """Test that detectors without trigger matches are skipped and timed."""
+        registry.detect_patterns(module, self.CODE)
+        timings = registry.get_timings()
+        
+        assert timings["Factory"]["skipped"] == 1
+        assert timings["Factory"]["calls"] == 0
+        assert timings["Decorator"]["calls"] == 1
+        assert timings["Decorator"]["patterns"] > 0
+        assert SHARED_PASS in timings
+    
+    def test_disabled_patterns(self, module, registry):
+        """Test disabling detectors on the registry and per call."""
+        registry.disable("Decorator")
+        names = {p.name for p in registry.detect_patterns(module, self.CODE)}
+        assert "Decorator" not in names
+        assert "Magic Numbers" in names
+        
+        registry.enable("Decorator")
+        names = {p.name for p in registry.detect_patterns(
+            module, self.CODE, disabled=["Magic Numbers"]
+        )}
+        assert "Decorator" in names
+        assert "Magic Numbers" not in names
+    
+    def test_overlapping_triggers(self):
+        """Test that overlapping triggers of different detectors all match."""
+        class First(PatternDetector):
+            triggers = {"call": r'foo\.bar\('}
+        
+        class Second(PatternDetector):
+            triggers = {"attr": r'\bbar\b', "name": r'foo'}
+        
+        first, second = First(), Second()
+        parsed = ParsedUnit.from_source("test.py", "x = 1\nfoo.bar(x)\n", parse=False)
+        context = CompiledDetectors([first, second]).build_context(None, parsed)
+        
+        assert context.trigger_matches(first, "call") == [(2, "foo.bar(")]
+        assert context.trigger_matches(second, "attr") == [(2, "bar")]
+        assert context.trigger_matches(second, "name") == [(2, "foo")]
+    
+    def test_analyzer_config_disables_patterns(self, tmp_path):
+        """Test the disabled_patterns analyzer setting."""
+        path = tmp_path / "module.py"
+        path.write_text(self.CODE)
+        
+        result = CodeAnalyzer({'disabled_patterns': ["Decorator"]}).analyze_file(path)
+        
+        assert "Decorator" not in {p.name for p in result.patterns}
@@ -0,0 +1,116 @@
+"""
+Tests for the persistent project index.
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from velocitytree.core import ContextManager
+from velocitytree.project_index import ProjectIndex
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Small project with source, docs and an ignored directory."""
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "main.py").write_text("import os\n\nprint('main')\n")
+    (root / "src" / "util.js").write_text("let x = 1;\nlet y = 2;")
+    (root / "docs").mkdir()
+    (root / "docs" / "guide.md").write_text("# Guide\n")
+    (root / "build").mkdir()
+    (root / "build" / "out.py").write_text("X = 1\n")
+    (root / ".gitignore").write_text("build/\n")
+    return root
+
+
+def index_for(root):
+    """Create an index stored in the project's .velocitytree directory."""
+    return ProjectIndex(root)
+
+
+class TestProjectIndex:
+
+    def test_build(self, project):
+        """Test that one scan records paths, sizes, lines and languages."""
+        index = index_for(project)
+        assert index.refresh()["files_read"] == 4
+        
+        assert [f.path for f in index.files()] == [
+            ".gitignore", "docs/guide.md", "src/main.py", "src/util.js"
+        ]
+        assert index.directories() == ["docs", "src"]
+        
+        main = index.get("src/main.py")
+        assert main.lines == 3
+        assert main.language == "python"
+        assert main.size == (project / "src" / "main.py").stat().st_size
+        assert len(main.content_hash) == 64
+        assert index.get("src/util.js").lines == 2
+        assert (project / ".velocitytree" / "project_index.db").exists()
+        index.close()
+    
+    def test_unchanged_refresh_reads_nothing(self, project):
+        """Test that a refresh of an unchanged tree only stats files."""
+        index_for(project).refresh()
+        
+        index = index_for(project)
+        with patch("velocitytree.project_index.open", side_effect=AssertionError("file read")):
+            result = index.refresh()
+        
+        assert result == {"files_read": 0, "files_reused": 4, "files_removed": 0}
+        assert index.get("src/main.py").lines == 3
+        index.close()
+    
+    def test_changed_and_deleted_files(self, project):
+        """Test that modified files are re-read and deleted ones dropped."""
+        index = index_for(project)
+        index.refresh()
+        old_hash = index.get("src/main.py").content_hash
+        
+        main = project / "src" / "main.py"
+        main.write_text("print('changed')\n")
+        stat = main.stat()
+        os.utime(main, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        (project / "src" / "util.js").unlink()
+        
+        result = index.refresh()
+        assert result == {"files_read": 1, "files_reused": 2, "files_removed": 1}
+        assert index.get("src/main.py").lines == 1
+        assert index.get("src/main.py").content_hash != old_hash
+        assert index.get("src/util.js") is None
+        
+        reopened = index_for(project)
+        assert reopened.get("src/util.js") is None
+        assert reopened.get("src/main.py").lines == 1
+        index.close()
+        reopened.close()
+    
+    def test_refresh_interval(self, project):
+        """Test that a recent refresh is reused without walking the tree."""
+        index = ProjectIndex(project, persist=False, refresh_interval=60)
+        index.refresh()
+        (project / "src" / "new.py").write_text("X = 1\n")
+        
+        assert index.refresh()["files_read"] == 0
+        assert index.get("src/new.py") is None
+        assert index.refresh(force=True)["files_read"] == 1
+        index.close()
+
+
+class TestContextFromIndex:
+
+    def test_generate_context_uses_index(self, project):
+        """Test that context sections are built from the index."""
+        index = ProjectIndex(project, persist=False)
+        context = ContextManager(project, index=index).generate_context()
+        
+        assert context['code_summary']['languages']['.py'] == {'files': 1, 'lines': 3}
+        assert context['code_summary']['languages']['.js'] == {'files': 1, 'lines': 2}
+        paths = [f['path'] for f in context['structure']['files']]
+        assert os.path.join("build", "out.py") not in paths
+        assert os.path.join("src", "main.py") in paths
+        assert index.get_stats()["files"] == 4
+        index.close()
@@ -396,7 +396,7 @@ class TestRealTimeSuggestionEngine:
     @pytest.mark.asyncio
     async def test_analyze_file_async(self, engine, sample_module):
         """Test async file analysis."""
-        with patch.object(engine.analyzer, 'analyze_file', return_value=sample_module):
+        with patch.object(engine.analyzer, 'analyze_source', return_value=sample_module):
             with patch.object(engine.quality_checker, 'check_quality') as mock_quality:
                 mock_quality.return_value = Mock(issues=[])
                 
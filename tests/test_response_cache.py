@@ -0,0 +1,94 @@
+"""Tests for the SQLite-backed Claude response cache."""
+
+import json
+import time
+
+import pytest
+
+from velocitytree.claude_integration import ResponseCache
+from velocitytree.claude_integration.cache import CACHE_DB_NAME, SmartCache
+
+
+class TestResponseCacheStorage:
+    """Test the single-file cache storage."""
+    
+    def test_single_file_persistence(self, tmp_path):
+        """Test that entries, hits and stats survive a restart."""
+        cache = ResponseCache(cache_dir=tmp_path, max_size=10)
+        cache.set("key1", "value1", metadata={"model": "test"})
+        cache.get("key1")
+        cache.get("missing")
+        cache.close()
+        
+        assert [f.name for f in tmp_path.iterdir() if f.suffix == ".json"] == []
+        assert (tmp_path / CACHE_DB_NAME).exists()
+        
+        reopened = SmartCache(cache_dir=tmp_path, max_size=10)
+        assert len(reopened) == 1
+        assert reopened.get_stats()["hits"] == 1
+        assert reopened.get_stats()["misses"] == 1
+        assert reopened.get("key1") == "value1"
+        assert reopened.analyze_usage()["most_accessed"] == [{"key": "key1", "hits": 2}]
+    
+    def test_compression(self, tmp_path):
+        """Test that large bodies are stored compressed."""
+        cache = ResponseCache(cache_dir=tmp_path, compression="zlib", compress_min_size=100)
+        body = "def example():\n    return 42\n" * 200
+        cache.set("large", body)
+        cache.set("small", "short")
+        
+        assert cache.get("large") == body
+        assert cache.get("small") == "short"
+        stats = cache.get_stats()
+        assert stats["raw_bytes"] == len(body) + len("short")
+        assert stats["stored_bytes"] < stats["raw_bytes"] / 5
+    
+    def test_unknown_compression(self, tmp_path):
+        """Test that unsupported codecs are rejected."""
+        with pytest.raises(ValueError):
+            ResponseCache(cache_dir=tmp_path, compression="lzma")
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = ResponseCache(max_size=3, persist=False)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+            time.sleep(0.01)
+        cache.get("a")
+        cache.set("d", "d")
+        
+        assert "b" not in cache
+        assert all(key in cache for key in ("a", "c", "d"))
+        assert len(cache) == 3
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_replacing_keeps_size_and_priority(self):
+        """Test that overwriting an entry does not evict or reset priority."""
+        cache = SmartCache(max_size=2, persist=False)
+        cache.set_with_priority("important", "v1", priority=10)
+        cache.set("other", "v")
+        cache.set("important", "v2")
+        cache.set("new", "v")
+        
+        assert cache.get("important") == "v2"
+        assert "other" not in cache
+        assert cache.get_stats()["evictions"] == 1
+    
+    def test_legacy_entries_imported(self, tmp_path):
+        """Test that the old one-file-per-entry layout is migrated."""
+        now = time.time()
+        (tmp_path / "abc.json").write_text(json.dumps({
+            "key": "old", "value": "old value", "timestamp": now,
+            "hit_count": 7, "last_accessed": now, "metadata": {}
+        }))
+        (tmp_path / "metadata.json").write_text(json.dumps({
+            "stats": {"hits": 7, "misses": 2, "evictions": 1, "expirations": 0}
+        }))
+        
+        cache = SmartCache(cache_dir=tmp_path)
+        
+        assert cache.get("old") == "old value"
+        assert cache.get_stats()["hits"] == 8
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.analyze_usage()["most_accessed"][0]["hits"] == 8
+        assert not (tmp_path / "abc.json").exists()
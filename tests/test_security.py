@@ -9,6 +9,7 @@ from velocitytree.code_analysis.security import (
     VulnerabilityType,
     VulnerabilityPattern,
 )
+from velocitytree.code_analysis.matcher import MatchRule, MultiPatternMatcher, find_keywords
 from velocitytree.code_analysis.models import (
     SeverityLevel,
     SecurityCategory,
@@ -325,4 +326,109 @@ os.system("rm -rf " + user_input)
         vulns2 = security_scanner.scan_code(code2, Path("test.py"))
         sensitive_vulns2 = [v for v in vulns2 if v.type == VulnerabilityType.SENSITIVE_DATA_EXPOSURE.value]
         
-        assert len(sensitive_vulns1) > len(sensitive_vulns2)
\ No newline at end of file
+        assert len(sensitive_vulns1) > len(sensitive_vulns2)
+    
+    def test_config_file_secrets(self, security_analyzer, tmp_path):
+        """Test that YAML, JSON and .env files are scanned for secrets."""
+        (tmp_path / "settings.yaml").write_text("database:\n  password: hunter2hunter2\n  user: app\n")
+        (tmp_path / "config.json").write_text('{"api_key": "k3y-value-1234", "debug": true}\n')
+        (tmp_path / ".env").write_text("DB_PASSWORD=s3cr3tvalue\nAPI_TOKEN=${VAULT_TOKEN}\n")
+        (tmp_path / "app.py").write_text("import os\n")
+        
+        result = security_analyzer.analyze_directory(tmp_path)
+        
+        assert result['files_analyzed'] == 4
+        flagged = {
+            (Path(v.location.file_path).name, v.location.line_start)
+            for v in result['vulnerabilities']
+            if v.rule_id == "config-credentials"
+        }
+        assert flagged == {("settings.yaml", 2), ("config.json", 1), (".env", 1)}
+    
+    def test_rule_id_reported(self, security_scanner):
+        """Test that findings name the rule that matched."""
+        code = 'import random\ntoken = "ghp_' + 'a' * 36 + '"\nvalue = random.choice(items)\n'
+        vulns = security_scanner.scan_code(code, Path("test.py"))
+        
+        rule_ids = {(v.rule_id, v.location.line_start) for v in vulns}
+        assert ("github-token", 2) in rule_ids
+        assert ("hardcoded-credentials", 2) in rule_ids
+        assert ("insecure-random", 3) in rule_ids
+    
+    def test_add_pattern(self, security_scanner):
+        """Test registering an in-house secret signature."""
+        security_scanner.add_pattern(VulnerabilityPattern(
+            type=VulnerabilityType.HARDCODED_CREDENTIALS,
+            severity=SeverityLevel.CRITICAL,
+            category=SecurityCategory.AUTHENTICATION,
+            description="Internal service key",
+            pattern=r'vtk_[a-f0-9]{24}',
+            fix_suggestion="Rotate the key",
+            id="internal-service-key",
+            keywords=["vtk_"]
+        ))
+        
+        vulns = security_scanner.scan_code('KEY = "vtk_' + 'ab' * 12 + '"\n', Path("test.py"))
+        
+        assert any(v.rule_id == "internal-service-key" for v in vulns)
+
+
+class TestMultiPatternMatcher:
+    """Test the compiled multi-pattern matcher."""
+    
+    def test_overlapping_rules_all_reported(self):
+        """Test that rules matching overlapping text are all reported."""
+        matcher = MultiPatternMatcher([
+            MatchRule("call", r'os\.system\('),
+            MatchRule("name", r'system'),
+            MatchRule("word", r'\b\w+\b'),
+        ])
+        
+        matches = [(m.rule_id, m.start, m.text) for m in matcher.scan("os.system(cmd)")]
+        
+        assert ("call", 0, "os.system(") in matches
+        assert ("name", 3, "system") in matches
+        assert [m for m in matches if m[0] == "word"] == [
+            ("word", 0, "os"), ("word", 3, "system"), ("word", 10, "cmd")
+        ]
+    
+    def test_keyword_gating(self):
+        """Test that gated rules only run when a keyword is present."""
+        matcher = MultiPatternMatcher([
+            MatchRule("aws", r'AKIA[0-9A-Z]{16}', keywords=["AKIA"]),
+        ])
+        matcher.compile()
+        regex = matcher._regexes[id(matcher.rules[0])]
+        
+        assert matcher.scan("nothing to see here") == []
+        assert [m.rule_id for m in matcher.scan(b"key = AKIA" + b"A" * 16)] == ["aws"]
+        assert regex.pattern == 'AKIA[0-9A-Z]{16}'
+    
+    def test_matches_finditer(self):
+        """Test that results equal running each rule separately."""
+        import re
+        
+        rules = [
+            MatchRule("flags", r'select.*?from', re.IGNORECASE),
+            MatchRule("digits", r'\d+'),
+            MatchRule("backref", r'(\w)\1'),
+        ]
+        text = "SELECT a FROM t WHERE id = 1234 and x = 'aa' select b from u"
+        expected = sorted(
+            (m.start(), i, rule.rule_id, m.group())
+            for i, rule in enumerate(rules)
+            for m in re.finditer(rule.pattern, text, rule.flags)
+        )
+        
+        actual = [(m.start, m.rule_id, m.text) for m in MultiPatternMatcher(rules).scan(text)]
+        
+        assert actual == [(start, rule_id, found) for start, _, rule_id, found in expected]
+    
+    def test_find_keywords(self):
+        """Test that the keyword scan finds overlapping and repeated literals."""
+        keywords = frozenset(["password", "pass", "word", "sword", "token", "@"])
+        text = "a@b c@d password = x"
+        
+        assert find_keywords(text, keywords) == {"password", "pass", "word", "sword", "@"}
+        assert find_keywords("nothing", keywords) == set()
+        assert find_keywords(text, keywords) == {k for k in keywords if k in text}
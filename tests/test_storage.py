@@ -0,0 +1,193 @@
+"""
+Tests for the shared SQLite persistence layer.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+from velocitytree.storage import SQLiteStore, get_store
+from velocitytree.code_analysis.models import Severity
+from velocitytree.continuous_eval.alert_system import Alert, AlertSeverity, AlertSystem, AlertType
+from velocitytree.learning.feedback_collector import FeedbackDatabase, FeedbackEntry, FeedbackType
+from velocitytree.realtime_suggestions import SuggestionType
+from velocitytree.workflow_memory.memory_store import DecisionType, MemoryStore, WorkflowDecision
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store with a long flush interval, so only explicit flushes commit."""
+    store = SQLiteStore(tmp_path / "test.db", flush_interval=60, batch_size=1000)
+    store.executescript("""
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+    """)
+    yield store
+    store.close()
+
+
+def committed(store, sql="SELECT COUNT(*) FROM items"):
+    """Read through a separate connection, seeing only committed rows."""
+    with sqlite3.connect(store.db_path) as conn:
+        return conn.execute(sql).fetchone()[0]
+
+
+class TestSQLiteStore:
+    
+    def test_queued_writes_commit_together(self, store):
+        """Test that queued writes wait for a group commit."""
+        for i in range(10):
+            store.queue_write("INSERT INTO items (name) VALUES (?)", (f"item{i}",))
+        
+        assert committed(store) == 0
+        store.flush()
+        assert committed(store) == 10
+    
+    def test_reads_see_queued_writes(self, store):
+        """Test that reads flush the queue first."""
+        store.queue_write("INSERT INTO items (name) VALUES (?)", ("a",))
+        store.queue_write("UPDATE items SET name = ? WHERE name = ?", ("b", "a"))
+        
+        assert store.query("SELECT name FROM items") == [("b",)]
+    
+    def test_batch_size_triggers_commit(self, tmp_path):
+        """Test that a full batch is committed without waiting."""
+        store = SQLiteStore(tmp_path / "batch.db", flush_interval=60, batch_size=5)
+        store.executescript("CREATE TABLE items (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT)")
+        try:
+            for i in range(5):
+                store.queue_write("INSERT INTO items (name) VALUES (?)", (str(i),))
+            
+            for _ in range(100):
+                if committed(store) == 5:
+                    break
+                threading.Event().wait(0.05)
+            assert committed(store) == 5
+        finally:
+            store.close()
+    
+    def test_failed_row_does_not_drop_group(self, store):
+        """Test that one bad row is skipped and the rest are written."""
+        store.queue_write("INSERT INTO items (name) VALUES (?)", ("dup",))
+        store.queue_write("INSERT INTO items (name) VALUES (?)", ("dup",))
+        store.queue_write("INSERT INTO items (name) VALUES (?)", ("other",))
+        
+        assert store.query("SELECT name FROM items ORDER BY id") == [("dup",), ("other",)]
+    
+    def test_executemany_is_atomic(self, store):
+        """Test that bulk writes commit in one transaction or not at all."""
+        assert store.executemany("INSERT INTO items (name) VALUES (?)", [("a",), ("b",)]) == 2
+        
+        with pytest.raises(sqlite3.IntegrityError):
+            store.executemany("INSERT INTO items (name) VALUES (?)", [("c",), ("a",)])
+        assert store.query("SELECT name FROM items ORDER BY id") == [("a",), ("b",)]
+    
+    def test_next_id_reserves_unique_ids(self, store, tmp_path):
+        """Test that ids reserved by two stores never collide."""
+        other = SQLiteStore(tmp_path / "test.db", batch_size=3)
+        try:
+            store.execute("INSERT INTO items (name) VALUES (?)", ("existing",))
+            
+            ids = [store.next_id("items") for _ in range(4)] + [other.next_id("items") for _ in range(4)]
+            assert len(set(ids)) == len(ids)
+            assert min(ids) > 1
+            
+            for i in ids:
+                store.queue_write("INSERT INTO items (id, name) VALUES (?, ?)", (i, f"item{i}"))
+            store.execute("INSERT INTO items (name) VALUES (?)", ("after",))
+            assert store.query_one("SELECT id FROM items WHERE name = 'after'")[0] > max(ids)
+        finally:
+            other.close()
+    
+    def test_writes_from_many_threads(self, store):
+        """Test that concurrent writers share the store safely."""
+        def write(thread):
+            for i in range(50):
+                store.queue_write("INSERT INTO items (name) VALUES (?)", (f"{thread}-{i}",))
+        
+        threads = [threading.Thread(target=write, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert store.query_one("SELECT COUNT(*) FROM items")[0] == 400
+    
+    def test_close_flushes(self, store):
+        """Test that closing commits queued writes."""
+        store.queue_write("INSERT INTO items (name) VALUES (?)", ("last",))
+        store.close()
+        
+        assert committed(store) == 1
+        with pytest.raises(sqlite3.ProgrammingError):
+            store.queue_write("INSERT INTO items (name) VALUES (?)", ("late",))
+    
+    def test_get_store_is_shared(self, tmp_path):
+        """Test that one store is shared per database file."""
+        store = get_store(tmp_path / "shared.db")
+        try:
+            assert get_store(tmp_path / "shared.db") is store
+            assert get_store(str(tmp_path / "shared.db")) is store
+        finally:
+            store.close()
+        assert get_store(tmp_path / "shared.db") is not store
+
+
+class TestStoreClients:
+    
+    def test_alert_ids_and_bulk_alerts(self, tmp_path):
+        """Test that queued and bulk alerts get distinct ids."""
+        alerts = AlertSystem(tmp_path / "alerts.db")
+        try:
+            single = alerts.create_alert(AlertType.DRIFT_DETECTED, AlertSeverity.INFO, "one", "first")
+            bulk = alerts.store_alerts([
+                Alert(AlertType.COVERAGE_DROP, AlertSeverity.WARNING, f"bulk{i}", "bulk")
+                for i in range(20)
+            ])
+            
+            ids = [single.alert_id] + [alert.alert_id for alert in bulk]
+            assert len(set(ids)) == 21
+            assert sorted(a.alert_id for a in alerts.get_alerts(limit=100)) == sorted(ids)
+            
+            alerts.resolve_alert(single.alert_id)
+            assert alerts.get_alert_summary()["total_unresolved"] == 20
+        finally:
+            alerts.store.close()
+    
+    def test_memory_store_bulk_decisions(self, tmp_path):
+        """Test bulk decisions alongside queued outcomes."""
+        memory = MemoryStore(tmp_path / "memory.db")
+        try:
+            decisions = [
+                WorkflowDecision(decision_type=DecisionType.TESTING, decision=f"d{i}", confidence=0.5)
+                for i in range(10)
+            ]
+            assert memory.add_decisions(decisions) == 10
+            assert memory.add_decisions(decisions[:1]) == 0
+            
+            assert memory.update_outcome(decisions[0].id, "done", success=True)
+            assert memory.get_decision(decisions[0].id).outcome == "done"
+            assert memory.get_statistics()["total_decisions"] == 10
+        finally:
+            memory.store.close()
+    
+    def test_feedback_batch(self, tmp_path):
+        """Test bulk feedback alongside queued feedback."""
+        db = FeedbackDatabase(tmp_path / "feedback.db")
+        try:
+            def entry(i):
+                return FeedbackEntry(
+                    id=f"fb{i}", timestamp=datetime.now(), user_id="user", session_id="s",
+                    suggestion_hash="hash", suggestion_type=SuggestionType.STYLE,
+                    severity=Severity.INFO, feedback_type=FeedbackType.ACCEPTED
+                )
+            
+            assert db.add_feedback_batch([entry(i) for i in range(5)]) == 5
+            db.add_feedback(entry(5))
+            assert len(db.get_feedback_for_suggestion("hash")) == 6
+        finally:
+            db.store.close()
@@ -0,0 +1,115 @@
+"""Test streaming, memory-bounded directory analysis."""
+
+import pytest
+
+from velocitytree.code_analysis import CodeAnalyzer, AnalysisSummary
+from velocitytree.code_analysis.models import CodeLocation, Pattern, PatternType
+from velocitytree.code_analysis.streaming import SuggestionAccumulator, iter_records
+
+
+COMPLEX_CODE = '''
+def tangled(a, b, c):
+    if a:
+        if b:
+            for i in range(c):
+                if i % 2:
+                    while b:
+                        b -= 1
+                elif i % 3:
+                    return i
+                elif i % 5:
+                    return -i
+                elif i % 7:
+                    return i * 2
+                else:
+                    continue
+    return None
+
+
+def helper(x):
+    return x + 1
+'''
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Small project with one unparsable file."""
+    root = tmp_path / "project"
+    root.mkdir()
+    for i in range(4):
+        (root / f"module{i}.py").write_text(COMPLEX_CODE)
+    (root / "pkg").mkdir()
+    (root / "pkg" / "util.py").write_text('"""Utilities."""\n\nVALUE = 42\n')
+    (root / "broken.js").write_text("function (")
+    return root
+
+
+class TestStreamingAnalysis:
+    """Test CodeAnalyzer.analyze_directory_streaming."""
+
+    def test_summary_matches_in_memory_result(self, project):
+        """Test that streamed aggregates equal the in-memory ones."""
+        result = CodeAnalyzer().analyze_directory(project)
+        summary = CodeAnalyzer().analyze_directory_streaming(project)
+
+        assert isinstance(summary, AnalysisSummary)
+        assert summary.files_analyzed == result.files_analyzed
+        assert summary.total_lines == result.total_lines
+        assert summary.language_breakdown == result.language_breakdown
+        assert summary.aggregate_metrics == result.aggregate_metrics
+        assert summary.total_issues == len(result.all_issues)
+        assert summary.total_patterns == len(result.all_patterns)
+        assert [s.title for s in summary.suggestions] == [s.title for s in result.suggestions]
+        assert summary.error_files == result.error_files
+
+    def test_jsonl_output(self, project, tmp_path):
+        """Test that records are written as JSON Lines and read back lazily."""
+        output = tmp_path / "out" / "analysis.jsonl"
+        summary = CodeAnalyzer().analyze_directory_streaming(project, output_path=output)
+
+        records = list(iter_records(output))
+        assert records[0]['type'] == 'header'
+        assert records[-1]['type'] == 'summary'
+        assert records[-1]['data']['files_analyzed'] == summary.files_analyzed
+
+        modules = [r['data'] for r in iter_records(output, 'module')]
+        assert len(modules) == summary.files_analyzed
+        assert all(m['language'] == 'python' for m in modules)
+        assert sum(len(m['issues']) for m in modules) == summary.total_issues
+        assert [r['data']['file_path'] for r in iter_records(output, 'error')] == summary.error_files
+
+    def test_callback_and_released_results(self, project):
+        """Test that modules go to the callback and are not kept afterwards."""
+        analyzer = CodeAnalyzer()
+        seen = []
+        summary = analyzer.analyze_directory_streaming(project, module_callback=seen.append)
+
+        assert len(seen) == summary.files_analyzed
+        assert analyzer.cache
+        assert all(result is None for _, result in analyzer.cache.values())
+
+    def test_parallel_streaming(self, project):
+        """Test that results stream from worker processes."""
+        serial = CodeAnalyzer().analyze_directory_streaming(project)
+        progress = []
+        parallel = CodeAnalyzer({'chunk_size': 1}).analyze_directory_streaming(
+            project, jobs=2, progress_callback=lambda done, total: progress.append((done, total))
+        )
+
+        assert parallel.files_analyzed == serial.files_analyzed
+        assert parallel.issue_counts == serial.issue_counts
+        assert progress[-1] == (6, 6)
+
+    def test_bounded_suggestions(self):
+        """Test that only the highest-ranked suggestions are kept."""
+        accumulator = SuggestionAccumulator(max_suggestions=3)
+        for i in range(10):
+            accumulator.add_pattern(Pattern(
+                pattern_type=PatternType.ANTI_PATTERN,
+                name="God Class",
+                description="Too big",
+                location=CodeLocation(file_path=f"file{i}.py", line_start=1, line_end=100)
+            ))
+
+        suggestions = accumulator.result()
+        assert [s.location.file_path for s in suggestions] == ["file0.py", "file1.py", "file2.py"]
@@ -9,7 +9,21 @@ __version__ = "2.0.0"
 __author__ = "Guntram Bechtold"
 __license__ = "MIT"
 
-from .core import TreeFlattener, ContextManager
-from .cli import main
+# Public names are imported on first access, so that importing a
+# submodule (or starting the CLI) does not load every subsystem
+_LAZY_ATTRIBUTES = {
+    "TreeFlattener": ".core",
+    "ContextManager": ".core",
+    "main": ".cli",
+}
 
-__all__ = ["TreeFlattener", "ContextManager", "main"]
\ No newline at end of file
+__all__ = ["TreeFlattener", "ContextManager", "main"]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
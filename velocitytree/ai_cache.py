@@ -0,0 +1,525 @@
+"""
+Shared cache of AI responses keyed on prompts and file contents.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .claude_integration.cache import DEFAULT_CACHE_DIR, CacheEntry, ResponseCache
+from .utils import logger
+
+
+# Bump when the stored columns or their meaning change
+AI_CACHE_FORMAT_VERSION = 1
+
+# Number of hash functions in a prompt's MinHash signature
+SIGNATURE_SIZE = 128
+
+# Most recently used entries compared when looking for a similar prompt
+MAX_SIMILARITY_CANDIDATES = 256
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(0x5eed)
+_PERM_A = _rng.randint(1, 1 << 31, size=(SIGNATURE_SIZE, 1)).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=(SIGNATURE_SIZE, 1)).astype(np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize line endings and trailing whitespace of prompt text."""
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip()
+
+
+def normalize_variables(value: Any) -> Any:
+    """Normalize template variables into a canonical, JSON-serializable form."""
+    if isinstance(value, str):
+        return normalize_text(value)
+    if isinstance(value, dict):
+        return {str(k): normalize_variables(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalize_variables(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(normalize_variables(v) for v in value)
+    if isinstance(value, Path):
+        return value.as_posix()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def text_signature(text: str) -> np.ndarray:
+    """Compute a MinHash signature of the word 3-shingles of a text.
+    
+    The fraction of equal positions in two signatures estimates the
+    Jaccard similarity of the texts' shingle sets.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) >= 3:
+        shingles = {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+    else:
+        shingles = {' '.join(words)}
+    values = np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles)
+    )
+    hashed = (_PERM_A * values + _PERM_B) % np.uint64(_MERSENNE_PRIME)
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+class FileHasher:
+    """Hashes file contents, reusing a hash while size and mtime match."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known: Dict[str, Tuple[int, int, Optional[str]]] = {}
+    
+    def hash(self, path: str) -> Optional[str]:
+        """Get the SHA-256 of a file, or None if it cannot be read."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            known = self._known.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        
+        try:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            content_hash = digest.hexdigest()
+        except OSError:
+            content_hash = None
+        with self._lock:
+            self._known[path] = (stat.st_size, stat.st_mtime_ns, content_hash)
+        return content_hash
+    
+    def forget(self, paths: Optional[Iterable[str]] = None):
+        """Drop remembered hashes of some or all files."""
+        with self._lock:
+            if paths is None:
+                self._known.clear()
+            for path in paths or ():
+                self._known.pop(path, None)
+
+
+@dataclass(frozen=True)
+class PromptKey:
+    """Identity of an AI request for caching.
+    
+    Attributes:
+        namespace: Provider, model and sampling settings
+        template: Name of the prompt template
+        scope: Digest of namespace, template, variables and file hashes;
+            only entries with the same scope are compared for similarity
+        slot: Digest of everything except file hashes; entries in the same
+            slot with other file hashes are outdated versions
+        digest: Exact cache key
+        dependencies: (path, content hash) of every file the answer depends on
+        text: Normalized prompt text
+    """
+    namespace: str
+    template: str
+    scope: str
+    slot: str
+    digest: str
+    dependencies: Tuple[Tuple[str, Optional[str]], ...]
+    text: str
+
+
+def make_prompt_key(
+    namespace: str,
+    template: str,
+    text: str,
+    variables: Optional[Dict[str, Any]] = None,
+    files: Optional[Iterable[Union[str, Path]]] = None,
+    hasher: Optional[FileHasher] = None
+) -> PromptKey:
+    """Build the cache key of a request.
+    
+    Args:
+        namespace: Provider, model and sampling settings
+        template: Name of the prompt template
+        text: Prompt text, compared for similarity
+        variables: Template variables that must match exactly
+        files: Files whose content the answer depends on
+        hasher: Hasher remembering file hashes between calls
+    
+    Returns:
+        Key for AIResponseCache.get and set
+    """
+    hasher = hasher or FileHasher()
+    dependencies = tuple(sorted(
+        (path, hasher.hash(path))
+        for path in {os.path.abspath(str(f)) for f in files or ()}
+    ))
+    text = normalize_text(text)
+    exact = json.dumps(
+        [namespace, template, normalize_variables(variables or {})],
+        sort_keys=True, separators=(',', ':')
+    )
+    deps = json.dumps(dependencies, separators=(',', ':'))
+    
+    scope = _digest(exact, deps)
+    return PromptKey(
+        namespace=namespace,
+        template=template,
+        scope=scope,
+        slot=_digest(exact, text),
+        digest=_digest(scope, text),
+        dependencies=dependencies,
+        text=text
+    )
+
+
+class AIResponseCache(ResponseCache):
+    """Cache of AI responses shared by all providers.
+    
+    Requests are keyed on the prompt template name, normalized variables and
+    the content hashes of the files they depend on, so touching a file or
+    reordering a context dictionary does not cause a miss. An answer is
+    dropped as soon as a file it depends on changes. With a similarity
+    threshold, a prompt that misses can reuse the answer to a near-duplicate
+    prompt with the same template, variables and files, found by comparing
+    MinHash signatures.
+    
+    Responses are stored by the ResponseCache backend, in the same database,
+    with its compression, LRU eviction and persisted statistics; the prompt
+    signatures and file dependencies are kept in tables next to its entries.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_size: int = 10000,
+        similarity_threshold: Optional[float] = None,
+        persist: bool = True,
+        **kwargs
+    ):
+        """Initialize the cache.
+        
+        Args:
+            cache_dir: Directory of the cache database, defaults to
+                ~/.velocitytree/claude_cache
+            max_size: Maximum number of cached responses
+            similarity_threshold: Estimated Jaccard similarity above which a
+                near-duplicate prompt's answer is reused; None for exact
+                matches only
+            persist: Store the cache on disk; otherwise keep it in memory
+            **kwargs: Passed to ResponseCache, e.g. compression
+        """
+        cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        if persist:
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.debug(f"Keeping AI response cache in memory: {e}")
+                persist = False
+        
+        self.similarity_threshold = similarity_threshold
+        self.hasher = FileHasher()
+        super().__init__(cache_dir=cache_dir, max_size=max_size, persist=persist, **kwargs)
+        self._stats.setdefault("similar_hits", 0)
+        self._stats.setdefault("invalidations", 0)
+    
+    def _init_database(self):
+        """Initialize the backend schema and the prompt tables next to it."""
+        super()._init_database()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'prompt_version'").fetchone()
+            if row is None or row[0] != str(AI_CACHE_FORMAT_VERSION):
+                self._conn.execute("DROP TABLE IF EXISTS prompts")
+                self._conn.execute("DROP TABLE IF EXISTS dependencies")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('prompt_version', ?)",
+                    (str(AI_CACHE_FORMAT_VERSION),)
+                )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS prompts (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    template TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    slot TEXT NOT NULL,
+                    signature BLOB NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS dependencies (
+                    key TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    content_hash TEXT,
+                    PRIMARY KEY (key, path)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_prompts_scope ON prompts(scope)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_prompts_slot ON prompts(slot)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_dependencies_path ON dependencies(path)")
+            
+            # Entries dropped by a backend format change take their prompts along
+            self._conn.execute("DELETE FROM prompts WHERE key NOT IN (SELECT key FROM entries)")
+            self._conn.execute("DELETE FROM dependencies WHERE key NOT IN (SELECT key FROM entries)")
+            self._conn.commit()
+    
+    def make_key(
+        self,
+        namespace: str,
+        template: str,
+        text: str,
+        variables: Optional[Dict[str, Any]] = None,
+        files: Optional[Iterable[Union[str, Path]]] = None
+    ) -> PromptKey:
+        """Build the cache key of a request, see make_prompt_key."""
+        return make_prompt_key(namespace, template, text, variables, files, self.hasher)
+    
+    def get(self, key: PromptKey, similarity_threshold: Optional[float] = None) -> Optional[str]:
+        """Get the answer to a request or to a near-duplicate of it.
+        
+        Args:
+            key: Key from make_key
+            similarity_threshold: Overrides the cache's threshold for this lookup
+        
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._load_entry(key.digest)
+            if entry is not None and self._is_expired(entry):
+                self._delete_row(entry.key)
+                self._stats["expirations"] += 1
+                entry = None
+            similar = False
+            
+            threshold = self.similarity_threshold if similarity_threshold is None else similarity_threshold
+            if entry is None and threshold is not None:
+                match = self._find_similar(key, threshold)
+                if match is not None:
+                    entry = self._load_entry(match)
+                    similar = True
+            
+            if entry is None:
+                self._stats["misses"] += 1
+                self._conn.commit()
+                return None
+            
+            self._conn.execute(
+                "UPDATE entries SET hit_count = hit_count + 1, last_accessed = ? WHERE key = ?",
+                (now, entry.key)
+            )
+            self._conn.commit()
+            self._stats["similar_hits" if similar else "hits"] += 1
+            return entry.value
+    
+    def _find_similar(self, key: PromptKey, threshold: float) -> Optional[str]:
+        """Find the most similar live prompt above the threshold within the key's scope."""
+        rows = self._conn.execute(
+            "SELECT prompts.key, prompts.signature, entries.timestamp, entries.metadata "
+            "FROM prompts JOIN entries ON entries.key = prompts.key "
+            "WHERE prompts.scope = ? ORDER BY entries.last_accessed DESC LIMIT ?",
+            (key.scope, MAX_SIMILARITY_CANDIDATES)
+        ).fetchall()
+        candidates = []
+        for candidate, signature, timestamp, metadata in rows:
+            entry = CacheEntry(
+                key=candidate, value=None, timestamp=timestamp,
+                metadata=json.loads(metadata) if metadata else {}
+            )
+            if self._is_expired(entry):
+                self._delete_row(candidate)
+                self._stats["expirations"] += 1
+            else:
+                candidates.append((candidate, signature))
+        if not candidates:
+            return None
+        
+        signatures = np.frombuffer(
+            b''.join(r[1] for r in candidates), dtype=np.uint32
+        ).reshape(len(candidates), -1)
+        similarity = (signatures == text_signature(key.text)).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] >= threshold:
+            return candidates[best][0]
+        return None
+    
+    def set(self, key: PromptKey, response: str, ttl: Optional[float] = None):
+        """Store the answer to a request.
+        
+        Answers to the same prompt that were computed from other versions of
+        its files are dropped.
+        
+        Args:
+            key: Key from make_key
+            response: Response text
+            ttl: Seconds the answer stays valid, forever if None
+        """
+        with self._lock:
+            stale = [
+                row[0] for row in self._conn.execute(
+                    "SELECT key FROM prompts WHERE slot = ? AND key != ?", (key.slot, key.digest)
+                ).fetchall()
+            ]
+            for stale_key in stale:
+                self._delete_row(stale_key)
+            self._stats["invalidations"] += len(stale)
+            self._conn.commit()
+        
+        super().set(key.digest, response, metadata={"expires": time.time() + ttl if ttl else None})
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompts (key, namespace, template, scope, slot, signature) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key.digest, key.namespace, key.template, key.scope, key.slot,
+                    text_signature(key.text).tobytes()
+                )
+            )
+            self._conn.execute("DELETE FROM dependencies WHERE key = ?", (key.digest,))
+            self._conn.executemany(
+                "INSERT INTO dependencies (key, path, content_hash) VALUES (?, ?, ?)",
+                [(key.digest, path, content_hash) for path, content_hash in key.dependencies]
+            )
+            self._conn.commit()
+    
+    def invalidate(self, paths: Iterable[Union[str, Path]]) -> int:
+        """Drop every answer that depends on any of the given files.
+        
+        Returns:
+            Number of answers dropped
+        """
+        paths = [os.path.abspath(str(p)) for p in paths]
+        with self._lock:
+            self.hasher.forget(paths)
+            keys = set()
+            for path in paths:
+                keys.update(
+                    row[0] for row in self._conn.execute(
+                        "SELECT key FROM dependencies WHERE path = ?", (path,)
+                    )
+                )
+            for key in keys:
+                self._delete_row(key)
+            self._stats["invalidations"] += len(keys)
+            self._conn.commit()
+        return len(keys)
+    
+    def invalidate_changed(self) -> int:
+        """Drop every answer whose files changed since it was stored.
+        
+        Only files whose size or mtime changed are read again.
+        
+        Returns:
+            Number of answers dropped
+        """
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT DISTINCT path, content_hash FROM dependencies"
+            ).fetchall()
+            current: Dict[str, Optional[str]] = {}
+            changed = []
+            for path, content_hash in stored:
+                if path not in current:
+                    current[path] = self.hasher.hash(path)
+                if current[path] != content_hash:
+                    changed.append((path, content_hash))
+            
+            keys = set()
+            for path, content_hash in changed:
+                keys.update(
+                    row[0] for row in self._conn.execute(
+                        "SELECT key FROM dependencies WHERE path = ? AND content_hash IS ?",
+                        (path, content_hash)
+                    )
+                )
+            for key in keys:
+                self._delete_row(key)
+            self._stats["invalidations"] += len(keys)
+            self._conn.commit()
+        
+        if keys:
+            logger.debug(f"Dropped {len(keys)} AI responses for {len(changed)} changed files")
+        return len(keys)
+    
+    def clear(self):
+        """Drop all cached responses and reset the statistics."""
+        super().clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM prompts")
+            self._conn.execute("DELETE FROM dependencies")
+            self._stats.update(similar_hits=0, invalidations=0)
+            self._conn.commit()
+        self.hasher.forget()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        stats = super().get_stats()
+        lookups = stats["hits"] + stats["similar_hits"] + stats["misses"]
+        stats["total_requests"] = lookups
+        stats["hit_rate"] = (stats["hits"] + stats["similar_hits"]) / lookups if lookups else 0
+        return stats
+    
+    def _is_expired(self, entry: CacheEntry) -> bool:
+        """Check expiry against the answer's own TTL.
+        
+        Entries stored through ResponseCache itself keep its TTL.
+        """
+        metadata = entry.metadata or {}
+        if "expires" in metadata:
+            expires = metadata["expires"]
+            return expires is not None and expires <= time.time()
+        return super()._is_expired(entry)
+    
+    def _delete_row(self, key: str) -> bool:
+        """Delete an entry together with its prompt and dependency records."""
+        self._conn.execute("DELETE FROM prompts WHERE key = ?", (key,))
+        self._conn.execute("DELETE FROM dependencies WHERE key = ?", (key,))
+        return super()._delete_row(key)
+
+
+def _digest(*parts: str) -> str:
+    """Hash strings into a hex digest."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# Caches shared by every client in this process
+_caches: Dict[str, AIResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_ai_cache(cache_dir: Optional[Union[str, Path]] = None) -> AIResponseCache:
+    """Get the shared response cache stored in a directory.
+    
+    Answers whose files changed since the last run are dropped when a
+    cache is first opened.
+    
+    Args:
+        cache_dir: Directory of the cache database, defaults to
+            ~/.velocitytree/claude_cache
+    
+    Returns:
+        Cache shared by all callers in this process
+    """
+    path = str(Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = AIResponseCache(path)
+            cache.invalidate_changed()
+    return cache
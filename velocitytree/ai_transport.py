@@ -0,0 +1,238 @@
+"""
+Pooled async HTTP transport for AI providers.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import aiohttp
+
+from .utils import logger
+
+
+class TransientAPIError(ConnectionError):
+    """A request that may succeed when retried (rate limit, overload, network)."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket limiting the request rate of one provider."""
+    
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        """Initialize the limiter.
+        
+        Args:
+            requests_per_minute: Sustained request rate
+            burst: Requests allowed back to back, defaults to one second's worth
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # Created on first use so it binds to the loop that runs the requests
+        self._lock: Optional[asyncio.Lock] = None
+    
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+    
+    def pause(self, seconds: float):
+        """Stop handing out requests for a while, e.g. after a 429 response."""
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class HTTPTransport:
+    """A keep-alive HTTP session shared by all requests to one provider.
+    
+    The session and its connection pool are created on first use and
+    reused for every later request, so TLS handshakes happen once per
+    connection rather than once per call. Concurrency is capped by a
+    semaphore and, optionally, the request rate by a token bucket.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        timeout: float = 120.0
+    ):
+        """Initialize the transport.
+        
+        Args:
+            base_url: URL that request paths are relative to
+            headers: Headers sent with every request
+            max_concurrency: Requests in flight at once
+            requests_per_minute: Rate limit, unlimited if None
+            timeout: Total time allowed per request in seconds
+        """
+        self.base_url = base_url.rstrip('/')
+        self.headers = dict(headers or {})
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "throttled": 0
+        }
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a JSON payload and return the decoded response.
+        
+        Raises:
+            TransientAPIError: On rate limiting, server errors and network
+                failures, which are worth retrying
+            ValueError: On other error responses
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            if self._limiter:
+                await self._limiter.acquire()
+            
+            self._stats["requests"] += 1
+            try:
+                async with self._get_session().post(f"{self.base_url}{path}", json=payload) as response:
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+                    
+                    error_text = await response.text()
+                    self._stats["errors"] += 1
+                    if response.status == 429 or response.status >= 500:
+                        retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                        if response.status == 429:
+                            self._stats["throttled"] += 1
+                            if self._limiter and retry_after:
+                                self._limiter.pause(retry_after)
+                        raise TransientAPIError(
+                            f"HTTP {response.status}: {error_text[:200]}", retry_after
+                        )
+                    raise ValueError(f"HTTP {response.status}: {error_text[:500]}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._stats["errors"] += 1
+                raise TransientAPIError(f"Request to {self.base_url} failed: {e}") from e
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request statistics."""
+        return dict(self._stats, max_concurrency=self.max_concurrency)
+    
+    async def close(self):
+        """Close the session and its connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class EventLoopThread:
+    """An event loop running in a daemon thread.
+    
+    Synchronous code submits coroutines to it instead of creating or
+    re-entering event loops, and loop-bound resources such as HTTP
+    sessions live on it for the lifetime of the process.
+    """
+    
+    def __init__(self, name: str = "velocitytree-ai"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the loop."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro: Awaitable) -> Any:
+        """Run a coroutine on the loop and wait for its result."""
+        if self.in_loop():
+            raise RuntimeError("Cannot block on the AI event loop from inside it")
+        return self.submit(coro).result()
+    
+    def in_loop(self) -> bool:
+        """Whether the caller is running on this loop."""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+
+_loop_thread: Optional[EventLoopThread] = None
+_transports: Dict[Tuple, HTTPTransport] = {}
+_lock = threading.Lock()
+
+
+def get_loop_thread() -> EventLoopThread:
+    """Get the event loop shared by all AI clients in this process."""
+    global _loop_thread
+    with _lock:
+        if _loop_thread is None:
+            _loop_thread = EventLoopThread()
+        return _loop_thread
+
+
+def get_transport(
+    base_url: str,
+    headers: Optional[Dict[str, str]] = None,
+    max_concurrency: int = 8,
+    requests_per_minute: Optional[float] = None,
+    timeout: float = 120.0
+) -> HTTPTransport:
+    """Get the pooled transport for a provider endpoint and credentials.
+    
+    Transports are shared by every client using the same endpoint and
+    headers, so the concurrency and rate limits apply per provider rather
+    than per client object.
+    """
+    key = (base_url, tuple(sorted((headers or {}).items())))
+    with _lock:
+        transport = _transports.get(key)
+        if transport is None:
+            transport = _transports[key] = HTTPTransport(
+                base_url, headers, max_concurrency, requests_per_minute, timeout
+            )
+            logger.debug(f"Created AI transport for {base_url}")
+        return transport
@@ -1,16 +1,41 @@
 """Claude integration for enhanced AI capabilities."""
 
-from .provider import LocalClaudeProvider, ClaudeConfig
-from .streaming import ContextStreamer, StreamConfig
-from .prompts import PromptManager, PromptTemplate
-from .cache import ResponseCache
+# Public names are imported on first access, so that the response cache
+# backend can be imported without loading the provider, which itself
+# depends on the shared AI cache built on that backend
+_LAZY_ATTRIBUTES = {
+    'LocalClaudeProvider': '.provider',
+    'ClaudeConfig': '.provider',
+    'BatchResult': '.provider',
+    'ContextStreamer': '.streaming',
+    'StreamConfig': '.streaming',
+    'ContextPacker': '.packing',
+    'ChunkCache': '.packing',
+    'PackedContext': '.packing',
+    'PromptManager': '.prompts',
+    'PromptTemplate': '.prompts',
+    'ResponseCache': '.cache',
+}
 
 __all__ = [
     'LocalClaudeProvider',
     'ClaudeConfig',
+    'BatchResult',
     'ContextStreamer',
     'StreamConfig',
+    'ContextPacker',
+    'ChunkCache',
+    'PackedContext',
     'PromptManager',
     'PromptTemplate',
     'ResponseCache',
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,15 +2,28 @@
 
 import time
 import json
+import sqlite3
+import zlib
 from pathlib import Path
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, asdict
-import hashlib
+from typing import Optional, Dict, Any, Iterator
+from dataclasses import dataclass
 import threading
 
 from ..utils import logger
 
 
+# Bump when the table layout changes; older databases are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+CACHE_DB_NAME = "responses.db"
+
+DEFAULT_CACHE_DIR = Path.home() / ".velocitytree" / "claude_cache"
+
+COMPRESSION_CODECS = (None, "zlib", "zstd")
+
+_ENTRY_COLUMNS = "key, value, codec, size, timestamp, hit_count, last_accessed, metadata, priority"
+
+
 @dataclass
 class CacheEntry:
     """Single cache entry."""
@@ -22,15 +35,53 @@ class CacheEntry:
     metadata: Dict[str, Any] = None
 
 
+def _zstd():
+    """Import the optional zstandard module."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression requires the zstandard package: pip install zstandard")
+    return zstandard
+
+
+def _compress(value: str, codec: Optional[str]) -> bytes:
+    """Encode and compress a response body."""
+    data = value.encode('utf-8')
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _decompress(data: bytes, codec: Optional[str]) -> str:
+    """Decompress and decode a stored response body."""
+    if codec == "zlib":
+        data = zlib.decompress(data)
+    elif codec == "zstd":
+        data = _zstd().ZstdDecompressor().decompress(data)
+    return data.decode('utf-8')
+
+
 class ResponseCache:
-    """Intelligent cache for Claude responses."""
+    """Intelligent cache for Claude responses.
+    
+    Entries live in a single SQLite database (WAL mode) in the cache
+    directory, or in memory when persistence is disabled. Nothing is loaded
+    up front: lookups go to the primary key index, and the least recently
+    used entry is found through an index on the access time, so both stay
+    fast with tens of thousands of entries. Large response bodies can be
+    stored compressed with zlib or, if installed, zstd.
+    """
     
     def __init__(
         self,
         cache_dir: Optional[Path] = None,
         ttl: int = 3600,
         max_size: int = 1000,
-        persist: bool = True
+        persist: bool = True,
+        compression: Optional[str] = None,
+        compress_min_size: int = 1024
     ):
         """Initialize response cache.
         
@@ -39,14 +90,21 @@ class ResponseCache:
             ttl: Time to live in seconds
             max_size: Maximum cache entries
             persist: Whether to persist cache to disk
+            compression: Codec for response bodies: None, 'zlib' or 'zstd'
+            compress_min_size: Bodies shorter than this are stored as is
         """
-        self.cache_dir = cache_dir or Path.home() / ".velocitytree" / "claude_cache"
+        if compression not in COMPRESSION_CODECS:
+            raise ValueError(f"Unknown compression {compression!r}, expected one of {COMPRESSION_CODECS}")
+        if compression == "zstd":
+            _zstd()
+        
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
         self.ttl = ttl
         self.max_size = max_size
         self.persist = persist
+        self.compression = compression
+        self.compress_min_size = compress_min_size
         
-        # In-memory cache
-        self._cache: Dict[str, CacheEntry] = {}
         self._lock = threading.Lock()
         
         # Statistics
@@ -57,23 +115,79 @@ class ResponseCache:
             "expirations": 0
         }
         
-        # Load persistent cache
+        database = ":memory:"
+        if self.persist:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            database = str(self.cache_dir / CACHE_DB_NAME)
+        self._conn = sqlite3.connect(database, timeout=30, check_same_thread=False)
+        self._init_database()
+        
         if self.persist:
-            self._load_cache()
+            self._import_legacy_entries()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    
+    def _init_database(self):
+        """Initialize database schema and restore statistics."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != str(CACHE_FORMAT_VERSION):
+                self._conn.execute("DROP TABLE IF EXISTS entries")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (str(CACHE_FORMAT_VERSION),)
+                )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    codec TEXT,
+                    size INTEGER NOT NULL,
+                    timestamp REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    last_accessed REAL NOT NULL,
+                    metadata TEXT,
+                    priority INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(last_accessed)"
+            )
+            # Matches SmartCache's eviction score, which only differs by the current time
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_score "
+                "ON entries(priority + last_accessed / 3600.0)"
+            )
+            
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'stats'").fetchone()
+            if row:
+                try:
+                    self._stats.update(json.loads(row[0]))
+                except ValueError as e:
+                    logger.warning(f"Failed to load cache statistics: {e}")
+            self._conn.commit()
     
     def get(self, key: str) -> Optional[str]:
         """Get value from cache."""
         with self._lock:
+            entry = self._load_entry(key)
+            
             # Check if key exists
-            if key not in self._cache:
+            if entry is None:
                 self._stats["misses"] += 1
                 return None
             
-            entry = self._cache[key]
-            
             # Check if expired
             if self._is_expired(entry):
-                del self._cache[key]
+                self._delete_row(key)
+                self._conn.commit()
                 self._stats["expirations"] += 1
                 self._stats["misses"] += 1
                 return None
@@ -81,6 +195,11 @@ class ResponseCache:
             # Update access info
             entry.hit_count += 1
             entry.last_accessed = time.time()
+            self._conn.execute(
+                "UPDATE entries SET hit_count = ?, last_accessed = ? WHERE key = ?",
+                (entry.hit_count, entry.last_accessed, key)
+            )
+            self._conn.commit()
             self._stats["hits"] += 1
             
             return entry.value
@@ -88,113 +207,96 @@ class ResponseCache:
     def set(self, key: str, value: str, metadata: Optional[Dict[str, Any]] = None):
         """Set value in cache."""
         with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM entries WHERE key = ?", (key,)
+            ).fetchone() is not None
+            
             # Check size limit
-            if len(self._cache) >= self.max_size:
-                self._evict_oldest()
+            if not exists:
+                while self._size >= self.max_size and self._size > 0:
+                    self._evict_oldest()
             
-            # Create entry
-            entry = CacheEntry(
+            now = time.time()
+            self._write_entry(CacheEntry(
                 key=key,
                 value=value,
-                timestamp=time.time(),
-                last_accessed=time.time(),
+                timestamp=now,
+                last_accessed=now,
                 metadata=metadata or {}
-            )
-            
-            self._cache[key] = entry
-            
-            # Persist if enabled
-            if self.persist:
-                self._save_entry(entry)
+            ))
+            if not exists:
+                self._size += 1
+            self._conn.commit()
     
     def delete(self, key: str) -> bool:
         """Delete entry from cache."""
         with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                
-                # Remove from persistent storage
-                if self.persist:
-                    entry_file = self._get_entry_path(key)
-                    if entry_file.exists():
-                        entry_file.unlink()
-                
-                return True
-            return False
+            deleted = self._delete_row(key)
+            self._conn.commit()
+            return deleted
     
     def clear(self):
         """Clear entire cache."""
         with self._lock:
-            self._cache.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._size = 0
             self._stats = {
                 "hits": 0,
                 "misses": 0,
                 "evictions": 0,
                 "expirations": 0
             }
-            
-            # Clear persistent storage
-            if self.persist and self.cache_dir.exists():
-                for entry_file in self.cache_dir.glob("*.json"):
-                    entry_file.unlink()
+            self._save_stats()
+            self._conn.commit()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
         with self._lock:
             total_requests = self._stats["hits"] + self._stats["misses"]
             hit_rate = self._stats["hits"] / total_requests if total_requests > 0 else 0
+            stored_bytes, raw_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
             
             return {
                 **self._stats,
-                "size": len(self._cache),
+                "size": self._size,
                 "hit_rate": hit_rate,
-                "total_requests": total_requests
+                "total_requests": total_requests,
+                "stored_bytes": stored_bytes,
+                "raw_bytes": raw_bytes
             }
     
     def prune(self):
         """Remove expired entries."""
         with self._lock:
-            expired_keys = []
-            
-            for key, entry in self._cache.items():
-                if self._is_expired(entry):
-                    expired_keys.append(key)
+            expired_keys = [entry.key for entry in self._iter_entries() if self._is_expired(entry)]
             
             for key in expired_keys:
-                del self._cache[key]
+                self._delete_row(key)
                 self._stats["expirations"] += 1
-                
-                # Remove from persistent storage
-                if self.persist:
-                    entry_file = self._get_entry_path(key)
-                    if entry_file.exists():
-                        entry_file.unlink()
+            self._conn.commit()
             
             logger.info(f"Pruned {len(expired_keys)} expired entries")
     
     def save(self):
-        """Save cache to disk."""
+        """Save cache statistics to disk.
+        
+        Entries are written as they are set, so only the counters need
+        saving.
+        """
         if not self.persist:
             return
         
         with self._lock:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save metadata
-            metadata_file = self.cache_dir / "metadata.json"
-            metadata = {
-                "stats": self._stats,
-                "ttl": self.ttl,
-                "max_size": self.max_size,
-                "saved_at": time.time()
-            }
-            
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
-            
-            # Save entries
-            for entry in self._cache.values():
-                self._save_entry(entry)
+            self._save_stats()
+            self._conn.commit()
+    
+    def close(self):
+        """Save statistics and close the database."""
+        self.save()
+        with self._lock:
+            self._conn.close()
     
     def _is_expired(self, entry: CacheEntry) -> bool:
         """Check if entry is expired."""
@@ -202,96 +304,124 @@ class ResponseCache:
         return age > self.ttl
     
     def _evict_oldest(self):
-        """Evict oldest entry to make room."""
-        if not self._cache:
+        """Evict least recently used entry to make room."""
+        row = self._conn.execute(
+            "SELECT key FROM entries ORDER BY last_accessed LIMIT 1"
+        ).fetchone()
+        if row is None:
             return
         
-        # Find least recently used
-        oldest_key = min(
-            self._cache.keys(),
-            key=lambda k: self._cache[k].last_accessed or self._cache[k].timestamp
-        )
-        
-        del self._cache[oldest_key]
+        self._delete_row(row[0])
         self._stats["evictions"] += 1
-        
-        # Remove from persistent storage
-        if self.persist:
-            entry_file = self._get_entry_path(oldest_key)
-            if entry_file.exists():
-                entry_file.unlink()
     
-    def _get_entry_path(self, key: str) -> Path:
-        """Get file path for cache entry."""
-        # Create safe filename from key
-        safe_key = hashlib.sha256(key.encode()).hexdigest()[:16]
-        return self.cache_dir / f"{safe_key}.json"
+    def _load_entry(self, key: str) -> Optional[CacheEntry]:
+        """Read one entry from the database."""
+        row = self._conn.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
     
-    def _save_entry(self, entry: CacheEntry):
-        """Save single entry to disk."""
-        if not self.persist:
-            return
-        
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        entry_file = self._get_entry_path(entry.key)
-        
-        # Convert to dict for JSON serialization
-        entry_dict = asdict(entry)
-        
-        with open(entry_file, 'w') as f:
-            json.dump(entry_dict, f, indent=2)
+    def _iter_entries(self, decode: bool = False) -> Iterator[CacheEntry]:
+        """Iterate over all entries, with values decoded only if asked."""
+        for row in self._conn.execute(f"SELECT {_ENTRY_COLUMNS} FROM entries").fetchall():
+            yield self._row_to_entry(row, decode)
     
-    def _load_cache(self):
-        """Load cache from disk."""
-        if not self.cache_dir.exists():
-            return
+    def _row_to_entry(self, row: tuple, decode: bool = True) -> CacheEntry:
+        """Convert a database row into a cache entry."""
+        key, value, codec, _, timestamp, hit_count, last_accessed, metadata, _ = row
+        return CacheEntry(
+            key=key,
+            value=_decompress(value, codec) if decode else None,
+            timestamp=timestamp,
+            hit_count=hit_count,
+            last_accessed=last_accessed,
+            metadata=json.loads(metadata) if metadata else {}
+        )
+    
+    def _write_entry(self, entry: CacheEntry, priority: int = 0):
+        """Insert or update an entry, compressing large values.
         
-        # Load metadata
+        Replacing an entry keeps its priority.
+        """
+        codec = self.compression if len(entry.value) >= self.compress_min_size else None
+        self._conn.execute(
+            f"INSERT INTO entries ({_ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, codec = excluded.codec, "
+            "size = excluded.size, timestamp = excluded.timestamp, hit_count = excluded.hit_count, "
+            "last_accessed = excluded.last_accessed, metadata = excluded.metadata",
+            (
+                entry.key,
+                _compress(entry.value, codec),
+                codec,
+                len(entry.value),
+                entry.timestamp,
+                entry.hit_count,
+                entry.last_accessed or entry.timestamp,
+                json.dumps(entry.metadata, default=str) if entry.metadata else None,
+                priority
+            )
+        )
+    
+    def _delete_row(self, key: str) -> bool:
+        """Delete an entry, keeping the size counter in sync."""
+        deleted = self._conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount > 0
+        if deleted:
+            self._size -= 1
+        return deleted
+    
+    def _save_stats(self):
+        """Store the statistics counters."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('stats', ?)",
+            (json.dumps(self._stats),)
+        )
+    
+    def _import_legacy_entries(self):
+        """Move entries from the old one-JSON-file-per-entry layout into the database."""
+        legacy_files = [f for f in self.cache_dir.glob("*.json") if f.name != "metadata.json"]
         metadata_file = self.cache_dir / "metadata.json"
-        if metadata_file.exists():
-            try:
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                self._stats = metadata.get("stats", self._stats)
-            except Exception as e:
-                logger.warning(f"Failed to load cache metadata: {e}")
+        if not legacy_files and not metadata_file.exists():
+            return
         
-        # Load entries
-        loaded = 0
-        for entry_file in self.cache_dir.glob("*.json"):
-            if entry_file.name == "metadata.json":
-                continue
+        imported = 0
+        with self._lock:
+            if metadata_file.exists():
+                try:
+                    with open(metadata_file, 'r') as f:
+                        stats = json.load(f).get("stats", {})
+                    for name, count in stats.items():
+                        self._stats[name] = self._stats.get(name, 0) + count
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Failed to load cache metadata: {e}")
             
-            try:
-                with open(entry_file, 'r') as f:
-                    entry_dict = json.load(f)
-                
-                entry = CacheEntry(**entry_dict)
-                
-                # Skip expired entries
-                if not self._is_expired(entry):
-                    self._cache[entry.key] = entry
-                    loaded += 1
-                else:
-                    entry_file.unlink()  # Clean up expired entry
-                    
-            except Exception as e:
-                logger.warning(f"Failed to load cache entry {entry_file}: {e}")
+            for entry_file in legacy_files:
+                try:
+                    with open(entry_file, 'r') as f:
+                        entry = CacheEntry(**json.load(f))
+                    if not self._is_expired(entry):
+                        self._write_entry(entry)
+                        imported += 1
+                except Exception as e:
+                    logger.warning(f"Failed to import cache entry {entry_file}: {e}")
+                    continue
+                entry_file.unlink()
+            
+            self._save_stats()
+            self._conn.commit()
+            if metadata_file.exists():
+                metadata_file.unlink()
         
-        logger.info(f"Loaded {loaded} cache entries")
+        logger.info(f"Imported {imported} cache entries into {CACHE_DB_NAME}")
     
     def __len__(self) -> int:
         """Get number of cached entries."""
-        return len(self._cache)
+        return self._size
     
     def __contains__(self, key: str) -> bool:
         """Check if key is in cache."""
         with self._lock:
-            if key not in self._cache:
-                return False
-            
-            entry = self._cache[key]
-            return not self._is_expired(entry)
+            entry = self._load_entry(key)
+            return entry is not None and not self._is_expired(entry)
 
 
 class SmartCache(ResponseCache):
@@ -299,9 +429,8 @@ class SmartCache(ResponseCache):
     
     def __init__(self, **kwargs):
         """Initialize smart cache."""
-        super().__init__(**kwargs)
         self._patterns = {}  # Pattern-based caching rules
-        self._priorities = {}  # Priority levels for entries
+        super().__init__(**kwargs)
     
     def set_with_priority(
         self,
@@ -312,7 +441,9 @@ class SmartCache(ResponseCache):
     ):
         """Set value with priority level."""
         self.set(key, value, metadata)
-        self._priorities[key] = priority
+        with self._lock:
+            self._conn.execute("UPDATE entries SET priority = ? WHERE key = ?", (priority, key))
+            self._conn.commit()
     
     def add_pattern_rule(self, pattern: str, ttl_override: Optional[int] = None):
         """Add caching rule based on key pattern."""
@@ -331,42 +462,32 @@ class SmartCache(ResponseCache):
         return super()._is_expired(entry)
     
     def _evict_oldest(self):
-        """Evict based on priority and age."""
-        if not self._cache:
-            return
-        
-        # Sort by priority (lower is less important) and age
-        candidates = []
-        for key, entry in self._cache.items():
-            priority = self._priorities.get(key, 0)
-            age = time.time() - (entry.last_accessed or entry.timestamp)
-            score = priority - (age / 3600)  # Reduce score by age in hours
-            candidates.append((key, score))
-        
-        # Evict lowest scoring entry
-        candidates.sort(key=lambda x: x[1])
-        evict_key = candidates[0][0]
+        """Evict based on priority and age.
         
-        del self._cache[evict_key]
-        if evict_key in self._priorities:
-            del self._priorities[evict_key]
+        The score is priority minus hours since last access; the entry with
+        the lowest score is found through the score index.
+        """
+        row = self._conn.execute(
+            "SELECT key FROM entries ORDER BY priority + last_accessed / 3600.0 LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return
         
+        self._delete_row(row[0])
         self._stats["evictions"] += 1
-        
-        # Remove from persistent storage
-        if self.persist:
-            entry_file = self._get_entry_path(evict_key)
-            if entry_file.exists():
-                entry_file.unlink()
     
     def get_by_pattern(self, pattern: str) -> Dict[str, str]:
         """Get all entries matching a pattern."""
         results = {}
         
         with self._lock:
-            for key, entry in self._cache.items():
-                if pattern in key and not self._is_expired(entry):
-                    results[key] = entry.value
+            rows = self._conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE instr(key, ?) > 0", (pattern,)
+            ).fetchall()
+            for row in rows:
+                entry = self._row_to_entry(row)
+                if not self._is_expired(entry):
+                    results[entry.key] = entry.value
         
         return results
     
@@ -381,49 +502,38 @@ class SmartCache(ResponseCache):
         }
         
         with self._lock:
-            # Sort by access count
-            by_access = sorted(
-                self._cache.items(),
-                key=lambda x: x[1].hit_count,
-                reverse=True
-            )
+            now = time.time()
             
             analysis["most_accessed"] = [
-                {"key": k, "hits": v.hit_count}
-                for k, v in by_access[:5]
+                {"key": k, "hits": hits}
+                for k, hits in self._conn.execute(
+                    "SELECT key, hit_count FROM entries ORDER BY hit_count DESC LIMIT 5"
+                )
             ]
             
-            analysis["least_accessed"] = [
-                {"key": k, "hits": v.hit_count}
-                for k, v in by_access[-5:]
-            ]
-            
-            # Sort by age
-            by_age = sorted(
-                self._cache.items(),
-                key=lambda x: x[1].timestamp
-            )
+            least = self._conn.execute(
+                "SELECT key, hit_count FROM entries ORDER BY hit_count ASC LIMIT 5"
+            ).fetchall()
+            analysis["least_accessed"] = [{"key": k, "hits": hits} for k, hits in reversed(least)]
             
             analysis["oldest_entries"] = [
-                {"key": k, "age": time.time() - v.timestamp}
-                for k, v in by_age[:5]
+                {"key": k, "age": now - timestamp}
+                for k, timestamp in self._conn.execute(
+                    "SELECT key, timestamp FROM entries ORDER BY timestamp LIMIT 5"
+                )
             ]
             
-            # Sort by value size
-            by_size = sorted(
-                self._cache.items(),
-                key=lambda x: len(x[1].value),
-                reverse=True
-            )
-            
             analysis["largest_values"] = [
-                {"key": k, "size": len(v.value)}
-                for k, v in by_size[:5]
+                {"key": k, "size": size}
+                for k, size in self._conn.execute(
+                    "SELECT key, size FROM entries ORDER BY size DESC LIMIT 5"
+                )
             ]
             
             # Analyze patterns
             for pattern in self._patterns:
-                matches = sum(1 for k in self._cache if pattern in k)
-                analysis["patterns"][pattern] = matches
+                analysis["patterns"][pattern] = self._conn.execute(
+                    "SELECT COUNT(*) FROM entries WHERE instr(key, ?) > 0", (pattern,)
+                ).fetchone()[0]
         
-        return analysis
\ No newline at end of file
+        return analysis
@@ -0,0 +1,532 @@
+"""Token-budgeted context packing for Claude prompts."""
+
+import ast
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Union
+
+import numpy as np
+
+from ..utils import logger
+
+
+# Target size of blank-line separated blocks in non-Python files
+TEXT_CHUNK_TOKENS = 256
+
+# Capacity steps of the knapsack table; budgets above this are scaled down
+KNAPSACK_RESOLUTION = 1024
+
+# Only the best candidates by value per token enter the exact solver
+MAX_KNAPSACK_ITEMS = 512
+
+# Value of a chunk that shares no terms with the query, so leftover budget
+# is still filled with something
+BASELINE_SCORE = 0.01
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOPWORDS = {
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'into', 'are', 'was',
+    'not', 'but', 'can', 'how', 'what', 'why', 'does', 'should', 'please',
+    'self', 'def', 'class', 'return', 'import', 'none', 'true', 'false'
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text.
+    
+    Counts words, numbers and punctuation separately, as BPE tokenizers do
+    for source code, with long words costing extra tokens.
+    """
+    return sum(1 + len(piece) // 6 for piece in _TOKEN_RE.findall(text))
+
+
+def extract_terms(text: str) -> List[str]:
+    """Split text into lowercase search terms.
+    
+    Identifiers are also split at underscores and camelCase boundaries, so
+    ``parse_config`` and ``ConfigParser`` both yield ``config``.
+    """
+    terms = []
+    for identifier in _IDENTIFIER_RE.findall(text):
+        lowered = identifier.lower()
+        parts = [p.lower() for part in identifier.split('_') for p in _CAMEL_RE.findall(part)]
+        for term in [lowered] + (parts if len(parts) > 1 else []):
+            if len(term) > 2 and term not in _STOPWORDS:
+                terms.append(term)
+    return terms
+
+
+@dataclass
+class ContextChunk:
+    """A syntactic unit of a file: a function, a class or a block of lines."""
+    path: str
+    name: str
+    kind: str  # 'function', 'class', 'module' or 'text'
+    start_line: int
+    end_line: int
+    content: str
+    tokens: int
+    _terms: Optional[Counter] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def terms(self) -> Counter:
+        """Search terms of the chunk, computed once."""
+        if self._terms is None:
+            self._terms = Counter(extract_terms(self.content))
+        return self._terms
+
+
+@dataclass
+class FileChunks:
+    """The content of a file and the chunks it was split into."""
+    path: str
+    content_hash: str
+    content: str
+    chunks: List[ContextChunk]
+
+
+@dataclass
+class PackedContext:
+    """Chunks selected to fill a token budget."""
+    chunks: List[ContextChunk]
+    tokens: int
+    budget: int
+    candidates: int
+    complete_files: List[str] = field(default_factory=list)
+    sources: Dict[str, FileChunks] = field(default_factory=dict)  # files with selected chunks
+    
+    def by_file(self) -> Dict[str, List[ContextChunk]]:
+        """Group the selected chunks by file, in line order."""
+        files: Dict[str, List[ContextChunk]] = {}
+        for chunk in self.chunks:
+            files.setdefault(chunk.path, []).append(chunk)
+        for chunks in files.values():
+            chunks.sort(key=lambda c: c.start_line)
+        return files
+    
+    def render(self) -> str:
+        """Render the selection as text with a header per chunk."""
+        parts = []
+        for path, chunks in self.by_file().items():
+            for chunk in chunks:
+                parts.append(f"# {path}:{chunk.start_line}-{chunk.end_line} ({chunk.name})\n{chunk.content}")
+        return "\n\n".join(parts)
+
+
+def chunk_source(path: str, content: str, max_tokens: int = 2048) -> List[ContextChunk]:
+    """Split file content into chunks no larger than max_tokens.
+    
+    Python files are split along the AST into top-level functions, classes
+    (or their methods, for large classes) and runs of module-level
+    statements. Other files are split into blocks of paragraphs.
+    
+    Args:
+        path: Path recorded on the chunks
+        content: File content
+        max_tokens: Largest chunk size; bigger units are split into line windows
+    
+    Returns:
+        Chunks in line order
+    """
+    lines = content.splitlines()
+    spans = None
+    if path.endswith('.py'):
+        try:
+            spans = _python_spans(ast.parse(content), lines, max_tokens)
+        except (SyntaxError, ValueError):
+            spans = None
+    if spans is None:
+        spans = _text_spans(lines)
+    
+    chunks = []
+    for name, kind, start, end in spans:
+        text = "\n".join(lines[start - 1:end])
+        if not text.strip():
+            continue
+        tokens = estimate_tokens(text)
+        if tokens <= max_tokens:
+            chunks.append(ContextChunk(path, name, kind, start, end, text, tokens))
+        else:
+            chunks.extend(_split_lines(path, name, kind, lines, start, end, max_tokens))
+    return chunks
+
+
+def _python_spans(
+    tree: ast.Module,
+    lines: List[str],
+    max_tokens: int
+) -> List[Tuple[str, str, int, int]]:
+    """Get (name, kind, start, end) line spans of a module's top-level units."""
+    spans = []
+    pending_start = None
+    pending_end = None
+    
+    def flush():
+        nonlocal pending_start
+        if pending_start is not None:
+            spans.append(('<module>', 'module', pending_start, pending_end))
+            pending_start = None
+    
+    for node in tree.body:
+        start = _node_start(node)
+        end = node.end_lineno or start
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            flush()
+            spans.append((node.name, 'function', start, end))
+        elif isinstance(node, ast.ClassDef):
+            flush()
+            text = "\n".join(lines[start - 1:end])
+            methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            if estimate_tokens(text) <= max_tokens or not methods:
+                spans.append((node.name, 'class', start, end))
+                continue
+            # Large class: header and class attributes, then one chunk per method
+            header_end = _node_start(methods[0]) - 1
+            spans.append((node.name, 'class', start, header_end))
+            for method in methods:
+                method_start = _node_start(method)
+                spans.append((f"{node.name}.{method.name}", 'function', method_start, method.end_lineno))
+        else:
+            if pending_start is None:
+                pending_start = start
+            pending_end = end
+    flush()
+    return spans
+
+
+def _node_start(node: ast.AST) -> int:
+    """First line of a statement, including its decorators."""
+    decorators = getattr(node, 'decorator_list', None)
+    if decorators:
+        return min(d.lineno for d in decorators)
+    return node.lineno
+
+
+def _text_spans(lines: List[str]) -> List[Tuple[str, str, int, int]]:
+    """Group blank-line separated paragraphs into spans of similar size."""
+    spans = []
+    start = None
+    tokens = 0
+    for number, line in enumerate(lines, 1):
+        if start is None:
+            if not line.strip():
+                continue
+            start = number
+        tokens += estimate_tokens(line)
+        if not line.strip() and tokens >= TEXT_CHUNK_TOKENS:
+            spans.append((f"lines {start}-{number - 1}", 'text', start, number - 1))
+            start = None
+            tokens = 0
+    if start is not None:
+        spans.append((f"lines {start}-{len(lines)}", 'text', start, len(lines)))
+    return spans
+
+
+def _split_lines(
+    path: str,
+    name: str,
+    kind: str,
+    lines: List[str],
+    start: int,
+    end: int,
+    max_tokens: int
+) -> List[ContextChunk]:
+    """Split an oversized unit into windows of whole lines."""
+    chunks = []
+    window_start = start
+    window: List[str] = []
+    tokens = 0
+    for number in range(start, end + 1):
+        line = lines[number - 1]
+        line_tokens = estimate_tokens(line)
+        if window and tokens + line_tokens > max_tokens:
+            chunks.append(ContextChunk(
+                path, f"{name}[{len(chunks) + 1}]", kind, window_start, number - 1,
+                "\n".join(window), tokens
+            ))
+            window_start, window, tokens = number, [], 0
+        if line_tokens > max_tokens:
+            # A single huge line (minified code, data) is cut by characters
+            line = line[:max_tokens * 4]
+            line_tokens = estimate_tokens(line)
+        window.append(line)
+        tokens += line_tokens
+    if window:
+        chunks.append(ContextChunk(
+            path, f"{name}[{len(chunks) + 1}]", kind, window_start, end, "\n".join(window), tokens
+        ))
+    return chunks
+
+
+class ChunkCache:
+    """Memoizes file chunking by content hash.
+    
+    A file whose size and mtime are unchanged is served without being
+    read; a file that changed on disk but has content seen before (for
+    example after a checkout) is read and hashed but not chunked again.
+    """
+    
+    def __init__(self, max_files: int = 4096, max_tokens: int = 2048):
+        """Initialize the chunk cache.
+        
+        Args:
+            max_files: Number of distinct file contents kept
+            max_tokens: Largest chunk size passed to chunk_source
+        """
+        self.max_files = max_files
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._stat: Dict[str, Tuple[int, int, str]] = {}
+        self._by_hash: "OrderedDict[Tuple[str, str], FileChunks]" = OrderedDict()
+        self._stats = {
+            "hits": 0,
+            "reads": 0,
+            "chunked": 0
+        }
+    
+    def load(self, file_path: Union[str, Path]) -> Optional[FileChunks]:
+        """Get the chunks of a file, reading it only if it changed.
+        
+        Returns:
+            The file's chunks, or None if it cannot be read
+        """
+        path = str(file_path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Failed to read {path}: {e}")
+            return None
+        
+        with self._lock:
+            known = self._stat.get(path)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                cached = self._by_hash.get((known[2], path))
+                if cached is not None:
+                    self._by_hash.move_to_end((known[2], path))
+                    self._stats["hits"] += 1
+                    return cached
+        
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            logger.warning(f"Failed to read {path}: {e}")
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        
+        with self._lock:
+            self._stats["reads"] += 1
+            self._stat[path] = (stat.st_size, stat.st_mtime_ns, digest)
+            cached = self._by_hash.get((digest, path))
+            if cached is not None:
+                self._by_hash.move_to_end((digest, path))
+                return cached
+        
+        content = data.decode('utf-8', errors='replace')
+        entry = FileChunks(path, digest, content, chunk_source(path, content, self.max_tokens))
+        
+        with self._lock:
+            self._stats["chunked"] += 1
+            self._by_hash[(digest, path)] = entry
+            while len(self._by_hash) > self.max_files:
+                self._by_hash.popitem(last=False)
+        return entry
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            stats = self._stats.copy()
+            stats["files"] = len(self._by_hash)
+        return stats
+    
+    def clear(self):
+        """Drop all cached chunks."""
+        with self._lock:
+            self._stat.clear()
+            self._by_hash.clear()
+
+
+class ContextPacker:
+    """Selects the most relevant chunks of a set of files within a token budget.
+    
+    Chunks are scored against the query with BM25 over identifier terms,
+    with extra weight for matches in a chunk's name, and the budget is
+    then filled by solving a 0/1 knapsack over the best candidates.
+    """
+    
+    def __init__(self, cache: Optional[ChunkCache] = None):
+        """Initialize the packer.
+        
+        Args:
+            cache: Chunk cache, defaults to the process-wide cache
+        """
+        self.cache = cache or get_chunk_cache()
+    
+    def load_chunks(self, files: Iterable[Union[str, Path]]) -> List[FileChunks]:
+        """Load the chunks of all readable files."""
+        loaded = []
+        for file_path in files:
+            entry = self.cache.load(file_path)
+            if entry is not None:
+                loaded.append(entry)
+        return loaded
+    
+    def score_chunks(
+        self,
+        query: str,
+        chunks: List[ContextChunk],
+        priorities: Optional[Dict[str, float]] = None
+    ) -> List[float]:
+        """Score chunks by relevance to a query.
+        
+        Args:
+            query: Prompt or search text
+            chunks: Candidate chunks
+            priorities: Extra score per file path
+        
+        Returns:
+            One score per chunk
+        """
+        query_terms = set(extract_terms(query))
+        priorities = priorities or {}
+        if not chunks:
+            return []
+        
+        k1, b = 1.2, 0.75
+        avg_tokens = sum(c.tokens for c in chunks) / len(chunks) or 1.0
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for c in chunks if term in c.terms)
+            idf[term] = math.log(1 + (len(chunks) - df + 0.5) / (df + 0.5))
+        
+        scores = []
+        for chunk in chunks:
+            score = BASELINE_SCORE
+            if query_terms:
+                terms = chunk.terms
+                name_terms = set(extract_terms(chunk.name))
+                norm = k1 * (1 - b + b * chunk.tokens / avg_tokens)
+                for term in query_terms:
+                    tf = terms.get(term, 0)
+                    if tf:
+                        score += idf[term] * tf * (k1 + 1) / (tf + norm)
+                    if term in name_terms:
+                        score += 2 * idf[term]
+            scores.append(score + priorities.get(chunk.path, 0.0))
+        return scores
+    
+    def pack(
+        self,
+        query: str,
+        files: Iterable[Union[str, Path]],
+        max_tokens: int,
+        priorities: Optional[Dict[str, float]] = None
+    ) -> PackedContext:
+        """Fill a token budget with the chunks most relevant to a query.
+        
+        Args:
+            query: Prompt or search text
+            files: Files to draw chunks from
+            max_tokens: Hard token budget for the selected chunks
+            priorities: Extra score per file path
+        
+        Returns:
+            The selected chunks
+        """
+        loaded = self.load_chunks(files)
+        chunks = [chunk for entry in loaded for chunk in entry.chunks]
+        scores = self.score_chunks(query, chunks, priorities)
+        selected = select_within_budget([c.tokens for c in chunks], scores, max_tokens)
+        
+        # Most relevant file first, chunks in line order within each file
+        best: Dict[str, float] = {}
+        for i in selected:
+            path = chunks[i].path
+            best[path] = max(best.get(path, 0.0), scores[i])
+        picked = sorted(
+            (chunks[i] for i in selected),
+            key=lambda c: (-best[c.path], c.path, c.start_line)
+        )
+        
+        chosen = {id(c) for c in picked}
+        complete = [
+            entry.path for entry in loaded
+            if entry.path in best and all(id(c) in chosen for c in entry.chunks)
+        ]
+        return PackedContext(
+            chunks=picked,
+            tokens=sum(c.tokens for c in picked),
+            budget=max_tokens,
+            candidates=len(chunks),
+            complete_files=complete,
+            sources={entry.path: entry for entry in loaded if entry.path in best}
+        )
+
+
+def select_within_budget(weights: List[int], values: List[float], budget: int) -> List[int]:
+    """Choose items maximizing total value with total weight within budget.
+    
+    The best items by value per token are solved exactly as a 0/1 knapsack
+    on a capacity grid of at most KNAPSACK_RESOLUTION steps; weights are
+    rounded up to the grid, so the result never exceeds the budget. Slack
+    left by the rounding is then filled greedily.
+    
+    Returns:
+        Indices of the chosen items in ascending order
+    """
+    items = [i for i, w in enumerate(weights) if w <= budget]
+    if sum(weights[i] for i in items) <= budget:
+        return items
+    
+    by_density = sorted(items, key=lambda i: values[i] / max(weights[i], 1), reverse=True)
+    candidates = by_density[:MAX_KNAPSACK_ITEMS]
+    
+    unit = max(1, math.ceil(budget / KNAPSACK_RESOLUTION))
+    capacity = budget // unit
+    grid_weights = [max(1, math.ceil(weights[i] / unit)) for i in candidates]
+    
+    best = np.zeros(capacity + 1)
+    keep = np.zeros((len(candidates), capacity + 1), dtype=bool)
+    for k, i in enumerate(candidates):
+        w = grid_weights[k]
+        if w > capacity:
+            continue
+        with_item = best[:capacity + 1 - w] + values[i]
+        better = with_item > best[w:]
+        keep[k, w:] = better
+        best[w:] = np.where(better, with_item, best[w:])
+    
+    chosen = set()
+    remaining = capacity
+    for k in range(len(candidates) - 1, -1, -1):
+        if keep[k, remaining]:
+            chosen.add(candidates[k])
+            remaining -= grid_weights[k]
+    
+    used = sum(weights[i] for i in chosen)
+    for i in by_density:
+        if i not in chosen and used + weights[i] <= budget:
+            chosen.add(i)
+            used += weights[i]
+    return sorted(chosen)
+
+
+_default_cache: Optional[ChunkCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_chunk_cache() -> ChunkCache:
+    """Get the chunk cache shared by all packers in this process."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ChunkCache()
+        return _default_cache
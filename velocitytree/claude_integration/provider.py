@@ -1,13 +1,19 @@
 """Local Claude provider for AI processing."""
 
+import asyncio
 import subprocess
 import json
+import queue
+import random
+import threading
 import time
+import weakref
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Iterator, AsyncIterator, Union
 from dataclasses import dataclass, field
 import shutil
 
+from ..ai_cache import PromptKey, get_ai_cache, make_prompt_key
 from ..utils import logger
 
 
@@ -23,8 +29,34 @@ class ClaudeConfig:
     fallback_model: Optional[str] = None
     use_cache: bool = True
     cache_ttl: int = 3600  # seconds
+    cache_similarity: Optional[float] = None  # e.g. 0.9 reuses near-duplicate prompts
     stream_response: bool = False
     env_vars: Dict[str, str] = field(default_factory=dict)
+    max_concurrency: int = 4  # concurrent CLI processes for batch queries
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a batch query."""
+    index: int
+    prompt: str
+    response: Optional[str] = None
+    error: Optional[Exception] = None
+    
+    @property
+    def ok(self) -> bool:
+        """Whether the request succeeded."""
+        return self.error is None
+
+
+BatchRequest = Union[str, Dict[str, Any]]
+
+
+@dataclass
+class _InflightQuery:
+    """A running CLI request and the number of callers awaiting it."""
+    task: asyncio.Task
+    waiters: int = 0
 
 
 class LocalClaudeProvider:
@@ -40,12 +72,16 @@ class LocalClaudeProvider:
         self._cli_path = self._find_claude_cli()
         self._validate_setup()
         
-        # Initialize cache if enabled
-        if self.config.use_cache:
-            from .cache import ResponseCache
-            self.cache = ResponseCache(ttl=self.config.cache_ttl)
-        else:
-            self.cache = None
+        # Responses are shared with the other AI clients through one cache
+        self.cache = get_ai_cache() if self.config.use_cache else None
+        
+        # Async state is bound to an event loop, so it is kept per loop
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _InflightQuery]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
     
     def _find_claude_cli(self) -> Optional[Path]:
         """Find Claude CLI executable."""
@@ -131,8 +167,8 @@ class LocalClaudeProvider:
         """
         # Check cache first
         cache_key = self._generate_cache_key(prompt, context, files)
-        if self.cache:
-            cached_response = self.cache.get(cache_key)
+        if self.cache is not None:
+            cached_response = self.cache.get(cache_key, self.config.cache_similarity)
             if cached_response:
                 logger.debug("Using cached response")
                 return cached_response
@@ -146,8 +182,8 @@ class LocalClaudeProvider:
                 response = self._execute_command(cmd)
                 
                 # Cache successful response
-                if self.cache:
-                    self.cache.set(cache_key, response)
+                if self.cache is not None:
+                    self.cache.set(cache_key, response, ttl=self.config.cache_ttl)
                 
                 return response
                 
@@ -157,7 +193,7 @@ class LocalClaudeProvider:
                 )
                 
                 if attempt < self.config.retry_attempts - 1:
-                    time.sleep(self.config.retry_delay * (attempt + 1))
+                    time.sleep(self._retry_backoff(attempt))
                 else:
                     # Last attempt failed, try fallback
                     if self.config.fallback_model:
@@ -166,6 +202,267 @@ class LocalClaudeProvider:
         
         return ""
     
+    async def aquery(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        files: Optional[List[Path]] = None
+    ) -> str:
+        """Query Claude without blocking the event loop.
+        
+        At most ``config.max_concurrency`` CLI processes run at once per
+        event loop, and identical requests made while one is in flight
+        share its result instead of starting another process. The process
+        is killed when the last caller waiting for it is cancelled.
+        
+        Args:
+            prompt: The prompt to send to Claude
+            context: Additional context data
+            files: Files to include in context
+            
+        Returns:
+            Claude's response
+        """
+        return await self._aquery(prompt, context, files, self._semaphore())
+    
+    async def aquery_batch(
+        self,
+        requests: Iterable[BatchRequest],
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[BatchResult]:
+        """Run many queries concurrently, yielding results as they complete.
+        
+        Closing the iterator early cancels the remaining queries; CLI
+        processes that no other caller is waiting for are killed before
+        it returns.
+        
+        Args:
+            requests: Prompts, or dicts with ``prompt`` and optional
+                ``context`` and ``files``
+            max_concurrency: Concurrent CLI processes, defaults to
+                ``config.max_concurrency``
+            
+        Yields:
+            One BatchResult per request, in completion order
+        """
+        semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else self._semaphore()
+        )
+        
+        async def run(index: int, request: BatchRequest) -> BatchResult:
+            if isinstance(request, str):
+                request = {"prompt": request}
+            result = BatchResult(index=index, prompt=request["prompt"])
+            try:
+                result.response = await self._aquery(
+                    request["prompt"], request.get("context"), request.get("files"), semaphore
+                )
+            except Exception as e:
+                result.error = e
+            return result
+        
+        tasks = [asyncio.ensure_future(run(i, request)) for i, request in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def query_batch(
+        self,
+        requests: Iterable[BatchRequest],
+        max_concurrency: Optional[int] = None
+    ) -> Iterator[BatchResult]:
+        """Run many queries concurrently from synchronous code.
+        
+        The queries run on an event loop in a background thread; results
+        are handed over as each one completes, so callers can process
+        them while the rest are still running. Closing the iterator early
+        cancels the remaining queries.
+        
+        Args:
+            requests: Prompts, or dicts with ``prompt`` and optional
+                ``context`` and ``files``
+            max_concurrency: Concurrent CLI processes, defaults to
+                ``config.max_concurrency``
+            
+        Yields:
+            One BatchResult per request, in completion order
+        """
+        results: "queue.Queue" = queue.Queue()
+        done = object()
+        loop = asyncio.new_event_loop()
+        
+        async def produce():
+            try:
+                async for result in self.aquery_batch(requests, max_concurrency):
+                    results.put(result)
+            finally:
+                results.put(done)
+        
+        main = loop.create_task(produce())
+        
+        def run():
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(main)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                # Stop anything still scheduled on the private loop
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+        
+        worker = threading.Thread(target=run, name="claude-batch", daemon=True)
+        worker.start()
+        try:
+            while True:
+                result = results.get()
+                if result is done:
+                    break
+                yield result
+        finally:
+            if not main.done():
+                try:
+                    loop.call_soon_threadsafe(main.cancel)
+                except RuntimeError:
+                    pass  # The loop finished in the meantime
+            worker.join()
+    
+    async def _aquery(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        files: Optional[List[Path]],
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """Serve a query from the cache, an in-flight request or a new process."""
+        cache_key = self._generate_cache_key(prompt, context, files)
+        if self.cache is not None:
+            cached_response = self.cache.get(cache_key, self.config.cache_similarity)
+            if cached_response:
+                logger.debug("Using cached response")
+                return cached_response
+        
+        inflight = self._inflight.setdefault(asyncio.get_running_loop(), {})
+        entry = inflight.get(cache_key.digest)
+        if entry is None:
+            entry = _InflightQuery(asyncio.ensure_future(
+                self._aexecute_with_retries(prompt, context, files, cache_key, semaphore)
+            ))
+            inflight[cache_key.digest] = entry
+            
+            def forget(_):
+                if inflight.get(cache_key.digest) is entry:
+                    del inflight[cache_key.digest]
+            
+            entry.task.add_done_callback(forget)
+        
+        entry.waiters += 1
+        try:
+            # Shielded so that one cancelled waiter does not cancel the others
+            return await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            if entry.waiters == 1 and not entry.task.done():
+                # Last waiter: stop the request and wait for its CLI process
+                # to be killed; later callers start a new one
+                if inflight.get(cache_key.digest) is entry:
+                    del inflight[cache_key.digest]
+                entry.task.cancel()
+                await asyncio.gather(entry.task, return_exceptions=True)
+            raise
+        finally:
+            entry.waiters -= 1
+    
+    async def _aexecute_with_retries(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        files: Optional[List[Path]],
+        cache_key: PromptKey,
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """Run the CLI with retries and jittered exponential backoff."""
+        cmd = self._build_command(prompt, context, files)
+        
+        for attempt in range(self.config.retry_attempts):
+            try:
+                async with semaphore:
+                    response = await self._aexecute_command(cmd)
+                
+                if self.cache is not None:
+                    self.cache.set(cache_key, response, ttl=self.config.cache_ttl)
+                return response
+                
+            except Exception as e:
+                logger.warning(
+                    f"Claude query failed (attempt {attempt + 1}): {e}"
+                )
+                
+                if attempt < self.config.retry_attempts - 1:
+                    await asyncio.sleep(self._retry_backoff(attempt))
+                elif self.config.fallback_model:
+                    logger.info(f"Attempting fallback with {self.config.fallback_model}")
+                    fallback_cmd = self._build_command(
+                        prompt, context, files, model=self.config.fallback_model
+                    )
+                    async with semaphore:
+                        return await self._aexecute_command(fallback_cmd)
+                else:
+                    raise
+        
+        return ""
+    
+    async def _aexecute_command(self, cmd: List[str]) -> str:
+        """Execute Claude command in a subprocess without blocking."""
+        logger.debug(f"Executing: {' '.join(cmd[:3])}...")  # Log first few args
+        
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=self._get_env()
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(), timeout=self.config.timeout
+            )
+        except BaseException:
+            # Timed out or cancelled: do not leave the CLI running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        
+        if process.returncode != 0:
+            error_msg = (stderr or stdout).decode(errors="replace")
+            raise RuntimeError(f"Claude command failed: {error_msg}")
+        
+        return stdout.decode(errors="replace").strip()
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency limit for the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.config.max_concurrency)
+        return semaphore
+    
+    def _retry_backoff(self, attempt: int) -> float:
+        """Delay before the next attempt: exponential, with full jitter.
+        
+        Jitter keeps concurrent requests that failed together from
+        retrying in lockstep.
+        """
+        return random.uniform(0, self.config.retry_delay * (2 ** attempt))
+    
     def stream_query(
         self,
         prompt: str,
@@ -218,13 +515,14 @@ class LocalClaudeProvider:
         prompt: str,
         context: Optional[Dict[str, Any]] = None,
         files: Optional[List[Path]] = None,
-        stream: bool = False
+        stream: bool = False,
+        model: Optional[str] = None
     ) -> List[str]:
         """Build Claude CLI command."""
         cmd = [str(self._cli_path)]
         
         # Add model
-        cmd.extend(["--model", self.config.model])
+        cmd.extend(["--model", model or self.config.model])
         
         # Add parameters
         cmd.extend(["--max-tokens", str(self.config.max_tokens)])
@@ -280,24 +578,19 @@ class LocalClaudeProvider:
         prompt: str,
         context: Optional[Dict[str, Any]] = None,
         files: Optional[List[Path]] = None
-    ) -> str:
-        """Generate cache key for request."""
-        import hashlib
-        
-        key_parts = [prompt]
+    ) -> PromptKey:
+        """Generate cache key for request.
         
-        if context:
-            key_parts.append(json.dumps(context, sort_keys=True))
-        
-        if files:
-            for file_path in sorted(files):
-                if file_path.exists():
-                    # Include file modification time
-                    mtime = file_path.stat().st_mtime
-                    key_parts.append(f"{file_path}:{mtime}")
-        
-        key_string = "|".join(key_parts)
-        return hashlib.sha256(key_string.encode()).hexdigest()
+        Files are keyed on their content hashes rather than mtimes, and the
+        context on its normalized value rather than its JSON encoding.
+        """
+        return (self.cache.make_key if self.cache is not None else make_prompt_key)(
+            namespace=f"claude-cli:{self.config.model}:{self.config.temperature}:{self.config.max_tokens}",
+            template="query",
+            text=prompt,
+            variables={"context": context},
+            files=files
+        )
     
     def _fallback_query(
         self,
@@ -403,7 +696,7 @@ class LocalClaudeProvider:
             pass
         
         # Check cache
-        if self.cache:
+        if self.cache is not None:
             health["cache_size"] = len(self.cache)
         
         return health
\ No newline at end of file
@@ -1,11 +1,15 @@
 """Context streaming for efficient Claude interactions."""
 
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Iterator
+from typing import Dict, Any, List, Optional, Iterator, Union
 from dataclasses import dataclass
 import json
+import mmap
+import os
 
 from ..utils import logger
+from .packing import ChunkCache, ContextChunk, ContextPacker, estimate_tokens
 
 
 @dataclass
@@ -19,16 +23,137 @@ class StreamConfig:
     context_window: int = 8192  # Claude's context window
 
 
+# Bytes counted per step when extending the newline index
+LINE_INDEX_BLOCK = 1 << 20
+
+# Upper bound on the bytes of one streamed chunk, per token of chunk_size;
+# generous for source code, but stops single huge lines (minified JSON,
+# SQL dumps) from being yielded in one piece
+BYTES_PER_TOKEN = 16
+
+
+class MappedFile:
+    """Read-only memory map of a file with a lazily built line index.
+    
+    The index records how many newlines precede each block of
+    LINE_INDEX_BLOCK bytes and is only extended as far as the lines asked
+    for, so reading near the start of a large file costs the same as
+    reading a small one, and the memory used is independent of file size.
+    """
+    
+    def __init__(self, path: Union[str, Path], encoding: str = 'utf-8'):
+        """Map a file.
+        
+        Args:
+            path: File to map
+            encoding: Encoding used to decode line ranges
+        """
+        self.path = Path(path)
+        self.encoding = encoding
+        self._file = open(self.path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # Empty files cannot be mapped
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        )
+        # _block_newlines[i] is the number of newlines before byte i * LINE_INDEX_BLOCK
+        self._block_newlines = [0]
+    
+    def __enter__(self) -> 'MappedFile':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self):
+        """Unmap and close the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+    
+    def _index_through(self, newlines: int):
+        """Extend the block index until it covers the given newline count."""
+        blocks = self._block_newlines
+        while blocks[-1] < newlines and (len(blocks) - 1) * LINE_INDEX_BLOCK < self.size:
+            start = (len(blocks) - 1) * LINE_INDEX_BLOCK
+            blocks.append(blocks[-1] + self._data[start:start + LINE_INDEX_BLOCK].count(b'\n'))
+    
+    def line_offset(self, line: int) -> Optional[int]:
+        """Get the byte offset where a line starts.
+        
+        Args:
+            line: 0-based line number
+        
+        Returns:
+            Offset of the line, or None if the file has fewer lines
+        """
+        if line <= 0:
+            return 0 if line == 0 and self.size else None
+        
+        # Line n starts after the n-th newline; find the block holding it
+        self._index_through(line)
+        blocks = self._block_newlines
+        block = bisect_left(blocks, line) - 1
+        if block + 1 >= len(blocks):
+            return None
+        
+        position = block * LINE_INDEX_BLOCK - 1
+        for _ in range(line - blocks[block]):
+            position = self._data.find(b'\n', position + 1)
+        offset = position + 1
+        return offset if offset < self.size else None
+    
+    def read_range(self, start: int, end: Optional[int] = None) -> str:
+        """Decode a byte range, trimming one trailing line break."""
+        end = self.size if end is None else end
+        text = self._data[start:end].decode(self.encoding, errors='replace')
+        if text.endswith('\n'):
+            text = text[:-2] if text.endswith('\r\n') else text[:-1]
+        return text
+    
+    def lines(self, start: int, end: int) -> str:
+        """Get lines [start, end) joined by newlines."""
+        begin = self.line_offset(max(start, 0))
+        if begin is None or end <= start:
+            return ""
+        return self.read_range(begin, self.line_offset(end))
+    
+    def byte_slices(self, start: int, end: int, max_bytes: int) -> Iterator[str]:
+        """Decode a byte range in pieces of at most max_bytes.
+        
+        Pieces are cut at newlines where possible and never inside a UTF-8
+        sequence.
+        """
+        while start < end:
+            cut = min(end, start + max_bytes)
+            if cut < end:
+                newline = self._data.rfind(b'\n', start, cut)
+                if newline > start:
+                    cut = newline + 1
+                else:
+                    # Back off continuation bytes so characters stay whole
+                    while cut > start + 1 and self._data[cut] & 0xC0 == 0x80:
+                        cut -= 1
+            yield self.read_range(start, cut)
+            start = cut
+
+
 class ContextStreamer:
     """Handles efficient context streaming for large files."""
     
-    def __init__(self, config: Optional[StreamConfig] = None):
+    def __init__(
+        self,
+        config: Optional[StreamConfig] = None,
+        chunk_cache: Optional[ChunkCache] = None
+    ):
         """Initialize context streamer.
         
         Args:
             config: Streaming configuration
+            chunk_cache: Cache of file chunks, defaults to the shared cache
         """
         self.config = config or StreamConfig()
+        self.packer = ContextPacker(chunk_cache)
     
     def stream_file(
         self,
@@ -49,17 +174,16 @@ class ContextStreamer:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        content = file_path.read_text()
-        lines = content.splitlines()
-        
-        if focus_line:
-            # Stream focused context first
-            yield from self._stream_focused_context(
-                lines, focus_line, context_lines
-            )
-        else:
-            # Stream entire file in chunks
-            yield from self._stream_chunks(content)
+        # Only the lines that are yielded are decoded
+        with MappedFile(file_path) as source:
+            if focus_line:
+                # Stream focused context first
+                yield from self._stream_focused_context(
+                    source, focus_line, context_lines
+                )
+            else:
+                # Stream entire file in chunks
+                yield from self._stream_chunks(source)
     
     def stream_multiple_files(
         self,
@@ -98,28 +222,46 @@ class ContextStreamer:
     def create_context_summary(
         self,
         files: List[Path],
-        focus_areas: Optional[List[str]] = None
+        focus_areas: Optional[List[str]] = None,
+        max_tokens: Optional[int] = None
     ) -> str:
         """Create a summary of file contexts.
         
+        Files are summarized most relevant first until the token budget is
+        used up; their contents come from the chunk cache, so unchanged
+        files are not read again.
+        
         Args:
             files: List of file paths
             focus_areas: Specific areas to focus on
+            max_tokens: Token budget for the summary, defaults to the
+                context window
             
         Returns:
             Context summary
         """
-        summary_parts = []
+        budget = max_tokens or self.config.context_window
+        loaded = self.packer.load_chunks(files)
         
-        for file_path in files[:5]:  # Limit to first 5 files
-            try:
-                content = file_path.read_text()
-                file_summary = self._summarize_file(
-                    file_path, content, focus_areas
-                )
-                summary_parts.append(file_summary)
-            except Exception as e:
-                logger.warning(f"Failed to summarize {file_path}: {e}")
+        if focus_areas:
+            # Rank files by their most relevant chunk
+            chunks = [chunk for entry in loaded for chunk in entry.chunks]
+            scores = self.packer.score_chunks(" ".join(focus_areas), chunks)
+            best: Dict[str, float] = {}
+            for chunk, score in zip(chunks, scores):
+                best[chunk.path] = max(best.get(chunk.path, 0.0), score)
+            loaded.sort(key=lambda entry: best.get(entry.path, 0.0), reverse=True)
+        
+        summary_parts = []
+        used = 0
+        for i, entry in enumerate(loaded):
+            file_summary = self._summarize_file(Path(entry.path), entry.content, focus_areas)
+            tokens = self._estimate_tokens(file_summary)
+            if summary_parts and used + tokens > budget:
+                summary_parts.append(f"... {len(loaded) - i} more files not summarized")
+                break
+            summary_parts.append(file_summary)
+            used += tokens
         
         return "\n\n".join(summary_parts)
     
@@ -131,6 +273,10 @@ class ContextStreamer:
     ) -> Dict[str, Any]:
         """Optimize context for Claude's context window.
         
+        Files are split into functions, classes and blocks, and the chunks
+        most relevant to the prompt are packed into the available tokens.
+        Files that do not fit completely keep only their selected chunks.
+        
         Args:
             prompt: The prompt being sent
             files: List of file paths
@@ -143,69 +289,83 @@ class ContextStreamer:
         
         # Estimate prompt size
         prompt_tokens = self._estimate_tokens(prompt)
-        available_context = max_context - prompt_tokens - 1000  # Reserve space
+        available_context = max(0, max_context - prompt_tokens - 1000)  # Reserve space
+        
+        packed = self.packer.pack(prompt, files, available_context)
         
         optimized_context = {
             "prompt": prompt,
             "files": [],
-            "truncated": False
+            "truncated": False,
+            "tokens": packed.tokens
         }
         
-        current_size = 0
-        for file_path in files:
-            try:
-                content = file_path.read_text()
-                content_tokens = self._estimate_tokens(content)
-                
-                if current_size + content_tokens > available_context:
-                    # Truncate or skip
-                    if current_size < available_context * 0.8:
-                        # Truncate this file
-                        truncated_content = self._truncate_content(
-                            content,
-                            available_context - current_size
-                        )
-                        optimized_context["files"].append({
-                            "path": str(file_path),
-                            "content": truncated_content,
-                            "truncated": True
-                        })
-                        optimized_context["truncated"] = True
-                    break
-                else:
-                    optimized_context["files"].append({
-                        "path": str(file_path),
-                        "content": content,
-                        "truncated": False
-                    })
-                    current_size += content_tokens
-                    
-            except Exception as e:
-                logger.warning(f"Failed to process {file_path}: {e}")
+        for path, chunks in packed.by_file().items():
+            source = packed.sources[path]
+            truncated = path not in packed.complete_files
+            optimized_context["files"].append({
+                "path": path,
+                "content": self._join_chunks(source.content, chunks) if truncated else source.content,
+                "truncated": truncated
+            })
+        
+        selected = {entry["path"] for entry in optimized_context["files"]}
+        optimized_context["truncated"] = (
+            any(entry["truncated"] for entry in optimized_context["files"])
+            or any(str(f) not in selected for f in files)
+        )
         
         return optimized_context
     
-    def _stream_chunks(self, content: str) -> Iterator[str]:
-        """Stream content in overlapping chunks."""
+    def _join_chunks(self, content: str, chunks: List[ContextChunk]) -> str:
+        """Join a file's selected chunks along their original line spans.
+        
+        Blank lines between chunks are kept as they are in the file; any
+        other lines left out are replaced by an omission marker.
+        """
         lines = content.splitlines()
-        chunk_lines = self.config.chunk_size // 50  # Approximate lines per chunk
-        overlap_lines = self.config.overlap // 50
+        parts = []
+        previous_end = 0
+        for chunk in chunks:
+            gap = lines[previous_end:chunk.start_line - 1]
+            if any(line.strip() for line in gap):
+                parts.append(f"... (lines {previous_end + 1}-{chunk.start_line - 1} omitted)")
+            elif previous_end:
+                parts.extend(gap)
+            parts.append(chunk.content)
+            previous_end = chunk.end_line
+        if any(line.strip() for line in lines[previous_end:]):
+            parts.append(f"... (lines {previous_end + 1}-{len(lines)} omitted)")
+        return "\n".join(parts)
+    
+    def _stream_chunks(self, source: MappedFile) -> Iterator[str]:
+        """Stream content in overlapping chunks."""
+        chunk_lines = max(1, self.config.chunk_size // 50)  # Approximate lines per chunk
+        overlap_lines = min(self.config.overlap // 50, chunk_lines - 1)
+        max_bytes = self.config.chunk_size * BYTES_PER_TOKEN
         
         start = 0
-        while start < len(lines):
-            end = min(start + chunk_lines, len(lines))
-            chunk = "\n".join(lines[start:end])
+        start_offset = source.line_offset(0)
+        while start_offset is not None:
+            end = start + chunk_lines
+            end_offset = source.line_offset(end)
+            stop = source.size if end_offset is None else end_offset
+            
+            if stop - start_offset <= max_bytes:
+                yield source.read_range(start_offset, stop)
+            else:
+                yield from source.byte_slices(start_offset, stop, max_bytes)
             
-            yield chunk
+            if end_offset is None:
+                break
             
             # Move forward with overlap
             start = end - overlap_lines
-            if start >= len(lines) - overlap_lines:
-                break
+            start_offset = source.line_offset(start)
     
     def _stream_focused_context(
         self,
-        lines: List[str],
+        source: MappedFile,
         focus_line: int,
         context_lines: int
     ) -> Iterator[str]:
@@ -215,20 +375,20 @@ class ContextStreamer:
         
         # Calculate context window
         start = max(0, focus_idx - context_lines)
-        end = min(len(lines), focus_idx + context_lines + 1)
+        end = focus_idx + context_lines + 1
         
         # First chunk: immediate context
         immediate_start = max(0, focus_idx - 10)
-        immediate_end = min(len(lines), focus_idx + 11)
+        immediate_end = focus_idx + 11
         
-        yield "\n".join(lines[immediate_start:immediate_end])
+        yield source.lines(immediate_start, immediate_end)
         
         # Subsequent chunks: expanding context
         if start < immediate_start:
-            yield "\n".join(lines[start:immediate_start])
+            yield source.lines(start, immediate_start)
         
-        if immediate_end < end:
-            yield "\n".join(lines[immediate_end:end])
+        if immediate_end < end and source.line_offset(immediate_end) is not None:
+            yield source.lines(immediate_end, end)
     
     def _prioritize_files(
         self,
@@ -313,22 +473,4 @@ class ContextStreamer:
     
     def _estimate_tokens(self, text: str) -> int:
         """Estimate token count for text."""
-        # Rough estimation: 1 token ≈ 4 characters
-        return len(text) // 4
-    
-    def _truncate_content(self, content: str, max_tokens: int) -> str:
-        """Truncate content to fit token limit."""
-        estimated_chars = max_tokens * 4
-        
-        if len(content) <= estimated_chars:
-            return content
-        
-        # Truncate with ellipsis
-        truncated = content[:estimated_chars - 100]
-        
-        # Try to truncate at a natural boundary
-        last_newline = truncated.rfind('\n')
-        if last_newline > estimated_chars * 0.8:
-            truncated = truncated[:last_newline]
-        
-        return truncated + "\n... (content truncated)"
\ No newline at end of file
+        return estimate_tokens(text)
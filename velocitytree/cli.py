@@ -4,31 +4,65 @@ Command-line interface for Velocitytree.
 """
 
 import click
+import importlib
 import sys
 import subprocess
 import time
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.table import Table
 from rich.prompt import Confirm
 from rich.progress import track
 
-from .core import TreeFlattener, ContextManager
-from .config import Config
 from .utils import logger
-from .ai import AIAssistant
-from .workflows import WorkflowManager
-from .version import version_info
-from .onboarding import create_onboarding_command
-from .web_server import FeatureGraphWebServer
-from .git_integration import GitFeatureTracker, GitWorkflowIntegration
-from .progress_tracking import ProgressCalculator
-from .continuous_eval import ContinuousMonitor, AlertSystem, DriftDetector, RealignmentEngine
 
 console = Console()
 
 
+class LazyGroup(click.Group):
+    """Click group with subcommands defined in modules imported on first use.
+    
+    ``lazy_subcommands`` maps a command name to a ``(module:attribute, help)``
+    pair. The module is imported when the command is run or its own help is
+    shown; the group's help lists it with the given text instead.
+    """
+    
+    def __init__(self, *args, lazy_subcommands: Optional[Dict[str, Tuple[str, str]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+    
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+    
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_subcommands:
+            module_name, attribute = self.lazy_subcommands[name][0].split(':')
+            module = importlib.import_module(module_name, __package__)
+            self.add_command(getattr(module, attribute), name)
+        return super().get_command(ctx, name)
+    
+    def format_commands(self, ctx, formatter):
+        """List the commands without importing the lazy ones."""
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        
+        rows = []
+        for name in names:
+            if name not in self.commands and name in self.lazy_subcommands:
+                rows.append((name, self.lazy_subcommands[name][1]))
+                continue
+            command = self.get_command(ctx, name)
+            if command is not None and not command.hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+        
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
+
 def get_suggestion_engine(ctx):
     """Get or create a suggestion engine instance."""
     if 'suggestion_engine' not in ctx.obj:
@@ -46,13 +80,16 @@ def get_suggestion_engine(ctx):
     return ctx.obj['suggestion_engine']
 
 
-@click.group()
+@click.group(cls=LazyGroup, lazy_subcommands={
+    'onboard': ('.onboarding:onboard', 'Interactive setup wizard for new users.'),
+})
 @click.option('--config', '-c', type=click.Path(exists=True), help='Config file path')
 @click.option('--verbose', '-v', is_flag=True, help='Verbose output')
 @click.option('--quiet', '-q', is_flag=True, help='Quiet output')
 @click.pass_context
 def cli(ctx, config, verbose, quiet):
     """Velocitytree - Streamline your developer workflow 🌳⚡"""
+    from .config import Config
     ctx.ensure_object(dict)
     ctx.obj['config'] = Config(config)
     ctx.obj['verbose'] = verbose
@@ -164,9 +201,16 @@ def init(ctx, template, name, force):
 @click.option('--preserve-structure', is_flag=True, help='Preserve directory structure')
 @click.option('--follow-symlinks', is_flag=True, help='Follow symbolic links')
 @click.option('--source', '-s', type=click.Path(exists=True), help='Source directory to flatten')
+@click.option('--link-mode', type=click.Choice(['copy', 'auto', 'reflink', 'hardlink']),
+              help='Copy files, clone them copy-on-write (auto/reflink) or hardlink them')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Threads placing files concurrently')
+@click.option('--incremental', is_flag=True, help='Skip files unchanged since the last flatten')
+@click.option('--fast', is_flag=True, help='Shortcut for --link-mode auto --incremental with 8 threads')
 @click.pass_context
-def flatten(ctx, output, exclude, include_ext, preserve_structure, follow_symlinks, source):
+def flatten(ctx, output, exclude, include_ext, preserve_structure, follow_symlinks, source,
+            link_mode, jobs, incremental, fast):
     """Flatten project directory structure (TreeTamer functionality)."""
+    from .core import TreeFlattener
     config = ctx.obj['config']
     
     # Merge command-line options with config
@@ -180,6 +224,9 @@ def flatten(ctx, output, exclude, include_ext, preserve_structure, follow_symlin
     # Handle boolean flags
     preserve = preserve_structure if preserve_structure else flatten_config.preserve_structure
     follow = follow_symlinks if follow_symlinks else flatten_config.follow_symlinks
+    link_mode = link_mode or ('auto' if fast else flatten_config.link_mode)
+    workers = jobs or (8 if fast else flatten_config.workers)
+    incremental = incremental or fast or flatten_config.incremental
     
     # Create flattener with merged configuration
     flattener = TreeFlattener(
@@ -187,7 +234,10 @@ def flatten(ctx, output, exclude, include_ext, preserve_structure, follow_symlin
         exclude_patterns=exclude_patterns,
         include_extensions=include_extensions,
         preserve_structure=preserve,
-        follow_symlinks=follow
+        follow_symlinks=follow,
+        link_mode=link_mode,
+        workers=workers,
+        incremental=incremental
     )
     
     with console.status("Flattening directory structure...") as status:
@@ -197,8 +247,14 @@ def flatten(ctx, output, exclude, include_ext, preserve_structure, follow_symlin
     console.print(f"Output directory: [blue]{result['output_dir']}[/blue]")
     console.print(f"Total size: {result['total_size']:,} bytes")
     
+    if incremental:
+        console.print(
+            f"Unchanged: {result['files_unchanged']}, removed: {result['files_removed']}"
+        )
+    
     if ctx.obj['verbose']:
         console.print(f"Files skipped: {result.get('files_skipped', 0)}")
+        console.print(f"Files linked: {result.get('files_linked', 0)}")
 
 
 @cli.command()
@@ -208,6 +264,7 @@ def flatten(ctx, output, exclude, include_ext, preserve_structure, follow_symlin
 @click.pass_context
 def context(ctx, format, output, ai_ready):
     """Generate project context for AI or documentation."""
+    from .core import ContextManager
     manager = ContextManager()
     
     with console.status("Generating context...") as status:
@@ -330,8 +387,17 @@ def code():
 @click.option('--interactive', '-i', is_flag=True, help='Interactive analysis session')
 @click.option('--batch', '-b', type=click.Path(exists=True), help='Batch analyze files from list')
 @click.option('--output', '-o', type=click.Path(), help='Output file for reports')
+@click.option('--jobs', '-j', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Worker processes for directory analysis (0 = one per CPU)')
+@click.option('--no-cache', is_flag=True, help='Do not use the persistent analysis cache')
+@click.option('--disable-pattern', 'disabled_patterns', multiple=True, metavar='NAME',
+              help='Skip a pattern detector, e.g. "Magic Numbers" (repeatable)')
+@click.option('--pattern-timings', is_flag=True, help='Show time spent in each pattern detector')
+@click.option('--stream', type=click.Path(dir_okay=False), metavar='FILE',
+              help='Stream per-file results to a JSON Lines file instead of keeping them in memory')
 @click.pass_context
-def analyze(ctx, path, type, format, severity, interactive, batch, output):
+def analyze(ctx, path, type, format, severity, interactive, batch, output, jobs, no_cache,
+            disabled_patterns, pattern_timings, stream):
     """Analyze code for security vulnerabilities and quality issues."""
     from pathlib import Path
     from .code_analysis.analyzer import CodeAnalyzer
@@ -344,6 +410,10 @@ def analyze(ctx, path, type, format, severity, interactive, batch, output):
     import yaml
     import datetime
     
+    # Reports are built from in-memory results, which streaming does not keep
+    if stream and format in ['report', 'html']:
+        raise click.UsageError(f"--stream cannot be combined with --format {format}")
+    
     # Handle batch mode
     if batch:
         paths_to_analyze = []
@@ -469,7 +539,15 @@ def analyze(ctx, path, type, format, severity, interactive, batch, output):
                 
         else:
             # Full code analysis
-            analyzer = CodeAnalyzer()
+            from .utils import get_project_root
+            analyzer_config = {}
+            if disabled_patterns:
+                analyzer_config['disabled_patterns'] = sorted(disabled_patterns)
+            if not no_cache:
+                state_dir = get_project_root() / '.velocitytree'
+                analyzer_config['cache_path'] = state_dir / 'analysis_cache.db'
+                analyzer_config['clone_index_path'] = state_dir / 'clone_index.db'
+            analyzer = CodeAnalyzer(analyzer_config)
             
             if path.is_file():
                 result = analyzer.analyze_file(path)
@@ -510,20 +588,65 @@ def analyze(ctx, path, type, format, severity, interactive, batch, output):
                 else:
                     console.print("[red]Analysis failed[/red]")
             else:
-                result = analyzer.analyze_directory(path)
+                with Progress(console=console, disable=format == 'json') as progress:
+                    task = progress.add_task("Analyzing files...", total=None)
+                    
+                    def on_progress(done, total):
+                        progress.update(task, completed=done, total=total)
+                    
+                    if stream:
+                        result = analyzer.analyze_directory_streaming(
+                            path, output_path=stream, jobs=jobs, progress_callback=on_progress
+                        )
+                    else:
+                        result = analyzer.analyze_directory(
+                            path, jobs=jobs, progress_callback=on_progress
+                        )
                 console.print(f"\n[green]Analysis Results:[/green]")
                 console.print(f"Files analyzed: {result.files_analyzed}")
                 console.print(f"Total lines: {result.total_lines}")
-                console.print(f"Total issues: {len(result.all_issues)}")
+                if stream:
+                    console.print(f"Total issues: {result.total_issues}")
+                    console.print(f"Results written to: {stream}")
+                else:
+                    console.print(f"Total issues: {len(result.all_issues)}")
+                
+                cache_stats = analyzer.get_cache_stats()
+                if cache_stats and ctx.obj.get('verbose'):
+                    console.print(
+                        f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                        f"({cache_stats['entries']} entries, {cache_stats['size_bytes']:,} bytes)"
+                    )
                 
                 # Show breakdown by severity
-                severity_counts = {}
-                for issue in result.all_issues:
-                    severity_counts[issue.severity.value] = severity_counts.get(issue.severity.value, 0) + 1
+                if stream:
+                    severity_counts = result.issue_counts
+                else:
+                    severity_counts = {}
+                    for issue in result.all_issues:
+                        severity_counts[issue.severity.value] = severity_counts.get(issue.severity.value, 0) + 1
                 
                 console.print("\n[yellow]Issues by severity:[/yellow]")
                 for severity, count in severity_counts.items():
                     console.print(f"  {severity}: {count}")
+            
+            if pattern_timings and format != 'json':
+                timing_table = Table(title="Pattern Detector Timings")
+                timing_table.add_column("Detector", style="cyan")
+                timing_table.add_column("Runs", justify="right")
+                timing_table.add_column("Skipped", justify="right")
+                timing_table.add_column("Time (ms)", justify="right")
+                timing_table.add_column("Patterns", justify="right")
+                
+                for name, stats in analyzer.get_pattern_timings().items():
+                    timing_table.add_row(
+                        name,
+                        str(stats['calls']),
+                        str(stats['skipped']),
+                        f"{stats['seconds'] * 1000:.1f}",
+                        str(stats['patterns'])
+                    )
+                console.print(timing_table)
                 
             # Handle report format
             if format in ['report', 'html']:
@@ -751,6 +874,7 @@ def refactor(ctx, path, type, output, threshold, max_risk, save):
     """Analyze code for refactoring opportunities."""
     from pathlib import Path
     from .refactoring import RefactoringRecommendationEngine, RefactoringType
+    from .discovery import discover_files
     import json
     
     path = Path(path)
@@ -764,7 +888,7 @@ def refactor(ctx, path, type, output, threshold, max_risk, save):
     else:
         # Analyze all Python files in directory
         recommendations = []
-        py_files = list(path.rglob("*.py"))
+        py_files = discover_files(path, ['*.py'])
         
         for file_path in track(py_files, description="Analyzing files..."):
             try:
@@ -926,6 +1050,7 @@ def ai():
 @click.pass_context
 def suggest(ctx, task, context, save):
     """Get AI suggestions for a task."""
+    from .ai import AIAssistant
     try:
         assistant = AIAssistant(config=ctx.obj['config'])
         
@@ -952,6 +1077,7 @@ def suggest(ctx, task, context, save):
 @click.pass_context
 def analyze(ctx, file, type):
     """Analyze a code file with AI."""
+    from .ai import AIAssistant
     from pathlib import Path
     
     try:
@@ -972,6 +1098,7 @@ def analyze(ctx, file, type):
 @click.pass_context
 def generate(ctx, language, save):
     """Generate code using AI."""
+    from .ai import AIAssistant
     from prompt_toolkit import prompt
     
     try:
@@ -997,6 +1124,7 @@ def generate(ctx, language, save):
 @click.pass_context
 def test(ctx):
     """Test AI connectivity."""
+    from .ai import AIAssistant
     try:
         assistant = AIAssistant(config=ctx.obj['config'])
         provider_info = assistant.get_provider_info()
@@ -1440,6 +1568,7 @@ def git():
 @click.pass_context
 def git_sync(ctx, project, watch):
     """Sync feature status with git activity."""
+    from .git_integration import GitFeatureTracker
     from .core import VelocityTree
     
     try:
@@ -1495,6 +1624,7 @@ def git_sync(ctx, project, watch):
 @click.pass_context
 def git_report(ctx, project, format):
     """Generate feature progress report from git activity."""
+    from .git_integration import GitWorkflowIntegration
     from .core import VelocityTree
     
     try:
@@ -1550,6 +1680,7 @@ def git_report(ctx, project, format):
 @click.pass_context
 def create_feature_branch(ctx, feature_id, project):
     """Create a git branch for a feature."""
+    from .git_integration import GitWorkflowIntegration
     from .core import VelocityTree
     
     try:
@@ -1583,6 +1714,7 @@ def create_feature_branch(ctx, feature_id, project):
 @click.pass_context
 def suggest_relationships(ctx, project):
     """Suggest feature relationships based on git activity."""
+    from .git_integration import GitFeatureTracker
     from .core import VelocityTree
     
     try:
@@ -1918,6 +2050,7 @@ def suggestions_realtime(ctx, file_path, batch, interactive, context, output, fe
 @click.pass_context
 def progress_status(ctx, project, feature, format):
     """Show progress status for features or project."""
+    from .progress_tracking import ProgressCalculator
     from .core import VelocityTree
     
     try:
@@ -1990,6 +2123,7 @@ def progress_status(ctx, project, feature, format):
 @click.pass_context
 def velocity_report(ctx, project):
     """Show velocity metrics and trends."""
+    from .progress_tracking import ProgressCalculator
     from .core import VelocityTree
     
     try:
@@ -2054,6 +2188,7 @@ def velocity_report(ctx, project):
 @click.pass_context
 def burndown_chart(ctx, project, output, days):
     """Generate burndown chart for project."""
+    from .progress_tracking import ProgressCalculator
     from .core import VelocityTree
     
     try:
@@ -2121,6 +2256,7 @@ def burndown_chart(ctx, project, output, days):
 @click.pass_context
 def milestone_progress(ctx, project):
     """Show progress for project milestones."""
+    from .progress_tracking import ProgressCalculator
     from .core import VelocityTree
     
     try:
@@ -2200,6 +2336,7 @@ def milestone_progress(ctx, project):
 @click.pass_context
 def predict_completion(ctx, project, feature, confidence, risks, format):
     """Predict completion dates using machine learning."""
+    from .progress_tracking import ProgressCalculator
     from .core import VelocityTree
     import json
     
@@ -2263,6 +2400,7 @@ def predict_completion(ctx, project, feature, confidence, risks, format):
 @click.pass_context
 def train_model(ctx, project, history):
     """Train or update the completion prediction model."""
+    from .progress_tracking import ProgressCalculator
     from .core import VelocityTree
     import json
     
@@ -2364,7 +2502,7 @@ def generate_docs(ctx, source, type, format, output, template, style):
               default='markdown', help='Output format')
 @click.option('--style', type=click.Choice(['google', 'numpy', 'sphinx']), 
               default='google', help='Documentation style')
-@click.option('--interval', '-i', type=float, default=1.0, help='Check interval in seconds')
+@click.option('--interval', '-i', type=float, default=1.0, help='Seconds to collect changes before updating')
 @click.pass_context
 def watch_docs(ctx, patterns, format, style, interval):
     """Watch files and update documentation incrementally."""
@@ -2548,6 +2686,7 @@ def workflow():
 @click.pass_context
 def list_workflows(ctx):
     """List available workflows."""
+    from .workflows import WorkflowManager
     try:
         manager = WorkflowManager(config=ctx.obj['config'])
         workflows = manager.list_workflows()
@@ -2579,6 +2718,7 @@ def list_workflows(ctx):
 @click.pass_context
 def list_templates(ctx):
     """List available workflow templates."""
+    from .workflows import WorkflowManager
     manager = WorkflowManager(config=ctx.obj['config'])
     templates = manager.list_templates()
     
@@ -2609,6 +2749,7 @@ def list_templates(ctx):
 @click.pass_context
 def create(ctx, name, template, edit):
     """Create a new workflow."""
+    from .workflows import WorkflowManager
     manager = WorkflowManager(config=ctx.obj['config'])
     
     # Check if template is valid
@@ -2647,6 +2788,7 @@ def create(ctx, name, template, edit):
 @click.pass_context
 def run(ctx, name, verbose, dry_run, var, var_file):
     """Run a workflow."""
+    from .workflows import WorkflowManager
     # Join name parts to support workflow names with spaces
     workflow_name = ' '.join(name)
     manager = WorkflowManager(config=ctx.obj['config'])
@@ -2717,6 +2859,7 @@ def run(ctx, name, verbose, dry_run, var, var_file):
 @click.pass_context
 def delete(ctx, name):
     """Delete a workflow."""
+    from .workflows import WorkflowManager
     manager = WorkflowManager(config=ctx.obj['config'])
     
     # Confirm deletion
@@ -2731,6 +2874,7 @@ def delete(ctx, name):
 @click.pass_context
 def show(ctx, name):
     """Show workflow details."""
+    from .workflows import WorkflowManager
     manager = WorkflowManager(config=ctx.obj['config'])
     manager.show_workflow_details(name)
 
@@ -2890,6 +3034,7 @@ def deactivate_plugin(ctx, name):
 @cli.command()
 def version():
     """Show version information."""
+    from .version import version_info
     console.print(version_info())
 
 
@@ -3149,6 +3294,7 @@ def _print_dependency_tree(graph, node_id, seen, prefix="", is_last=True,
 @click.pass_context
 def visualize_web(ctx, host, port, project):
     """Start interactive web server for feature graph visualization."""
+    from .web_server import FeatureGraphWebServer
     server = FeatureGraphWebServer(host=host, port=port)
     
     if project:
@@ -4139,16 +4285,13 @@ def monitor_realign(ctx, action, project, drift_file, suggestion_id, priority, t
         console.print(f"[green]✓[/green] Suggestions exported to {output}")
 
 
-# Register onboarding command
-create_onboarding_command(cli)
-
-
 def main():
     """Main entry point."""
-    # Check for first run
-    from .onboarding import check_first_run
-    if check_first_run():
-        return  # Exit after onboarding
+    # Check for first run; the onboarding module is only loaded when needed
+    if not (Path.home() / '.velocitytree').exists():
+        from .onboarding import check_first_run
+        if check_first_run():
+            return  # Exit after onboarding
         
     try:
         cli(obj={})
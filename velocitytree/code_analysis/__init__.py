@@ -5,6 +5,7 @@ Provides intelligent code analysis, pattern detection, and quality metrics.
 
 from .analyzer import CodeAnalyzer, AnalysisResult
 from .models import (
+    AnalysisSummary,
     CodeIssue,
     CodeMetrics,
     Pattern,
@@ -17,6 +18,7 @@ from .models import (
 __all__ = [
     'CodeAnalyzer',
     'AnalysisResult',
+    'AnalysisSummary',
     'CodeIssue',
     'CodeMetrics',
     'Pattern',
@@ -1,9 +1,10 @@
 """Advanced pattern detectors for code analysis."""
 
 import ast
+import bisect
 import re
-from typing import List, Dict, Any, Optional
-from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict, Counter
 
 from .models import (
     Pattern,
@@ -11,20 +12,31 @@ from .models import (
     CodeLocation,
     LanguageSupport
 )
-from .patterns import PatternDetector
+from .patterns import PatternDetector, DetectionContext
+from .source import ParsedUnit
 
 
 class StrategyPatternDetector(PatternDetector):
     """Detector for Strategy design pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    # A module without any of these cannot define an abstract strategy
+    triggers = {
+        "abc": r'\bABC\b',
+        "abstractmethod": r'@abstractmethod',
+        "not_implemented": r'NotImplementedError',
+    }
+    requires_trigger = True
+    
+    def run(self, context: DetectionContext) -> List[Pattern]:
         patterns = []
+        module_analysis = context.module_analysis
+        parsed = context.parsed
         
         if module_analysis.language == LanguageSupport.PYTHON:
             # Look for abstract base classes or interfaces
             for cls in module_analysis.classes:
                 # Check if it's an abstract class
-                is_abstract = self._is_abstract_class(cls, content)
+                is_abstract = self._is_abstract_class(cls, context)
                 
                 if is_abstract:
                     # Find concrete implementations
@@ -32,7 +44,7 @@ class StrategyPatternDetector(PatternDetector):
                     
                     if len(implementations) >= 2:
                         # Check for context class that uses the strategy
-                        context_class = self._find_context_class(cls, module_analysis.classes, content)
+                        context_class = self._find_context_class(cls, module_analysis.classes, parsed)
                         
                         if context_class:
                             patterns.append(Pattern(
@@ -50,21 +62,19 @@ class StrategyPatternDetector(PatternDetector):
         
         return patterns
     
-    def _is_abstract_class(self, cls: Any, content: str) -> bool:
+    def _is_abstract_class(self, cls: Any, context: DetectionContext) -> bool:
         """Check if a class is abstract."""
         # Check for ABC inheritance or abstract methods
         if "ABC" in cls.parent_classes or "abc.ABC" in cls.parent_classes:
             return True
         
         # Check for abstractmethod decorator
-        class_content = self._get_class_content(content, cls.location)
-        if class_content and "@abstractmethod" in class_content:
+        if self._matches_in(context, "abstractmethod", cls.location):
             return True
         
         # Check for NotImplementedError in methods
         for method in cls.methods:
-            method_content = self._get_method_content(content, method.location)
-            if method_content and "NotImplementedError" in method_content:
+            if self._matches_in(context, "not_implemented", method.location):
                 return True
         
         return False
@@ -79,7 +89,8 @@ class StrategyPatternDetector(PatternDetector):
         
         return implementations
     
-    def _find_context_class(self, strategy_cls: Any, all_classes: List[Any], content: str) -> Optional[Any]:
+    def _find_context_class(self, strategy_cls: Any, all_classes: List[Any],
+                            parsed: ParsedUnit) -> Optional[Any]:
         """Find the context class that uses the strategy."""
         for cls in all_classes:
             if cls == strategy_cls:
@@ -92,37 +103,30 @@ class StrategyPatternDetector(PatternDetector):
             
             # Check if methods use strategy
             for method in cls.methods:
-                method_content = self._get_method_content(content, method.location)
+                method_content = self._get_content(parsed, method.location)
                 if method_content and strategy_cls.name in method_content:
                     return cls
         
         return None
-    
-    def _get_class_content(self, content: str, location: CodeLocation) -> Optional[str]:
-        """Extract class content from source code."""
-        lines = content.splitlines()
-        if location.line_start <= len(lines) and location.line_end <= len(lines):
-            return '\n'.join(lines[location.line_start-1:location.line_end])
-        return None
-    
-    def _get_method_content(self, content: str, location: CodeLocation) -> Optional[str]:
-        """Extract method content from source code."""
-        lines = content.splitlines()
-        if location.line_start <= len(lines) and location.line_end <= len(lines):
-            return '\n'.join(lines[location.line_start-1:location.line_end])
-        return None
 
 
 class DecoratorPatternDetector(PatternDetector):
     """Detector for Decorator design pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    node_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+    
+    def run(self, context: DetectionContext) -> List[Pattern]:
         patterns = []
+        module_analysis = context.module_analysis
         
         if module_analysis.language == LanguageSupport.PYTHON:
             # Python has built-in decorator syntax
+            decorated_lines = {
+                node.lineno for node in context.nodes_of(*self.node_types)
+                if node.decorator_list
+            }
             for func in module_analysis.functions:
-                if self._has_decorators(func, content):
+                if func.location.line_start in decorated_lines:
                     patterns.append(Pattern(
                         pattern_type=PatternType.DESIGN_PATTERN,
                         name="Decorator",
@@ -152,15 +156,6 @@ class DecoratorPatternDetector(PatternDetector):
         
         return patterns
     
-    def _has_decorators(self, func: Any, content: str) -> bool:
-        """Check if function has decorators."""
-        # Get the line before the function definition
-        if func.location.line_start > 1:
-            lines = content.splitlines()
-            prev_line = lines[func.location.line_start - 2].strip()
-            return prev_line.startswith('@')
-        return False
-    
     def _is_structural_decorator(self, cls: Any, all_classes: List[Any]) -> bool:
         """Check if class implements structural decorator pattern."""
         # Check if class wraps another object of same interface
@@ -181,16 +176,17 @@ class DecoratorPatternDetector(PatternDetector):
 class MagicNumbersCodeSmellDetector(PatternDetector):
     """Detector for Magic Numbers code smell."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
         
         # Regular expression to find numeric literals
         # Excludes 0, 1, -1, 2 as these are often not magic numbers
         magic_number_pattern = r'(?<!\w)(?!-?[012]\b)-?\d+\.?\d*(?!\w)'
         
-        lines = content.splitlines()
+        parsed = self._get_unit(module_analysis, content, parsed)
         
-        for i, line in enumerate(lines):
+        for i, line in enumerate(parsed.lines):
             # Skip comments and strings
             if line.strip().startswith('#') or '"""' in line or "'''" in line:
                 continue
@@ -234,22 +230,26 @@ class MagicNumbersCodeSmellDetector(PatternDetector):
 class FeatureEnvyCodeSmellDetector(PatternDetector):
     """Detector for Feature Envy code smell."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    node_types = (ast.Attribute,)
+    
+    def run(self, context: DetectionContext) -> List[Pattern]:
         patterns = []
+        module_analysis = context.module_analysis
         
         if module_analysis.language == LanguageSupport.PYTHON:
+            accesses = self._collect_accesses(context)
+            access_lines = [line for line, _ in accesses]
+            
             for cls in module_analysis.classes:
                 for method in cls.methods:
                     # Skip special methods
                     if method.name.startswith('__') and method.name.endswith('__'):
                         continue
                     
-                    method_content = self._get_method_content(content, method.location)
-                    if not method_content:
-                        continue
-                    
                     # Count accesses to other objects
-                    access_counts = self._count_object_accesses(method_content)
+                    first = bisect.bisect_left(access_lines, method.location.line_start)
+                    last = bisect.bisect_right(access_lines, method.location.line_end)
+                    access_counts = Counter(obj for _, obj in accesses[first:last])
                     
                     # Check if method uses another object more than self
                     self_count = access_counts.get('self', 0)
@@ -272,31 +272,36 @@ class FeatureEnvyCodeSmellDetector(PatternDetector):
         
         return patterns
     
-    def _get_method_content(self, content: str, location: CodeLocation) -> Optional[str]:
-        """Extract method content from source code."""
-        lines = content.splitlines()
-        if location.line_start <= len(lines) and location.line_end <= len(lines):
-            return '\n'.join(lines[location.line_start-1:location.line_end])
-        return None
-    
-    def _count_object_accesses(self, method_content: str) -> Dict[str, int]:
-        """Count how many times each object is accessed in method."""
-        access_counts = defaultdict(int)
+    def _collect_accesses(self, context: DetectionContext) -> List[Tuple[int, str]]:
+        """Collect (line, object) pairs for attribute accesses in the module.
+        
+        ``obj.attr`` counts as an access to ``obj``; ``self.obj.attr`` counts
+        as an access to the collaborator ``obj`` rather than to ``self``.
+        """
+        attributes = context.nodes_of(ast.Attribute)
+        accesses = []
+        collaborators = set()
         
-        # Pattern to match object.attribute or object.method()
-        access_pattern = r'(\w+)\.(?:\w+|\w+\(\))'
+        for node in attributes:
+            receiver = node.value
+            if (isinstance(receiver, ast.Attribute) and
+                    isinstance(receiver.value, ast.Name) and receiver.value.id == 'self'):
+                collaborators.add(id(receiver))
+                accesses.append((receiver.lineno, receiver.attr))
         
-        for match in re.finditer(access_pattern, method_content):
-            obj_name = match.group(1)
-            access_counts[obj_name] += 1
+        for node in attributes:
+            if isinstance(node.value, ast.Name) and id(node) not in collaborators:
+                accesses.append((node.lineno, node.value.id))
         
-        return dict(access_counts)
+        accesses.sort()
+        return accesses
 
 
 class DataClumpCodeSmellDetector(PatternDetector):
     """Detector for Data Clump code smell."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
         
         # Find groups of parameters that appear together in multiple functions
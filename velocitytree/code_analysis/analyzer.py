@@ -2,9 +2,11 @@
 
 import ast
 import os
+import sqlite3
 import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import List, Dict, Optional, Any, Union, Tuple
+from typing import List, Dict, Optional, Any, Union, Tuple, Callable, Iterator
 from datetime import datetime
 import re
 import tokenize
@@ -12,6 +14,7 @@ import io
 
 from .models import (
     AnalysisResult,
+    AnalysisSummary,
     ModuleAnalysis,
     FunctionAnalysis,
     ClassAnalysis,
@@ -30,9 +33,66 @@ from .language_adapters import get_language_adapter, BaseLanguageAdapter
 from .patterns import pattern_registry
 from .metrics import complexity_calculator
 from .security import SecurityAnalyzer
+from .source import ParsedUnit
+from .cache import AnalysisCache, content_hash, DEFAULT_MAX_SIZE, DEFAULT_MAX_AGE
+from .clones import CloneIndex, MinHasher, fingerprint_functions
+from .incremental import MODULE_WIDE_PATTERNS, LineMap, diff_lines, plan_edits, splice_module
+from .streaming import (
+    AnalysisAccumulator,
+    JsonLinesWriter,
+    MetricsAccumulator,
+    SuggestionAccumulator,
+)
+from ..discovery import FileDiscovery
 from ..utils import logger
 
 
+# Suggestions kept by streamed analyses unless ``max_suggestions`` is set
+DEFAULT_MAX_SUGGESTIONS = 1000
+
+# Files of the supported languages, analyzed when no patterns are given
+DEFAULT_FILE_PATTERNS = ['*.py', '*.js', '*.jsx', '*.ts', '*.tsx',
+                         '*.java', '*.cpp', '*.cc', '*.go', '*.rs', '*.rb']
+
+# Clone index location under the analyzed directory unless ``clone_index_path`` is set
+DEFAULT_CLONE_INDEX_PATH = Path('.velocitytree') / 'clone_index.db'
+
+# Per-process analyzer used by parallel workers
+_worker_analyzer: Optional['CodeAnalyzer'] = None
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """Create the analyzer instance for a worker process."""
+    global _worker_analyzer
+    _worker_analyzer = CodeAnalyzer(config)
+
+
+def _analyze_chunk(chunk: List[Tuple[int, str]], indexed: Optional[Dict[str, str]] = None
+                   ) -> Tuple[List[Tuple[int, Optional[str], Optional[ModuleAnalysis], Optional[List]]], Dict[str, Dict[str, float]]]:
+    """Analyze a chunk of indexed files in a worker process.
+    
+    Returns (index, content hash, result, clone fingerprints) tuples so the
+    parent process can store results in its persistent cache and clone
+    index without reading the files again, along with the pattern detector
+    timings for the chunk. Clone fingerprints are only collected if
+    ``indexed`` maps paths to the content hashes already in the clone index,
+    and only for files whose content differs.
+    """
+    pattern_registry.reset_timings()
+    _worker_analyzer._clone_fingerprints = (
+        {path: (digest, None) for path, digest in indexed.items()} if indexed is not None else None
+    )
+    results = []
+    for index, path in chunk:
+        module_analysis = _worker_analyzer.analyze_file(path)
+        digest = _worker_analyzer.cache.get(path, (None, None))[0]
+        fingerprints = None
+        if indexed is not None:
+            fingerprints = _worker_analyzer._clone_fingerprints.pop(path, (None, None))[1]
+        results.append((index, digest, module_analysis, fingerprints))
+    return results, pattern_registry.get_timings()
+
+
 class CodeAnalyzer:
     """Main code analyzer class with plugin architecture."""
     
@@ -40,13 +100,41 @@ class CodeAnalyzer:
         """Initialize the code analyzer.
         
         Args:
-            config: Configuration dictionary for analyzer settings
+            config: Configuration dictionary for analyzer settings. ``jobs``
+                sets the default number of worker processes used by
+                analyze_directory (1 = serial, 0 = one per CPU) and
+                ``chunk_size`` the number of files sent to a worker at once.
+                ``cache_path`` enables the persistent analysis cache, bounded
+                by ``cache_max_size`` (bytes) and ``cache_max_age`` (seconds).
+                ``disabled_patterns`` lists pattern detectors to skip.
+                ``clone_detection`` (default True) enables cross-file clone
+                detection in analyze_directory, with the index stored at
+                ``clone_index_path`` (``.velocitytree/clone_index.db`` under
+                the analyzed directory if unset, in memory if None) and pairs
+                reported above ``clone_threshold`` similarity. ``max_suggestions``
+                bounds the suggestions kept by analyze_directory_streaming.
+                File discovery honors .gitignore unless ``use_gitignore`` is
+                False, skips ``exclude_patterns`` and lists files with
+                ``git ls-files`` when ``use_git_ls_files`` is set.
         """
         self.config = config or {}
         self.language_adapters: Dict[LanguageSupport, BaseLanguageAdapter] = {}
         self._load_language_adapters()
-        self.cache = {}  # Simple in-memory cache
+        self.cache = {}  # In-memory cache: path -> (content hash, result)
         self.security_analyzer = SecurityAnalyzer(config)
+        self.persistent_cache: Optional[AnalysisCache] = None
+        if self.config.get('cache_path'):
+            self.persistent_cache = AnalysisCache(
+                self.config['cache_path'],
+                version=self._rules_fingerprint(),
+                max_size=self.config.get('cache_max_size', DEFAULT_MAX_SIZE),
+                max_age=self.config.get('cache_max_age', DEFAULT_MAX_AGE)
+            )
+        self._clone_index: Optional[CloneIndex] = None
+        self._clone_hasher = MinHasher()
+        # Content hash and clone fingerprints (None while the index is current)
+        # of each file, collected while a directory is analyzed
+        self._clone_fingerprints: Optional[Dict[str, Tuple[str, List]]] = None
         
     def _load_language_adapters(self):
         """Load language-specific analyzers."""
@@ -61,6 +149,9 @@ class CodeAnalyzer:
     def analyze_file(self, file_path: Union[str, Path]) -> Optional[ModuleAnalysis]:
         """Analyze a single file.
         
+        Results are cached by content hash in memory and, when a persistent
+        cache is configured, on disk across runs.
+        
         Args:
             file_path: Path to the file to analyze
             
@@ -68,76 +159,60 @@ class CodeAnalyzer:
             Module analysis result or None if analysis failed
         """
         file_path = Path(file_path)
-        
-        # Check cache
-        cache_key = str(file_path)
-        if cache_key in self.cache:
-            file_mtime = file_path.stat().st_mtime
-            cached_result, cached_mtime = self.cache[cache_key]
-            if file_mtime <= cached_mtime:
-                return cached_result
-        
-        # Detect language
-        language = self._detect_language(file_path)
-        if not language:
-            logger.warning(f"Unsupported file type: {file_path}")
-            return None
-        
-        # Get appropriate adapter
-        adapter = self.language_adapters.get(language)
-        if not adapter:
-            logger.warning(f"No adapter for language: {language}")
+        if self._get_adapter(file_path) is None:
             return None
         
         try:
             # Read file content
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path}: {e}")
+            return None
+        
+        return self.analyze_source(file_path, content)
+    
+    def analyze_source(self, file_path: Union[str, Path], content: str,
+                       cache: bool = True) -> Optional[ModuleAnalysis]:
+        """Analyze in-memory source, such as an unsaved editor buffer.
+        
+        The file is never read; its path only selects the language and
+        appears in locations. Results share the content-hash caches of
+        analyze_file.
+        
+        Args:
+            file_path: Path the source belongs to
+            content: Source text
+            cache: Look up and store the result in the caches
             
-            # Perform analysis
-            module_analysis = adapter.analyze_module(str(file_path), content)
-            
-            # Calculate metrics
-            metrics = self._calculate_metrics(module_analysis, content)
-            module_analysis.metrics = metrics
-            
-            # Detect patterns
-            patterns = self._detect_patterns(module_analysis, content)
-            module_analysis.patterns.extend(patterns)
-            
-            # Check common issues
-            issues = self._check_common_issues(module_analysis, content)
-            module_analysis.issues.extend(issues)
+        Returns:
+            Module analysis result or None if analysis failed
+        """
+        file_path = Path(file_path)
+        resolved = self._get_adapter(file_path)
+        if resolved is None:
+            return None
+        language, adapter = resolved
+        
+        try:
+            # Check caches
+            cache_key = str(file_path)
+            digest = content_hash(content)
+            if cache:
+                cached = self._get_cached(cache_key, digest)
+                if cached is not None:
+                    return cached
             
-            # Security analysis
-            security_result = self.security_analyzer.analyze_file(file_path)
-            if security_result and security_result['vulnerabilities']:
-                # Store security vulnerabilities in module analysis
-                if hasattr(module_analysis, 'vulnerabilities'):
-                    module_analysis.vulnerabilities = security_result['vulnerabilities']
-                else:
-                    # Add vulnerabilities as issues for now
-                    for vuln in security_result['vulnerabilities']:
-                        # Map SeverityLevel to Severity
-                        severity_map = {
-                            SeverityLevel.CRITICAL: Severity.CRITICAL,
-                            SeverityLevel.HIGH: Severity.ERROR,
-                            SeverityLevel.MEDIUM: Severity.WARNING,
-                            SeverityLevel.LOW: Severity.INFO,
-                        }
-                        issue = CodeIssue(
-                            severity=severity_map.get(vuln.severity, Severity.WARNING),
-                            category=IssueCategory.SECURITY,
-                            message=vuln.description,
-                            rule_id=f"security-{vuln.type}",
-                            location=vuln.location,
-                            suggestion=vuln.fix_suggestion,
-                            confidence=vuln.confidence
-                        )
-                        module_analysis.issues.append(issue)
+            module_analysis = self._analyze_content(file_path, content, language, adapter)
+            if self._clone_fingerprints is not None and \
+                    self._clone_fingerprints.get(cache_key, (None, None))[0] != digest:
+                self._clone_fingerprints[cache_key] = (
+                    digest, self._fingerprint_functions(module_analysis, content)
+                )
             
             # Cache result
-            self.cache[cache_key] = (module_analysis, time.time())
+            if cache:
+                self._set_cached(cache_key, digest, module_analysis)
             
             return module_analysis
             
@@ -145,15 +220,262 @@ class CodeAnalyzer:
             logger.error(f"Error analyzing {file_path}: {e}")
             return None
     
+    def analyze_incremental(self, file_path: Union[str, Path], old_content: str,
+                            new_content: str,
+                            previous: Optional[ModuleAnalysis] = None) -> Optional[ModuleAnalysis]:
+        """Analyze a new version of a file, re-analyzing only what an edit touched.
+        
+        The versions are diffed line by line and each changed hunk is mapped
+        to the top-level function or class enclosing it in the previous
+        analysis. Only those definitions are parsed and scored again; their
+        results are spliced into the previous analysis and everything after
+        them moves to its new lines. Edits to module-level code, or that add,
+        remove or break a definition, fall back to a full analysis.
+        
+        The result matches a full analysis of the new version up to the
+        order of its issues and patterns, and is cached like one.
+        
+        Args:
+            file_path: Path the source belongs to
+            old_content: Previous version of the source
+            new_content: New version of the source
+            previous: Analysis of old_content, looked up or computed if omitted
+            
+        Returns:
+            Module analysis of the new version or None if analysis failed
+        """
+        file_path = Path(file_path)
+        cache_key = str(file_path)
+        digest = content_hash(new_content)
+        cached = self._get_cached(cache_key, digest)
+        if cached is not None:
+            return cached
+        
+        if previous is None:
+            previous = self.analyze_source(file_path, old_content)
+        
+        module_analysis = None
+        if previous is not None and previous.language == LanguageSupport.PYTHON:
+            try:
+                module_analysis = self._analyze_edits(file_path, old_content, new_content, previous)
+            except Exception as e:
+                logger.debug(f"Incremental analysis of {file_path} failed: {e}")
+        
+        if module_analysis is None:
+            return self.analyze_source(file_path, new_content)
+        
+        self._set_cached(cache_key, digest, module_analysis)
+        return module_analysis
+    
+    def _analyze_edits(self, file_path: Path, old_content: str, new_content: str,
+                       previous: ModuleAnalysis) -> Optional[ModuleAnalysis]:
+        """Splice re-analyzed definitions into a previous analysis.
+        
+        Returns:
+            Analysis of the new version, or None if it needs a full analysis
+        """
+        if any(issue.rule_id == "syntax-error" for issue in previous.issues):
+            return None
+        
+        old_lines = old_content.splitlines()
+        new_lines = new_content.splitlines()
+        opcodes = diff_lines(old_lines, new_lines)
+        edits = plan_edits(old_content, new_lines, opcodes, previous)
+        if edits is None:
+            return None
+        
+        language, adapter = self._get_adapter(file_path)
+        cognitive = previous.metrics.cognitive_complexity
+        parts = []
+        for edit in edits:
+            new_text = '\n'.join(new_lines[edit.new_start - 1:edit.new_end])
+            try:
+                body = ast.parse(new_text).body
+            except SyntaxError:
+                return None
+            if len(body) != 1 or not isinstance(body[0], (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                return None
+            
+            old_text = '\n'.join(old_lines[edit.old_start - 1:edit.old_end])
+            old_parsed = ParsedUnit.from_source(file_path, old_text)
+            old_part = adapter.analyze_module(str(file_path), old_text, old_parsed)
+            part = self._analyze_content(file_path, new_text, language, adapter)
+            
+            # Imports and globals carry no lines, so they cannot be spliced
+            if (part.imports, part.global_variables) != (old_part.imports, old_part.global_variables):
+                return None
+            
+            # Cognitive complexity adds up over top-level statements
+            old_metrics, _ = complexity_calculator.calculate_function_metrics(old_parsed.tree)
+            cognitive += part.metrics.cognitive_complexity - old_metrics.cognitive_complexity
+            parts.append(part)
+        
+        module_analysis = splice_module(previous, edits, parts, LineMap(opcodes))
+        if not module_analysis.functions and not any(c.methods for c in module_analysis.classes):
+            # The module's own cyclomatic complexity would be needed
+            return None
+        
+        complexity_calculator.summarize_metrics(
+            module_analysis, new_content, previous.metrics.cyclomatic_complexity,
+            cognitive, lines=new_lines
+        )
+        module_analysis.patterns.extend(self._detect_module_wide_patterns(module_analysis, new_content))
+        return module_analysis
+    
+    def _detect_module_wide_patterns(self, module: ModuleAnalysis, content: str) -> List[Pattern]:
+        """Detect only the patterns that compare a module's definitions with each other."""
+        disabled = {d.name for d in pattern_registry.detectors if d.name not in MODULE_WIDE_PATTERNS}
+        disabled.update(self.config.get('disabled_patterns') or ())
+        parsed = ParsedUnit.from_source(module.file_path, content, parse=False)
+        return pattern_registry.detect_patterns(module, content, parsed, disabled=disabled)
+    
+    def _get_adapter(self, file_path: Path) -> Optional[Tuple[LanguageSupport, BaseLanguageAdapter]]:
+        """Find the language and adapter for a file, warning if there is none."""
+        # Detect language
+        language = self._detect_language(file_path)
+        if not language:
+            logger.warning(f"Unsupported file type: {file_path}")
+            return None
+        
+        # Get appropriate adapter
+        adapter = self.language_adapters.get(language)
+        if not adapter:
+            logger.warning(f"No adapter for language: {language}")
+            return None
+        
+        return language, adapter
+    
+    def _analyze_content(self, file_path: Path, content: str,
+                         language: LanguageSupport,
+                         adapter: BaseLanguageAdapter) -> ModuleAnalysis:
+        """Run every analysis stage over already loaded source."""
+        # Parse the source once for every analysis stage
+        parsed = ParsedUnit.from_source(
+            file_path, content, parse=language == LanguageSupport.PYTHON
+        )
+        
+        # Perform analysis
+        module_analysis = adapter.analyze_module(str(file_path), content, parsed)
+        
+        # Calculate metrics
+        metrics = self._calculate_metrics(module_analysis, content, parsed)
+        module_analysis.metrics = metrics
+        
+        # Detect patterns
+        patterns = self._detect_patterns(module_analysis, content, parsed)
+        module_analysis.patterns.extend(patterns)
+        
+        # Check common issues
+        issues = self._check_common_issues(module_analysis, content, parsed)
+        module_analysis.issues.extend(issues)
+        
+        # Security analysis
+        security_result = self.security_analyzer.analyze_file(file_path, parsed)
+        if security_result and security_result['vulnerabilities']:
+            # Store security vulnerabilities in module analysis
+            if hasattr(module_analysis, 'vulnerabilities'):
+                module_analysis.vulnerabilities = security_result['vulnerabilities']
+            else:
+                # Add vulnerabilities as issues for now
+                for vuln in security_result['vulnerabilities']:
+                    # Map SeverityLevel to Severity
+                    severity_map = {
+                        SeverityLevel.CRITICAL: Severity.CRITICAL,
+                        SeverityLevel.HIGH: Severity.ERROR,
+                        SeverityLevel.MEDIUM: Severity.WARNING,
+                        SeverityLevel.LOW: Severity.INFO,
+                    }
+                    issue = CodeIssue(
+                        severity=severity_map.get(vuln.severity, Severity.WARNING),
+                        category=IssueCategory.SECURITY,
+                        message=vuln.description,
+                        rule_id=f"security-{vuln.type}",
+                        location=vuln.location,
+                        suggestion=vuln.fix_suggestion,
+                        confidence=vuln.confidence
+                    )
+                    module_analysis.issues.append(issue)
+        
+        return module_analysis
+    
+    def _get_cached(self, cache_key: str, digest: str) -> Optional[ModuleAnalysis]:
+        """Look up a result in the in-memory and persistent caches."""
+        if cache_key in self.cache:
+            cached_digest, cached_result = self.cache[cache_key]
+            if cached_digest == digest and cached_result is not None:
+                return cached_result
+        
+        if self.persistent_cache is not None:
+            cached_result = self.persistent_cache.get(cache_key, digest)
+            if cached_result is not None:
+                self.cache[cache_key] = (digest, cached_result)
+                return cached_result
+        
+        return None
+    
+    def _release_cached(self, cache_key: str):
+        """Drop a result from the in-memory cache, keeping its content hash.
+        
+        Streamed analyses release results once they are consumed so memory
+        does not grow with the size of the project; the persistent cache
+        still serves them on later runs.
+        """
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            self.cache[cache_key] = (entry[0], None)
+    
+    def _set_cached(self, cache_key: str, digest: str, module_analysis: ModuleAnalysis):
+        """Store a result in the in-memory and persistent caches."""
+        self.cache[cache_key] = (digest, module_analysis)
+        if self.persistent_cache is not None:
+            try:
+                self.persistent_cache.set(cache_key, digest, module_analysis)
+            except Exception as e:
+                logger.warning(f"Failed to cache analysis of {cache_key}: {e}")
+    
+    def _rules_fingerprint(self) -> str:
+        """Fingerprint the analyzer version, rules and settings for cache keys."""
+        from .. import __version__
+        
+        settings = {
+            key: value for key, value in self.config.items()
+            if key not in ('jobs', 'chunk_size', 'use_git_ls_files')
+            and not key.startswith('cache') and not key.startswith('clone')
+        }
+        parts = [
+            __version__,
+            repr(sorted(settings.items(), key=lambda item: item[0])),
+            repr([d.name for d in pattern_registry.detectors]),
+            repr(sorted(pattern_registry.disabled)),
+            repr([p.pattern for p in self.security_analyzer.scanner.vulnerability_patterns]),
+        ]
+        return content_hash('\n'.join(parts))[:16]
+    
+    def get_pattern_timings(self) -> Dict[str, Dict[str, float]]:
+        """Get per-detector pattern detection timings, slowest first."""
+        return pattern_registry.get_timings()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics for the persistent cache."""
+        if self.persistent_cache is None:
+            return {}
+        return self.persistent_cache.get_stats()
+    
     def analyze_directory(self, directory: Union[str, Path], 
                          recursive: bool = True,
-                         file_patterns: Optional[List[str]] = None) -> AnalysisResult:
+                         file_patterns: Optional[List[str]] = None,
+                         jobs: Optional[int] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> AnalysisResult:
         """Analyze all files in a directory.
         
         Args:
             directory: Directory to analyze
             recursive: Whether to analyze subdirectories
             file_patterns: Glob patterns for files to include
+            jobs: Number of worker processes (1 = serial, 0 = one per CPU);
+                defaults to the ``jobs`` config value
+            progress_callback: Called with (files_done, files_total) as
+                files complete
             
         Returns:
             Complete analysis result
@@ -169,8 +491,11 @@ class CodeAnalyzer:
         error_files = []
         language_breakdown = {}
         
-        for file_path in files_to_analyze:
-            module_analysis = self.analyze_file(file_path)
+        detect_clones = self.config.get('clone_detection', True)
+        clone_fingerprints = self._indexed_clone_digests(directory) if detect_clones else None
+        results = self._analyze_files(files_to_analyze, jobs, progress_callback, clone_fingerprints)
+        
+        for file_path, module_analysis in zip(files_to_analyze, results):
             if module_analysis:
                 modules.append(module_analysis)
                 language = module_analysis.language
@@ -188,12 +513,18 @@ class CodeAnalyzer:
             all_patterns.extend(module.patterns)
             total_lines += module.metrics.lines_of_code
         
+        if detect_clones:
+            all_patterns.extend(self._detect_clones(directory, modules, clone_fingerprints))
+        
         # Calculate aggregate metrics
         aggregate_metrics = self._aggregate_metrics([m.metrics for m in modules])
         
         # Generate suggestions
         suggestions = self._generate_suggestions(modules, all_issues, all_patterns)
         
+        if self.persistent_cache is not None:
+            self.persistent_cache.evict()
+        
         analysis_time = time.time() - start_time
         
         return AnalysisResult(
@@ -210,10 +541,369 @@ class CodeAnalyzer:
             error_files=error_files
         )
     
+    def iter_directory(self, directory: Union[str, Path],
+                       recursive: bool = True,
+                       file_patterns: Optional[List[str]] = None,
+                       jobs: Optional[int] = None,
+                       progress_callback: Optional[Callable[[int, int], None]] = None
+                       ) -> Iterator[Tuple[Path, Optional[ModuleAnalysis]]]:
+        """Analyze a directory, yielding each file's result as it completes.
+        
+        Results are not retained once the consumer moves on, so memory use
+        does not grow with the number of files. With several jobs, results
+        arrive in completion order rather than path order.
+        
+        Args:
+            directory: Directory to analyze
+            recursive: Whether to analyze subdirectories
+            file_patterns: Glob patterns for files to include
+            jobs: Number of worker processes (1 = serial, 0 = one per CPU)
+            progress_callback: Called with (files_done, files_total)
+        
+        Yields:
+            (file path, module analysis or None if analysis failed)
+        """
+        files = self._find_files(Path(directory), recursive, file_patterns)
+        return self._iter_released(files, jobs, progress_callback)
+    
+    def _iter_released(self, files: List[Path], jobs: Optional[int],
+                       progress_callback: Optional[Callable[[int, int], None]],
+                       clone_fingerprints: Optional[Dict[str, Tuple[str, List]]] = None
+                       ) -> Iterator[Tuple[Path, Optional[ModuleAnalysis]]]:
+        """Yield each file's result, releasing it once the consumer moves on."""
+        for index, module_analysis in self._iter_analyzed(files, jobs, progress_callback, clone_fingerprints):
+            file_path = files[index]
+            yield file_path, module_analysis
+            self._release_cached(str(file_path))
+    
+    def analyze_directory_streaming(self, directory: Union[str, Path],
+                                    output_path: Optional[Union[str, Path]] = None,
+                                    module_callback: Optional[Callable[[ModuleAnalysis], None]] = None,
+                                    recursive: bool = True,
+                                    file_patterns: Optional[List[str]] = None,
+                                    jobs: Optional[int] = None,
+                                    progress_callback: Optional[Callable[[int, int], None]] = None
+                                    ) -> AnalysisSummary:
+        """Analyze a directory without keeping per-module results in memory.
+        
+        Aggregates are computed incrementally while each module is passed to
+        ``module_callback`` and written to ``output_path`` as JSON Lines
+        (see ``streaming.iter_records`` for reading them back lazily).
+        
+        Args:
+            directory: Directory to analyze
+            output_path: JSON Lines file for module, pattern and summary records
+            module_callback: Called with each module analysis as it completes
+            recursive: Whether to analyze subdirectories
+            file_patterns: Glob patterns for files to include
+            jobs: Number of worker processes (1 = serial, 0 = one per CPU)
+            progress_callback: Called with (files_done, files_total)
+        
+        Returns:
+            Aggregated summary of the analysis
+        """
+        start_time = time.time()
+        directory = Path(directory)
+        accumulator = AnalysisAccumulator(
+            self.config.get('max_suggestions', DEFAULT_MAX_SUGGESTIONS)
+        )
+        detect_clones = self.config.get('clone_detection', True)
+        clone_fingerprints = self._indexed_clone_digests(directory) if detect_clones else None
+        analyzed_paths = []
+        error_files = []
+        writer = JsonLinesWriter(output_path) if output_path else None
+        
+        try:
+            files = self._find_files(directory, recursive, file_patterns)
+            for file_path, module_analysis in self._iter_released(
+                files, jobs, progress_callback, clone_fingerprints
+            ):
+                if module_analysis is None:
+                    error_files.append(str(file_path))
+                    if writer:
+                        writer.write('error', {'file_path': str(file_path)})
+                    continue
+                
+                accumulator.add_module(module_analysis)
+                if detect_clones:
+                    self._index_clones(directory, module_analysis, clone_fingerprints)
+                    analyzed_paths.append(module_analysis.file_path)
+                if writer:
+                    writer.write('module', module_analysis)
+                if module_callback:
+                    module_callback(module_analysis)
+            
+            if detect_clones:
+                for pattern in self._find_clone_patterns(directory, analyzed_paths):
+                    accumulator.add_pattern(pattern)
+                    if writer:
+                        writer.write('pattern', pattern)
+            
+            if self.persistent_cache is not None:
+                self.persistent_cache.evict()
+            
+            summary = AnalysisSummary(
+                timestamp=datetime.now(),
+                files_analyzed=accumulator.files_analyzed,
+                total_lines=accumulator.total_lines,
+                language_breakdown=accumulator.language_breakdown,
+                aggregate_metrics=accumulator.metrics.result(),
+                issue_counts=accumulator.issue_counts,
+                category_counts=accumulator.category_counts,
+                pattern_counts=accumulator.pattern_counts,
+                suggestions=accumulator.suggestions.result(),
+                analysis_time=time.time() - start_time,
+                output_path=str(output_path) if output_path else None,
+                error_files=error_files
+            )
+            if writer:
+                writer.write('summary', summary)
+        finally:
+            if writer:
+                writer.close()
+        
+        return summary
+    
+    def _detect_clones(self, directory: Path, modules: List[ModuleAnalysis],
+                       clone_fingerprints: Optional[Dict[str, Tuple[str, List]]] = None) -> List[Pattern]:
+        """Find functions duplicated across files using the clone index."""
+        for module in modules:
+            self._index_clones(directory, module, clone_fingerprints)
+        return self._find_clone_patterns(directory, [m.file_path for m in modules])
+    
+    def _get_clone_index(self, directory: Path) -> CloneIndex:
+        """Get the clone index, opening it on first use.
+        
+        Unless ``clone_index_path`` is set, the index is stored under the
+        first analyzed directory so later runs only fingerprint changed files.
+        """
+        if self._clone_index is None:
+            db_path = self.config.get('clone_index_path', Path(directory) / DEFAULT_CLONE_INDEX_PATH)
+            try:
+                self._clone_index = CloneIndex(db_path)
+            except (OSError, sqlite3.Error) as e:
+                logger.debug(f"Keeping clone index in memory: {e}")
+                self._clone_index = CloneIndex()
+        return self._clone_index
+    
+    def _index_clones(self, directory: Path, module: ModuleAnalysis,
+                      clone_fingerprints: Optional[Dict[str, Tuple[str, List]]] = None):
+        """Fingerprint a module's functions for clone detection.
+        
+        Files whose content is unchanged since they were last indexed are
+        skipped. Fingerprints computed when the file was analyzed are used
+        as they are; only results served from the analysis cache need the
+        file to be read again.
+        """
+        index = self._get_clone_index(directory)
+        path = module.file_path
+        digest = self.cache.get(path, (None, None))[0]
+        pending = clone_fingerprints.pop(path, None) if clone_fingerprints is not None else None
+        if digest is not None and index.is_current(path, digest):
+            return
+        if pending is not None and pending[0] == digest and pending[1] is not None:
+            index.store_fingerprints(path, digest, pending[1])
+            return
+        
+        try:
+            unit = ParsedUnit.from_file(path, parse=False)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.debug(f"Skipping clone fingerprinting of {path}: {e}")
+            return
+        index.update_file(path, content_hash(unit.content), self._clone_functions(module, unit))
+    
+    def _indexed_clone_digests(self, directory: Path) -> Dict[str, Tuple[str, None]]:
+        """Start collecting clone fingerprints, seeded with the files already indexed."""
+        return {
+            path: (digest, None)
+            for path, digest in self._get_clone_index(directory).get_digests().items()
+        }
+    
+    def _fingerprint_functions(self, module: ModuleAnalysis, content: str) -> List:
+        """Compute clone fingerprints of a module's functions from its loaded source."""
+        unit = ParsedUnit.from_source(module.file_path, content, parse=False)
+        return fingerprint_functions(self._clone_functions(module, unit), self._clone_hasher)
+    
+    @staticmethod
+    def _clone_functions(module: ModuleAnalysis, unit: ParsedUnit) -> List[Tuple[str, int, int, str]]:
+        """List (name, line_start, line_end, source) for a module's functions and methods."""
+        return [
+            (func.name, func.location.line_start, func.location.line_end,
+             unit.get_lines(func.location.line_start, func.location.line_end) or '')
+            for func in module.functions
+        ] + [
+            (f"{cls.name}.{method.name}", method.location.line_start, method.location.line_end,
+             unit.get_lines(method.location.line_start, method.location.line_end) or '')
+            for cls in module.classes for method in cls.methods
+        ]
+    
+    def _find_clone_patterns(self, directory: Path, paths: List[str]) -> List[Pattern]:
+        """Report clone pairs among indexed files as Duplicate Code patterns."""
+        index = self._get_clone_index(directory)
+        index.prune(directory, paths)
+        
+        patterns = []
+        for clone in index.find_clones(self.config.get('clone_threshold', 0.8), paths=paths):
+            first, second = clone.first, clone.second
+            patterns.append(Pattern(
+                pattern_type=PatternType.CODE_SMELL,
+                name="Duplicate Code",
+                description=(
+                    f"Functions '{first.name}' and '{second.name}' in different files "
+                    f"have similar implementation"
+                ),
+                location=CodeLocation(
+                    file_path=first.file_path,
+                    line_start=first.line_start,
+                    line_end=first.line_end
+                ),
+                confidence=clone.similarity,
+                metadata={
+                    "duplicate_function": second.name,
+                    "duplicate_location": {
+                        "file": second.file_path,
+                        "line": second.line_start
+                    },
+                    "similarity": clone.similarity,
+                    "scope": "cross_file"
+                }
+            ))
+        return patterns
+    
+    def _analyze_files(self, files: List[Path], jobs: Optional[int],
+                       progress_callback: Optional[Callable[[int, int], None]],
+                       clone_fingerprints: Optional[Dict[str, Tuple[str, List]]] = None
+                       ) -> List[Optional[ModuleAnalysis]]:
+        """Analyze files serially or in a process pool.
+        
+        Results are returned in the same order as ``files`` regardless of
+        the order in which workers finish.
+        """
+        results: List[Optional[ModuleAnalysis]] = [None] * len(files)
+        for index, module_analysis in self._iter_analyzed(files, jobs, progress_callback, clone_fingerprints):
+            results[index] = module_analysis
+        return results
+    
+    def _iter_analyzed(self, files: List[Path], jobs: Optional[int],
+                       progress_callback: Optional[Callable[[int, int], None]],
+                       clone_fingerprints: Optional[Dict[str, Tuple[str, List]]] = None
+                       ) -> Iterator[Tuple[int, Optional[ModuleAnalysis]]]:
+        """Analyze files serially or in a process pool, yielding results as they complete.
+        
+        Yields (index into ``files``, result) pairs. In parallel mode only a
+        few chunks per worker are in flight at a time, so finished results
+        never pile up waiting for the consumer. If ``clone_fingerprints`` is
+        given, it maps paths to (content hash, None) for the files in the
+        clone index; every file that is analyzed rather than served from a
+        cache, and whose content hash differs, gets its clone fingerprints.
+        """
+        total = len(files)
+        jobs = self._resolve_jobs(jobs)
+        
+        if jobs <= 1 or total <= 1:
+            self._clone_fingerprints = clone_fingerprints
+            try:
+                for index, file_path in enumerate(files):
+                    module_analysis = self.analyze_file(file_path)
+                    if progress_callback:
+                        progress_callback(index + 1, total)
+                    yield index, module_analysis
+            finally:
+                self._clone_fingerprints = None
+            return
+        
+        # Serve cache hits here so that only changed files reach the workers
+        pending = []
+        done = 0
+        for index, file_path in enumerate(files):
+            cached = self._get_cached_for_path(file_path)
+            if cached is not None:
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+                yield index, cached
+            else:
+                pending.append((index, str(file_path)))
+        
+        if not pending:
+            return
+        
+        chunk_size = self.config.get('chunk_size') or max(1, min(64, len(pending) // (jobs * 4)))
+        chunks = iter([pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)])
+        workers = min(jobs, -(-len(pending) // chunk_size))
+        
+        # Workers keep only in-memory caches; this process owns the on-disk one
+        worker_config = {
+            key: value for key, value in self.config.items()
+            if not key.startswith('cache')
+        }
+        
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(worker_config,)) as executor:
+            in_flight = {}
+            
+            def submit_next():
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    indexed = None
+                    if clone_fingerprints is not None:
+                        indexed = {
+                            path: clone_fingerprints[path][0]
+                            for _, path in chunk if path in clone_fingerprints
+                        }
+                    in_flight[executor.submit(_analyze_chunk, chunk, indexed)] = chunk
+            
+            for _ in range(workers * 2):
+                submit_next()
+            
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    chunk = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        chunk_results, timings = future.result()
+                        pattern_registry.merge_timings(timings)
+                    except Exception as e:
+                        logger.error(f"Worker failed analyzing {len(chunk)} files: {e}")
+                        chunk_results = [(index, None, None, None) for index, _ in chunk]
+                    
+                    done += len(chunk)
+                    if progress_callback:
+                        progress_callback(done, total)
+                    
+                    for index, digest, module_analysis, fingerprints in chunk_results:
+                        if module_analysis is not None:
+                            self._set_cached(str(files[index]), digest, module_analysis)
+                        if fingerprints is not None and clone_fingerprints is not None:
+                            clone_fingerprints[str(files[index])] = (digest, fingerprints)
+                        yield index, module_analysis
+    
+    def _get_cached_for_path(self, file_path: Path) -> Optional[ModuleAnalysis]:
+        """Look up a cached result for a file on disk without analyzing it."""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        return self._get_cached(str(file_path), content_hash(content))
+    
+    def _resolve_jobs(self, jobs: Optional[int]) -> int:
+        """Resolve the requested worker count."""
+        if jobs is None:
+            jobs = self.config.get('jobs', 1)
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
+        return max(1, jobs)
+    
     def analyze_changes(self, old_content: str, new_content: str, 
                        file_path: str) -> Tuple[ModuleAnalysis, ModuleAnalysis, List[Suggestion]]:
         """Analyze changes between two versions of a file.
         
+        The new version is analyzed incrementally from the old one, so an
+        edit to one function does not cost a full analysis of the module.
+        
         Args:
             old_content: Previous version of the file
             new_content: New version of the file
@@ -230,13 +920,11 @@ class CodeAnalyzer:
         if not adapter:
             raise ValueError(f"No adapter for language: {language}")
         
-        # Analyze both versions
-        old_analysis = adapter.analyze_module(file_path, old_content)
-        new_analysis = adapter.analyze_module(file_path, new_content)
-        
-        # Calculate metrics for both
-        old_analysis.metrics = self._calculate_metrics(old_analysis, old_content)
-        new_analysis.metrics = self._calculate_metrics(new_analysis, new_content)
+        # The new version only re-analyzes the definitions the edit touched
+        old_analysis = self.analyze_source(file_path, old_content)
+        new_analysis = self.analyze_incremental(file_path, old_content, new_content, old_analysis)
+        if old_analysis is None or new_analysis is None:
+            raise ValueError(f"Failed to analyze {file_path}")
         
         # Generate change-specific suggestions
         change_suggestions = self._analyze_changes(old_analysis, new_analysis)
@@ -265,33 +953,38 @@ class CodeAnalyzer:
     
     def _find_files(self, directory: Path, recursive: bool, 
                    file_patterns: Optional[List[str]]) -> List[Path]:
-        """Find files to analyze in a directory."""
-        files = []
+        """Find files to analyze in a directory.
         
+        Uses a single gitignore-aware walk that prunes ignored directories
+        such as ``node_modules`` and virtualenvs before descending.
+        """
         if not file_patterns:
-            # Default patterns for supported languages
-            file_patterns = ['*.py', '*.js', '*.jsx', '*.ts', '*.tsx', 
-                           '*.java', '*.cpp', '*.cc', '*.go', '*.rs', '*.rb']
-        
-        for pattern in file_patterns:
-            if recursive:
-                files.extend(directory.rglob(pattern))
-            else:
-                files.extend(directory.glob(pattern))
+            file_patterns = DEFAULT_FILE_PATTERNS
         
-        return sorted(set(files))
+        discovery = FileDiscovery(
+            directory,
+            exclude_patterns=self.config.get('exclude_patterns'),
+            use_gitignore=self.config.get('use_gitignore', True),
+            use_git=self.config.get('use_git_ls_files', False)
+        )
+        return discovery.find_files(file_patterns, recursive)
     
-    def _calculate_metrics(self, module: ModuleAnalysis, content: str) -> CodeMetrics:
+    def _calculate_metrics(self, module: ModuleAnalysis, content: str,
+                           parsed: Optional[ParsedUnit] = None) -> CodeMetrics:
         """Calculate code metrics for a module."""
         # Use the advanced metrics calculator
-        return complexity_calculator.calculate_complexity_metrics(module, content)
+        return complexity_calculator.calculate_complexity_metrics(module, content, parsed)
     
-    def _detect_patterns(self, module: ModuleAnalysis, content: str) -> List[Pattern]:
+    def _detect_patterns(self, module: ModuleAnalysis, content: str,
+                         parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         """Detect design patterns and anti-patterns."""
         # Use the pattern registry to detect all registered patterns
-        return pattern_registry.detect_patterns(module, content)
+        return pattern_registry.detect_patterns(
+            module, content, parsed, disabled=self.config.get('disabled_patterns')
+        )
     
-    def _check_common_issues(self, module: ModuleAnalysis, content: str) -> List[CodeIssue]:
+    def _check_common_issues(self, module: ModuleAnalysis, content: str,
+                             parsed: Optional[ParsedUnit] = None) -> List[CodeIssue]:
         """Check for common code issues."""
         issues = []
         
@@ -336,83 +1029,21 @@ class CodeAnalyzer:
     
     def _aggregate_metrics(self, metrics_list: List[CodeMetrics]) -> CodeMetrics:
         """Aggregate metrics from multiple modules."""
-        if not metrics_list:
-            return CodeMetrics(
-                lines_of_code=0,
-                lines_of_comments=0,
-                cyclomatic_complexity=0,
-                cognitive_complexity=0,
-                maintainability_index=0
-            )
-        
-        total_loc = sum(m.lines_of_code for m in metrics_list)
-        total_comments = sum(m.lines_of_comments for m in metrics_list)
-        
-        # Weighted averages
-        avg_cyclomatic = sum(m.cyclomatic_complexity * m.lines_of_code for m in metrics_list) / total_loc
-        avg_cognitive = sum(m.cognitive_complexity * m.lines_of_code for m in metrics_list) / total_loc
-        avg_maintainability = sum(m.maintainability_index * m.lines_of_code for m in metrics_list) / total_loc
-        
-        return CodeMetrics(
-            lines_of_code=total_loc,
-            lines_of_comments=total_comments,
-            cyclomatic_complexity=avg_cyclomatic,
-            cognitive_complexity=avg_cognitive,
-            maintainability_index=avg_maintainability,
-            code_to_comment_ratio=total_loc / (total_comments + 1),
-            average_function_length=sum(m.average_function_length for m in metrics_list) / len(metrics_list),
-            max_function_length=max(m.max_function_length for m in metrics_list),
-            number_of_functions=sum(m.number_of_functions for m in metrics_list),
-            number_of_classes=sum(m.number_of_classes for m in metrics_list)
-        )
+        accumulator = MetricsAccumulator()
+        for metrics in metrics_list:
+            accumulator.add(metrics)
+        return accumulator.result()
     
     def _generate_suggestions(self, modules: List[ModuleAnalysis], 
                             issues: List[CodeIssue], 
                             patterns: List[Pattern]) -> List[Suggestion]:
         """Generate improvement suggestions based on analysis."""
-        suggestions = []
-        
-        # Group issues by category
-        issues_by_category = {}
+        accumulator = SuggestionAccumulator()
         for issue in issues:
-            category = issue.category
-            if category not in issues_by_category:
-                issues_by_category[category] = []
-            issues_by_category[category].append(issue)
-        
-        # Generate suggestions based on issue patterns
-        if IssueCategory.COMPLEXITY in issues_by_category:
-            complexity_issues = issues_by_category[IssueCategory.COMPLEXITY]
-            if len(complexity_issues) > 5:
-                suggestions.append(Suggestion(
-                    title="Reduce Overall Code Complexity",
-                    description="Multiple functions have high complexity. Consider a refactoring sprint.",
-                    location=CodeLocation(
-                        file_path="project-wide",
-                        line_start=0,
-                        line_end=0
-                    ),
-                    category=IssueCategory.MAINTAINABILITY,
-                    priority=2,
-                    estimated_effort="large",
-                    rationale="High complexity makes code harder to understand and maintain"
-                ))
-        
-        # Pattern-based suggestions
-        god_classes = [p for p in patterns if p.name == "God Class"]
-        if god_classes:
-            for pattern in god_classes:
-                suggestions.append(Suggestion(
-                    title=f"Refactor {pattern.location.file_path}",
-                    description="This class has too many responsibilities. Consider splitting it.",
-                    location=pattern.location,
-                    category=IssueCategory.MAINTAINABILITY,
-                    priority=3,
-                    estimated_effort="large",
-                    rationale="Large classes violate the Single Responsibility Principle"
-                ))
-        
-        return suggestions
+            accumulator.add_issue(issue)
+        for pattern in patterns:
+            accumulator.add_pattern(pattern)
+        return accumulator.result()
     
     def _analyze_changes(self, old_analysis: ModuleAnalysis, 
                         new_analysis: ModuleAnalysis) -> List[Suggestion]:
@@ -0,0 +1,307 @@
+"""Persistent analysis cache keyed by file content."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Any, Optional, Set, Union
+
+from .models import (
+    ModuleAnalysis,
+    ClassAnalysis,
+    FunctionAnalysis,
+    CodeIssue,
+    CodeLocation,
+    CodeMetrics,
+    Pattern,
+    Severity,
+    IssueCategory,
+    PatternType,
+    LanguageSupport,
+)
+from ..utils import logger
+
+
+# Bump when the ModuleAnalysis layout or analysis semantics change
+CACHE_FORMAT_VERSION = 2
+
+DEFAULT_CACHE_PATH = Path('.velocitytree') / 'analysis_cache.db'
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds
+
+
+def content_hash(content: str) -> str:
+    """Hash source content for cache lookups."""
+    return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    """Replace enums in nested dicts and lists by their values."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _issue(data: Dict[str, Any]) -> CodeIssue:
+    return CodeIssue(**{
+        **data,
+        'severity': Severity(data['severity']),
+        'category': IssueCategory(data['category']),
+        'location': CodeLocation(**data['location']),
+    })
+
+
+def _pattern(data: Dict[str, Any]) -> Pattern:
+    return Pattern(**{
+        **data,
+        'pattern_type': PatternType(data['pattern_type']),
+        'location': CodeLocation(**data['location']),
+    })
+
+
+def _function(data: Dict[str, Any]) -> FunctionAnalysis:
+    return FunctionAnalysis(**{
+        **data,
+        'location': CodeLocation(**data['location']),
+        'issues': [_issue(issue) for issue in data['issues']],
+        'metrics': CodeMetrics(**data['metrics']) if data['metrics'] else None,
+    })
+
+
+def _class(data: Dict[str, Any]) -> ClassAnalysis:
+    return ClassAnalysis(**{
+        **data,
+        'location': CodeLocation(**data['location']),
+        'methods': [_function(method) for method in data['methods']],
+        'issues': [_issue(issue) for issue in data['issues']],
+        'patterns': [_pattern(pattern) for pattern in data['patterns']],
+    })
+
+
+def encode_analysis(analysis: ModuleAnalysis) -> bytes:
+    """Serialize a module analysis to compressed JSON."""
+    return zlib.compress(json.dumps(_jsonable(asdict(analysis))).encode('utf-8'))
+
+
+def decode_analysis(data: bytes) -> ModuleAnalysis:
+    """Rebuild a module analysis from ``encode_analysis`` output.
+
+    Only plain JSON is parsed, so a tampered cache file can at worst
+    produce a wrong or unreadable entry, never run code.
+    """
+    fields = json.loads(zlib.decompress(data).decode('utf-8'))
+    return ModuleAnalysis(**{
+        **fields,
+        'language': LanguageSupport(fields['language']),
+        'functions': [_function(function) for function in fields['functions']],
+        'classes': [_class(cls) for cls in fields['classes']],
+        'metrics': CodeMetrics(**fields['metrics']),
+        'issues': [_issue(issue) for issue in fields['issues']],
+        'patterns': [_pattern(pattern) for pattern in fields['patterns']],
+    })
+
+
+class AnalysisCache:
+    """On-disk cache of serialized ModuleAnalysis results.
+
+    Entries are stored in a SQLite database, one row per file path. A row
+    is only used when both the content hash and the analyzer version match,
+    so edits, checkouts and rule changes all invalidate it, while touching
+    a file or switching branches back and forth does not.
+
+    Results are stored as JSON rather than pickles, because the database
+    lives in the project directory and may come from an untrusted clone.
+    Lookups only read; access times of hit entries are written in one batch
+    when the cache is evicted or closed.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]] = None,
+        version: str = '',
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_age: float = DEFAULT_MAX_AGE
+    ):
+        """Initialize the analysis cache.
+
+        Args:
+            db_path: SQLite database file, defaults to .velocitytree/analysis_cache.db
+            version: Analyzer/rule fingerprint stored with every entry
+            max_size: Maximum total size of stored results in bytes
+            max_age: Entries not accessed for this many seconds are evicted
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_PATH
+        self.version = f"{CACHE_FORMAT_VERSION}:{version}"
+        self.max_size = max_size
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._accessed: Set[str] = set()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0
+        }
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize database schema."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    path TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed
+                ON analysis_cache(last_accessed)
+            """)
+            self._conn.commit()
+
+    def get(self, path: str, digest: str) -> Optional[ModuleAnalysis]:
+        """Get the cached analysis for a path if its content is unchanged.
+
+        Args:
+            path: File path the analysis was stored under
+            digest: Content hash of the current file content
+
+        Returns:
+            Cached module analysis or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM analysis_cache "
+                "WHERE path = ? AND content_hash = ? AND version = ?",
+                (path, digest, self.version)
+            ).fetchone()
+
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            try:
+                result = decode_analysis(row[0])
+            except Exception as e:
+                logger.debug(f"Dropping unreadable cache entry for {path}: {e}")
+                self._conn.execute("DELETE FROM analysis_cache WHERE path = ?", (path,))
+                self._conn.commit()
+                self._stats["misses"] += 1
+                return None
+
+            self._accessed.add(path)
+            self._stats["hits"] += 1
+            return result
+
+    def _write_access_times(self):
+        """Record the access time of the entries hit since the last call.
+
+        Must be called with the lock held; the caller commits.
+        """
+        if self._accessed:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE analysis_cache SET last_accessed = ? WHERE path = ?",
+                [(now, path) for path in self._accessed]
+            )
+            self._accessed.clear()
+
+    def set(self, path: str, digest: str, analysis: ModuleAnalysis):
+        """Store the analysis for a path, replacing any older entry."""
+        data = encode_analysis(analysis)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache "
+                "(path, content_hash, version, data, size, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, digest, self.version, data, len(data), now, now)
+            )
+            self._conn.commit()
+            self._stats["writes"] += 1
+
+    def evict(self) -> int:
+        """Evict stale, outdated and least recently used entries.
+
+        Returns:
+            Number of evicted entries
+        """
+        with self._lock:
+            self._write_access_times()
+            cursor = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE version != ? OR last_accessed < ?",
+                (self.version, time.time() - self.max_age)
+            )
+            evicted = cursor.rowcount
+
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM analysis_cache"
+            ).fetchone()[0]
+
+            if total > self.max_size:
+                excess = total - self.max_size
+                freed = 0
+                stale = []
+                for path, size in self._conn.execute(
+                    "SELECT path, size FROM analysis_cache ORDER BY last_accessed"
+                ):
+                    if freed >= excess:
+                        break
+                    stale.append((path,))
+                    freed += size
+                self._conn.executemany("DELETE FROM analysis_cache WHERE path = ?", stale)
+                evicted += len(stale)
+
+            self._conn.commit()
+            self._stats["evictions"] += evicted
+            return evicted
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache"
+            ).fetchone()
+            stats = self._stats.copy()
+
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "entries": entries,
+            "size_bytes": size,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0
+        })
+        return stats
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._write_access_times()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,461 @@
+"""Near-duplicate code detection with MinHash and locality-sensitive hashing."""
+
+import io
+import keyword
+import sqlite3
+import threading
+import tokenize
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from ..utils import logger
+
+
+# Bump when normalization or hashing changes so stored signatures are rebuilt
+CLONE_INDEX_VERSION = 1
+
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 5
+MIN_TOKENS = 30
+MAX_BUCKET_SIZE = 200
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_SKIPPED_TOKENS = {
+    tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE,
+    tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER
+}
+
+
+def normalize_tokens(code: str) -> List[str]:
+    """Tokenize code with identifiers and literals abstracted away.
+
+    Renamed variables, changed constants, comments and formatting do not
+    affect the result, so copy-pasted code that was lightly edited still
+    produces the same token stream.
+    """
+    tokens = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type in _SKIPPED_TOKENS:
+                continue
+            if tok.type == tokenize.NAME:
+                tokens.append(tok.string if keyword.iskeyword(tok.string) else 'ID')
+            elif tok.type == tokenize.NUMBER:
+                tokens.append('NUM')
+            elif tok.type == tokenize.STRING:
+                tokens.append('STR')
+            else:
+                tokens.append(tok.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        # Keep what was tokenized before the error
+        pass
+    return tokens
+
+
+def shingle_hashes(tokens: Sequence[str], size: int = SHINGLE_SIZE) -> np.ndarray:
+    """Hash every run of ``size`` consecutive tokens into a 32-bit value."""
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    if len(tokens) <= size:
+        shingles = {' '.join(tokens)}
+    else:
+        shingles = {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed family of hash functions.
+
+    The hash functions are derived from a fixed seed, so signatures are
+    stable across processes and can be stored on disk.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        """Initialize the hash family.
+
+        Args:
+            num_perm: Number of hash functions (signature length)
+            seed: Seed for the hash function coefficients
+        """
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """Compute the MinHash signature of a set of 32-bit hashes."""
+        if hashes.size == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        # a, b and the hashes are below 2**32, so a * h + b cannot overflow
+        values = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return values.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray, bands: int = BANDS) -> List[int]:
+    """Split a signature into bands and hash each band to a bucket key."""
+    rows = len(signature) // bands
+    return [zlib.crc32(signature[i * rows:(i + 1) * rows].tobytes()) for i in range(bands)]
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two sets from their signatures."""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+def candidate_pairs(keys: Sequence[Sequence[int]],
+                    max_bucket: int = MAX_BUCKET_SIZE) -> Set[Tuple[int, int]]:
+    """Find index pairs that share at least one LSH bucket.
+
+    Args:
+        keys: Band keys for each item, as returned by band_keys
+        max_bucket: Buckets with more items than this are ignored; they
+            hold boilerplate shared by many functions
+
+    Returns:
+        Set of (i, j) index pairs with i < j
+    """
+    buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for index, item_keys in enumerate(keys):
+        for band, key in enumerate(item_keys):
+            buckets[(band, key)].append(index)
+
+    pairs = set()
+    for members in buckets.values():
+        if 1 < len(members) <= max_bucket:
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pairs.add((first, second))
+    return pairs
+
+
+def fingerprint_functions(functions: Iterable[Tuple[str, int, int, str]],
+                          hasher: Optional[MinHasher] = None,
+                          shingle_size: int = SHINGLE_SIZE,
+                          min_tokens: int = MIN_TOKENS
+                          ) -> List[Tuple[str, int, int, int, np.ndarray]]:
+    """Compute the signatures of function bodies without storing them.
+
+    Fingerprints can be computed wherever the source is already loaded,
+    such as in analysis worker processes, and stored in an index later.
+
+    Args:
+        functions: (name, line_start, line_end, source) for each function
+        hasher: MinHash family, the default one if None
+        shingle_size: Number of tokens per shingle
+        min_tokens: Functions with fewer normalized tokens are skipped
+
+    Returns:
+        (name, line_start, line_end, token count, signature) for each
+        function long enough to be indexed
+    """
+    hasher = hasher or MinHasher()
+    rows = []
+    for name, line_start, line_end, source in functions:
+        tokens = normalize_tokens(source)
+        if len(tokens) < min_tokens:
+            continue
+        signature = hasher.signature(shingle_hashes(tokens, shingle_size))
+        rows.append((name, line_start, line_end, len(tokens), signature))
+    return rows
+
+
+@dataclass
+class FunctionFingerprint:
+    """A function body stored in the clone index."""
+    file_path: str
+    name: str
+    line_start: int
+    line_end: int
+    token_count: int
+
+
+@dataclass
+class ClonePair:
+    """Two functions with near-identical normalized bodies."""
+    first: FunctionFingerprint
+    second: FunctionFingerprint
+    similarity: float
+
+
+class CloneIndex:
+    """Persistent MinHash/LSH index of function bodies across a repository.
+
+    Each function body is normalized, shingled and reduced to a MinHash
+    signature whose bands are stored as bucket keys. Functions sharing a
+    bucket are candidate clones, so finding near-duplicates costs roughly
+    linear time in the number of functions instead of comparing every
+    pair. Files are re-fingerprinted only when their content hash changes.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Union[str, Path]] = None,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        shingle_size: int = SHINGLE_SIZE,
+        min_tokens: int = MIN_TOKENS
+    ):
+        """Initialize the clone index.
+
+        Args:
+            db_path: SQLite database file; the index is kept in memory if None
+            num_perm: MinHash signature length
+            bands: Number of LSH bands; must divide num_perm
+            shingle_size: Number of tokens per shingle
+            min_tokens: Functions with fewer normalized tokens are not indexed
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.db_path = Path(db_path) if db_path else None
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.hasher = MinHasher(num_perm)
+        self.settings = f"{CLONE_INDEX_VERSION}:{num_perm}:{bands}:{shingle_size}:{min_tokens}"
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "files_indexed": 0,
+            "files_skipped": 0,
+            "functions_indexed": 0
+        }
+
+        if self.db_path is not None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            database = str(self.db_path)
+        else:
+            database = ':memory:'
+        self._conn = sqlite3.connect(database, timeout=30, check_same_thread=False)
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize database schema, discarding data from other settings."""
+        with self._lock:
+            if self.db_path is not None:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    path TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    line_start INTEGER NOT NULL,
+                    line_end INTEGER NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    signature BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS buckets (
+                    band INTEGER NOT NULL,
+                    key INTEGER NOT NULL,
+                    fingerprint_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_fingerprints_path ON fingerprints(path);
+                CREATE INDEX IF NOT EXISTS idx_buckets_key ON buckets(band, key);
+                CREATE INDEX IF NOT EXISTS idx_buckets_fingerprint ON buckets(fingerprint_id);
+            """)
+
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'settings'").fetchone()
+            if row is None or row[0] != self.settings:
+                self._conn.executescript(
+                    "DELETE FROM files; DELETE FROM fingerprints; DELETE FROM buckets;"
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('settings', ?)",
+                    (self.settings,)
+                )
+            self._conn.commit()
+
+    def is_current(self, path: str, digest: str) -> bool:
+        """Check whether a file is indexed with the given content hash."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        return row is not None and row[0] == digest
+
+    def get_digests(self) -> Dict[str, str]:
+        """Get the content hash of every indexed file by path."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT path, content_hash FROM files").fetchall())
+
+    def update_file(self, path: str, digest: str,
+                    functions: Iterable[Tuple[str, int, int, str]]) -> int:
+        """Replace the fingerprints stored for a file.
+
+        Args:
+            path: File path
+            digest: Content hash of the file the functions were taken from
+            functions: (name, line_start, line_end, source) for each function
+
+        Returns:
+            Number of functions indexed
+        """
+        if self.is_current(path, digest):
+            self._stats["files_skipped"] += 1
+            return 0
+        return self.store_fingerprints(path, digest, self.fingerprint(functions))
+
+    def fingerprint(self, functions: Iterable[Tuple[str, int, int, str]]
+                    ) -> List[Tuple[str, int, int, int, np.ndarray]]:
+        """Compute signatures with this index's settings, see fingerprint_functions."""
+        return fingerprint_functions(functions, self.hasher, self.shingle_size, self.min_tokens)
+
+    def store_fingerprints(self, path: str, digest: str,
+                           rows: Iterable[Tuple[str, int, int, int, np.ndarray]]) -> int:
+        """Replace the fingerprints stored for a file with precomputed ones.
+
+        Args:
+            path: File path
+            digest: Content hash of the file the functions were taken from
+            rows: Fingerprints from fingerprint_functions
+
+        Returns:
+            Number of functions indexed
+        """
+        rows = list(rows)
+        with self._lock:
+            self._delete_file(path)
+            for name, line_start, line_end, token_count, signature in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO fingerprints (path, name, line_start, line_end, tokens, signature) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, name, line_start, line_end, token_count, signature.tobytes())
+                )
+                self._conn.executemany(
+                    "INSERT INTO buckets (band, key, fingerprint_id) VALUES (?, ?, ?)",
+                    [(band, key, cursor.lastrowid)
+                     for band, key in enumerate(band_keys(signature, self.bands))]
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, content_hash) VALUES (?, ?)",
+                (path, digest)
+            )
+            self._conn.commit()
+
+        self._stats["files_indexed"] += 1
+        self._stats["functions_indexed"] += len(rows)
+        return len(rows)
+
+    def remove_file(self, path: str):
+        """Remove a file and its functions from the index."""
+        with self._lock:
+            self._delete_file(path)
+            self._conn.commit()
+
+    def prune(self, directory: Union[str, Path], keep: Iterable[str]) -> int:
+        """Remove indexed files under a directory that are not in ``keep``.
+
+        Returns:
+            Number of removed files
+        """
+        keep = set(keep)
+        prefix = str(Path(directory)).rstrip('/\\')
+        with self._lock:
+            stale = [
+                path for (path,) in self._conn.execute("SELECT path FROM files")
+                if path not in keep and (path == prefix or path.startswith(prefix + '/') or
+                                         path.startswith(prefix + '\\'))
+            ]
+            for path in stale:
+                self._delete_file(path)
+            self._conn.commit()
+        return len(stale)
+
+    def _delete_file(self, path: str):
+        """Delete a file's rows; the caller holds the lock and commits."""
+        self._conn.execute(
+            "DELETE FROM buckets WHERE fingerprint_id IN "
+            "(SELECT id FROM fingerprints WHERE path = ?)", (path,)
+        )
+        self._conn.execute("DELETE FROM fingerprints WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def find_clones(self, threshold: float = 0.8,
+                    paths: Optional[Iterable[str]] = None,
+                    cross_file_only: bool = True) -> List[ClonePair]:
+        """Find pairs of near-duplicate functions.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity of shingle sets
+            paths: Only report pairs where both functions are in these files
+            cross_file_only: Skip pairs within the same file
+
+        Returns:
+            Clone pairs, most similar first
+        """
+        allowed = set(paths) if paths is not None else None
+
+        with self._lock:
+            groups = self._conn.execute(
+                "SELECT GROUP_CONCAT(fingerprint_id) FROM buckets "
+                "GROUP BY band, key HAVING COUNT(*) > 1"
+            ).fetchall()
+
+            pairs = set()
+            for (members,) in groups:
+                ids = sorted(int(i) for i in members.split(','))
+                if len(ids) > MAX_BUCKET_SIZE:
+                    logger.debug(f"Skipping clone bucket with {len(ids)} functions")
+                    continue
+                for i, first in enumerate(ids):
+                    for second in ids[i + 1:]:
+                        pairs.add((first, second))
+
+            involved = {i for pair in pairs for i in pair}
+            records = {}
+            for row in self._conn.execute(
+                "SELECT id, path, name, line_start, line_end, tokens, signature FROM fingerprints"
+            ):
+                if row[0] in involved:
+                    records[row[0]] = (
+                        FunctionFingerprint(*row[1:6]),
+                        np.frombuffer(row[6], dtype=np.uint32)
+                    )
+
+        clones = []
+        for first_id, second_id in pairs:
+            first, first_sig = records[first_id]
+            second, second_sig = records[second_id]
+            if cross_file_only and first.file_path == second.file_path:
+                continue
+            if allowed is not None and (first.file_path not in allowed or
+                                        second.file_path not in allowed):
+                continue
+            similarity = estimate_similarity(first_sig, second_sig)
+            if similarity >= threshold:
+                clones.append(ClonePair(first, second, similarity))
+
+        clones.sort(key=lambda c: (-c.similarity, c.first.file_path, c.first.line_start))
+        return clones
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            functions = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        stats = self._stats.copy()
+        stats.update({"files": files, "functions": functions})
+        return stats
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
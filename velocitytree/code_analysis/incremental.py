@@ -0,0 +1,312 @@
+"""Incremental re-analysis of edited Python modules.
+
+An edit is diffed line by line and every changed hunk is mapped onto the
+top-level function or class enclosing it in the previous version. Only
+those definitions are analyzed again; their results are spliced into the
+previous module analysis and everything after them is moved to its new
+lines.
+"""
+
+import bisect
+import difflib
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .models import (
+    ClassAnalysis,
+    CodeIssue,
+    CodeLocation,
+    FunctionAnalysis,
+    ModuleAnalysis,
+    Pattern
+)
+from .source import top_level_spans
+
+
+# Patterns that compare definitions with each other; they are detected
+# again over the whole spliced module instead of per definition
+MODULE_WIDE_PATTERNS = ("Duplicate Code", "Data Clump", "Strategy")
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+@dataclass
+class DefinitionEdit:
+    """A top-level definition touched by an edit.
+
+    Lines are 1-based and inclusive, and include the definition's
+    decorators and trailing comments.
+
+    Attributes:
+        old_start: First line of the definition before the edit
+        old_end: Last line of the definition before the edit
+        new_start: First line of the definition after the edit
+        new_end: Last line of the definition after the edit
+    """
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+    @property
+    def offset(self) -> int:
+        """Line offset of results analyzed with the definition as line 1."""
+        return self.new_start - 1
+
+
+def diff_lines(old_lines: Sequence[str], new_lines: Sequence[str]) -> List[Opcode]:
+    """Diff two versions of a source line by line.
+
+    The common prefix and suffix are stripped before difflib runs, so a
+    small edit costs time in proportion to the edited region rather than
+    to the module.
+
+    Returns:
+        difflib opcodes over the full line lists
+    """
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    old_end = len(old_lines) - suffix
+    new_end = len(new_lines) - suffix
+    opcodes: List[Opcode] = []
+    if prefix:
+        opcodes.append(('equal', 0, prefix, 0, prefix))
+    matcher = difflib.SequenceMatcher(
+        None, old_lines[prefix:old_end], new_lines[prefix:new_end], autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    if suffix:
+        opcodes.append(('equal', old_end, len(old_lines), new_end, len(new_lines)))
+    return opcodes
+
+
+class LineMap:
+    """Maps line numbers of the old version of a source to the new one."""
+
+    def __init__(self, opcodes: Sequence[Opcode]):
+        # Insertions cover no old lines, so every old line is in exactly one opcode
+        self._opcodes = [op for op in opcodes if op[2] > op[1]]
+        self._starts = [op[1] for op in self._opcodes]
+
+    def _find(self, line: int) -> Opcode:
+        """Get the opcode covering a 1-based old line."""
+        return self._opcodes[bisect.bisect_right(self._starts, line - 1) - 1]
+
+    def map(self, line: int) -> int:
+        """Get the new number of a line the edit left unchanged.
+
+        Line 0, used for module-wide results, maps to itself.
+
+        Raises:
+            ValueError: If the line was changed
+        """
+        if line <= 0:
+            return line
+        tag, i1, _, j1, _ = self._find(line)
+        if tag != 'equal':
+            raise ValueError(f"Line {line} was changed")
+        return line - i1 + j1
+
+    def map_range(self, start: int, end: int) -> Tuple[int, int]:
+        """Get the new lines of an old range, widened to whole changed hunks."""
+        tag, i1, _, j1, _ = self._find(start)
+        new_start = start - i1 + j1 if tag == 'equal' else j1 + 1
+        tag, i1, _, j1, j2 = self._find(end)
+        new_end = end - i1 + j1 if tag == 'equal' else j2
+        return new_start, new_end
+
+
+def plan_edits(old_content: str, new_lines: Sequence[str], opcodes: Sequence[Opcode],
+               previous: ModuleAnalysis) -> Optional[List[DefinitionEdit]]:
+    """Map the changed hunks of an edit onto top-level definitions.
+
+    Blank lines may change anywhere. Other changes must fall inside
+    top-level functions or classes of the previous version, or be indented
+    lines and comments continuing one; a definition's new extent runs up to
+    the next line of code in column 0.
+
+    Args:
+        old_content: Previous version of the source
+        new_lines: Lines of the new version
+        opcodes: Line diff from diff_lines
+        previous: Analysis of the previous version
+
+    Returns:
+        The touched definitions in order, or None if the edit changes
+        module-level code and needs a full analysis
+    """
+    spans = top_level_spans(old_content)
+    starts = [start for start, _ in spans]
+    definition_lines = sorted(
+        item.location.line_start
+        for item in list(previous.functions) + list(previous.classes)
+        if item.location.column_start == 0
+    )
+
+    def is_definition(index: int) -> bool:
+        start, end = spans[index]
+        position = bisect.bisect_left(definition_lines, start)
+        return position < len(definition_lines) and definition_lines[position] <= end
+
+    touched = set()
+    changed_lines: List[int] = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        added = [j + 1 for j in range(j1, j2) if new_lines[j].strip()]
+        changed_lines.extend(added)
+
+        # Spans sharing an old line with the hunk, or enclosing an insertion
+        index = bisect.bisect_right(starts, i2) - 1
+        hunk = []
+        while index >= 0 and spans[index][1] > i1:
+            hunk.append(index)
+            index -= 1
+
+        if not hunk:
+            if not added:
+                continue
+            # Indented code and comments continue the preceding span
+            if index < 0 or any(
+                not new_lines[j - 1][0].isspace() and not new_lines[j - 1].startswith('#')
+                for j in added
+            ):
+                return None
+            hunk = [index]
+
+        if not all(is_definition(index) for index in hunk):
+            return None
+        touched.update(hunk)
+
+    line_map = LineMap(opcodes)
+    edits: List[DefinitionEdit] = []
+    for index in sorted(touched):
+        old_start, old_end = spans[index]
+        new_start, new_end = line_map.map_range(old_start, old_end)
+        while new_end < len(new_lines) and (
+            not new_lines[new_end].strip() or new_lines[new_end][0].isspace()
+            or new_lines[new_end].startswith('#')
+        ):
+            new_end += 1
+        while new_end > new_start and not new_lines[new_end - 1].strip():
+            new_end -= 1
+
+        if new_end < new_start or (edits and new_start <= edits[-1].new_end):
+            return None
+        edits.append(DefinitionEdit(old_start, old_end, new_start, new_end))
+
+    # Every changed line of code must belong to a touched definition
+    new_starts = [edit.new_start for edit in edits]
+    for line in changed_lines:
+        position = bisect.bisect_right(new_starts, line) - 1
+        if position < 0 or line > edits[position].new_end:
+            return None
+
+    return edits
+
+
+def splice_module(previous: ModuleAnalysis, edits: Sequence[DefinitionEdit],
+                  parts: Sequence[ModuleAnalysis], line_map: LineMap) -> ModuleAnalysis:
+    """Replace the results of edited definitions in a module analysis.
+
+    Results within an edited definition's old lines are dropped and those
+    of its new analysis, made with the definition starting on line 1, are
+    moved to where it starts now. All other results move through the line
+    map. Module-wide patterns are left out, to be detected again; metrics
+    are left to the caller.
+
+    Args:
+        previous: Analysis of the previous version
+        edits: Touched definitions from plan_edits
+        parts: Analysis of each touched definition's new source
+        line_map: Line map of the edit
+
+    Returns:
+        Module analysis of the new version without metrics
+    """
+    old_starts = [edit.old_start for edit in edits]
+
+    def is_kept(location: CodeLocation) -> bool:
+        position = bisect.bisect_right(old_starts, location.line_start) - 1
+        return position < 0 or location.line_start > edits[position].old_end
+
+    def splice(items: list, new_items: Callable[[ModuleAnalysis], list],
+               move: Callable[[object, Callable[[int], int]], object]) -> list:
+        result = [move(item, line_map.map) for item in items if is_kept(item.location)]
+        for edit, part in zip(edits, parts):
+            shift = _offset_by(edit.offset)
+            moved = [move(item, shift) for item in new_items(part)]
+            position = sum(1 for item in result if item.location.line_start < edit.new_start)
+            result[position:position] = moved
+        return result
+
+    def module_patterns(module: ModuleAnalysis) -> List[Pattern]:
+        return [p for p in module.patterns if p.name not in MODULE_WIDE_PATTERNS]
+
+    return ModuleAnalysis(
+        file_path=previous.file_path,
+        language=previous.language,
+        imports=list(previous.imports),
+        functions=splice(previous.functions, lambda part: part.functions, _move_function),
+        classes=splice(previous.classes, lambda part: part.classes, _move_class),
+        global_variables=list(previous.global_variables),
+        docstring=previous.docstring,
+        metrics=None,
+        issues=splice(previous.issues, lambda part: part.issues, _move_issue),
+        patterns=splice(module_patterns(previous), module_patterns, _move_pattern)
+    )
+
+
+def _offset_by(offset: int) -> Callable[[int], int]:
+    """Create a line mover adding a fixed offset to every line but 0."""
+    return lambda line: line + offset if line > 0 else line
+
+
+def _move_location(location: CodeLocation, move: Callable[[int], int]) -> CodeLocation:
+    """Move a location, reusing it if its lines stay the same."""
+    start = move(location.line_start)
+    end = move(location.line_end)
+    if start == location.line_start and end == location.line_end:
+        return location
+    return replace(location, line_start=start, line_end=end)
+
+
+def _move_issue(issue: CodeIssue, move: Callable[[int], int]) -> CodeIssue:
+    """Move an issue to new lines."""
+    location = _move_location(issue.location, move)
+    return issue if location is issue.location else replace(issue, location=location)
+
+
+def _move_pattern(pattern: Pattern, move: Callable[[int], int]) -> Pattern:
+    """Move a pattern to new lines."""
+    location = _move_location(pattern.location, move)
+    return pattern if location is pattern.location else replace(pattern, location=location)
+
+
+def _move_function(func: FunctionAnalysis, move: Callable[[int], int]) -> FunctionAnalysis:
+    """Move a function and its issues to new lines."""
+    location = _move_location(func.location, move)
+    if location is func.location:
+        return func
+    return replace(func, location=location, issues=[_move_issue(i, move) for i in func.issues])
+
+
+def _move_class(cls: ClassAnalysis, move: Callable[[int], int]) -> ClassAnalysis:
+    """Move a class, its methods, issues and patterns to new lines."""
+    location = _move_location(cls.location, move)
+    if location is cls.location:
+        return cls
+    return replace(
+        cls,
+        location=location,
+        methods=[_move_function(m, move) for m in cls.methods],
+        issues=[_move_issue(i, move) for i in cls.issues],
+        patterns=[_move_pattern(p, move) for p in cls.patterns]
+    )
@@ -4,18 +4,21 @@ from abc import ABC, abstractmethod
 from typing import Optional
 
 from ..models import ModuleAnalysis, LanguageSupport
+from ..source import ParsedUnit
 
 
 class BaseLanguageAdapter(ABC):
     """Base class for language-specific analyzers."""
     
     @abstractmethod
-    def analyze_module(self, file_path: str, content: str) -> ModuleAnalysis:
+    def analyze_module(self, file_path: str, content: str,
+                       parsed: Optional[ParsedUnit] = None) -> ModuleAnalysis:
         """Analyze a module/file and return analysis results.
         
         Args:
             file_path: Path to the file being analyzed
             content: File content as string
+            parsed: Already parsed source unit to reuse instead of re-parsing
             
         Returns:
             Module analysis results
@@ -5,6 +5,7 @@ import re
 from typing import List, Optional, Set
 
 from . import BaseLanguageAdapter
+from ..source import ParsedUnit
 from ..models import (
     ModuleAnalysis,
     FunctionAnalysis,
@@ -20,10 +21,11 @@ from ..models import (
 class PythonAnalysisVisitor(ast.NodeVisitor):
     """AST visitor for analyzing Python code."""
     
-    def __init__(self, source_code: str, file_path: str):
+    def __init__(self, source_code: str, file_path: str,
+                 lines: Optional[List[str]] = None):
         self.source_code = source_code
         self.file_path = file_path
-        self.lines = source_code.splitlines()
+        self.lines = lines if lines is not None else source_code.splitlines()
         self.imports: List[str] = []
         self.functions: List[FunctionAnalysis] = []
         self.classes: List[ClassAnalysis] = []
@@ -220,14 +222,20 @@ class PythonAnalysisVisitor(ast.NodeVisitor):
 class PythonAdapter(BaseLanguageAdapter):
     """Python-specific code analyzer."""
     
-    def analyze_module(self, file_path: str, content: str) -> ModuleAnalysis:
+    def analyze_module(self, file_path: str, content: str,
+                       parsed: Optional[ParsedUnit] = None) -> ModuleAnalysis:
         """Analyze a Python module."""
+        if parsed is None:
+            parsed = ParsedUnit.from_source(file_path, content)
+        
         try:
-            # Parse the AST
-            tree = ast.parse(content, filename=file_path)
+            # Reuse the shared AST
+            if parsed.syntax_error is not None:
+                raise parsed.syntax_error
+            tree = parsed.tree
             
             # Visit the AST
-            visitor = PythonAnalysisVisitor(content, file_path)
+            visitor = PythonAnalysisVisitor(content, file_path, parsed.lines)
             visitor.visit(tree)
             
             # Get module docstring
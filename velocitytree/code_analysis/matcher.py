@@ -0,0 +1,194 @@
+"""Compiled multi-pattern matching for rule-based scanners."""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, FrozenSet, Iterable, Set, Union
+
+
+# Rules using these constructs cannot share a combined regex
+_UNCOMBINABLE = re.compile(r'\(\?P[<=]|\\[1-9]|\(\?[aiLmsux]+\)')
+
+
+@dataclass
+class MatchRule:
+    """A regex rule for the multi-pattern matcher.
+
+    ``keywords`` are literals (matched case-insensitively) of which at least
+    one must occur in the text for the rule to be able to match. Rules with
+    keywords are only evaluated when the keyword prefilter finds one of
+    them, so large sets of signature-style rules cost little on files that
+    contain none of their literals. Combined rules are tried at every
+    offset, so a pattern that starts with a repeated character class should
+    be anchored (e.g. with a lookbehind) to avoid rescanning long runs.
+    """
+    rule_id: str
+    pattern: str
+    flags: int = 0
+    keywords: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RuleMatch:
+    """A single match of a rule."""
+    rule_id: str
+    start: int
+    end: int
+    text: str
+
+
+def _scoped(pattern: str, flags: int) -> str:
+    """Wrap a pattern so its flags apply only to itself."""
+    letters = ''.join(
+        letter for flag, letter in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'))
+        if flags & flag
+    )
+    return f'(?{letters}:{pattern})' if letters else f'(?:{pattern})'
+
+
+@lru_cache(maxsize=512)
+def _keyword_regex(keywords: FrozenSet[str]) -> 're.Pattern':
+    """Compile literals into one alternation, longest first."""
+    return re.compile('|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+
+
+def find_keywords(text: str, keywords: FrozenSet[str]) -> Set[str]:
+    """Find which of a set of literals occur in a text.
+
+    The literals are searched with a single alternation regex. Each time
+    one is found it is dropped from the alternation and the search resumes
+    at the same offset, so frequent literals are reported once instead of
+    at every occurrence, and literals overlapping a found one are not
+    missed. The text is scanned at most once per distinct literal found.
+
+    Args:
+        text: Text to search
+        keywords: Literals to look for
+
+    Returns:
+        The literals that occur in the text
+    """
+    found = set()
+    remaining = keywords
+    position = 0
+    while remaining:
+        match = _keyword_regex(remaining).search(text, position)
+        if match is None:
+            break
+        found.add(match.group())
+        remaining = remaining - {match.group()}
+        position = match.start()
+    return found
+
+
+class MultiPatternMatcher:
+    """Matches many regex rules against a text in a single scan.
+
+    Rules without keywords are combined into one regex in which every rule
+    is tried at each position through its own lookahead group, so all
+    rules are evaluated in a single pass and each match reports the rule
+    that produced it. Rules with keywords are gated by a literal
+    prefilter, which finds all keywords with one compiled alternation, and
+    only the triggered ones are run. Matches of one rule
+    never overlap, as with ``re.finditer``.
+    """
+
+    def __init__(self, rules: Iterable[MatchRule] = ()):
+        """Initialize the matcher.
+
+        Args:
+            rules: Rules to compile
+        """
+        self.rules: List[MatchRule] = []
+        self._compiled = False
+        for rule in rules:
+            self.add(rule)
+
+    def add(self, rule: MatchRule):
+        """Add a rule; the matcher is recompiled on the next scan."""
+        re.compile(rule.pattern, rule.flags)  # Fail early on invalid patterns
+        self.rules.append(rule)
+        self._compiled = False
+
+    def compile(self):
+        """Compile the combined scanner and keyword prefilter."""
+        combined = []
+        self._separate: List[MatchRule] = []
+        self._gated: Dict[str, List[MatchRule]] = {}
+
+        for rule in self.rules:
+            if rule.keywords:
+                for keyword in rule.keywords:
+                    self._gated.setdefault(keyword.lower(), []).append(rule)
+            elif _UNCOMBINABLE.search(rule.pattern):
+                self._separate.append(rule)
+            else:
+                combined.append(rule)
+
+        self._keywords = frozenset(self._gated)
+        self._groups = [(f'r{i}', rule.rule_id) for i, rule in enumerate(combined)]
+        self._scanner = None
+        if combined:
+            scoped = [_scoped(rule.pattern, rule.flags) for rule in combined]
+            self._scanner = re.compile(
+                '(?=' + '|'.join(scoped) + ')' +
+                ''.join(f'(?=(?P<{group}>{pattern}))?'
+                        for (group, _), pattern in zip(self._groups, scoped))
+            )
+
+        self._regexes = {
+            id(rule): re.compile(rule.pattern, rule.flags)
+            for rule in self._separate + [r for rules in self._gated.values() for r in rules]
+        }
+        self._compiled = True
+
+    def scan(self, text: Union[str, bytes]) -> List[RuleMatch]:
+        """Find all rule matches in a text.
+
+        Args:
+            text: Text to scan; bytes are decoded as UTF-8, keeping
+                undecodable bytes as surrogates so offsets stay aligned
+                with the decoded text
+
+        Returns:
+            Matches ordered by position, then by rule order
+        """
+        if isinstance(text, bytes):
+            text = text.decode('utf-8', errors='surrogateescape')
+        if not self._compiled:
+            self.compile()
+
+        matches = []
+        order = {rule.rule_id: index for index, rule in enumerate(self.rules)}
+
+        if self._scanner is not None:
+            last_end: Dict[str, int] = {}
+            for match in self._scanner.finditer(text):
+                start = match.start()
+                for group, rule_id in self._groups:
+                    matched = match.group(group)
+                    if matched is None or start < last_end.get(rule_id, 0):
+                        continue
+                    end = start + len(matched)
+                    last_end[rule_id] = end if end > start else start + 1
+                    matches.append(RuleMatch(rule_id, start, end, matched))
+
+        # Literal prefilter: one keyword scan of the lowercased text is far
+        # cheaper than trying each gated regex at every offset
+        triggered = {id(rule): rule for rule in self._separate}
+        if self._keywords:
+            for keyword in find_keywords(text.lower(), self._keywords):
+                for rule in self._gated[keyword]:
+                    triggered.setdefault(id(rule), rule)
+
+        for rule in triggered.values():
+            for match in self._regexes[id(rule)].finditer(text):
+                matches.append(RuleMatch(rule.rule_id, match.start(), match.end(), match.group()))
+
+        matches.sort(key=lambda m: (m.start, order.get(m.rule_id, 0)))
+        return matches
+
+    def scan_file(self, file_path: Union[str, Path]) -> List[RuleMatch]:
+        """Read a file's bytes and scan them in one pass."""
+        return self.scan(Path(file_path).read_bytes())
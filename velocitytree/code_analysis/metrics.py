@@ -14,6 +14,7 @@ from .models import (
     LanguageSupport,
     CodeLocation
 )
+from .source import ParsedUnit
 
 
 @dataclass
@@ -71,6 +72,23 @@ class HalsteadMetrics:
         return self.volume / 3000  # Empirical constant
 
 
+@dataclass
+class FunctionComplexity:
+    """Complexity metrics for a single function, method or module."""
+    qualified_name: str
+    name: str
+    line_start: int
+    line_end: int
+    cyclomatic_complexity: int
+    cognitive_complexity: int
+    halstead: HalsteadMetrics
+    
+    @property
+    def key(self) -> Tuple[str, int, int]:
+        """Lookup key: qualified name and line span."""
+        return (self.qualified_name, self.line_start, self.line_end)
+
+
 class ComplexityCalculator:
     """Calculate various complexity metrics for code."""
     
@@ -135,6 +153,24 @@ class ComplexityCalculator:
             N2=visitor.total_operands
         )
     
+    def calculate_function_metrics(self, tree: ast.AST) -> Tuple[FunctionComplexity, Dict[Tuple[str, int, int], FunctionComplexity]]:
+        """Calculate complexity metrics for a module and all its functions in one pass.
+        
+        Produces the same values as calling calculate_cyclomatic_complexity,
+        calculate_cognitive_complexity and calculate_halstead_metrics on the
+        module and on every function node, but walks the tree only once.
+        
+        Args:
+            tree: Parsed module
+            
+        Returns:
+            Tuple of (module metrics, function metrics keyed by qualified
+            name and line span)
+        """
+        visitor = SinglePassMetricsVisitor()
+        module_metrics = visitor.run(tree)
+        return module_metrics, visitor.functions
+    
     def calculate_maintainability_index(self, module: ModuleAnalysis) -> float:
         """Calculate Maintainability Index.
         
@@ -181,19 +217,34 @@ class ComplexityCalculator:
         # Ensure MI is in valid range [0, 100]
         return max(0, min(100, mi))
     
-    def calculate_complexity_metrics(self, module: ModuleAnalysis, content: str) -> CodeMetrics:
-        """Calculate all complexity metrics for a module."""
-        # Parse AST for detailed analysis
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
+    def calculate_complexity_metrics(self, module: ModuleAnalysis, content: str,
+                                     parsed: Optional[ParsedUnit] = None) -> CodeMetrics:
+        """Calculate all complexity metrics for a module.
+        
+        Args:
+            module: Module analysis to calculate metrics for
+            content: Source code content
+            parsed: Already parsed source unit to reuse instead of re-parsing
+        """
+        # Reuse the shared AST for detailed analysis
+        if parsed is None:
+            parsed = ParsedUnit.from_source(module.file_path, content)
+        tree = parsed.tree
+        if tree is None:
             # Return default metrics for files with syntax errors
             return self._default_metrics(module, content)
         
-        # Calculate module-level metrics
-        module_cyclomatic = self.calculate_cyclomatic_complexity(tree)
-        module_cognitive = self.calculate_cognitive_complexity(tree)
-        halstead = self.calculate_halstead_metrics(tree)
+        # Calculate module and per-function metrics in a single walk
+        module_metrics, function_metrics = self.calculate_function_metrics(tree)
+        module_cyclomatic = module_metrics.cyclomatic_complexity
+        module_cognitive = module_metrics.cognitive_complexity
+        
+        # Functions are matched on name and definition line, so methods
+        # with the same name in different classes get their own metrics
+        by_definition = {
+            (metrics.name, metrics.line_start): metrics
+            for metrics in function_metrics.values()
+        }
         
         # Calculate metrics for all functions
         all_functions = module.functions + [
@@ -201,22 +252,49 @@ class ComplexityCalculator:
             for method in cls.methods
         ]
         
-        function_complexities = []
-        function_lengths = []
-        
+        matched = []
         for func in all_functions:
-            # Get function node from AST
-            func_node = self._find_function_node(tree, func.name)
-            if func_node:
-                func_complexity = self.calculate_cyclomatic_complexity(func_node)
-                func.complexity = func_complexity
-                function_complexities.append(func_complexity)
-                
-                func_length = func.location.line_end - func.location.line_start + 1
-                function_lengths.append(func_length)
+            func_metrics = by_definition.get((func.name, func.location.line_start))
+            if func_metrics:
+                func.complexity = func_metrics.cyclomatic_complexity
+                matched.append(func)
+        
+        return self.summarize_metrics(module, content, module_cyclomatic, module_cognitive,
+                                      matched, parsed.lines)
+    
+    def summarize_metrics(self, module: ModuleAnalysis, content: str,
+                          module_cyclomatic: float, module_cognitive: float,
+                          functions: Optional[List[FunctionAnalysis]] = None,
+                          lines: Optional[List[str]] = None) -> CodeMetrics:
+        """Build module metrics from per-function complexities and the source text.
+        
+        Only the module-wide complexities need the AST, so a module whose
+        functions already carry their complexities can be summarized
+        without parsing it again.
+        
+        Args:
+            module: Module analysis whose functions have their complexities set
+            content: Source code content
+            module_cyclomatic: Cyclomatic complexity of the whole module
+            module_cognitive: Cognitive complexity of the whole module
+            functions: Functions to average over, defaults to all functions and methods
+            lines: Source lines, split from content if omitted
+        """
+        if functions is None:
+            functions = module.functions + [
+                method for cls in module.classes 
+                for method in cls.methods
+            ]
+        if lines is None:
+            lines = content.splitlines()
+        
+        function_complexities = [func.complexity for func in functions]
+        function_lengths = [
+            func.location.line_end - func.location.line_start + 1
+            for func in functions
+        ]
         
         # Calculate aggregate metrics
-        lines = content.splitlines()
         lines_of_code = len([line for line in lines if line.strip()])
         lines_of_comments = self._count_comment_lines(content, module.language)
         
@@ -250,14 +328,6 @@ class ComplexityCalculator:
         
         return metrics
     
-    def _find_function_node(self, tree: ast.AST, func_name: str) -> Optional[ast.FunctionDef]:
-        """Find a function node in the AST by name."""
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                if node.name == func_name:
-                    return node
-        return None
-    
     def _count_comment_lines(self, content: str, language: LanguageSupport) -> int:
         """Count comment lines in code."""
         if language == LanguageSupport.PYTHON:
@@ -488,5 +558,216 @@ class HalsteadVisitor(ast.NodeVisitor):
         self.generic_visit(node)
 
 
+class _MetricsFrame:
+    """Running counters for one function (or the module) during a walk."""
+    
+    __slots__ = ('decisions', 'flat', 'nest_count', 'nest_sum', 'base_nesting',
+                 'operators', 'operands', 'total_operators', 'total_operands')
+    
+    def __init__(self, base_nesting: int):
+        self.decisions = 0  # cyclomatic decision points
+        self.flat = 0  # cognitive increments independent of nesting
+        self.nest_count = 0  # cognitive structures that nest
+        self.nest_sum = 0  # sum of absolute nesting levels of those structures
+        self.base_nesting = base_nesting
+        self.operators: Set[str] = set()
+        self.operands: Set[str] = set()
+        self.total_operators = 0
+        self.total_operands = 0
+    
+    def merge(self, child: '_MetricsFrame'):
+        """Add a nested function's counters to this frame."""
+        self.decisions += child.decisions
+        self.flat += child.flat
+        self.nest_count += child.nest_count
+        self.nest_sum += child.nest_sum
+        self.operators |= child.operators
+        self.operands |= child.operands
+        self.total_operators += child.total_operators
+        self.total_operands += child.total_operands
+    
+    @property
+    def cyclomatic(self) -> int:
+        """Cyclomatic complexity for the frame."""
+        return 1 + self.decisions
+    
+    @property
+    def cognitive(self) -> int:
+        """Cognitive complexity for the frame."""
+        # Each nesting structure scores 1 + its nesting relative to this frame
+        return (self.flat + self.nest_count + self.nest_sum
+                - self.nest_count * self.base_nesting)
+    
+    def halstead(self) -> HalsteadMetrics:
+        """Halstead metrics for the frame."""
+        return HalsteadMetrics(
+            n1=len(self.operators),
+            n2=len(self.operands),
+            N1=self.total_operators,
+            N2=self.total_operands
+        )
+
+
+class SinglePassMetricsVisitor(ast.NodeVisitor):
+    """Compute cyclomatic, cognitive and Halstead metrics for every function at once.
+    
+    Each function keeps its own counters while it is being visited; when it
+    is left, they are recorded and folded into the enclosing frame, so
+    nested code counts towards every enclosing function exactly as a
+    separate walk of each function node would.
+    """
+    
+    def __init__(self):
+        self.functions: Dict[Tuple[str, int, int], FunctionComplexity] = {}
+        self.nesting = 0
+        self.scope: List[str] = []
+        self.stack: List[_MetricsFrame] = []
+    
+    def run(self, tree: ast.AST) -> FunctionComplexity:
+        """Walk a tree and return the metrics for the whole tree."""
+        root = _MetricsFrame(base_nesting=0)
+        self.stack = [root]
+        self.visit(tree)
+        return FunctionComplexity(
+            qualified_name='<module>',
+            name='<module>',
+            line_start=1,
+            line_end=max(
+                (getattr(n, 'end_lineno', 1) or 1 for n in getattr(tree, 'body', [])),
+                default=1
+            ),
+            cyclomatic_complexity=root.cyclomatic,
+            cognitive_complexity=root.cognitive,
+            halstead=root.halstead()
+        )
+    
+    def visit_FunctionDef(self, node):
+        """Collect metrics for a function in its own frame."""
+        self.scope.append(node.name)
+        frame = _MetricsFrame(base_nesting=self.nesting)
+        self.stack.append(frame)
+        self.generic_visit(node)
+        self.stack.pop()
+        
+        metrics = FunctionComplexity(
+            qualified_name='.'.join(self.scope),
+            name=node.name,
+            line_start=node.lineno,
+            line_end=getattr(node, 'end_lineno', None) or node.lineno,
+            cyclomatic_complexity=frame.cyclomatic,
+            cognitive_complexity=frame.cognitive,
+            halstead=frame.halstead()
+        )
+        self.functions[metrics.key] = metrics
+        self.scope.pop()
+        self.stack[-1].merge(frame)
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_ClassDef(self, node):
+        """Track class names for qualified method names."""
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+    
+    def _visit_nesting(self, node):
+        """Decision point that also increases cognitive nesting."""
+        frame = self.stack[-1]
+        frame.decisions += 1
+        frame.nest_count += 1
+        frame.nest_sum += self.nesting
+        self.nesting += 1
+        self.generic_visit(node)
+        self.nesting -= 1
+    
+    visit_If = _visit_nesting
+    visit_While = _visit_nesting
+    visit_For = _visit_nesting
+    visit_ExceptHandler = _visit_nesting
+    
+    def visit_BoolOp(self, node):
+        """Boolean operations add decision points and an operator."""
+        frame = self.stack[-1]
+        frame.decisions += len(node.values) - 1
+        frame.flat += len(node.values) - 1
+        frame.operators.add(type(node.op).__name__)
+        frame.total_operators += 1
+        self.generic_visit(node)
+    
+    def visit_Assert(self, node):
+        """Assertions add a decision point."""
+        self.stack[-1].decisions += 1
+        self.generic_visit(node)
+    
+    def visit_comprehension(self, node):
+        """Each comprehension clause adds a decision point."""
+        self.stack[-1].decisions += 1
+        self.generic_visit(node)
+    
+    def visit_Lambda(self, node):
+        """Lambdas add cyclomatic and cognitive complexity."""
+        frame = self.stack[-1]
+        frame.decisions += 1
+        frame.flat += 1
+        self.generic_visit(node)
+    
+    def _visit_comprehension_expr(self, node):
+        """Comprehension expressions add cognitive complexity."""
+        self.stack[-1].flat += 1
+        self.generic_visit(node)
+    
+    visit_ListComp = _visit_comprehension_expr
+    visit_DictComp = _visit_comprehension_expr
+    visit_SetComp = _visit_comprehension_expr
+    visit_GeneratorExp = _visit_comprehension_expr
+    
+    def _visit_operator(self, node):
+        """Count binary and unary operators."""
+        frame = self.stack[-1]
+        frame.operators.add(type(node.op).__name__)
+        frame.total_operators += 1
+        self.generic_visit(node)
+    
+    visit_BinOp = _visit_operator
+    visit_UnaryOp = _visit_operator
+    
+    def visit_Compare(self, node):
+        """Count comparison operators."""
+        frame = self.stack[-1]
+        for op in node.ops:
+            frame.operators.add(type(op).__name__)
+            frame.total_operators += 1
+        self.generic_visit(node)
+    
+    def visit_Name(self, node):
+        """Count variable names as operands."""
+        frame = self.stack[-1]
+        frame.operands.add(node.id)
+        frame.total_operands += 1
+        self.generic_visit(node)
+    
+    def visit_Constant(self, node):
+        """Count constants as operands."""
+        frame = self.stack[-1]
+        frame.operands.add(str(node.value))
+        frame.total_operands += 1
+        self.generic_visit(node)
+    
+    def visit_Call(self, node):
+        """Count function calls as operators."""
+        if isinstance(node.func, ast.Name):
+            frame = self.stack[-1]
+            frame.operators.add(node.func.id)
+            frame.total_operators += 1
+        self.generic_visit(node)
+    
+    def visit_Attribute(self, node):
+        """Count attribute access as operators."""
+        frame = self.stack[-1]
+        frame.operators.add(f".{node.attr}")
+        frame.total_operators += 1
+        self.generic_visit(node)
+
+
 # Create global instance
 complexity_calculator = ComplexityCalculator()
\ No newline at end of file
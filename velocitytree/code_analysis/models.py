@@ -192,6 +192,37 @@ class AnalysisResult:
     warnings: List[str] = field(default_factory=list)
 
 
+@dataclass
+class AnalysisSummary:
+    """Aggregates of a streamed codebase analysis.
+
+    Per-module results are not kept; they are passed to a callback and
+    written to ``output_path`` as JSON Lines while the analysis runs.
+    """
+    timestamp: datetime
+    files_analyzed: int
+    total_lines: int
+    language_breakdown: Dict[LanguageSupport, int]
+    aggregate_metrics: CodeMetrics
+    issue_counts: Dict[str, int]  # by severity
+    category_counts: Dict[str, int]  # issues by category
+    pattern_counts: Dict[str, int]  # by pattern name
+    suggestions: List[Suggestion]
+    analysis_time: float  # seconds
+    output_path: Optional[str] = None
+    error_files: List[str] = field(default_factory=list)
+
+    @property
+    def total_issues(self) -> int:
+        """Total number of issues found."""
+        return sum(self.issue_counts.values())
+
+    @property
+    def total_patterns(self) -> int:
+        """Total number of patterns found."""
+        return sum(self.pattern_counts.values())
+
+
 @dataclass
 class VulnerabilityInfo:
     """Information about a security vulnerability."""
@@ -204,6 +235,7 @@ class VulnerabilityInfo:
     fix_suggestion: str
     references: List[str] = field(default_factory=list)
     confidence: float = 0.8
+    rule_id: Optional[str] = None  # Scanner rule that produced the finding
     
 
 @dataclass
@@ -2,8 +2,13 @@
 
 import ast
 import re
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import time
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Tuple, Type, Iterable
+from dataclasses import dataclass, field
+
+import numpy as np
 
 from .models import (
     Pattern,
@@ -11,6 +16,12 @@ from .models import (
     CodeLocation,
     LanguageSupport
 )
+from .source import ParsedUnit
+from .clones import MinHasher, band_keys, candidate_pairs
+
+
+# Timing entry for the traversal and scan shared by all detectors
+SHARED_PASS = "(shared pass)"
 
 
 @dataclass
@@ -23,26 +34,177 @@ class PatternDefinition:
     detector: 'PatternDetector'
 
 
+@dataclass
+class DetectionContext:
+    """State shared by all detectors for one module.
+    
+    Built by a single AST traversal and a single regex scan over the
+    source; detectors read the nodes and trigger matches they declared
+    instead of walking or searching the module themselves.
+    """
+    module_analysis: Any
+    parsed: ParsedUnit
+    nodes: Dict[Type[ast.AST], List[ast.AST]] = field(default_factory=lambda: defaultdict(list))
+    matches: Dict[Tuple[int, str], List[Tuple[int, str]]] = field(default_factory=lambda: defaultdict(list))
+    
+    def nodes_of(self, *node_types: Type[ast.AST]) -> List[ast.AST]:
+        """Get collected nodes of the given types in source order."""
+        if len(node_types) == 1:
+            return self.nodes.get(node_types[0], [])
+        found = [node for node_type in node_types for node in self.nodes.get(node_type, [])]
+        found.sort(key=lambda node: (getattr(node, 'lineno', 0), getattr(node, 'col_offset', 0)))
+        return found
+    
+    def trigger_matches(self, detector: 'PatternDetector', trigger: str) -> List[Tuple[int, str]]:
+        """Get (line, matched text) pairs for one of a detector's triggers."""
+        return self.matches.get((id(detector), trigger), [])
+    
+    def has_triggers(self, detector: 'PatternDetector') -> bool:
+        """Check whether any of a detector's triggers matched."""
+        return any(self.matches.get((id(detector), name)) for name in detector.triggers)
+
+
+class CompiledDetectors:
+    """A set of detectors compiled into a single-pass detection plan.
+    
+    The AST node types requested by all detectors are merged into one
+    dispatch table and their regex triggers into one scanner, so each
+    module is traversed and scanned exactly once however many detectors
+    are registered.
+    """
+    
+    def __init__(self, detectors: Iterable['PatternDetector']):
+        """Compile the given detectors.
+        
+        Args:
+            detectors: Enabled detectors for one language
+        """
+        self.detectors = list(detectors)
+        
+        # Node type -> detectors interested in it
+        self.dispatch: Dict[Type[ast.AST], List['PatternDetector']] = defaultdict(list)
+        for detector in self.detectors:
+            for node_type in detector.node_types:
+                self.dispatch[node_type].append(detector)
+        
+        # Each trigger is tried at every offset through its own optional
+        # lookahead group, so overlapping triggers never hide each other
+        self._groups: List[Tuple[str, Tuple[int, str]]] = []
+        alternatives = []
+        for detector in self.detectors:
+            for name, regex in detector.triggers.items():
+                group = f"t{len(self._groups)}"
+                self._groups.append((group, (id(detector), name)))
+                alternatives.append((group, regex))
+        
+        self.scanner: Optional[re.Pattern] = None
+        if alternatives:
+            self.scanner = re.compile(
+                '(?=' + '|'.join(f'(?:{regex})' for _, regex in alternatives) + ')' +
+                ''.join(f'(?=(?P<{group}>{regex}))?' for group, regex in alternatives),
+                re.MULTILINE
+            )
+    
+    def build_context(self, module_analysis: Any, parsed: ParsedUnit) -> DetectionContext:
+        """Run the shared traversal and scan for a module."""
+        context = DetectionContext(module_analysis=module_analysis, parsed=parsed)
+        
+        if self.dispatch:
+            tree = parsed.ensure_tree()
+            if tree is not None:
+                dispatch = self.dispatch
+                nodes = context.nodes
+                for node in ast.walk(tree):
+                    node_type = type(node)
+                    if node_type in dispatch:
+                        nodes[node_type].append(node)
+        
+        if self.scanner is not None:
+            matches = context.matches
+            for match in self.scanner.finditer(parsed.content):
+                line = parsed.line_number(match.start())
+                for group, key in self._groups:
+                    text = match.group(group)
+                    if text is not None:
+                        matches[key].append((line, text))
+        
+        return context
+
+
 class PatternDetector:
-    """Base class for pattern detectors."""
+    """Base class for pattern detectors.
+    
+    Detectors that only look at the module analysis implement ``detect``.
+    Detectors that need the source declare ``node_types`` (AST node classes
+    to collect) and ``triggers`` (named regexes to scan for) and implement
+    ``run``, reading the results from the shared ``DetectionContext``.
+    Triggers are combined into one regex, so they must not use global
+    inline flags and are reported once per start offset. With
+    ``requires_trigger`` set, the detector is skipped for modules where
+    none of its triggers match.
+    """
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    node_types: Tuple[Type[ast.AST], ...] = ()
+    triggers: Dict[str, str] = {}
+    requires_trigger: bool = False
+    
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         """Detect patterns in the given module.
         
         Args:
             module_analysis: Module analysis object
             content: Source code content
+            parsed: Shared parsed source unit for the module
+            
+        Returns:
+            List of detected patterns
+        """
+        if type(self).run is PatternDetector.run:
+            raise NotImplementedError
+        
+        parsed = self._get_unit(module_analysis, content, parsed)
+        context = CompiledDetectors([self]).build_context(module_analysis, parsed)
+        if self.requires_trigger and not context.has_triggers(self):
+            return []
+        return self.run(context)
+    
+    def run(self, context: DetectionContext) -> List[Pattern]:
+        """Detect patterns using the shared detection context.
+        
+        Args:
+            context: Nodes and trigger matches collected for the module
             
         Returns:
             List of detected patterns
         """
-        raise NotImplementedError
+        return self.detect(context.module_analysis, context.parsed.content, context.parsed)
+    
+    def _get_unit(self, module_analysis: Any, content: str,
+                  parsed: Optional[ParsedUnit]) -> ParsedUnit:
+        """Return the shared unit, creating an unparsed one if needed."""
+        if parsed is not None:
+            return parsed
+        return ParsedUnit.from_source(module_analysis.file_path, content, parse=False)
+    
+    def _get_content(self, parsed: ParsedUnit, location: CodeLocation) -> Optional[str]:
+        """Extract the source for a location using the unit's line index."""
+        return parsed.get_lines(location.line_start, location.line_end)
+    
+    def _matches_in(self, context: DetectionContext, trigger: str,
+                    location: CodeLocation) -> List[str]:
+        """Get the texts matched by a trigger within a location's lines."""
+        return [
+            text for line, text in context.trigger_matches(self, trigger)
+            if location.line_start <= line <= location.line_end
+        ]
 
 
 class SingletonPatternDetector(PatternDetector):
     """Detector for Singleton design pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
         
         if module_analysis.language == LanguageSupport.PYTHON:
@@ -82,8 +244,13 @@ class SingletonPatternDetector(PatternDetector):
 class FactoryPatternDetector(PatternDetector):
     """Detector for Factory design pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    # Simple heuristic: factory methods contain 'return ClassName('
+    triggers = {"instantiation": r'return\s+[A-Z]\w+\('}
+    requires_trigger = True
+    
+    def run(self, context: DetectionContext) -> List[Pattern]:
         patterns = []
+        module_analysis = context.module_analysis
         
         if module_analysis.language == LanguageSupport.PYTHON:
             for cls in module_analysis.classes:
@@ -97,9 +264,7 @@ class FactoryPatternDetector(PatternDetector):
                 # Check if methods return other class instances
                 creates_instances = False
                 for method in factory_methods:
-                    # Simple heuristic: check if method contains 'return ClassName('
-                    method_content = self._get_method_content(content, method.location)
-                    if method_content and re.search(r'return\s+[A-Z]\w+\(', method_content):
+                    if self._matches_in(context, "instantiation", method.location):
                         creates_instances = True
                         break
                 
@@ -116,19 +281,13 @@ class FactoryPatternDetector(PatternDetector):
                     ))
         
         return patterns
-    
-    def _get_method_content(self, content: str, location: CodeLocation) -> Optional[str]:
-        """Extract method content from source code."""
-        lines = content.splitlines()
-        if location.line_start <= len(lines) and location.line_end <= len(lines):
-            return '\n'.join(lines[location.line_start-1:location.line_end])
-        return None
 
 
 class ObserverPatternDetector(PatternDetector):
     """Detector for Observer design pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
         
         if module_analysis.language == LanguageSupport.PYTHON:
@@ -171,7 +330,8 @@ class ObserverPatternDetector(PatternDetector):
 class GodClassAntiPatternDetector(PatternDetector):
     """Detector for God Class anti-pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
         
         for cls in module_analysis.classes:
@@ -222,14 +382,16 @@ class GodClassAntiPatternDetector(PatternDetector):
 class SpaghettiCodeAntiPatternDetector(PatternDetector):
     """Detector for Spaghetti Code anti-pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
+        parsed = self._get_unit(module_analysis, content, parsed)
         
         # Check for functions with high complexity and deep nesting
         for func in module_analysis.functions:
             if func.complexity > 15:
                 # Analyze nesting depth
-                func_content = self._get_function_content(content, func.location)
+                func_content = self._get_content(parsed, func.location)
                 if func_content:
                     max_nesting = self._calculate_nesting_depth(func_content)
                     
@@ -250,7 +412,7 @@ class SpaghettiCodeAntiPatternDetector(PatternDetector):
         for cls in module_analysis.classes:
             for method in cls.methods:
                 if method.complexity > 15:
-                    method_content = self._get_function_content(content, method.location)
+                    method_content = self._get_content(parsed, method.location)
                     if method_content:
                         max_nesting = self._calculate_nesting_depth(method_content)
                         
@@ -270,13 +432,6 @@ class SpaghettiCodeAntiPatternDetector(PatternDetector):
         
         return patterns
     
-    def _get_function_content(self, content: str, location: CodeLocation) -> Optional[str]:
-        """Extract function content from source code."""
-        lines = content.splitlines()
-        if location.line_start <= len(lines) and location.line_end <= len(lines):
-            return '\n'.join(lines[location.line_start-1:location.line_end])
-        return None
-    
     def _calculate_nesting_depth(self, code: str) -> int:
         """Calculate maximum nesting depth in code."""
         max_depth = 0
@@ -296,7 +451,8 @@ class SpaghettiCodeAntiPatternDetector(PatternDetector):
 class LongParameterListAntiPatternDetector(PatternDetector):
     """Detector for Long Parameter List anti-pattern."""
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
         parameter_threshold = 5
         
@@ -325,16 +481,23 @@ class LongParameterListAntiPatternDetector(PatternDetector):
 
 
 class DuplicateCodeDetector(PatternDetector):
-    """Detector for Duplicate Code smell."""
+    """Detector for Duplicate Code smell within a module.
     
-    def detect(self, module_analysis: Any, content: str) -> List[Pattern]:
+    Duplicates across files are found by the repository-wide CloneIndex.
+    """
+    
+    hasher = MinHasher()
+    
+    def detect(self, module_analysis: Any, content: str,
+               parsed: Optional[ParsedUnit] = None) -> List[Pattern]:
         patterns = []
+        parsed = self._get_unit(module_analysis, content, parsed)
         
         # Extract all function bodies
         function_bodies = []
         
         for func in module_analysis.functions:
-            func_content = self._get_function_content(content, func.location)
+            func_content = self._get_content(parsed, func.location)
             if func_content:
                 # Normalize whitespace and strip comments
                 normalized = self._normalize_code(func_content)
@@ -342,45 +505,37 @@ class DuplicateCodeDetector(PatternDetector):
         
         for cls in module_analysis.classes:
             for method in cls.methods:
-                method_content = self._get_function_content(content, method.location)
+                method_content = self._get_content(parsed, method.location)
                 if method_content:
                     normalized = self._normalize_code(method_content)
                     function_bodies.append((method, normalized))
         
-        # Find similar function bodies
-        for i in range(len(function_bodies)):
-            for j in range(i + 1, len(function_bodies)):
-                func1, body1 = function_bodies[i]
-                func2, body2 = function_bodies[j]
-                
-                similarity = self._calculate_similarity(body1, body2)
-                
-                if similarity > 0.8:  # 80% similar
-                    patterns.append(Pattern(
-                        pattern_type=PatternType.CODE_SMELL,
-                        name="Duplicate Code",
-                        description=f"Functions '{func1.name}' and '{func2.name}' have similar implementation",
-                        location=func1.location,
-                        confidence=similarity,
-                        metadata={
-                            "duplicate_function": func2.name,
-                            "duplicate_location": {
-                                "file": func2.location.file_path,
-                                "line": func2.location.line_start
-                            },
-                            "similarity": similarity
-                        }
-                    ))
+        # Find similar function bodies, comparing only LSH candidate pairs
+        for i, j in self._candidate_pairs([body for _, body in function_bodies]):
+            func1, body1 = function_bodies[i]
+            func2, body2 = function_bodies[j]
+            
+            similarity = self._calculate_similarity(body1, body2)
+            
+            if similarity > 0.8:  # 80% similar
+                patterns.append(Pattern(
+                    pattern_type=PatternType.CODE_SMELL,
+                    name="Duplicate Code",
+                    description=f"Functions '{func1.name}' and '{func2.name}' have similar implementation",
+                    location=func1.location,
+                    confidence=similarity,
+                    metadata={
+                        "duplicate_function": func2.name,
+                        "duplicate_location": {
+                            "file": func2.location.file_path,
+                            "line": func2.location.line_start
+                        },
+                        "similarity": similarity
+                    }
+                ))
         
         return patterns
     
-    def _get_function_content(self, content: str, location: CodeLocation) -> Optional[str]:
-        """Extract function content from source code."""
-        lines = content.splitlines()
-        if location.line_start <= len(lines) and location.line_end <= len(lines):
-            return '\n'.join(lines[location.line_start-1:location.line_end])
-        return None
-    
     def _normalize_code(self, code: str) -> str:
         """Normalize code for comparison."""
         # Remove comments
@@ -396,6 +551,23 @@ class DuplicateCodeDetector(PatternDetector):
         
         return code.strip()
     
+    def _candidate_pairs(self, bodies: List[str]) -> List[Tuple[int, int]]:
+        """Find pairs of bodies whose token sets may be similar.
+        
+        MinHash signatures of the token sets are banded into LSH buckets, so
+        only bodies sharing a bucket are compared instead of every pair.
+        """
+        if len(bodies) < 2:
+            return []
+        keys = [
+            band_keys(self.hasher.signature(np.fromiter(
+                (zlib.crc32(token.encode('utf-8')) for token in set(body.split())),
+                dtype=np.uint64
+            )))
+            for body in bodies
+        ]
+        return sorted(candidate_pairs(keys))
+    
     def _calculate_similarity(self, code1: str, code2: str) -> float:
         """Calculate similarity between two code snippets."""
         # Simple token-based similarity
@@ -416,6 +588,9 @@ class PatternDetectorRegistry:
     
     def __init__(self):
         self.detectors: List[PatternDefinition] = []
+        self.disabled: Set[str] = set()
+        self._compiled: Dict[Tuple[LanguageSupport, frozenset], Tuple[List[PatternDefinition], CompiledDetectors]] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
         self._register_default_detectors()
     
     def _register_default_detectors(self):
@@ -482,17 +657,111 @@ class PatternDetectorRegistry:
     def register(self, pattern_def: PatternDefinition):
         """Register a new pattern detector."""
         self.detectors.append(pattern_def)
+        self._compiled.clear()
     
-    def detect_patterns(self, module_analysis: Any, content: str) -> List[Pattern]:
-        """Detect all patterns in the given module."""
-        patterns = []
+    def disable(self, *names: str):
+        """Disable detectors by pattern name."""
+        self.disabled.update(names)
+    
+    def enable(self, *names: str):
+        """Re-enable previously disabled detectors."""
+        self.disabled.difference_update(names)
+    
+    def compile(self, language: LanguageSupport,
+                disabled: Optional[Iterable[str]] = None) -> Tuple[List[PatternDefinition], CompiledDetectors]:
+        """Get the compiled detection plan for a language.
         
-        for pattern_def in self.detectors:
-            if module_analysis.language in pattern_def.languages:
-                detected = pattern_def.detector.detect(module_analysis, content)
-                patterns.extend(detected)
+        Args:
+            language: Language of the modules to analyze
+            disabled: Additional pattern names to skip
+            
+        Returns:
+            Enabled pattern definitions and their compiled plan
+        """
+        skipped = frozenset(self.disabled.union(disabled or ()))
+        key = (language, skipped)
+        if key not in self._compiled:
+            definitions = [
+                d for d in self.detectors
+                if language in d.languages and d.name not in skipped
+            ]
+            self._compiled[key] = (definitions, CompiledDetectors(d.detector for d in definitions))
+        return self._compiled[key]
+    
+    def detect_patterns(self, module_analysis: Any, content: str,
+                        parsed: Optional[ParsedUnit] = None,
+                        disabled: Optional[Iterable[str]] = None) -> List[Pattern]:
+        """Detect all patterns in the given module.
+        
+        Args:
+            module_analysis: Module analysis object
+            content: Source code content
+            parsed: Shared parsed source unit; created once here if omitted
+            disabled: Pattern names to skip for this call
+        """
+        patterns = []
+        if parsed is None:
+            parsed = ParsedUnit.from_source(module_analysis.file_path, content, parse=False)
+        
+        definitions, plan = self.compile(module_analysis.language, disabled)
+        if not definitions:
+            return patterns
+        
+        start = time.perf_counter()
+        context = plan.build_context(module_analysis, parsed)
+        self._record_timing(SHARED_PASS, time.perf_counter() - start, 0)
+        
+        for pattern_def in definitions:
+            detector = pattern_def.detector
+            if detector.requires_trigger and not context.has_triggers(detector):
+                self._record_timing(pattern_def.name, 0.0, 0, skipped=True)
+                continue
+            
+            start = time.perf_counter()
+            detected = detector.run(context)
+            self._record_timing(pattern_def.name, time.perf_counter() - start, len(detected))
+            patterns.extend(detected)
         
         return patterns
+    
+    def _record_timing(self, name: str, seconds: float, found: int, skipped: bool = False):
+        """Accumulate timing statistics for a detector."""
+        stats = self._timing_entry(name)
+        if skipped:
+            stats["skipped"] += 1
+        else:
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["patterns"] += found
+    
+    def _timing_entry(self, name: str) -> Dict[str, float]:
+        """Get or create the timing record for a detector."""
+        if name not in self._timings:
+            self._timings[name] = {"calls": 0, "skipped": 0, "seconds": 0.0, "patterns": 0}
+        return self._timings[name]
+    
+    def get_timings(self) -> Dict[str, Dict[str, float]]:
+        """Get accumulated per-detector timings, slowest first.
+        
+        The time spent building the shared context is reported under
+        ``SHARED_PASS``.
+        """
+        return {
+            name: dict(stats)
+            for name, stats in sorted(self._timings.items(),
+                                      key=lambda item: item[1]["seconds"], reverse=True)
+        }
+    
+    def merge_timings(self, timings: Dict[str, Dict[str, float]]):
+        """Add timings collected elsewhere, e.g. in a worker process."""
+        for name, stats in timings.items():
+            current = self._timing_entry(name)
+            for key, value in stats.items():
+                current[key] = current.get(key, 0) + value
+    
+    def reset_timings(self):
+        """Clear accumulated timings."""
+        self._timings.clear()
 
 
 # Global registry instance
@@ -15,6 +15,19 @@ from .models import (
     CodeLocation,
 )
 from .patterns import PatternDetectorRegistry, PatternDetector
+from .matcher import MatchRule, MultiPatternMatcher, RuleMatch
+from .source import ParsedUnit
+from ..discovery import FileDiscovery
+
+
+# Configuration and environment files scanned for secrets
+CONFIG_FILE_TYPES = ['.yaml', '.yml', '.json', '.env', '.toml', '.ini', '.cfg']
+
+# Literals required by sensitive data patterns, used to skip them cheaply
+SENSITIVE_KEYWORDS = {
+    'sensitive-private-key': ['PRIVATE KEY'],
+    'sensitive-email': ['@'],
+}
 
 
 class VulnerabilityType(Enum):
@@ -47,15 +60,35 @@ class VulnerabilityPattern:
     fix_suggestion: str
     references: List[str] = field(default_factory=list)
     confidence: float = 0.8
+    id: str = ''
+    flags: int = re.IGNORECASE | re.MULTILINE
+    keywords: List[str] = field(default_factory=list)  # Literals gating the regex
+    file_types: List[str] = field(default_factory=list)  # Suffixes; empty for all files
 
 
 class SecurityScanner:
-    """Scanner for detecting security vulnerabilities in code."""
+    """Scanner for detecting security vulnerabilities in code.
+    
+    All regex rules (vulnerability patterns and sensitive data patterns)
+    are compiled into a MultiPatternMatcher, so a file is scanned once no
+    matter how many rules are registered.
+    """
     
     def __init__(self):
         self.vulnerability_patterns = self._initialize_patterns()
         self.dangerous_functions = self._get_dangerous_functions()
         self.sensitive_patterns = self._get_sensitive_patterns()
+        for index, pattern in enumerate(self.vulnerability_patterns):
+            if not pattern.id:
+                pattern.id = f"{pattern.type.value}-{index}"
+        self._matchers: Dict[Optional[str], MultiPatternMatcher] = {}
+    
+    def add_pattern(self, pattern: VulnerabilityPattern):
+        """Register an additional vulnerability pattern, e.g. a secret signature."""
+        if not pattern.id:
+            pattern.id = f"{pattern.type.value}-{len(self.vulnerability_patterns)}"
+        self.vulnerability_patterns.append(pattern)
+        self._matchers.clear()
         
     def _initialize_patterns(self) -> List[VulnerabilityPattern]:
         """Initialize vulnerability detection patterns."""
@@ -68,7 +101,9 @@ class SecurityScanner:
                 description="Potential SQL injection vulnerability",
                 pattern=r'(execute|cursor\.execute)\s*\(\s*["\'].*?\%[sd].*?["\'].*?\%',
                 fix_suggestion="Use parameterized queries instead of string formatting",
-                references=["https://owasp.org/www-community/attacks/SQL_Injection"]
+                references=["https://owasp.org/www-community/attacks/SQL_Injection"],
+                id="sql-string-format",
+                keywords=["execute"]
             ),
             VulnerabilityPattern(
                 type=VulnerabilityType.SQL_INJECTION,
@@ -77,7 +112,9 @@ class SecurityScanner:
                 description="SQL query with string concatenation",
                 pattern=r'(SELECT|INSERT|UPDATE|DELETE).*?\+.*?(\'|")',
                 fix_suggestion="Use parameterized queries instead of string concatenation",
-                references=["CWE-89"]
+                references=["CWE-89"],
+                id="sql-concatenation",
+                keywords=["select", "insert", "update", "delete"]
             ),
             
             # Command injection patterns
@@ -88,7 +125,9 @@ class SecurityScanner:
                 description="Potential command injection vulnerability",
                 pattern=r'(os\.system|subprocess\.(call|run|Popen))\s*\([^)]*\+[^)]*\)',
                 fix_suggestion="Use subprocess with shell=False and pass arguments as a list",
-                references=["CWE-78"]
+                references=["CWE-78"],
+                id="command-concatenation",
+                keywords=["os.system", "subprocess."]
             ),
             
             # Path traversal patterns
@@ -99,7 +138,9 @@ class SecurityScanner:
                 description="Potential path traversal vulnerability",
                 pattern=r'open\s*\([^)]*\+[^)]*\)|Path\s*\([^)]*\+[^)]*\)',
                 fix_suggestion="Validate and sanitize file paths before use",
-                references=["CWE-22"]
+                references=["CWE-22"],
+                id="path-concatenation",
+                keywords=["open", "path"]
             ),
             
             # Hardcoded credentials
@@ -110,7 +151,62 @@ class SecurityScanner:
                 description="Hardcoded credentials detected",
                 pattern=r'(password|passwd|pwd|secret|api_key|token)\s*=\s*["\'][^"\']+["\']',
                 fix_suggestion="Use environment variables or secure credential storage",
-                references=["CWE-798"]
+                references=["CWE-798"],
+                id="hardcoded-credentials",
+                keywords=["password", "passwd", "pwd", "secret", "api_key", "token"]
+            ),
+            VulnerabilityPattern(
+                type=VulnerabilityType.HARDCODED_CREDENTIALS,
+                severity=SeverityLevel.CRITICAL,
+                category=SecurityCategory.AUTHENTICATION,
+                description="Credential stored in configuration file",
+                pattern=r'(?:^|[{,])[ \t-]*["\']?[\w.-]*(password|passwd|pwd|secret|api_?key|token)["\']?[ \t]*[:=][ \t]*["\']?(?![$<{%]|(?:null|none|true|false)\b)[^\s"\'#,}]{4,}',
+                fix_suggestion="Reference an environment variable or secret store instead",
+                references=["CWE-798", "CWE-312"],
+                id="config-credentials",
+                keywords=["password", "passwd", "pwd", "secret", "apikey", "api_key", "token"],
+                file_types=CONFIG_FILE_TYPES
+            ),
+            
+            # Secret signatures; the keywords gate the regexes
+            VulnerabilityPattern(
+                type=VulnerabilityType.HARDCODED_CREDENTIALS,
+                severity=SeverityLevel.CRITICAL,
+                category=SecurityCategory.AUTHENTICATION,
+                description="AWS access key ID detected",
+                pattern=r'\b(AKIA|ASIA)[0-9A-Z]{16}\b',
+                fix_suggestion="Revoke the key and load credentials from the environment",
+                references=["CWE-798"],
+                confidence=0.95,
+                id="aws-access-key",
+                flags=0,
+                keywords=["AKIA", "ASIA"]
+            ),
+            VulnerabilityPattern(
+                type=VulnerabilityType.HARDCODED_CREDENTIALS,
+                severity=SeverityLevel.CRITICAL,
+                category=SecurityCategory.AUTHENTICATION,
+                description="GitHub token detected",
+                pattern=r'\bgh[pousr]_[A-Za-z0-9]{36,}\b',
+                fix_suggestion="Revoke the token and load it from the environment",
+                references=["CWE-798"],
+                confidence=0.95,
+                id="github-token",
+                flags=0,
+                keywords=["ghp_", "gho_", "ghu_", "ghs_", "ghr_"]
+            ),
+            VulnerabilityPattern(
+                type=VulnerabilityType.HARDCODED_CREDENTIALS,
+                severity=SeverityLevel.CRITICAL,
+                category=SecurityCategory.AUTHENTICATION,
+                description="Slack token detected",
+                pattern=r'\bxox[abprs]-[A-Za-z0-9-]{10,}',
+                fix_suggestion="Revoke the token and load it from the environment",
+                references=["CWE-798"],
+                confidence=0.95,
+                id="slack-token",
+                flags=0,
+                keywords=["xox"]
             ),
             
             # Insecure random
@@ -121,7 +217,9 @@ class SecurityScanner:
                 description="Use of insecure random number generator",
                 pattern=r'random\.(random|randint|choice)\s*\(',
                 fix_suggestion="Use secrets module for cryptographic purposes",
-                references=["CWE-330"]
+                references=["CWE-330"],
+                id="insecure-random",
+                keywords=["random."]
             ),
             
             # Weak encryption
@@ -132,7 +230,9 @@ class SecurityScanner:
                 description="Use of weak encryption algorithm",
                 pattern=r'(MD5|SHA1|DES|RC4)\s*\(',
                 fix_suggestion="Use strong encryption algorithms like SHA-256 or AES",
-                references=["CWE-327"]
+                references=["CWE-327"],
+                id="weak-encryption",
+                keywords=["md5", "sha1", "des", "rc4"]
             ),
             
             # Insecure deserialization
@@ -143,7 +243,9 @@ class SecurityScanner:
                 description="Potential insecure deserialization",
                 pattern=r'pickle\.(load|loads)\s*\(',
                 fix_suggestion="Validate input before deserialization or use safer formats like JSON",
-                references=["CWE-502"]
+                references=["CWE-502"],
+                id="insecure-deserialization",
+                keywords=["pickle."]
             ),
             
             # SSRF patterns
@@ -154,7 +256,9 @@ class SecurityScanner:
                 description="Potential Server-Side Request Forgery",
                 pattern=r'requests\.(get|post|put|delete)\s*\([^)]*\+[^)]*\)',
                 fix_suggestion="Validate and whitelist URLs before making requests",
-                references=["CWE-918"]
+                references=["CWE-918"],
+                id="ssrf-concatenation",
+                keywords=["requests."]
             ),
         ]
         
@@ -171,45 +275,106 @@ class SecurityScanner:
             'xml': ['parse', 'XMLParse', 'XMLTreeBuilder'],
         }
         
-    def _get_sensitive_patterns(self) -> List[re.Pattern]:
-        """Get patterns for sensitive data detection."""
-        return [
-            re.compile(r'[A-Za-z0-9]{32,}'),  # API keys
-            re.compile(r'-----BEGIN (RSA |EC )?PRIVATE KEY-----'),  # Private keys
-            re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+'),  # Emails
-            re.compile(r'\b(?:\d{3}[-.]?)?\d{3}[-.]?\d{4}\b'),  # Phone numbers
-            re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),  # SSN pattern
-            re.compile(r'\b(?:\d{4}[-\s]?){3}\d{4}\b'),  # Credit card pattern
-        ]
-        
-    def scan_code(self, code: str, file_path: Optional[Path] = None) -> List[VulnerabilityInfo]:
-        """Scan code for security vulnerabilities."""
+    def _get_sensitive_patterns(self) -> Dict[str, re.Pattern]:
+        """Get patterns for sensitive data detection, keyed by rule id."""
+        return {
+            # Anchored to the start of a run; the matcher tries every offset
+            'sensitive-api-key': re.compile(r'(?<![A-Za-z0-9])[A-Za-z0-9]{32,}'),
+            'sensitive-private-key': re.compile(r'-----BEGIN (RSA |EC )?PRIVATE KEY-----'),
+            'sensitive-email': re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+'),
+            'sensitive-phone': re.compile(r'\b(?:\d{3}[-.]?)?\d{3}[-.]?\d{4}\b'),
+            'sensitive-ssn': re.compile(r'\b\d{3}-\d{2}-\d{4}\b'),
+            'sensitive-credit-card': re.compile(r'\b(?:\d{4}[-\s]?){3}\d{4}\b'),
+        }
+    
+    def _file_kind(self, file_path: Optional[Path]) -> Optional[str]:
+        """Get the key used to select file-type specific rules."""
+        if file_path is None:
+            return None
+        if file_path.name.lower().startswith('.env'):
+            return '.env'
+        return file_path.suffix.lower()
+    
+    def _get_matcher(self, file_path: Optional[Path]) -> MultiPatternMatcher:
+        """Get the compiled matcher for the rules that apply to a file."""
+        kind = self._file_kind(file_path)
+        matcher = self._matchers.get(kind)
+        if matcher is None:
+            patterns = [
+                p for p in self.vulnerability_patterns
+                if not p.file_types or kind in p.file_types
+            ]
+            matcher = MultiPatternMatcher([
+                MatchRule(p.id, p.pattern, p.flags, p.keywords) for p in patterns
+            ] + [
+                MatchRule(rule_id, regex.pattern, regex.flags & ~re.UNICODE,
+                          SENSITIVE_KEYWORDS.get(rule_id, []))
+                for rule_id, regex in self.sensitive_patterns.items()
+            ])
+            self._matchers[kind] = matcher
+        return matcher
+    
+    def match_rules(self, code: str, file_path: Optional[Path] = None) -> List[RuleMatch]:
+        """Run every applicable regex rule over the code in one scan.
+        
+        Returns:
+            Matches with the id of the rule that produced each
+        """
+        return self._get_matcher(file_path).scan(code)
+        
+    def scan_code(self, code: str, file_path: Optional[Path] = None,
+                  parsed: Optional[ParsedUnit] = None) -> List[VulnerabilityInfo]:
+        """Scan code for security vulnerabilities.
+        
+        Args:
+            code: Source code to scan
+            file_path: Path of the scanned file
+            parsed: Shared parsed source unit to reuse instead of re-parsing
+        """
         vulnerabilities = []
+        is_python = bool(file_path and file_path.suffix == '.py')
+        is_config = bool(file_path) and self._is_config_file(file_path)
+        if parsed is None:
+            parsed = ParsedUnit.from_source(file_path or 'unknown', code, parse=is_python)
+        
+        # One scan feeds the pattern and sensitive data checks
+        matches = self.match_rules(code, file_path)
         
         # Check regex patterns
-        vulnerabilities.extend(self._scan_patterns(code, file_path))
+        vulnerabilities.extend(self._scan_patterns(code, file_path, parsed, matches))
         
         # AST-based analysis for Python
-        if file_path and file_path.suffix == '.py':
-            vulnerabilities.extend(self._scan_ast(code, file_path))
+        if is_python:
+            vulnerabilities.extend(self._scan_ast(code, file_path, parsed))
             
         # Check for sensitive data exposure
-        vulnerabilities.extend(self._scan_sensitive_data(code, file_path))
+        vulnerabilities.extend(self._scan_sensitive_data(code, file_path, parsed, matches))
         
         # Check imported modules
-        vulnerabilities.extend(self._scan_imports(code, file_path))
+        if not is_config:
+            vulnerabilities.extend(self._scan_imports(code, file_path, parsed))
         
         return vulnerabilities
         
-    def _scan_patterns(self, code: str, file_path: Optional[Path]) -> List[VulnerabilityInfo]:
+    def _is_config_file(self, file_path: Path) -> bool:
+        """Check whether a file is a configuration or environment file."""
+        return self._file_kind(file_path) in CONFIG_FILE_TYPES
+    
+    def _scan_patterns(self, code: str, file_path: Optional[Path],
+                       parsed: ParsedUnit,
+                       matches: Optional[List[RuleMatch]] = None) -> List[VulnerabilityInfo]:
         """Scan code using regex patterns."""
         vulnerabilities = []
+        if matches is None:
+            matches = self.match_rules(code, file_path)
+        
+        by_rule: Dict[str, List[RuleMatch]] = {}
+        for match in matches:
+            by_rule.setdefault(match.rule_id, []).append(match)
         
         for pattern in self.vulnerability_patterns:
-            matches = re.finditer(pattern.pattern, code, re.IGNORECASE | re.MULTILINE)
-            
-            for match in matches:
-                line_num = code[:match.start()].count('\n') + 1
+            for match in by_rule.get(pattern.id, ()):
+                line_num = parsed.line_number(match.start)
                 
                 vulnerability = VulnerabilityInfo(
                     type=pattern.type.value,
@@ -220,45 +385,46 @@ class SecurityScanner:
                         file_path=str(file_path) if file_path else 'unknown',
                         line_start=line_num,
                         line_end=line_num,
-                        column_start=match.start() - code.rfind('\n', 0, match.start()),
-                        column_end=match.end() - code.rfind('\n', 0, match.start()),
+                        column_start=parsed.column(match.start),
+                        column_end=parsed.column(match.start) + match.end - match.start,
                     ),
-                    code_snippet=code.splitlines()[line_num - 1] if line_num <= len(code.splitlines()) else '',
+                    code_snippet=parsed.get_line(line_num),
                     fix_suggestion=pattern.fix_suggestion,
                     references=pattern.references,
                     confidence=pattern.confidence,
+                    rule_id=pattern.id,
                 )
                 
                 vulnerabilities.append(vulnerability)
                 
         return vulnerabilities
         
-    def _scan_ast(self, code: str, file_path: Path) -> List[VulnerabilityInfo]:
+    def _scan_ast(self, code: str, file_path: Path,
+                  parsed: Optional[ParsedUnit] = None) -> List[VulnerabilityInfo]:
         """Scan Python AST for vulnerabilities."""
         vulnerabilities = []
         
-        try:
-            tree = ast.parse(code)
-            
-            for node in ast.walk(tree):
-                # Check for dangerous function calls
-                if isinstance(node, ast.Call):
-                    vulnerabilities.extend(self._check_dangerous_call(node, code, file_path))
-                    
-                # Check for eval/exec usage
-                if isinstance(node, ast.Name) and node.id in ['eval', 'exec']:
-                    vulnerabilities.append(self._create_eval_vulnerability(node, code, file_path))
-                    
-                # Check for assert statements in production code
-                if isinstance(node, ast.Assert):
-                    vulnerabilities.append(self._create_assert_vulnerability(node, code, file_path))
-                    
-        except SyntaxError:
-            pass  # Invalid syntax, skip AST analysis
+        if parsed is None:
+            parsed = ParsedUnit.from_source(file_path, code)
+        if parsed.tree is None:
+            return vulnerabilities  # Invalid syntax, skip AST analysis
+        
+        for node in ast.walk(parsed.tree):
+            # Check for dangerous function calls
+            if isinstance(node, ast.Call):
+                vulnerabilities.extend(self._check_dangerous_call(node, parsed, file_path))
+                
+            # Check for eval/exec usage
+            if isinstance(node, ast.Name) and node.id in ['eval', 'exec']:
+                vulnerabilities.append(self._create_eval_vulnerability(node, parsed, file_path))
+                
+            # Check for assert statements in production code
+            if isinstance(node, ast.Assert):
+                vulnerabilities.append(self._create_assert_vulnerability(node, parsed, file_path))
             
         return vulnerabilities
         
-    def _check_dangerous_call(self, node: ast.Call, code: str, file_path: Path) -> List[VulnerabilityInfo]:
+    def _check_dangerous_call(self, node: ast.Call, parsed: ParsedUnit, file_path: Path) -> List[VulnerabilityInfo]:
         """Check for dangerous function calls."""
         vulnerabilities = []
         
@@ -279,7 +445,7 @@ class SecurityScanner:
                         column_start=node.col_offset,
                         column_end=node.end_col_offset or node.col_offset,
                     ),
-                    code_snippet=code.splitlines()[node.lineno - 1] if node.lineno <= len(code.splitlines()) else '',
+                    code_snippet=parsed.get_line(node.lineno),
                     fix_suggestion=self._get_fix_suggestion(func_name),
                     references=self._get_references(func_name),
                     confidence=0.9,
@@ -317,19 +483,23 @@ class SecurityScanner:
         }
         return references.get(func_name, ['CWE-676'])
         
-    def _scan_sensitive_data(self, code: str, file_path: Optional[Path]) -> List[VulnerabilityInfo]:
+    def _scan_sensitive_data(self, code: str, file_path: Optional[Path],
+                             parsed: ParsedUnit,
+                             matches: Optional[List[RuleMatch]] = None) -> List[VulnerabilityInfo]:
         """Scan for exposed sensitive data."""
         vulnerabilities = []
+        if matches is None:
+            matches = self.match_rules(code, file_path)
         
-        for pattern in self.sensitive_patterns:
-            matches = pattern.finditer(code)
-            
+        for rule_id in self.sensitive_patterns:
             for match in matches:
-                line_num = code[:match.start()].count('\n') + 1
+                if match.rule_id != rule_id:
+                    continue
+                line_num = parsed.line_number(match.start)
                 
                 # Check context to reduce false positives
-                context = code[max(0, match.start() - 50):match.end() + 50]
-                if self._is_likely_sensitive(match.group(), context):
+                context = code[max(0, match.start - 50):match.end + 50]
+                if self._is_likely_sensitive(match.text, context):
                     vulnerability = VulnerabilityInfo(
                         type=VulnerabilityType.SENSITIVE_DATA_EXPOSURE.value,
                         severity=SeverityLevel.HIGH,
@@ -339,13 +509,14 @@ class SecurityScanner:
                             file_path=str(file_path) if file_path else 'unknown',
                             line_start=line_num,
                             line_end=line_num,
-                            column_start=match.start() - code.rfind('\n', 0, match.start()),
-                            column_end=match.end() - code.rfind('\n', 0, match.start()),
+                            column_start=parsed.column(match.start),
+                            column_end=parsed.column(match.start) + match.end - match.start,
                         ),
-                        code_snippet=code.splitlines()[line_num - 1] if line_num <= len(code.splitlines()) else '',
+                        code_snippet=parsed.get_line(line_num),
                         fix_suggestion="Remove or encrypt sensitive data",
                         references=["CWE-200", "CWE-312"],
                         confidence=0.7,
+                        rule_id=rule_id,
                     )
                     vulnerabilities.append(vulnerability)
                     
@@ -363,7 +534,8 @@ class SecurityScanner:
         
         return any(keyword in context_lower for keyword in sensitive_keywords)
         
-    def _scan_imports(self, code: str, file_path: Optional[Path]) -> List[VulnerabilityInfo]:
+    def _scan_imports(self, code: str, file_path: Optional[Path],
+                      parsed: ParsedUnit) -> List[VulnerabilityInfo]:
         """Scan for dangerous imports."""
         vulnerabilities = []
         
@@ -381,7 +553,7 @@ class SecurityScanner:
             module = match.group(1) or match.group(2)
             
             if module in dangerous_imports:
-                line_num = code[:match.start()].count('\n') + 1
+                line_num = parsed.line_number(match.start())
                 desc, fix = dangerous_imports[module]
                 
                 vulnerability = VulnerabilityInfo(
@@ -393,10 +565,10 @@ class SecurityScanner:
                         file_path=str(file_path) if file_path else 'unknown',
                         line_start=line_num,
                         line_end=line_num,
-                        column_start=match.start() - code.rfind('\n', 0, match.start()),
-                        column_end=match.end() - code.rfind('\n', 0, match.start()),
+                        column_start=parsed.column(match.start()),
+                        column_end=parsed.column(match.start()) + match.end() - match.start(),
                     ),
-                    code_snippet=code.splitlines()[line_num - 1] if line_num <= len(code.splitlines()) else '',
+                    code_snippet=parsed.get_line(line_num),
                     fix_suggestion=fix,
                     references=["CWE-676"],
                     confidence=0.9,
@@ -405,7 +577,7 @@ class SecurityScanner:
                 
         return vulnerabilities
         
-    def _create_eval_vulnerability(self, node: ast.Name, code: str, file_path: Path) -> VulnerabilityInfo:
+    def _create_eval_vulnerability(self, node: ast.Name, parsed: ParsedUnit, file_path: Path) -> VulnerabilityInfo:
         """Create vulnerability for eval/exec usage."""
         return VulnerabilityInfo(
             type=VulnerabilityType.COMMAND_INJECTION.value,
@@ -419,13 +591,13 @@ class SecurityScanner:
                 column_start=node.col_offset,
                 column_end=node.end_col_offset or node.col_offset,
             ),
-            code_snippet=code.splitlines()[node.lineno - 1] if node.lineno <= len(code.splitlines()) else '',
+            code_snippet=parsed.get_line(node.lineno),
             fix_suggestion=f"Avoid using {node.id}, consider safer alternatives",
             references=["CWE-94", "CWE-95"],
             confidence=1.0,
         )
         
-    def _create_assert_vulnerability(self, node: ast.Assert, code: str, file_path: Path) -> VulnerabilityInfo:
+    def _create_assert_vulnerability(self, node: ast.Assert, parsed: ParsedUnit, file_path: Path) -> VulnerabilityInfo:
         """Create vulnerability for assert usage."""
         return VulnerabilityInfo(
             type=VulnerabilityType.INSUFFICIENT_VALIDATION.value,
@@ -439,7 +611,7 @@ class SecurityScanner:
                 column_start=node.col_offset,
                 column_end=node.end_col_offset or node.col_offset,
             ),
-            code_snippet=code.splitlines()[node.lineno - 1] if node.lineno <= len(code.splitlines()) else '',
+            code_snippet=parsed.get_line(node.lineno),
             fix_suggestion="Use proper error handling instead of assert for validation",
             references=["CWE-617"],
             confidence=0.8,
@@ -454,12 +626,19 @@ class SecurityAnalyzer:
         self.scanner = SecurityScanner()
         self.pattern_registry = PatternDetectorRegistry()
         
-    def analyze_file(self, file_path: Path) -> Dict[str, Any]:
-        """Analyze a single file for security vulnerabilities."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            code = f.read()
+    def analyze_file(self, file_path: Path,
+                     parsed: Optional[ParsedUnit] = None) -> Dict[str, Any]:
+        """Analyze a single file for security vulnerabilities.
+        
+        Args:
+            file_path: File to analyze
+            parsed: Already read and parsed unit; the file is read from disk if omitted
+        """
+        file_path = Path(file_path)
+        if parsed is None:
+            parsed = ParsedUnit.from_file(file_path, parse=file_path.suffix == '.py')
             
-        vulnerabilities = self.scanner.scan_code(code, file_path)
+        vulnerabilities = self.scanner.scan_code(parsed.content, file_path, parsed)
         
         # Group by severity
         severity_counts = {
@@ -483,22 +662,22 @@ class SecurityAnalyzer:
         }
         
     def analyze_directory(self, directory: Path, patterns: List[str] = None) -> Dict[str, Any]:
-        """Analyze all files in a directory for security vulnerabilities."""
+        """Analyze all source and configuration files in a directory."""
         if patterns is None:
-            patterns = ['*.py', '*.js', '*.ts', '*.java', '*.rb', '*.php']
+            patterns = ['*.py', '*.js', '*.ts', '*.java', '*.rb', '*.php',
+                        '*.yaml', '*.yml', '*.json', '*.toml', '*.ini', '*.cfg',
+                        '.env', '.env.*', '*.env']
             
         all_vulnerabilities = []
         file_results = []
         
-        for pattern in patterns:
-            for file_path in directory.rglob(pattern):
-                if file_path.is_file():
-                    try:
-                        result = self.analyze_file(file_path)
-                        file_results.append(result)
-                        all_vulnerabilities.extend(result['vulnerabilities'])
-                    except Exception as e:
-                        print(f"Error analyzing {file_path}: {e}")
+        for file_path in FileDiscovery(directory).find_files(patterns):
+            try:
+                result = self.analyze_file(file_path)
+                file_results.append(result)
+                all_vulnerabilities.extend(result['vulnerabilities'])
+            except Exception as e:
+                print(f"Error analyzing {file_path}: {e}")
                         
         return {
             'directory': str(directory),
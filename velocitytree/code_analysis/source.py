@@ -0,0 +1,190 @@
+"""Parsed source units shared across analysis stages."""
+
+import ast
+import bisect
+import io
+import re
+import tokenize
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+_DEFINITION_RE = re.compile(r'(?:async\s+def|def|class)\b')
+_CLAUSE_RE = re.compile(r'(?:else|elif|except|finally)\b')
+_STRING_OR_COMMENT_RE = re.compile(
+    r'#[^\n]*'
+    r'|"""(?:\\.|[^\\])*?"""'
+    r"|'''(?:\\.|[^\\])*?'''"
+    r'|"(?:\\.|[^"\\\n])*"'
+    r"|'(?:\\.|[^'\\\n])*'",
+    re.DOTALL
+)
+_LINE_START_RE = re.compile(r'^[^\s#]', re.MULTILINE)
+
+
+@dataclass
+class ParsedUnit:
+    """A source file read and parsed once for every analysis stage.
+
+    The adapter, metrics calculator, pattern registry and security scanner
+    all receive the same unit, so the file is read from disk once and the
+    AST is built once per analysis.
+    """
+    file_path: str
+    content: str
+    tree: Optional[ast.AST] = None
+    syntax_error: Optional[SyntaxError] = None
+    _lines: Optional[List[str]] = field(default=None, repr=False)
+    _line_offsets: Optional[List[int]] = field(default=None, repr=False)
+    _tokens: Optional[List[tokenize.TokenInfo]] = field(default=None, repr=False)
+
+    @classmethod
+    def from_source(cls, file_path: Union[str, Path], content: str,
+                    parse: bool = True) -> 'ParsedUnit':
+        """Create a unit from in-memory source.
+
+        Args:
+            file_path: Path used for error reporting and locations
+            content: Source text
+            parse: Whether to build the Python AST
+
+        Returns:
+            Parsed unit; ``tree`` is None if parsing failed or was skipped
+        """
+        unit = cls(file_path=str(file_path), content=content)
+        if parse:
+            try:
+                unit.tree = ast.parse(content, filename=str(file_path))
+            except SyntaxError as e:
+                unit.syntax_error = e
+        return unit
+
+    @classmethod
+    def from_file(cls, file_path: Union[str, Path],
+                  parse: bool = True) -> 'ParsedUnit':
+        """Read a file and create a unit from its content."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return cls.from_source(file_path, content, parse=parse)
+
+    def ensure_tree(self) -> Optional[ast.AST]:
+        """Parse the source if the unit was created with ``parse=False``."""
+        if self.tree is None and self.syntax_error is None:
+            try:
+                self.tree = ast.parse(self.content, filename=self.file_path)
+            except SyntaxError as e:
+                self.syntax_error = e
+        return self.tree
+
+    @property
+    def lines(self) -> List[str]:
+        """Source lines without line terminators."""
+        if self._lines is None:
+            self._lines = self.content.splitlines()
+        return self._lines
+
+    @property
+    def line_offsets(self) -> List[int]:
+        """Character offset of the start of each line."""
+        if self._line_offsets is None:
+            offsets = [0]
+            pos = self.content.find('\n')
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = self.content.find('\n', pos + 1)
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def tokens(self) -> List[tokenize.TokenInfo]:
+        """Python tokens for the source, generated on first access."""
+        if self._tokens is None:
+            try:
+                self._tokens = list(
+                    tokenize.generate_tokens(io.StringIO(self.content).readline)
+                )
+            except (tokenize.TokenError, IndentationError, SyntaxError):
+                self._tokens = []
+        return self._tokens
+
+    def line_number(self, offset: int) -> int:
+        """Convert a character offset into a 1-based line number."""
+        return bisect.bisect_right(self.line_offsets, offset)
+
+    def column(self, offset: int) -> int:
+        """Convert a character offset into a 1-based column."""
+        return offset - self.line_offsets[self.line_number(offset) - 1] + 1
+
+    def get_line(self, line_number: int) -> str:
+        """Get a single 1-based source line, or '' if out of range."""
+        if 1 <= line_number <= len(self.lines):
+            return self.lines[line_number - 1]
+        return ''
+
+    def get_lines(self, line_start: int, line_end: int) -> Optional[str]:
+        """Get the source text for an inclusive 1-based line range.
+
+        Returns None if the range extends past the end of the file.
+        """
+        lines = self.lines
+        if line_start <= len(lines) and line_end <= len(lines):
+            return '\n'.join(lines[line_start - 1:line_end])
+        return None
+
+
+def top_level_spans(content: str) -> List[Tuple[int, int]]:
+    """Split Python source into the line spans of its top-level statements.
+
+    Every function and class, including its decorators, gets a span of its
+    own; runs of other module-level statements share one. Comments and
+    blank lines belong to the preceding span and the first span starts at
+    line 1. Strings and comments are blanked out with a regular expression
+    and only lines starting in column 0 outside brackets are inspected,
+    which is much cheaper than parsing and also works on source with
+    syntax errors.
+
+    Returns:
+        Inclusive 1-based (start, end) line spans in order
+    """
+    # Keep line breaks inside strings, and indent what follows a
+    # multi-line string so it cannot look like a new statement
+    code = _STRING_OR_COMMENT_RE.sub(
+        lambda m: '\n' * m.group().count('\n') + (' ' if '\n' in m.group() else ''),
+        content
+    )
+
+    spans: List[List] = []  # [start, end, kind]
+    depth = 0
+    number = 1
+    previous = 0
+    for match in _LINE_START_RE.finditer(code):
+        pos = match.start()
+        depth += (code.count('(', previous, pos) + code.count('[', previous, pos)
+                  + code.count('{', previous, pos) - code.count(')', previous, pos)
+                  - code.count(']', previous, pos) - code.count('}', previous, pos))
+        number += code.count('\n', previous, pos)
+        previous = pos
+        if depth > 0 or code.startswith('\\\n', pos - 2):
+            continue
+
+        line_end = code.find('\n', pos)
+        line = code[pos:line_end if line_end != -1 else len(code)]
+        if line[0] in ')]}' or _CLAUSE_RE.match(line):
+            continue
+        kind = ('decorator' if line[0] == '@' else
+                'definition' if _DEFINITION_RE.match(line) else 'statement')
+        last = spans[-1][2] if spans else None
+        if last == 'decorator' and kind != 'statement':
+            spans[-1][2] = kind
+        elif not (last == 'statement' and kind == 'statement'):
+            spans.append([number, None, kind])
+
+    lines = content.splitlines()
+    for index, span in enumerate(spans):
+        end = spans[index + 1][0] - 1 if index + 1 < len(spans) else len(lines)
+        while end > span[0] and not lines[end - 1].strip():
+            end -= 1
+        span[1] = end
+    if spans:
+        spans[0][0] = 1
+    return [(start, end) for start, end, _ in spans]
@@ -0,0 +1,267 @@
+"""Incremental aggregation and JSON Lines output for streamed analyses."""
+
+import heapq
+import json
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .models import (
+    CodeIssue,
+    CodeLocation,
+    CodeMetrics,
+    IssueCategory,
+    ModuleAnalysis,
+    Pattern,
+    Suggestion,
+)
+
+
+# Bump when the layout of the JSON Lines records changes
+RECORD_FORMAT_VERSION = 1
+
+
+def to_record(value: Any) -> Any:
+    """Convert analysis models into JSON-serializable values.
+    
+    Dataclasses become dicts, enums their values and datetimes ISO strings.
+    """
+    if is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_record(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {
+            (key.value if isinstance(key, Enum) else str(key)): to_record(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple, set)):
+        return [to_record(item) for item in value]
+    return value
+
+
+class MetricsAccumulator:
+    """Aggregates module metrics with constant memory.
+    
+    Produces the same values as aggregating the full list of metrics:
+    totals, line-weighted complexity and maintainability averages, and the
+    mean of per-module average function lengths.
+    """
+    
+    def __init__(self):
+        self.modules = 0
+        self.lines_of_code = 0
+        self.lines_of_comments = 0
+        self.weighted_cyclomatic = 0.0
+        self.weighted_cognitive = 0.0
+        self.weighted_maintainability = 0.0
+        self.function_length_sum = 0.0
+        self.max_function_length = 0
+        self.number_of_functions = 0
+        self.number_of_classes = 0
+    
+    def add(self, metrics: CodeMetrics):
+        """Add the metrics of one module."""
+        loc = metrics.lines_of_code
+        self.modules += 1
+        self.lines_of_code += loc
+        self.lines_of_comments += metrics.lines_of_comments
+        self.weighted_cyclomatic += metrics.cyclomatic_complexity * loc
+        self.weighted_cognitive += metrics.cognitive_complexity * loc
+        self.weighted_maintainability += metrics.maintainability_index * loc
+        self.function_length_sum += metrics.average_function_length
+        self.max_function_length = max(self.max_function_length, metrics.max_function_length)
+        self.number_of_functions += metrics.number_of_functions
+        self.number_of_classes += metrics.number_of_classes
+    
+    def result(self) -> CodeMetrics:
+        """Get the aggregated metrics."""
+        if not self.modules:
+            return CodeMetrics(
+                lines_of_code=0,
+                lines_of_comments=0,
+                cyclomatic_complexity=0,
+                cognitive_complexity=0,
+                maintainability_index=0
+            )
+        
+        total_loc = self.lines_of_code or 1
+        return CodeMetrics(
+            lines_of_code=self.lines_of_code,
+            lines_of_comments=self.lines_of_comments,
+            cyclomatic_complexity=self.weighted_cyclomatic / total_loc,
+            cognitive_complexity=self.weighted_cognitive / total_loc,
+            maintainability_index=self.weighted_maintainability / total_loc,
+            code_to_comment_ratio=self.lines_of_code / (self.lines_of_comments + 1),
+            average_function_length=self.function_length_sum / self.modules,
+            max_function_length=self.max_function_length,
+            number_of_functions=self.number_of_functions,
+            number_of_classes=self.number_of_classes
+        )
+
+
+class SuggestionAccumulator:
+    """Builds project-level suggestions from issues and patterns as they arrive.
+    
+    Only counters and the suggestions themselves are kept. With
+    ``max_suggestions`` set, only that many of the highest-priority
+    suggestions are retained, so memory stays bounded on huge projects.
+    """
+    
+    def __init__(self, max_suggestions: Optional[int] = None):
+        self.max_suggestions = max_suggestions
+        self.complexity_issues = 0
+        self._heap: List[tuple] = []
+        self._sequence = 0
+    
+    def add_issue(self, issue: CodeIssue):
+        """Record an issue."""
+        if issue.category == IssueCategory.COMPLEXITY:
+            self.complexity_issues += 1
+    
+    def add_pattern(self, pattern: Pattern):
+        """Record a pattern, turning God Classes into suggestions."""
+        if pattern.name == "God Class":
+            self._push(Suggestion(
+                title=f"Refactor {pattern.location.file_path}",
+                description="This class has too many responsibilities. Consider splitting it.",
+                location=pattern.location,
+                category=IssueCategory.MAINTAINABILITY,
+                priority=3,
+                estimated_effort="large",
+                rationale="Large classes violate the Single Responsibility Principle"
+            ))
+    
+    def _push(self, suggestion: Suggestion):
+        """Keep a suggestion, dropping the lowest-ranked one when full."""
+        # Lower priority numbers rank higher; earlier suggestions win ties
+        entry = (-suggestion.priority, -self._sequence, suggestion)
+        self._sequence += 1
+        if self.max_suggestions is None or len(self._heap) < self.max_suggestions:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def result(self) -> List[Suggestion]:
+        """Get the suggestions, project-wide ones first."""
+        suggestions = []
+        if self.complexity_issues > 5:
+            suggestions.append(Suggestion(
+                title="Reduce Overall Code Complexity",
+                description="Multiple functions have high complexity. Consider a refactoring sprint.",
+                location=CodeLocation(
+                    file_path="project-wide",
+                    line_start=0,
+                    line_end=0
+                ),
+                category=IssueCategory.MAINTAINABILITY,
+                priority=2,
+                estimated_effort="large",
+                rationale="High complexity makes code harder to understand and maintain"
+            ))
+        
+        ranked = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        suggestions.extend(entry[2] for entry in ranked)
+        return suggestions
+
+
+class AnalysisAccumulator:
+    """Aggregates streamed module results with constant memory per module."""
+    
+    def __init__(self, max_suggestions: Optional[int] = None):
+        self.files_analyzed = 0
+        self.total_lines = 0
+        self.language_breakdown: Dict[Any, int] = {}
+        self.issue_counts: Dict[str, int] = {}
+        self.category_counts: Dict[str, int] = {}
+        self.pattern_counts: Dict[str, int] = {}
+        self.metrics = MetricsAccumulator()
+        self.suggestions = SuggestionAccumulator(max_suggestions)
+    
+    def add_module(self, module: ModuleAnalysis):
+        """Add a module result and everything it contains."""
+        self.files_analyzed += 1
+        self.total_lines += module.metrics.lines_of_code
+        self.language_breakdown[module.language] = self.language_breakdown.get(module.language, 0) + 1
+        self.metrics.add(module.metrics)
+        for issue in module.issues:
+            self.add_issue(issue)
+        for pattern in module.patterns:
+            self.add_pattern(pattern)
+    
+    def add_issue(self, issue: CodeIssue):
+        """Add an issue found outside a module result."""
+        severity = issue.severity.value
+        category = issue.category.value
+        self.issue_counts[severity] = self.issue_counts.get(severity, 0) + 1
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        self.suggestions.add_issue(issue)
+    
+    def add_pattern(self, pattern: Pattern):
+        """Add a pattern found outside a module result, e.g. a cross-file clone."""
+        self.pattern_counts[pattern.name] = self.pattern_counts.get(pattern.name, 0) + 1
+        self.suggestions.add_pattern(pattern)
+
+
+class JsonLinesWriter:
+    """Writes analysis records to a JSON Lines file as they are produced.
+    
+    Every line is an object with a ``type`` key: ``module`` records hold a
+    full ModuleAnalysis, ``pattern`` records project-level patterns such as
+    cross-file clones, ``error`` records files that could not be analyzed,
+    and a final ``summary`` record holds the aggregates.
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """Open the output file, replacing any previous content.
+        
+        Args:
+            path: JSON Lines file to write
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self.records = 0
+        self.write('header', {'version': RECORD_FORMAT_VERSION})
+    
+    def write(self, record_type: str, data: Any):
+        """Write one record."""
+        record = {'type': record_type, 'data': to_record(data)}
+        self._file.write(json.dumps(record, default=str))
+        self._file.write('\n')
+        self.records += 1
+    
+    def close(self):
+        """Flush and close the output file."""
+        if not self._file.closed:
+            self._file.close()
+    
+    def __enter__(self) -> 'JsonLinesWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def iter_records(path: Union[str, Path],
+                 record_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Lazily read the records of a JSON Lines analysis output.
+    
+    Args:
+        path: File written by JsonLinesWriter
+        record_type: Only yield records of this type (e.g. ``module``)
+    
+    Yields:
+        Records with ``type`` and ``data`` keys, in file order
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record_type is None or record['type'] == record_type:
+                yield record
@@ -30,6 +30,9 @@ class FlattenConfig(BaseModel):
     include_extensions: list = Field(default_factory=list)
     preserve_structure: bool = Field(default=False)
     follow_symlinks: bool = Field(default=False)
+    link_mode: str = Field(default="copy")
+    workers: int = Field(default=1)
+    incremental: bool = Field(default=False)
 
 
 class AIConfig(BaseModel):
@@ -40,6 +43,11 @@ class AIConfig(BaseModel):
     temperature: float = Field(default=0.7)
     max_tokens: int = Field(default=2000)
     base_url: Optional[str] = None
+    max_concurrency: Optional[int] = None  # provider default if unset
+    requests_per_minute: Optional[float] = None  # provider default if unset
+    cache: bool = Field(default=True)
+    cache_ttl: Optional[int] = Field(default=7 * 24 * 3600)  # seconds, None keeps answers until files change
+    cache_similarity: Optional[float] = Field(default=None)  # e.g. 0.9 reuses near-duplicate prompts
 
 
 class LoggingConfig(BaseModel):
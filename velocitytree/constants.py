@@ -161,6 +161,24 @@ DEFAULT_EXCLUDE_DIRS = [
     "buck-out",
 ]
 
+# Directories never entered during file discovery, even without a .gitignore
+DISCOVERY_SKIP_DIRS = [
+    ".git",
+    ".hg",
+    ".svn",
+    ".velocitytree",
+    "node_modules",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".eggs",
+]
+
 # Binary file extensions to skip
 DEFAULT_BINARY_EXTENSIONS = [
     ".exe",
@@ -290,19 +308,31 @@ AI_PROVIDERS = {
         "models": ["gpt-4", "gpt-3.5-turbo", "gpt-4-32k"],
         "default_model": "gpt-4",
         "api_key_env": "OPENAI_API_KEY",
+        "base_url": "https://api.openai.com/v1",
+        "max_concurrency": 8,
+        "requests_per_minute": 500,
     },
     "anthropic": {
         "models": ["claude-3-sonnet", "claude-3-opus", "claude-3-haiku"],
         "default_model": "claude-3-sonnet",
         "api_key_env": "ANTHROPIC_API_KEY",
+        "base_url": "https://api.anthropic.com",
+        "max_concurrency": 5,
+        "requests_per_minute": 50,
     },
     "local": {
         "models": ["llama2", "codellama", "mistral"],
         "default_model": "codellama",
         "api_key_env": None,
+        "base_url": "http://localhost:11434",
+        "max_concurrency": 2,
+        "requests_per_minute": None,
     },
 }
 
+# Version header required by the Anthropic HTTP API
+ANTHROPIC_API_VERSION = "2023-06-01"
+
 # Configuration file names
 CONFIG_FILES = [
     ".velocitytree.yaml",
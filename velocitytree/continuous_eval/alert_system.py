@@ -6,9 +6,10 @@ from enum import Enum
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Callable
 import json
-import sqlite3
 from collections import defaultdict
 
+from ..storage import get_store
+
 class AlertType(Enum):
     """Types of alerts."""
     DRIFT_DETECTED = "drift_detected"
@@ -67,8 +68,20 @@ class Alert:
             "alert_id": self.alert_id
         }
 
+_INSERT_ALERT = """
+    INSERT INTO alerts (
+        id, type, severity, title, message,
+        file_path, line_number, context,
+        timestamp, resolved, resolved_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 class AlertSystem:
-    """Manages alerts and notifications."""
+    """Manages alerts and notifications.
+    
+    Alerts are written behind: each gets its id at once, and the shared
+    store commits new alerts in groups.
+    """
     
     def __init__(self, db_path: Optional[Path] = None):
         """Initialize alert system."""
@@ -76,7 +89,7 @@ class AlertSystem:
             db_path = Path.home() / ".velocitytree" / "alerts.db"
         
         self.db_path = db_path
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.store = get_store(db_path)
         
         # Alert handlers by type
         self.handlers: Dict[AlertType, List[Callable[[Alert], None]]] = defaultdict(list)
@@ -89,47 +102,33 @@ class AlertSystem:
     
     def _init_database(self):
         """Initialize database schema."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS alerts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    type TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    file_path TEXT,
-                    line_number INTEGER,
-                    context TEXT,
-                    timestamp TEXT NOT NULL,
-                    resolved BOOLEAN NOT NULL DEFAULT 0,
-                    resolved_at TEXT
-                )
-            """)
+        self.store.executescript("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                type TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                title TEXT NOT NULL,
+                message TEXT NOT NULL,
+                file_path TEXT,
+                line_number INTEGER,
+                context TEXT,
+                timestamp TEXT NOT NULL,
+                resolved BOOLEAN NOT NULL DEFAULT 0,
+                resolved_at TEXT
+            );
             
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_alerts_type 
-                ON alerts(type)
-            """)
+            CREATE INDEX IF NOT EXISTS idx_alerts_type 
+            ON alerts(type);
             
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_alerts_severity 
-                ON alerts(severity)
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_alerts_resolved 
-                ON alerts(resolved)
-            """)
+            CREATE INDEX IF NOT EXISTS idx_alerts_severity 
+            ON alerts(severity);
             
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_alerts_timestamp 
-                ON alerts(timestamp)
-            """)
+            CREATE INDEX IF NOT EXISTS idx_alerts_resolved 
+            ON alerts(resolved);
             
-            conn.commit()
-        finally:
-            conn.close()
+            CREATE INDEX IF NOT EXISTS idx_alerts_timestamp 
+            ON alerts(timestamp);
+        """)
     
     def _setup_default_handlers(self):
         """Set up default alert handlers."""
@@ -215,32 +214,39 @@ class AlertSystem:
         return alert
     
     def _store_alert(self, alert: Alert):
-        """Store alert in database."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.execute("""
-                INSERT INTO alerts (
-                    type, severity, title, message,
-                    file_path, line_number, context,
-                    timestamp, resolved, resolved_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                alert.type.value,
-                alert.severity.name,
-                alert.title,
-                alert.message,
-                str(alert.file_path) if alert.file_path else None,
-                alert.line_number,
-                json.dumps(alert.context) if alert.context else None,
-                alert.timestamp.isoformat() if alert.timestamp else None,
-                alert.resolved,
-                alert.resolved_at.isoformat() if alert.resolved_at else None
-            ))
+        """Queue an alert for the next group commit."""
+        alert.alert_id = self.store.next_id("alerts")
+        self.store.queue_write(_INSERT_ALERT, self._alert_row(alert))
+    
+    def store_alerts(self, alerts: List[Alert]) -> List[Alert]:
+        """Store many alerts in a single transaction, without triggering handlers.
+        
+        Args:
+            alerts: Alerts to store; their alert_id is set
             
-            alert.alert_id = cursor.lastrowid
-            conn.commit()
-        finally:
-            conn.close()
+        Returns:
+            The stored alerts
+        """
+        for alert in alerts:
+            alert.alert_id = self.store.next_id("alerts")
+        self.store.executemany(_INSERT_ALERT, [self._alert_row(alert) for alert in alerts])
+        return alerts
+    
+    def _alert_row(self, alert: Alert) -> tuple:
+        """Convert an alert to a row of the alerts table."""
+        return (
+            alert.alert_id,
+            alert.type.value,
+            alert.severity.name,
+            alert.title,
+            alert.message,
+            str(alert.file_path) if alert.file_path else None,
+            alert.line_number,
+            json.dumps(alert.context) if alert.context else None,
+            alert.timestamp.isoformat() if alert.timestamp else None,
+            alert.resolved,
+            alert.resolved_at.isoformat() if alert.resolved_at else None
+        )
     
     def _trigger_handlers(self, alert: Alert):
         """Trigger registered handlers for alert."""
@@ -284,79 +290,65 @@ class AlertSystem:
         query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
         
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.execute(query, params)
-            alerts = []
-            
-            for row in cursor.fetchall():
-                alert = Alert(
-                    type=AlertType(row[1]),
-                    severity=AlertSeverity[row[2]],
-                    title=row[3],
-                    message=row[4],
-                    file_path=Path(row[5]) if row[5] else None,
-                    line_number=row[6],
-                    context=json.loads(row[7]) if row[7] else {},
-                    timestamp=datetime.fromisoformat(row[8]) if row[8] else None,
-                    resolved=bool(row[9]),
-                    resolved_at=datetime.fromisoformat(row[10]) if row[10] else None,
-                    alert_id=row[0]
-                )
-                alerts.append(alert)
-            
-            return alerts
-        finally:
-            conn.close()
+        alerts = []
+        for row in self.store.query(query, params):
+            alert = Alert(
+                type=AlertType(row[1]),
+                severity=AlertSeverity[row[2]],
+                title=row[3],
+                message=row[4],
+                file_path=Path(row[5]) if row[5] else None,
+                line_number=row[6],
+                context=json.loads(row[7]) if row[7] else {},
+                timestamp=datetime.fromisoformat(row[8]) if row[8] else None,
+                resolved=bool(row[9]),
+                resolved_at=datetime.fromisoformat(row[10]) if row[10] else None,
+                alert_id=row[0]
+            )
+            alerts.append(alert)
+        
+        return alerts
     
     def resolve_alert(self, alert_id: int):
         """Mark an alert as resolved."""
         resolved_at = datetime.now()
         
-        conn = sqlite3.connect(self.db_path)
-        try:
-            conn.execute("""
-                UPDATE alerts 
-                SET resolved = 1, resolved_at = ?
-                WHERE id = ?
-            """, (resolved_at.isoformat(), alert_id))
-            conn.commit()
-        finally:
-            conn.close()
+        self.store.execute("""
+            UPDATE alerts 
+            SET resolved = 1, resolved_at = ?
+            WHERE id = ?
+        """, (resolved_at.isoformat(), alert_id))
     
     def get_alert_summary(self) -> Dict[str, Any]:
         """Get summary of current alerts."""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            # Count by type
-            cursor = conn.execute("""
-                SELECT type, COUNT(*) 
-                FROM alerts 
-                WHERE resolved = 0 
-                GROUP BY type
-            """)
-            by_type = dict(cursor.fetchall())
-            
-            # Count by severity
-            cursor = conn.execute("""
-                SELECT severity, COUNT(*) 
-                FROM alerts 
-                WHERE resolved = 0 
-                GROUP BY severity
-            """)
-            by_severity = dict(cursor.fetchall())
-            
-            # Recent alerts
-            cursor = conn.execute("""
-                SELECT COUNT(*) 
-                FROM alerts 
-                WHERE resolved = 0 
-                AND timestamp > datetime('now', '-1 hour')
-            """)
-            recent_count = cursor.fetchone()[0]
-            
-            # Files with most alerts
-            cursor = conn.execute("""
+        # Count by type
+        by_type = dict(self.store.query("""
+            SELECT type, COUNT(*) 
+            FROM alerts 
+            WHERE resolved = 0 
+            GROUP BY type
+        """))
+        
+        # Count by severity
+        by_severity = dict(self.store.query("""
+            SELECT severity, COUNT(*) 
+            FROM alerts 
+            WHERE resolved = 0 
+            GROUP BY severity
+        """))
+        
+        # Recent alerts
+        recent_count = self.store.query_one("""
+            SELECT COUNT(*) 
+            FROM alerts 
+            WHERE resolved = 0 
+            AND timestamp > datetime('now', '-1 hour')
+        """)[0]
+        
+        # Files with most alerts
+        top_files = [
+            {"file": row[0], "count": row[1]}
+            for row in self.store.query("""
                 SELECT file_path, COUNT(*) as alert_count
                 FROM alerts 
                 WHERE resolved = 0 
@@ -365,32 +357,22 @@ class AlertSystem:
                 ORDER BY alert_count DESC
                 LIMIT 5
             """)
-            top_files = [
-                {"file": row[0], "count": row[1]}
-                for row in cursor.fetchall()
-            ]
-            
-            return {
-                "by_type": by_type,
-                "by_severity": by_severity,
-                "recent_count": recent_count,
-                "top_files": top_files,
-                "total_unresolved": sum(by_type.values())
-            }
-        finally:
-            conn.close()
+        ]
+        
+        return {
+            "by_type": by_type,
+            "by_severity": by_severity,
+            "recent_count": recent_count,
+            "top_files": top_files,
+            "total_unresolved": sum(by_type.values())
+        }
     
     def cleanup_old_alerts(self, days: int = 30):
         """Clean up old resolved alerts."""
         cutoff_date = datetime.now().isoformat()
         
-        conn = sqlite3.connect(self.db_path)
-        try:
-            conn.execute("""
-                DELETE FROM alerts 
-                WHERE resolved = 1 
-                AND resolved_at < datetime('now', '-{} days')
-            """.format(days))
-            conn.commit()
-        finally:
-            conn.close()
\ No newline at end of file
+        self.store.execute("""
+            DELETE FROM alerts 
+            WHERE resolved = 1 
+            AND resolved_at < datetime('now', '-{} days')
+        """.format(days))
\ No newline at end of file
@@ -3,14 +3,19 @@ Core functionality for Velocitytree.
 """
 
 import os
+import json
+import errno
 import shutil
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple, Any
 import pathspec
 from rich.progress import Progress
 
-from .utils import logger, get_file_info
+from .utils import logger, calculate_file_hash
+from .discovery import FileDiscovery
+from .project_index import ProjectIndex, get_project_index
 from .constants import (
     DEFAULT_EXCLUDE_PATTERNS,
     DEFAULT_INCLUDE_EXTENSIONS,
@@ -18,6 +23,37 @@ from .constants import (
     DEFAULT_BINARY_EXTENSIONS
 )
 
+# Ways of placing a source file in the flattened output
+LINK_MODES = ('copy', 'auto', 'reflink', 'hardlink')
+
+# Manifest of previously flattened files, kept in the output directory
+FLATTEN_MANIFEST = '.flatten_manifest.json'
+MANIFEST_VERSION = 1
+
+# Linux ioctl that clones file extents (copy-on-write) on btrfs, XFS, etc.
+FICLONE = 0x40049409
+
+
+def reflink_file(src: Path, dst: Path):
+    """Create ``dst`` as a copy-on-write clone of ``src``.
+    
+    Raises:
+        OSError: If the platform or file system does not support reflinks
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported on this platform")
+    
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
 
 class TreeFlattener:
     """Flattens directory structures similar to TreeTamer functionality."""
@@ -28,14 +64,42 @@ class TreeFlattener:
         exclude_patterns: Optional[List[str]] = None,
         include_extensions: Optional[List[str]] = None,
         preserve_structure: bool = False,
-        follow_symlinks: bool = False
+        follow_symlinks: bool = False,
+        link_mode: str = 'copy',
+        workers: int = 1,
+        incremental: bool = False
     ):
+        """Initialize the flattener.
+        
+        Args:
+            output_dir: Directory receiving the flattened files
+            exclude_patterns: Patterns in .gitignore syntax to skip
+            include_extensions: Extensions or file names to include
+            preserve_structure: Keep relative paths instead of flat names
+            follow_symlinks: Include symlinked files and directories
+            link_mode: How files are placed: ``copy``; ``reflink`` or
+                ``auto`` for copy-on-write clones where the file system
+                supports them, falling back to copying; ``hardlink`` to
+                share the source inode (edits to the output then change
+                the source too). Links are only made within one file system.
+            workers: Number of threads placing files concurrently
+            incremental: Skip files unchanged since the last run, based on a
+                manifest of size, mtime and content hash, and remove output
+                for files that no longer exist
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode}")
+        
         self.output_dir = Path(output_dir or "tamed_tree")
         self.exclude_patterns = exclude_patterns or DEFAULT_EXCLUDE_PATTERNS
         self.include_extensions = include_extensions or DEFAULT_INCLUDE_EXTENSIONS
         self.preserve_structure = preserve_structure
         self.follow_symlinks = follow_symlinks
+        self.link_mode = link_mode
+        self.workers = max(1, workers)
+        self.incremental = incremental
         self.processed_files: Set[str] = set()
+        self._reflink_supported = True
         
         # Initialize pathspec for exclusion patterns
         self._init_pathspec()
@@ -46,11 +110,11 @@ class TreeFlattener:
         self.exclude_spec = pathspec.PathSpec.from_lines('gitwildmatch', patterns)
     
     def _should_process_file(self, path: Path) -> bool:
-        """Determine if a file should be processed."""
-        # Check if file exists
-        if not path.exists():
-            return False
-            
+        """Determine if a file should be processed.
+        
+        Exclusion patterns are applied during discovery, which prunes
+        excluded directories instead of checking every path below them.
+        """
         # Check symlinks
         if path.is_symlink() and not self.follow_symlinks:
             return False
@@ -59,17 +123,33 @@ class TreeFlattener:
         if path.suffix.lower() in DEFAULT_BINARY_EXTENSIONS:
             return False
             
-        # Check if file matches exclusion patterns
-        if self.exclude_spec.match_file(str(path)):
-            return False
-            
         # Check include extensions
         if self.include_extensions:
-            if path.suffix.lower() not in self.include_extensions:
+            if path.suffix.lower() not in self.include_extensions and path.name not in self.include_extensions:
                 return False
                 
         return True
     
+    def _discover_files(self, source_dir: Path):
+        """Find candidate files, skipping excluded and ignored directories."""
+        exclude_patterns = self.exclude_patterns + DEFAULT_EXCLUDE_PATTERNS
+        
+        # Never pick up earlier output when it lives inside the source tree
+        try:
+            output_rel = self.output_dir.resolve().relative_to(source_dir.resolve())
+            if output_rel.parts:
+                exclude_patterns = exclude_patterns + [f"/{output_rel.as_posix()}/"]
+        except ValueError:
+            pass
+        
+        discovery = FileDiscovery(
+            source_dir,
+            exclude_patterns=exclude_patterns,
+            follow_symlinks=self.follow_symlinks
+        )
+        for path, _ in discovery.iter_entries():
+            yield path
+    
     def _get_flat_filename(self, path: Path, root_dir: Path) -> str:
         """Generate a flattened filename from a path."""
         relative_path = path.relative_to(root_dir)
@@ -101,39 +181,163 @@ class TreeFlattener:
         stats = {
             'files_processed': 0,
             'files_skipped': 0,
+            'files_unchanged': 0,
+            'files_linked': 0,
+            'files_removed': 0,
             'total_size': 0,
             'output_dir': str(self.output_dir)
         }
         
-        # Process files
-        for path in source_dir.rglob('*'):
-            if path.is_file() and self._should_process_file(path):
+        previous = self._load_manifest(source_dir) if self.incremental else {}
+        output_device = self.output_dir.stat().st_dev
+        
+        # Names are assigned in discovery order so collisions resolve the
+        # same way on every run; only the file placement runs in parallel
+        tasks = []
+        for path in self._discover_files(source_dir):
+            if self._should_process_file(path):
                 flat_name = self._get_flat_filename(path, source_dir)
-                output_path = self.output_dir / flat_name
-                
-                try:
-                    # Create parent directories if preserving structure
-                    if self.preserve_structure:
-                        output_path.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Copy file
-                    shutil.copy2(path, output_path)
-                    self.processed_files.add(flat_name)
-                    
-                    stats['files_processed'] += 1
-                    stats['total_size'] += path.stat().st_size
-                    
-                    logger.debug(f"Processed: {path} -> {output_path}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing {path}: {e}")
-                    stats['files_skipped'] += 1
+                self.processed_files.add(flat_name)
+                tasks.append((path, flat_name))
+        
+        def place(task: Tuple[Path, str]):
+            path, flat_name = task
+            try:
+                return task, self._place_file(
+                    path, self.output_dir / flat_name, previous.get(flat_name), output_device
+                ), None
+            except Exception as e:
+                return task, None, e
+        
+        if self.workers > 1 and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(place, tasks))
+        else:
+            results = [place(task) for task in tasks]
+        
+        manifest = {}
+        for (path, flat_name), result, error in results:
+            if error is not None:
+                logger.error(f"Error processing {path}: {error}")
+                stats['files_skipped'] += 1
+                continue
+            
+            method, entry = result
+            manifest[flat_name] = entry
+            stats['files_processed'] += 1
+            stats['total_size'] += entry['size']
+            if method == 'unchanged':
+                stats['files_unchanged'] += 1
+            elif method in ('reflink', 'hardlink'):
+                stats['files_linked'] += 1
+            logger.debug(f"Processed ({method}): {path} -> {self.output_dir / flat_name}")
+        
+        if self.incremental:
+            stats['files_removed'] = self._remove_stale(previous, manifest)
+            self._save_manifest(source_dir, manifest)
         
         # Generate structure file if tree command is available
         self._generate_structure_file(source_dir)
         
         return stats
     
+    def _place_file(self, path: Path, output_path: Path,
+                    previous: Optional[Dict[str, Any]],
+                    output_device: int) -> Tuple[str, Dict[str, Any]]:
+        """Copy or link one file into the output unless it is unchanged.
+        
+        Returns:
+            The method used ('unchanged', 'copy', 'reflink' or 'hardlink')
+            and the manifest entry for the file
+        """
+        stat = path.stat()
+        entry = {
+            'source': str(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': None
+        }
+        
+        if (previous and previous.get('source') == entry['source']
+                and previous.get('size') == stat.st_size and output_path.exists()):
+            if previous.get('mtime_ns') == stat.st_mtime_ns:
+                entry['hash'] = previous.get('hash')
+                return 'unchanged', entry
+            
+            # Touched but possibly identical: compare content before copying
+            digest = calculate_file_hash(path, 'sha256')
+            if digest and digest == (previous.get('hash') or calculate_file_hash(output_path, 'sha256')):
+                entry['hash'] = digest
+                return 'unchanged', entry
+        
+        # Create parent directories if preserving structure
+        if self.preserve_structure:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Never write through an earlier hardlink into its source
+        if output_path.is_symlink() or output_path.exists():
+            output_path.unlink()
+        
+        same_device = stat.st_dev == output_device
+        if same_device and self.link_mode == 'hardlink':
+            os.link(path, output_path)
+            return 'hardlink', entry
+        
+        if same_device and self.link_mode in ('auto', 'reflink') and self._reflink_supported:
+            try:
+                reflink_file(path, output_path)
+                return 'reflink', entry
+            except OSError as e:
+                if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS):
+                    # The file system cannot clone; stop trying for this run
+                    self._reflink_supported = False
+                else:
+                    raise
+        
+        shutil.copy2(path, output_path)
+        return 'copy', entry
+    
+    def _manifest_key(self, source_dir: Path) -> Dict[str, Any]:
+        """Settings a manifest must match to be reused."""
+        return {
+            'version': MANIFEST_VERSION,
+            'source': str(source_dir.resolve()),
+            'preserve_structure': self.preserve_structure
+        }
+    
+    def _load_manifest(self, source_dir: Path) -> Dict[str, Dict[str, Any]]:
+        """Load the entries of the previous run's manifest, if compatible."""
+        manifest_path = self.output_dir / FLATTEN_MANIFEST
+        try:
+            data = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        
+        if data.get('key') != self._manifest_key(source_dir):
+            return {}
+        return data.get('files', {})
+    
+    def _save_manifest(self, source_dir: Path, files: Dict[str, Dict[str, Any]]):
+        """Write the manifest for the next incremental run."""
+        manifest_path = self.output_dir / FLATTEN_MANIFEST
+        tmp_path = manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'key': self._manifest_key(source_dir), 'files': files}))
+        os.replace(tmp_path, manifest_path)
+    
+    def _remove_stale(self, previous: Dict[str, Dict[str, Any]],
+                      current: Dict[str, Dict[str, Any]]) -> int:
+        """Delete output files whose sources were removed or excluded."""
+        removed = 0
+        for flat_name in previous.keys() - current.keys():
+            try:
+                (self.output_dir / flat_name).unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove stale output {flat_name}: {e}")
+        return removed
+    
     def _generate_structure_file(self, source_dir: Path):
         """Generate a file containing the original directory structure."""
         structure_file = self.output_dir / 'original_structure.txt'
@@ -157,9 +361,26 @@ class TreeFlattener:
 class ContextManager:
     """Manages project context for AI integration and documentation."""
     
-    def __init__(self, project_root: Optional[Path] = None):
+    def __init__(self, project_root: Optional[Path] = None,
+                 index: Optional[ProjectIndex] = None):
+        """Initialize the context manager.
+        
+        Args:
+            project_root: Root directory of the project
+            index: Project index to use, defaults to the shared persistent
+                index for the project root
+        """
         self.project_root = Path(project_root or os.getcwd())
         self.context_data = {}
+        self._index = index
+    
+    @property
+    def index(self) -> ProjectIndex:
+        """Project index, refreshed before each use."""
+        if self._index is None:
+            self._index = get_project_index(self.project_root, refresh=False)
+        self._index.refresh()
+        return self._index
     
     def generate_context(
         self,
@@ -176,60 +397,63 @@ class ContextManager:
             'context_version': '1.0'
         }
         
+        # One refresh serves every section below
+        index = self.index
+        
         if include_structure:
-            context['structure'] = self._get_project_structure()
+            context['structure'] = self._get_project_structure(index)
         
         if include_code:
-            context['code_summary'] = self._get_code_summary()
+            context['code_summary'] = self._get_code_summary(index)
         
         if include_docs:
-            context['documentation'] = self._get_documentation()
+            context['documentation'] = self._get_documentation(index)
         
         if ai_ready:
             context = self._format_for_ai(context)
         
         return context
     
-    def _get_project_structure(self) -> Dict[str, any]:
+    def _get_project_structure(self, index: Optional[ProjectIndex] = None) -> Dict[str, any]:
         """Get project directory structure."""
+        index = index or self.index
+        native = (lambda p: p) if os.sep == '/' else (lambda p: p.replace('/', os.sep))
         structure = {
-            'directories': [],
+            'directories': [native(d) for d in index.directories()],
             'files': [],
             'total_size': 0
         }
         
-        for path in self.project_root.rglob('*'):
-            if path.is_dir():
-                structure['directories'].append(str(path.relative_to(self.project_root)))
-            else:
-                file_info = get_file_info(path)
-                structure['files'].append({
-                    'path': str(path.relative_to(self.project_root)),
-                    'size': file_info['size'],
-                    'extension': file_info['extension']
-                })
-                structure['total_size'] += file_info['size']
+        for entry in index.files():
+            structure['files'].append({
+                'path': native(entry.path),
+                'size': entry.size,
+                'extension': entry.extension
+            })
+            structure['total_size'] += entry.size
         
         return structure
     
-    def _get_code_summary(self) -> Dict[str, any]:
+    def _get_code_summary(self, index: Optional[ProjectIndex] = None) -> Dict[str, any]:
         """Generate code summary statistics."""
+        index = index or self.index
         summary = {
             'languages': {},
             'total_lines': 0,
             'total_files': 0
         }
         
-        # Count lines and files by language
-        for ext in ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs']:
-            count = 0
-            lines = 0
-            
-            for path in self.project_root.rglob(f'*{ext}'):
-                if path.is_file():
-                    count += 1
-                    lines += len(path.read_text().splitlines())
-            
+        # Count lines and files by language from the index
+        extensions = ['.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs']
+        counts = {ext: [0, 0] for ext in extensions}
+        
+        for entry in index.files():
+            if entry.extension in counts:
+                counts[entry.extension][0] += 1
+                counts[entry.extension][1] += entry.lines
+        
+        for ext in extensions:
+            count, lines = counts[ext]
             if count > 0:
                 summary['languages'][ext] = {
                     'files': count,
@@ -240,8 +464,9 @@ class ContextManager:
         
         return summary
     
-    def _get_documentation(self) -> Dict[str, any]:
+    def _get_documentation(self, index: Optional[ProjectIndex] = None) -> Dict[str, any]:
         """Extract documentation from the project."""
+        index = index or self.index
         docs = {
             'readme': None,
             'license': None,
@@ -264,12 +489,11 @@ class ContextManager:
                 break
         
         # Find other documentation
-        docs_dir = self.project_root / 'docs'
-        if docs_dir.exists():
-            for doc_file in docs_dir.rglob('*.md'):
+        for entry in index.files():
+            if entry.path.startswith('docs/') and entry.extension == '.md':
                 docs['guides'].append({
-                    'name': doc_file.name,
-                    'path': str(doc_file.relative_to(self.project_root))
+                    'name': entry.path.rsplit('/', 1)[-1],
+                    'path': str(Path(entry.path))
                 })
         
         return docs
@@ -0,0 +1,408 @@
+"""
+Fast, gitignore-aware file discovery shared by all subsystems.
+"""
+
+import fnmatch
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import pathspec
+
+from .utils import logger, parse_gitignore
+from .constants import DISCOVERY_SKIP_DIRS
+
+
+_GLOB_CHARS = re.compile(r'[*?\[]')
+
+
+class IgnoreRules:
+    """Compiled gitwildmatch ignore patterns anchored at a base directory.
+    
+    Plain names (``node_modules``, ``build/``) and extension globs
+    (``*.pyc``) are checked with set lookups; only the remaining patterns
+    go through pathspec. Pattern sets with negations are matched entirely
+    by pathspec so that their ordering semantics are preserved.
+    """
+    
+    def __init__(self, patterns: Iterable[str], base: str = ''):
+        """Compile ignore patterns.
+        
+        Args:
+            patterns: Lines in .gitignore syntax
+            base: Directory the patterns are relative to, as a '/'-separated
+                path relative to the discovery root ('' for the root)
+        """
+        self.base = base
+        self.names: Set[str] = set()
+        self.dir_names: Set[str] = set()
+        self.suffixes: Tuple[str, ...] = ()
+        
+        lines = [p.strip() for p in patterns if p.strip() and not p.strip().startswith('#')]
+        if any(line.startswith('!') for line in lines):
+            complex_lines = lines
+        else:
+            complex_lines = []
+            suffixes = []
+            for line in lines:
+                name = line[:-1] if line.endswith('/') else line
+                if '/' in name or '\\' in name:
+                    complex_lines.append(line)
+                elif not _GLOB_CHARS.search(name):
+                    (self.dir_names if line.endswith('/') else self.names).add(name)
+                elif (name.startswith('*') and not _GLOB_CHARS.search(name[1:])
+                      and not line.endswith('/')):
+                    suffixes.append(name[1:])
+                else:
+                    complex_lines.append(line)
+            self.suffixes = tuple(suffixes)
+        
+        self.spec = pathspec.PathSpec.from_lines('gitwildmatch', complex_lines) if complex_lines else None
+    
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        """Check whether a path is ignored.
+        
+        Args:
+            rel_path: '/'-separated path relative to the discovery root
+            name: Final path component
+            is_dir: Whether the path is a directory
+        """
+        if name in self.names or (is_dir and name in self.dir_names):
+            return True
+        if self.suffixes and name.endswith(self.suffixes):
+            return True
+        if self.spec is None:
+            return False
+        
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return self.spec.match_file(rel_path + '/' if is_dir else rel_path)
+
+
+class FileMatcher:
+    """Matches file names against extensions, exact names and globs in one check.
+    
+    Entries like ``*.py`` and ``.py`` select by extension, entries without
+    wildcards (``Dockerfile``, ``.env``) select by exact name, and other
+    globs are combined into a single regex.
+    """
+    
+    def __init__(self, patterns: Optional[Iterable[str]] = None):
+        """Compile file patterns; no patterns matches every file."""
+        self.match_all = patterns is None
+        self.suffixes: Set[str] = set()
+        self.names: Set[str] = set()
+        globs = []
+        
+        for pattern in patterns or ():
+            if pattern.startswith('*.') and not _GLOB_CHARS.search(pattern[2:]):
+                self.suffixes.add(pattern[1:].lower())
+            elif not _GLOB_CHARS.search(pattern):
+                self.names.add(pattern)
+                if pattern.startswith('.') and pattern.count('.') == 1:
+                    self.suffixes.add(pattern.lower())
+            else:
+                globs.append(fnmatch.translate(pattern))
+        
+        self.glob = re.compile('|'.join(globs)) if globs else None
+    
+    def __call__(self, name: str) -> bool:
+        """Check whether a file name is selected."""
+        if self.match_all or name in self.names:
+            return True
+        dot = name.rfind('.')
+        if dot > 0 and name[dot:].lower() in self.suffixes:
+            return True
+        return bool(self.glob and self.glob.match(name))
+
+
+class FileDiscovery:
+    """Finds project files in a single pruned walk of the tree.
+    
+    Ignored directories (``.gitignore`` rules, explicit exclude patterns and
+    well-known dependency/cache directories) are pruned before they are
+    entered, and all file patterns are matched in the same pass. When
+    ``use_git`` is set and the root is inside a git work tree, the file list
+    comes from ``git ls-files`` instead of walking the file system.
+    """
+    
+    def __init__(
+        self,
+        root: Union[str, Path],
+        exclude_patterns: Optional[List[str]] = None,
+        use_gitignore: bool = True,
+        use_git: bool = False,
+        follow_symlinks: bool = False,
+        skip_dirs: Optional[Iterable[str]] = None
+    ):
+        """Initialize file discovery.
+        
+        Args:
+            root: Directory to search
+            exclude_patterns: Additional patterns in .gitignore syntax
+            use_gitignore: Honor .gitignore files in and above the root
+            use_git: List files with ``git ls-files`` when possible
+            follow_symlinks: Descend into symlinked directories
+            skip_dirs: Directory names never entered, defaults to
+                DISCOVERY_SKIP_DIRS
+        """
+        self.root = Path(root)
+        self.use_gitignore = use_gitignore
+        self.use_git = use_git
+        self.follow_symlinks = follow_symlinks
+        self.skip_dirs = set(DISCOVERY_SKIP_DIRS if skip_dirs is None else skip_dirs)
+        
+        self._base_rules: List[IgnoreRules] = []
+        if exclude_patterns:
+            self._base_rules.append(IgnoreRules(exclude_patterns))
+        if use_gitignore:
+            self._base_rules.extend(self._parent_gitignores())
+        # Base rules plus the root's .gitignore, loaded by is_ignored
+        self._root_rules: Optional[List[IgnoreRules]] = None
+    
+    def _parent_gitignores(self) -> List[IgnoreRules]:
+        """Load .gitignore files from the enclosing work tree above the root.
+        
+        Patterns from parent directories are re-anchored at the root where
+        possible, so running on a subdirectory honors the project's rules.
+        """
+        root = self.root.resolve()
+        if (root / '.git').exists():
+            return []
+        
+        parents = []
+        for parent in root.parents:
+            parents.append(parent)
+            if (parent / '.git').exists():
+                break
+        else:
+            return []
+        
+        rules = []
+        for parent in reversed(parents):
+            gitignore = parent / '.gitignore'
+            if not gitignore.is_file():
+                continue
+            prefix = root.relative_to(parent).as_posix()
+            patterns = []
+            for line in parse_gitignore(gitignore):
+                negated = line.startswith('!')
+                body = line[1:] if negated else line
+                anchored = '/' in body.rstrip('/')
+                if not anchored:
+                    patterns.append(line)
+                elif body.lstrip('/').startswith(prefix + '/'):
+                    # Pattern below the root: strip the path down to it
+                    patterns.append(('!' if negated else '') + '/' + body.lstrip('/')[len(prefix) + 1:])
+            if patterns:
+                rules.append(IgnoreRules(patterns))
+        return rules
+    
+    def iter_entries(
+        self,
+        file_patterns: Optional[Iterable[str]] = None,
+        recursive: bool = True,
+        include_dirs: bool = False
+    ) -> Iterator[Tuple[Path, bool]]:
+        """Walk the tree, yielding selected files and, optionally, directories.
+        
+        Args:
+            file_patterns: Globs, extensions or names selecting files; all
+                files if None
+            recursive: Whether to descend into subdirectories
+            include_dirs: Also yield the directories that are entered
+        
+        Yields:
+            (path, is_dir) pairs; files are yielded in sorted order within
+            each directory
+        """
+        for path, _, is_dir in self.walk(file_patterns, recursive, include_dirs):
+            yield Path(path), is_dir
+    
+    def walk(
+        self,
+        file_patterns: Optional[Iterable[str]] = None,
+        recursive: bool = True,
+        include_dirs: bool = False
+    ) -> Iterator[Tuple[str, str, bool]]:
+        """Walk the tree without building Path objects.
+        
+        Same selection as iter_entries, for callers that visit every file
+        of large trees and only need strings.
+        
+        Yields:
+            (path, rel_path, is_dir) triples, where rel_path is '/'-separated
+            and relative to the root
+        """
+        matcher = FileMatcher(file_patterns)
+        root = str(self.root)
+        
+        if self.use_git and not include_dirs:
+            files = self._git_files()
+            if files is not None:
+                ignored_dirs = {}
+                for rel_path in files:
+                    rel_dir, _, name = rel_path.rpartition('/')
+                    if not recursive and rel_dir:
+                        continue
+                    if not matcher(name) or self._is_ignored(rel_path, self._base_rules, False):
+                        continue
+                    if rel_dir and self._dir_ignored(rel_dir, ignored_dirs):
+                        continue
+                    yield os.path.join(root, rel_path), rel_path, False
+                return
+        
+        # Stack of (directory, relative path, ignore rules in effect)
+        stack = [(root, '', self._base_rules)]
+        while stack:
+            directory, rel_dir, rules = stack.pop()
+            if self.use_gitignore:
+                gitignore = os.path.join(directory, '.gitignore')
+                if os.path.isfile(gitignore):
+                    rules = rules + [IgnoreRules(parse_gitignore(Path(gitignore)), rel_dir)]
+            
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                logger.debug(f"Cannot read directory {directory}: {e}")
+                continue
+            
+            subdirs = []
+            for entry in entries:
+                name = entry.name
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=self.follow_symlinks)
+                    if not is_dir and not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                
+                if is_dir:
+                    if name in self.skip_dirs or self._is_ignored(rel_path, rules, True):
+                        continue
+                    if include_dirs:
+                        yield entry.path, rel_path, True
+                    if recursive:
+                        subdirs.append((entry.path, rel_path, rules))
+                elif matcher(name) and not self._is_ignored(rel_path, rules, False):
+                    yield entry.path, rel_path, False
+            
+            # Reversed so that directories are visited in sorted order
+            stack.extend(reversed(subdirs))
+    
+    def find_files(
+        self,
+        file_patterns: Optional[Iterable[str]] = None,
+        recursive: bool = True
+    ) -> List[Path]:
+        """Find files matching any of the patterns, sorted by path."""
+        return sorted(path for path, _ in self.iter_entries(file_patterns, recursive))
+    
+    def is_ignored(self, path: Union[str, Path]) -> bool:
+        """Check whether a single file would be left out of a walk.
+        
+        Lets callers that learn about files one at a time, such as file
+        system watchers, apply the same exclusions without walking. Only the
+        .gitignore files of the root and its parents are consulted.
+        
+        Args:
+            path: File path, absolute or relative to the current directory
+        
+        Returns:
+            True if the file is excluded or outside the root
+        """
+        path = Path(path)
+        try:
+            rel_path = path.relative_to(self.root).as_posix()
+        except ValueError:
+            try:
+                rel_path = path.resolve().relative_to(self.root.resolve()).as_posix()
+            except ValueError:
+                return True
+        
+        if self._root_rules is None:
+            self._root_rules = list(self._base_rules)
+            gitignore = self.root / '.gitignore'
+            if self.use_gitignore and gitignore.is_file():
+                self._root_rules.append(IgnoreRules(parse_gitignore(gitignore)))
+        
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts)):
+            if parts[depth - 1] in self.skip_dirs:
+                return True
+            if self._is_ignored('/'.join(parts[:depth]), self._root_rules, True):
+                return True
+        return self._is_ignored(rel_path, self._root_rules, False)
+    
+    @staticmethod
+    def _is_ignored(rel_path: str, rules: List[IgnoreRules], is_dir: bool) -> bool:
+        """Check a path against every rule set in effect."""
+        name = rel_path.rsplit('/', 1)[-1]
+        return any(rule.matches(rel_path, name, is_dir) for rule in rules)
+    
+    def _dir_ignored(self, rel_dir: str, cache: dict) -> bool:
+        """Check whether a directory or any of its parents is excluded."""
+        if rel_dir not in cache:
+            parent, _, name = rel_dir.rpartition('/')
+            cache[rel_dir] = (
+                (bool(parent) and self._dir_ignored(parent, cache))
+                or name in self.skip_dirs
+                or self._is_ignored(rel_dir, self._base_rules, True)
+            )
+        return cache[rel_dir]
+    
+    def _git_files(self) -> Optional[List[str]]:
+        """List tracked and untracked, non-ignored files via git.
+        
+        Returns:
+            Paths relative to the root, or None if git is unavailable or
+            the root is not inside a work tree
+        """
+        try:
+            result = subprocess.run(
+                ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                cwd=self.root,
+                capture_output=True,
+                timeout=60
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.debug(f"git ls-files unavailable: {e}")
+            return None
+        if result.returncode != 0:
+            return None
+        
+        files = []
+        for raw in result.stdout.split(b'\0'):
+            if not raw:
+                continue
+            rel_path = os.fsdecode(raw)
+            # Deleted but still tracked files are listed too
+            if (self.root / rel_path).is_file():
+                files.append(rel_path)
+        return files
+
+
+def discover_files(
+    root: Union[str, Path],
+    file_patterns: Optional[Iterable[str]] = None,
+    recursive: bool = True,
+    **options
+) -> List[Path]:
+    """Find files under a root with the shared discovery rules.
+    
+    Args:
+        root: Directory to search
+        file_patterns: Globs, extensions or names selecting files
+        recursive: Whether to descend into subdirectories
+        **options: Passed to FileDiscovery
+    
+    Returns:
+        Matching files sorted by path
+    """
+    return FileDiscovery(root, **options).find_files(file_patterns, recursive)
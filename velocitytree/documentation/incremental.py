@@ -2,13 +2,22 @@
 
 import ast
 import difflib
+import glob
 import hashlib
 import json
 import os
+import re
+import threading
 import time
-from dataclasses import dataclass
+import zlib
+from array import array
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Any
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union, Any
+
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 
 from ..code_analysis.analyzer import CodeAnalyzer
 from ..code_analysis.models import (
@@ -16,6 +25,7 @@ from ..code_analysis.models import (
     ClassAnalysis,
     FunctionAnalysis,
 )
+from ..storage import get_store
 from .generator import DocGenerator
 from .models import (
     DocFormat,
@@ -24,15 +34,43 @@ from .models import (
     DocumentationResult,
     DocConfig,
     DocMetadata,
+    DocTemplate,
+    FunctionDoc,
+    ClassDoc,
 )
 from ..utils import logger
 
 
+# Files modified this recently may change again within the same mtime tick,
+# so their stat is not trusted to prove them unchanged
+RACY_STAT_WINDOW_NS = 2_000_000_000
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS doc_files (
+        path TEXT PRIMARY KEY,
+        hash TEXT NOT NULL,
+        mtime_ns INTEGER,
+        size INTEGER,
+        line_hashes BLOB,
+        elements TEXT,
+        fragments TEXT,
+        documentation TEXT,
+        timestamp REAL
+    );
+"""
+
+_UPSERT_FILE = """
+    INSERT OR REPLACE INTO doc_files
+    (path, hash, mtime_ns, size, line_hashes, elements, fragments, documentation, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 @dataclass
 class FileChange:
     """Represents a change in a file."""
     path: str
-    old_content: str
+    old_content: str  # Empty for cached files, which keep only line hashes
     new_content: str
     change_type: str  # 'added', 'modified', 'deleted'
     change_lines: List[int]
@@ -57,8 +95,299 @@ class ChangeSet:
     timestamp: float
     
 
+@dataclass
+class CachedDoc:
+    """Cached state and documentation of a single source file."""
+    path: str
+    hash: str
+    mtime_ns: Optional[int] = None  # None when the stat cannot be trusted
+    size: Optional[int] = None
+    line_hashes: List[int] = field(default_factory=list)
+    elements: Dict[str, Dict] = field(default_factory=dict)
+    fragments: Dict[str, Dict] = field(default_factory=dict)
+    documentation: str = ""
+    timestamp: float = field(default_factory=time.time)
+
+
+def _line_hashes(content: str) -> List[int]:
+    """Hash each line of a file, for diffing against later versions."""
+    return [zlib.crc32(line.encode('utf-8')) for line in content.splitlines()]
+
+
+class DocCache:
+    """Documentation cache with one SQLite row per source file.
+    
+    Rows keep the file's hash and stat for change detection, hashes of its
+    lines and its functions and classes for change analysis, and the cached
+    documentation with its per-element fragments. Updating a file writes
+    only that file's row.
+    """
+    
+    def __init__(self, db_path: Path):
+        """Open the cache.
+        
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = db_path
+        self.store = get_store(db_path)
+        self.store.executescript(_SCHEMA)
+    
+    def __contains__(self, path: str) -> bool:
+        return self.store.query_one("SELECT 1 FROM doc_files WHERE path = ?", (path,)) is not None
+    
+    def __len__(self) -> int:
+        return self.store.query_one("SELECT COUNT(*) FROM doc_files")[0]
+    
+    def file_states(self) -> List[Tuple[str, str, Optional[int], Optional[int]]]:
+        """Get (path, hash, mtime_ns, size) of every cached file."""
+        return self.store.query("SELECT path, hash, mtime_ns, size FROM doc_files")
+    
+    def get(self, path: str) -> Optional[CachedDoc]:
+        """Get the cached entry of a file, if any."""
+        row = self.store.query_one(
+            """
+            SELECT path, hash, mtime_ns, size, line_hashes, elements, fragments, documentation, timestamp
+            FROM doc_files WHERE path = ?
+            """,
+            (path,)
+        )
+        if row is None:
+            return None
+        
+        line_hashes = array('I')
+        line_hashes.frombytes(row[4] or b'')
+        return CachedDoc(
+            path=row[0],
+            hash=row[1],
+            mtime_ns=row[2],
+            size=row[3],
+            line_hashes=line_hashes.tolist(),
+            elements=json.loads(row[5] or '{}'),
+            fragments=json.loads(row[6] or '{}'),
+            documentation=row[7] or "",
+            timestamp=row[8],
+        )
+    
+    def put(self, entry: CachedDoc):
+        """Cache a file's entry, replacing the previous one."""
+        self.store.queue_write(_UPSERT_FILE, (
+            entry.path,
+            entry.hash,
+            entry.mtime_ns,
+            entry.size,
+            array('I', entry.line_hashes).tobytes(),
+            json.dumps(entry.elements),
+            json.dumps(entry.fragments),
+            entry.documentation,
+            entry.timestamp,
+        ))
+    
+    def update_stat(self, path: str, mtime_ns: Optional[int], size: Optional[int]):
+        """Record the stat of a file whose content is unchanged."""
+        self.store.queue_write(
+            "UPDATE doc_files SET mtime_ns = ?, size = ? WHERE path = ?",
+            (mtime_ns, size, path)
+        )
+    
+    def remove(self, paths: Iterable[str]):
+        """Remove the entries of files."""
+        for path in paths:
+            self.store.queue_write("DELETE FROM doc_files WHERE path = ?", (path,))
+    
+    def clear(self):
+        """Remove every entry."""
+        self.store.execute("DELETE FROM doc_files")
+
+
+def _fragment_key(kind: str, style: DocStyle, *parts: Any) -> str:
+    """Digest of everything a documentation fragment is generated from."""
+    data = json.dumps([kind, style.value, *parts], default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class CachingDocGenerator(DocGenerator):
+    """Documentation generator that reuses the docs of unchanged elements.
+    
+    Function and class documentation is cached as fragments keyed by a
+    digest of their name, signature, docstring and style, so only the
+    elements that changed since the cached version are generated again.
+    When template selection picks a template for the module, the rendered
+    template is cached the same way, keyed by the template and the context
+    it is rendered from.
+    """
+    
+    def __init__(self, config: Optional[DocConfig] = None):
+        super().__init__(config)
+        self._cached_fragments: Dict[str, Dict] = {}
+        self._used_fragments: Dict[str, Dict] = {}
+    
+    def generate_with_fragments(
+        self,
+        source: ModuleAnalysis,
+        fragments: Dict[str, Dict],
+        format: Optional[DocFormat] = None,
+        style: Optional[DocStyle] = None,
+    ) -> Tuple[DocumentationResult, Dict[str, Dict]]:
+        """Generate module documentation, reusing cached fragments.
+        
+        Args:
+            source: Analysis of the module
+            fragments: Fragments cached for the previous version
+            format: Output format
+            style: Documentation style
+        
+        Returns:
+            The documentation and the fragments to cache for this version
+        """
+        self._cached_fragments = fragments
+        self._used_fragments = {}
+        try:
+            result = self.generate_documentation(
+                source,
+                doc_type=DocType.MODULE,
+                format=format,
+                style=style,
+            )
+            return result, self._used_fragments
+        finally:
+            self._cached_fragments = {}
+            self._used_fragments = {}
+    
+    def _generate_with_template(
+        self,
+        analysis: Union[ModuleAnalysis, ClassAnalysis, FunctionAnalysis],
+        template: DocTemplate,
+        style: DocStyle,
+    ) -> Dict[str, Any]:
+        """Render a template, or reuse the cached rendering of the same context."""
+        context = self.template_selector.get_template_context(analysis, template)
+        key = _fragment_key('template', style, template.name, template.content, context)
+        cached = self._cached_fragments.get(key)
+        if cached is not None:
+            self._used_fragments[key] = cached
+            return cached
+        
+        doc = super()._generate_with_template(analysis, template, style)
+        self._used_fragments[key] = doc
+        return doc
+    
+    def _function_key(self, func: FunctionAnalysis, style: DocStyle) -> str:
+        return _fragment_key('function', style, func.name, func.parameters, func.returns, func.docstring)
+    
+    def _generate_function_doc(self, func: FunctionAnalysis, style: DocStyle) -> FunctionDoc:
+        """Generate documentation for a function, or reuse its cached fragment."""
+        key = self._function_key(func, style)
+        cached = self._cached_fragments.get(key)
+        if cached is not None:
+            self._used_fragments[key] = cached
+            return FunctionDoc(**cached)
+        
+        doc = super()._generate_function_doc(func, style)
+        self._used_fragments[key] = asdict(doc)
+        return doc
+    
+    def _generate_class_doc(self, cls: ClassAnalysis, style: DocStyle) -> ClassDoc:
+        """Generate documentation for a class, or reuse its cached fragment."""
+        method_keys = [self._function_key(method, style) for method in cls.methods]
+        key = _fragment_key('class', style, cls.name, cls.docstring, cls.parent_classes, method_keys)
+        cached = self._cached_fragments.get(key)
+        if cached is not None:
+            self._used_fragments[key] = cached
+            # Keep the method fragments for when the class changes
+            for method_key in method_keys:
+                if method_key in self._cached_fragments:
+                    self._used_fragments[method_key] = self._cached_fragments[method_key]
+            return ClassDoc(**{
+                **cached,
+                'methods': [FunctionDoc(**method) for method in cached['methods']],
+                'class_methods': [FunctionDoc(**method) for method in cached['class_methods']],
+                'static_methods': [FunctionDoc(**method) for method in cached['static_methods']],
+            })
+        
+        doc = super()._generate_class_doc(cls, style)
+        self._used_fragments[key] = asdict(doc)
+        return doc
+
+
+def _glob_regex(pattern: str) -> str:
+    """Regex matching the paths a recursive glob pattern expands to."""
+    regex = []
+    for token in re.split(r'(\*\*/|\*\*|\*|\?|\[[^\]/]+\])', pattern):
+        if token == '**/':
+            regex.append('(?:[^/]*/)*')
+        elif token == '**':
+            regex.append('.*')
+        elif token == '*':
+            regex.append('[^/]*')
+        elif token == '?':
+            regex.append('[^/]')
+        elif token.startswith('[') and len(token) > 2:
+            regex.append('[^' + token[2:] if token.startswith('[!') else token)
+        else:
+            regex.append(re.escape(token))
+    return ''.join(regex)
+
+
+def _watch_roots(patterns: List[str]) -> Dict[str, bool]:
+    """Directories to watch for glob patterns, and whether recursively."""
+    roots: Dict[str, bool] = {}
+    for pattern in patterns:
+        parts = Path(pattern).parts
+        literal = 0
+        while literal < len(parts) and not re.search(r'[*?\[]', parts[literal]):
+            literal += 1
+        
+        if literal == len(parts):
+            # A plain file path
+            directory, recursive = os.path.dirname(pattern), False
+        else:
+            directory = str(Path(*parts[:literal]))
+            recursive = '**' in pattern or literal < len(parts) - 1
+        
+        if os.path.isdir(directory):
+            roots[directory] = roots.get(directory, False) or recursive
+        else:
+            logger.warning(f"Not watching {pattern}: {directory} does not exist")
+    return roots
+
+
+class _ChangeCollector(FileSystemEventHandler):
+    """Collects the watched files that file system events report changed."""
+    
+    def __init__(self, matches: Callable[[str], bool]):
+        self.matches = matches
+        self.changed: Set[str] = set()
+        self.wakeup = threading.Event()
+        self._lock = threading.Lock()
+    
+    def on_any_event(self, event: FileSystemEvent):
+        """Handle creation, modification, deletion and move events."""
+        if event.is_directory or event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+            return
+        
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path and self.matches(path):
+                with self._lock:
+                    self.changed.add(path)
+                    self.wakeup.set()
+    
+    def take(self) -> Set[str]:
+        """Take the files changed since the last call."""
+        with self._lock:
+            changed, self.changed = self.changed, set()
+            self.wakeup.clear()
+        return changed
+
+
 class IncrementalDocUpdater:
-    """Handle incremental documentation updates."""
+    """Handle incremental documentation updates.
+    
+    Files are compared with the cache by size and modification time first,
+    and only hashed when those differ. Changed files are documented again
+    from cached per-element fragments, and ``watch_files`` waits for file
+    system events instead of rescanning the watched files.
+    """
     
     def __init__(self, config: Optional[DocConfig] = None):
         """Initialize the incremental updater.
@@ -68,43 +397,25 @@ class IncrementalDocUpdater:
         """
         self.config = config or DocConfig()
         self.analyzer = CodeAnalyzer()
-        self.generator = DocGenerator(config)
+        self.generator = CachingDocGenerator(config)
         self.cache_dir = Path.home() / ".velocitytree" / "doc_cache"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._watch_stop = threading.Event()
+        self._watch_collector: Optional[_ChangeCollector] = None
         self._init_cache()
         
     def _init_cache(self):
         """Initialize documentation cache."""
-        self.cache_file = self.cache_dir / "doc_cache.json"
-        self.hash_file = self.cache_dir / "file_hashes.json"
-        
-        # Load existing caches
-        self.doc_cache = self._load_json(self.cache_file)
-        self.file_hashes = self._load_json(self.hash_file)
-        
-        # Create files if they don't exist
-        if not self.cache_file.exists():
-            self._save_json({}, self.cache_file)
-        if not self.hash_file.exists():
-            self._save_json({}, self.hash_file)
-        
-    def _load_json(self, file_path: Path) -> Dict:
-        """Load JSON file or return empty dict."""
-        if file_path.exists():
-            try:
-                with open(file_path, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load cache file {file_path}: {e}")
-        return {}
-        
-    def _save_json(self, data: Dict, file_path: Path):
-        """Save data to JSON file."""
-        try:
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save cache file {file_path}: {e}")
+        self.cache_file = self.cache_dir / "doc_cache.db"
+        self.doc_cache = DocCache(self.cache_file)
+        
+        # Hashes and stats of every cached file, for change detection
+        self.file_hashes: Dict[str, str] = {}
+        self.file_stats: Dict[str, Tuple[int, int]] = {}
+        for path, file_hash, mtime_ns, size in self.doc_cache.file_states():
+            self.file_hashes[path] = file_hash
+            if mtime_ns is not None:
+                self.file_stats[path] = (mtime_ns, size)
             
     def _calculate_file_hash(self, file_path: str) -> str:
         """Calculate hash of file content."""
@@ -114,66 +425,108 @@ class IncrementalDocUpdater:
         except Exception:
             return ""
             
-    def detect_changes(self, file_paths: List[str]) -> ChangeSet:
+    def _trusted_stat(self, stat: os.stat_result) -> Optional[Tuple[int, int]]:
+        """Get (mtime_ns, size) of a stat, or None if it is too recent to trust."""
+        if time.time_ns() - stat.st_mtime_ns < RACY_STAT_WINDOW_NS:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _record_stat(self, file_path: str, stat: os.stat_result):
+        """Remember the stat of a file known to match its cached hash."""
+        trusted = self._trusted_stat(stat)
+        if trusted is None:
+            self.file_stats.pop(file_path, None)
+            self.doc_cache.update_stat(file_path, None, None)
+        else:
+            self.file_stats[file_path] = trusted
+            self.doc_cache.update_stat(file_path, *trusted)
+    
+    def _is_unchanged(self, file_path: str, stat: os.stat_result) -> bool:
+        """Check whether a file still matches its cached hash.
+        
+        The file is only hashed if its size or modification time differ
+        from the recorded ones.
+        """
+        old_hash = self.file_hashes.get(file_path)
+        if old_hash is None:
+            return False
+        if self.file_stats.get(file_path) == (stat.st_mtime_ns, stat.st_size):
+            return True
+        
+        if self._calculate_file_hash(file_path) != old_hash:
+            return False
+        self._record_stat(file_path, stat)
+        return True
+    
+    def detect_changes(self, file_paths: List[str], check_deleted: bool = True) -> ChangeSet:
         """Detect changes in files since last update.
         
         Args:
             file_paths: List of file paths to check
+            check_deleted: Also report cached files missing from
+                ``file_paths`` that no longer exist
             
         Returns:
             Set of detected changes
         """
         file_changes = []
         doc_changes = []
+        missing = []
         
         for file_path in file_paths:
-            # Skip non-existent files
-            if not os.path.exists(file_path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                missing.append(file_path)
                 continue
                 
-            # Calculate current hash
-            current_hash = self._calculate_file_hash(file_path)
-            old_hash = self.file_hashes.get(file_path)
+            if self._is_unchanged(file_path, stat):
+                continue
             
-            # Check if file changed
-            if current_hash != old_hash:
-                change_type = 'added' if old_hash is None else 'modified'
+            change_type = 'added' if file_path not in self.file_hashes else 'modified'
+            cached = self.doc_cache.get(file_path)
                 
-                # Get old content from cache if available
-                old_content = ""
-                if file_path in self.doc_cache:
-                    old_content = self.doc_cache[file_path].get('content', '')
+            # Read current content
+            with open(file_path, 'r') as f:
+                new_content = f.read()
                     
-                # Read current content
-                with open(file_path, 'r') as f:
-                    new_content = f.read()
+            # Find changed lines against the cached line hashes
+            change_lines = self._changed_line_numbers(
+                cached.line_hashes if cached else [],
+                _line_hashes(new_content),
+            )
                     
-                # Find changed lines
-                change_lines = self._find_changed_lines(old_content, new_content)
-                
-                file_change = FileChange(
-                    path=file_path,
-                    old_content=old_content,
-                    new_content=new_content,
-                    change_type=change_type,
-                    change_lines=change_lines,
-                )
-                file_changes.append(file_change)
+            file_change = FileChange(
+                path=file_path,
+                old_content="",
+                new_content=new_content,
+                change_type=change_type,
+                change_lines=change_lines,
+            )
+            file_changes.append(file_change)
                 
-                # Detect documentation changes
-                doc_changes.extend(self._analyze_doc_changes(file_change))
+            # Detect documentation changes
+            doc_changes.extend(self._analyze_doc_changes(
+                file_change,
+                old_elements=cached.elements if cached else None,
+            ))
                 
         # Check for deleted files
-        for file_path in list(self.file_hashes.keys()):
-            if file_path not in file_paths and not os.path.exists(file_path):
-                file_change = FileChange(
+        if check_deleted:
+            listed = set(file_paths)
+            missing.extend(
+                file_path for file_path in self.file_hashes
+                if file_path not in listed and not os.path.exists(file_path)
+            )
+        for file_path in missing:
+            if file_path in self.file_hashes:
+                file_changes.append(FileChange(
                     path=file_path,
-                    old_content=self.doc_cache.get(file_path, {}).get('content', ''),
+                    old_content='',
                     new_content='',
                     change_type='deleted',
                     change_lines=[],
-                )
-                file_changes.append(file_change)
+                ))
                 
         return ChangeSet(
             file_changes=file_changes,
@@ -183,44 +536,51 @@ class IncrementalDocUpdater:
         
     def _find_changed_lines(self, old_content: str, new_content: str) -> List[int]:
         """Find lines that changed between versions."""
-        old_lines = old_content.splitlines()
-        new_lines = new_content.splitlines()
+        return self._changed_line_numbers(old_content.splitlines(), new_content.splitlines())
         
-        differ = difflib.unified_diff(old_lines, new_lines, lineterm='')
-        changed_lines = []
+    def _changed_line_numbers(self, old_lines: List[Any], new_lines: List[Any]) -> List[int]:
+        """Find the 1-based numbers of added or modified lines.
         
-        line_num = 0
-        for line in differ:
-            if line.startswith('@@'):
-                # Parse line numbers from diff header
-                parts = line.split()
-                if len(parts) >= 3:
-                    new_range = parts[2]
-                    if ',' in new_range:
-                        start_line = int(new_range.split(',')[0])
-                        line_num = start_line
-            elif line.startswith('+') and not line.startswith('+++'):
-                changed_lines.append(line_num)
-                line_num += 1
-            elif not line.startswith('-'):
-                line_num += 1
-                
+        Args:
+            old_lines: Lines, or line hashes, of the old version
+            new_lines: Lines, or line hashes, of the new version
+        """
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        changed_lines = []
+        for tag, _, _, start, end in matcher.get_opcodes():
+            if tag in ('replace', 'insert'):
+                changed_lines.extend(range(start + 1, end + 1))
         return changed_lines
         
-    def _analyze_doc_changes(self, file_change: FileChange) -> List[DocChange]:
-        """Analyze what documentation changes are needed."""
+    def _parse_elements(self, content: str) -> Optional[Dict[str, Dict]]:
+        """Extract functions and classes from source, or None if it does not parse."""
+        if not content:
+            return {}
+        try:
+            return self._extract_elements(ast.parse(content))
+        except (SyntaxError, ValueError):
+            return None
+    
+    def _analyze_doc_changes(
+        self,
+        file_change: FileChange,
+        old_elements: Optional[Dict[str, Dict]] = None,
+    ) -> List[DocChange]:
+        """Analyze what documentation changes are needed.
+        
+        Args:
+            file_change: Change to analyze
+            old_elements: Cached elements of the old version; parsed from
+                ``file_change.old_content`` if not given
+        """
         doc_changes = []
         
-        # Parse old and new AST
-        try:
-            old_ast = ast.parse(file_change.old_content) if file_change.old_content else None
-            new_ast = ast.parse(file_change.new_content) if file_change.new_content else None
-        except SyntaxError:
-            return doc_changes
-            
         # Find changed functions and classes
-        old_elements = self._extract_elements(old_ast) if old_ast else {}
-        new_elements = self._extract_elements(new_ast) if new_ast else {}
+        if old_elements is None:
+            old_elements = self._parse_elements(file_change.old_content)
+        new_elements = self._parse_elements(file_change.new_content)
+        if old_elements is None or new_elements is None:
+            return doc_changes
         
         # Check for added/modified/deleted elements
         all_keys = set(old_elements.keys()) | set(new_elements.keys())
@@ -332,149 +692,59 @@ class IncrementalDocUpdater:
             if file_change.change_type == 'deleted':
                 # Remove from cache
                 self.file_hashes.pop(file_path, None)
-                self.doc_cache.pop(file_path, None)
+                self.file_stats.pop(file_path, None)
+                self.doc_cache.remove([file_path])
                 continue
                 
-            # Check if only specific elements changed
-            relevant_doc_changes = [
-                dc for dc in change_set.doc_changes 
-                if dc.location.startswith(file_path)
-            ]
-            
-            if relevant_doc_changes and self._can_update_incrementally(relevant_doc_changes):
-                # Update only changed elements
-                result = self._update_elements(
-                    file_path,
-                    relevant_doc_changes,
-                    doc_format,
-                    style,
-                )
-            else:
-                # Regenerate full documentation
-                result = self.generator.generate_documentation(
-                    file_path,
-                    format=doc_format,
-                    style=style,
-                )
-                
-            results[file_path] = result
-            
-            # Update cache
-            self.file_hashes[file_path] = self._calculate_file_hash(file_path)
-            self.doc_cache[file_path] = {
-                'content': file_change.new_content,
-                'documentation': result.content,
-                'timestamp': time.time(),
-            }
-            
-        # Save caches
-        self._save_json(self.file_hashes, self.hash_file)
-        self._save_json(self.doc_cache, self.cache_file)
+            results[file_path] = self._document_file(file_path, doc_format, style)
         
         return results
         
-    def _can_update_incrementally(self, doc_changes: List[DocChange]) -> bool:
-        """Check if changes can be updated incrementally."""
-        # Can update incrementally if:
-        # 1. Only functions/methods changed (not module-level changes)
-        # 2. No structural changes (only docstring/signature changes)
-        
-        for change in doc_changes:
-            if change.element_type == 'module':
-                return False
-            if change.change_type in ['added', 'deleted']:
-                # Structural changes require full regeneration
-                return False
-                
-        return True
-        
-    def _update_elements(
+    def _document_file(
         self,
         file_path: str,
-        doc_changes: List[DocChange],
         doc_format: Optional[DocFormat],
         style: Optional[DocStyle],
     ) -> DocumentationResult:
-        """Update specific elements in documentation."""
-        # Get current analysis
+        """Document a file from its cached fragments and cache the result."""
+        # Stat before reading, so that a write racing with the update
+        # leaves a newer stat behind and is picked up by the next check
+        stat = os.stat(file_path)
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        content = data.decode('utf-8', errors='replace')
+        
         analysis = self.analyzer.analyze_file(file_path)
         if not analysis:
             raise ValueError(f"Could not analyze file: {file_path}")
             
-        # Get cached documentation or generate new
-        cached_doc = self.doc_cache.get(file_path, {}).get('documentation')
-        if not cached_doc:
-            return self.generator.generate_documentation(
-                file_path,
-                format=doc_format,
-                style=style,
-            )
-            
-        # Apply incremental updates
-        updated_content = cached_doc
-        
-        for change in doc_changes:
-            if change.change_type == 'modified':
-                # Find and update the specific element in the documentation
-                updated_content = self._replace_element_documentation(
-                    updated_content,
-                    change.element,
-                    change.new_doc,
-                    analysis,
-                    style,
-                )
-                
-        # Create updated result
-        return DocumentationResult(
-            content=updated_content,
-            format=doc_format or self.config.format,
-            metadata=self.generator._get_metadata(analysis, DocType.MODULE),
-            sections=[],  # Would need to parse sections from content
-            issues=[],    # Would need to re-check quality
-            quality_score=90.0,  # Placeholder
-            completeness_score=95.0,  # Placeholder
-            generation_time=0.1,  # Incremental update is fast
+        cached = self.doc_cache.get(file_path)
+        result, fragments = self.generator.generate_with_fragments(
+            analysis,
+            cached.fragments if cached else {},
+            format=doc_format,
+            style=style,
         )
         
-    def _replace_element_documentation(
-        self,
-        content: str,
-        element_name: str,
-        new_docstring: Optional[str],
-        analysis: ModuleAnalysis,
-        style: Optional[DocStyle],
-    ) -> str:
-        """Replace documentation for a specific element."""
-        # This is a simplified implementation
-        # In practice, would need to parse the documentation format
-        # and update the specific section
-        
-        lines = content.split('\n')
-        updated_lines = []
-        in_element = False
-        element_pattern = f"### `{element_name}"  # Markdown format
-        
-        for i, line in enumerate(lines):
-            if element_pattern in line:
-                in_element = True
-                updated_lines.append(line)
-                # Skip to description
-                while i < len(lines) - 1 and lines[i + 1].strip():
-                    i += 1
-                    if not lines[i].startswith('#'):
-                        break
-                # Replace description
-                if new_docstring:
-                    updated_lines.append(new_docstring.split('\n')[0])
-                else:
-                    updated_lines.append("No description available.")
-            elif in_element and line.startswith('###'):
-                in_element = False
-                updated_lines.append(line)
-            elif not in_element:
-                updated_lines.append(line)
-                
-        return '\n'.join(updated_lines)
+        # Update cache
+        entry = CachedDoc(
+            path=file_path,
+            hash=hashlib.sha256(data).hexdigest(),
+            line_hashes=_line_hashes(content),
+            elements=self._parse_elements(content) or {},
+            fragments=fragments,
+            documentation=result.content,
+        )
+        trusted = self._trusted_stat(stat)
+        if trusted is not None:
+            entry.mtime_ns, entry.size = trusted
+            self.file_stats[file_path] = trusted
+        else:
+            self.file_stats.pop(file_path, None)
+        self.file_hashes[file_path] = entry.hash
+        self.doc_cache.put(entry)
+        
+        return result
         
     def watch_files(
         self,
@@ -484,42 +754,90 @@ class IncrementalDocUpdater:
     ):
         """Watch files for changes and update documentation.
         
+        Matching files are checked once, then only when file system events
+        report them changed, so an idle watch does no work. If events are
+        unavailable, e.g. because the inotify watch limit is reached, the
+        watched directories are polled for stat changes instead.
+        
         Args:
             file_patterns: List of file patterns to watch
             callback: Optional callback for updates
-            interval: Check interval in seconds
+            interval: Seconds to collect further changes after the first
+                one, so that bursts of saves are handled together
         """
-        import glob
+        patterns = [os.path.abspath(pattern) for pattern in file_patterns]
+        matcher = re.compile('|'.join(f'(?:{_glob_regex(pattern)})' for pattern in patterns))
+        collector = _ChangeCollector(lambda path: matcher.fullmatch(path) is not None)
         
         logger.info(f"Watching files matching patterns: {file_patterns}")
         
+        self._watch_stop.clear()
+        self._watch_collector = collector
+        observer = self._start_observer(collector, patterns, interval)
+        
         try:
-            while True:
-                # Expand patterns to file paths
-                file_paths = []
-                for pattern in file_patterns:
-                    file_paths.extend(glob.glob(pattern, recursive=True))
+            # Expand patterns to file paths once; events report later changes
+            file_paths = sorted({
+                path
+                for pattern in patterns
+                for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path)
+            })
+            self._apply_changes(self.detect_changes(file_paths), callback)
                     
-                # Detect changes
-                change_set = self.detect_changes(file_paths)
+            while not self._watch_stop.is_set():
+                collector.wakeup.wait()
+                if self._watch_stop.wait(interval):
+                    break
                 
-                if change_set.file_changes or change_set.doc_changes:
-                    logger.info(f"Detected {len(change_set.file_changes)} file changes")
-                    
-                    # Update documentation
-                    results = self.update_documentation(change_set)
-                    
-                    # Call callback if provided
-                    if callback:
-                        callback(results, change_set)
-                    else:
-                        for file_path, result in results.items():
-                            logger.info(f"Updated documentation for {file_path}")
-                            
-                time.sleep(interval)
+                changed = sorted(collector.take())
+                self._apply_changes(self.detect_changes(changed, check_deleted=False), callback)
                 
         except KeyboardInterrupt:
             logger.info("Stopped watching files")
+        finally:
+            observer.stop()
+            observer.join(timeout=10)
+            self._watch_collector = None
+    
+    def _start_observer(self, collector: _ChangeCollector, patterns: List[str], interval: float):
+        """Start delivering file system events for the watched patterns."""
+        roots = _watch_roots(patterns)
+        try:
+            observer = Observer()
+            for directory, recursive in roots.items():
+                observer.schedule(collector, directory, recursive=recursive)
+            observer.start()
+        except Exception as e:
+            logger.warning(f"File system events unavailable, polling for changes: {e}")
+            observer = PollingObserver(timeout=interval)
+            for directory, recursive in roots.items():
+                observer.schedule(collector, directory, recursive=recursive)
+            observer.start()
+        return observer
+    
+    def _apply_changes(self, change_set: ChangeSet, callback: Optional[callable]):
+        """Update documentation for detected changes and report the results."""
+        if not (change_set.file_changes or change_set.doc_changes):
+            return
+        
+        logger.info(f"Detected {len(change_set.file_changes)} file changes")
+        
+        # Update documentation
+        results = self.update_documentation(change_set)
+        
+        # Call callback if provided
+        if callback:
+            callback(results, change_set)
+        else:
+            for file_path, result in results.items():
+                logger.info(f"Updated documentation for {file_path}")
+    
+    def stop_watching(self):
+        """Stop a running ``watch_files`` loop."""
+        self._watch_stop.set()
+        if self._watch_collector:
+            self._watch_collector.wakeup.set()
             
     def get_cached_documentation(
         self,
@@ -533,27 +851,31 @@ class IncrementalDocUpdater:
         Returns:
             Cached documentation result or None
         """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
+        # Check if file hasn't changed
+        if not self._is_unchanged(file_path, stat):
+            return None
+        
         cached = self.doc_cache.get(file_path)
-        if cached and 'documentation' in cached:
-            # Check if file hasn't changed
-            current_hash = self._calculate_file_hash(file_path)
-            cached_hash = self.file_hashes.get(file_path)
-            
-            if current_hash == cached_hash:
-                # Return cached documentation
-                return DocumentationResult(
-                    content=cached['documentation'],
-                    format=self.config.format,
-                    metadata=DocMetadata(
-                        title=Path(file_path).stem,
-                        description="Cached documentation",
-                    ),
-                    sections=[],
-                    issues=[],
-                    quality_score=100.0,
-                    completeness_score=100.0,
-                    generation_time=0.0,
-                )
+        if cached and cached.documentation:
+            # Return cached documentation
+            return DocumentationResult(
+                content=cached.documentation,
+                format=self.config.format,
+                metadata=DocMetadata(
+                    title=Path(file_path).stem,
+                    description="Cached documentation",
+                ),
+                sections=[],
+                issues=[],
+                quality_score=100.0,
+                completeness_score=100.0,
+                generation_time=0.0,
+            )
                 
         return None
         
@@ -566,13 +888,12 @@ class IncrementalDocUpdater:
         if file_paths is None:
             # Clear all caches
             self.file_hashes.clear()
+            self.file_stats.clear()
             self.doc_cache.clear()
         else:
             # Clear specific files
             for file_path in file_paths:
                 self.file_hashes.pop(file_path, None)
-                self.doc_cache.pop(file_path, None)
-                
-        # Save updated caches
-        self._save_json(self.file_hashes, self.hash_file)
-        self._save_json(self.doc_cache, self.cache_file)
\ No newline at end of file
+                self.file_stats.pop(file_path, None)
+            self.doc_cache.remove(file_paths)
+                
\ No newline at end of file
@@ -4,7 +4,6 @@ Collects user feedback on suggestions and learns to improve recommendations.
 """
 
 import json
-import sqlite3
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 from pathlib import Path
@@ -19,6 +18,7 @@ from velocitytree.realtime_suggestions import (
     CodeSuggestion, SuggestionType, Severity
 )
 from velocitytree.refactoring import RefactoringType
+from velocitytree.storage import get_store
 from velocitytree.utils import logger
 
 
@@ -117,189 +117,192 @@ class LearnedPattern:
         return True
 
 
+_INSERT_FEEDBACK = """
+    INSERT INTO feedback VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class FeedbackDatabase:
     """Database for storing feedback and learned patterns."""
     
     def __init__(self, db_path: Path):
         self.db_path = db_path
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.store = get_store(db_path)
         self._init_db()
     
     def _init_db(self):
         """Initialize database schema."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS feedback (
-                    id TEXT PRIMARY KEY,
-                    timestamp TEXT NOT NULL,
-                    user_id TEXT NOT NULL,
-                    session_id TEXT NOT NULL,
-                    suggestion_hash TEXT NOT NULL,
-                    suggestion_type TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    feedback_type TEXT NOT NULL,
-                    reasons TEXT NOT NULL,
-                    custom_reason TEXT,
-                    applied_changes TEXT,
-                    context TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    line_number INTEGER NOT NULL
-                )
-            """)
+        self.store.executescript("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                suggestion_hash TEXT NOT NULL,
+                suggestion_type TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                feedback_type TEXT NOT NULL,
+                reasons TEXT NOT NULL,
+                custom_reason TEXT,
+                applied_changes TEXT,
+                context TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                line_number INTEGER NOT NULL
+            );
             
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS learned_patterns (
-                    pattern_id TEXT PRIMARY KEY,
-                    pattern_type TEXT NOT NULL,
-                    conditions TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    confidence REAL NOT NULL,
-                    support_count INTEGER NOT NULL,
-                    last_updated TEXT NOT NULL
-                )
-            """)
+            CREATE TABLE IF NOT EXISTS learned_patterns (
+                pattern_id TEXT PRIMARY KEY,
+                pattern_type TEXT NOT NULL,
+                conditions TEXT NOT NULL,
+                action TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                support_count INTEGER NOT NULL,
+                last_updated TEXT NOT NULL
+            );
             
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS user_preferences (
-                    user_id TEXT PRIMARY KEY,
-                    preferences TEXT NOT NULL,
-                    last_updated TEXT NOT NULL
-                )
-            """)
+            CREATE TABLE IF NOT EXISTS user_preferences (
+                user_id TEXT PRIMARY KEY,
+                preferences TEXT NOT NULL,
+                last_updated TEXT NOT NULL
+            );
             
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS team_patterns (
-                    pattern_id TEXT PRIMARY KEY,
-                    pattern_data TEXT NOT NULL,
-                    team_id TEXT NOT NULL,
-                    confidence REAL NOT NULL,
-                    last_updated TEXT NOT NULL
-                )
-            """)
+            CREATE TABLE IF NOT EXISTS team_patterns (
+                pattern_id TEXT PRIMARY KEY,
+                pattern_data TEXT NOT NULL,
+                team_id TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                last_updated TEXT NOT NULL
+            );
             
-            # Create indexes
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_user ON feedback(user_id)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_type ON feedback(suggestion_type)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_hash ON feedback(suggestion_hash)")
+            -- Indexes
+            CREATE INDEX IF NOT EXISTS idx_feedback_user ON feedback(user_id);
+            CREATE INDEX IF NOT EXISTS idx_feedback_type ON feedback(suggestion_type);
+            CREATE INDEX IF NOT EXISTS idx_feedback_hash ON feedback(suggestion_hash);
+        """)
     
     def add_feedback(self, entry: FeedbackEntry):
-        """Add a feedback entry."""
-        with sqlite3.connect(self.db_path) as conn:
-            data = entry.to_dict()
-            conn.execute("""
-                INSERT INTO feedback VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                data['id'],
-                data['timestamp'],
-                data['user_id'],
-                data['session_id'],
-                data['suggestion_hash'],
-                data['suggestion_type'],
-                data['severity'],
-                data['feedback_type'],
-                json.dumps(data['reasons']),
-                data['custom_reason'],
-                data['applied_changes'],
-                json.dumps(data['context']),
-                data['file_path'],
-                data['line_number']
-            ))
+        """Queue a feedback entry for the next group commit."""
+        self.store.queue_write(_INSERT_FEEDBACK, self._feedback_row(entry))
+    
+    def add_feedback_batch(self, entries: List[FeedbackEntry]) -> int:
+        """Add many feedback entries in a single transaction.
+        
+        Returns:
+            Number of entries stored
+        """
+        return self.store.executemany(
+            _INSERT_FEEDBACK, [self._feedback_row(entry) for entry in entries]
+        )
+    
+    def _feedback_row(self, entry: FeedbackEntry) -> Tuple:
+        """Convert a feedback entry to a row of the feedback table."""
+        data = entry.to_dict()
+        return (
+            data['id'],
+            data['timestamp'],
+            data['user_id'],
+            data['session_id'],
+            data['suggestion_hash'],
+            data['suggestion_type'],
+            data['severity'],
+            data['feedback_type'],
+            json.dumps(data['reasons']),
+            data['custom_reason'],
+            data['applied_changes'],
+            json.dumps(data['context']),
+            data['file_path'],
+            data['line_number']
+        )
     
     def get_feedback_for_suggestion(self, suggestion_hash: str) -> List[FeedbackEntry]:
         """Get all feedback for a specific suggestion."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT * FROM feedback WHERE suggestion_hash = ?
-                ORDER BY timestamp DESC
-            """, (suggestion_hash,))
-            
-            entries = []
-            for row in cursor:
-                data = {
-                    'id': row[0],
-                    'timestamp': row[1],
-                    'user_id': row[2],
-                    'session_id': row[3],
-                    'suggestion_hash': row[4],
-                    'suggestion_type': row[5],
-                    'severity': row[6],
-                    'feedback_type': row[7],
-                    'reasons': json.loads(row[8]),
-                    'custom_reason': row[9],
-                    'applied_changes': row[10],
-                    'context': json.loads(row[11]),
-                    'file_path': row[12],
-                    'line_number': row[13]
-                }
-                entries.append(FeedbackEntry.from_dict(data))
-            
-            return entries
+        rows = self.store.query("""
+            SELECT * FROM feedback WHERE suggestion_hash = ?
+            ORDER BY timestamp DESC
+        """, (suggestion_hash,))
+        
+        entries = []
+        for row in rows:
+            data = {
+                'id': row[0],
+                'timestamp': row[1],
+                'user_id': row[2],
+                'session_id': row[3],
+                'suggestion_hash': row[4],
+                'suggestion_type': row[5],
+                'severity': row[6],
+                'feedback_type': row[7],
+                'reasons': json.loads(row[8]),
+                'custom_reason': row[9],
+                'applied_changes': row[10],
+                'context': json.loads(row[11]),
+                'file_path': row[12],
+                'line_number': row[13]
+            }
+            entries.append(FeedbackEntry.from_dict(data))
+        
+        return entries
     
     def add_learned_pattern(self, pattern: LearnedPattern):
         """Add or update a learned pattern."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO learned_patterns VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                pattern.pattern_id,
-                pattern.pattern_type,
-                json.dumps(pattern.conditions),
-                json.dumps(pattern.action),
-                pattern.confidence,
-                pattern.support_count,
-                pattern.last_updated.isoformat()
-            ))
+        self.store.queue_write("""
+            INSERT OR REPLACE INTO learned_patterns VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            pattern.pattern_id,
+            pattern.pattern_type,
+            json.dumps(pattern.conditions),
+            json.dumps(pattern.action),
+            pattern.confidence,
+            pattern.support_count,
+            pattern.last_updated.isoformat()
+        ))
     
     def get_learned_patterns(self, pattern_type: Optional[str] = None) -> List[LearnedPattern]:
         """Get learned patterns, optionally filtered by type."""
-        with sqlite3.connect(self.db_path) as conn:
-            if pattern_type:
-                cursor = conn.execute("""
-                    SELECT * FROM learned_patterns WHERE pattern_type = ?
-                    ORDER BY confidence DESC
-                """, (pattern_type,))
-            else:
-                cursor = conn.execute("""
-                    SELECT * FROM learned_patterns
-                    ORDER BY confidence DESC
-                """)
-            
-            patterns = []
-            for row in cursor:
-                patterns.append(LearnedPattern(
-                    pattern_id=row[0],
-                    pattern_type=row[1],
-                    conditions=json.loads(row[2]),
-                    action=json.loads(row[3]),
-                    confidence=row[4],
-                    support_count=row[5],
-                    last_updated=datetime.fromisoformat(row[6])
-                ))
-            
-            return patterns
+        if pattern_type:
+            rows = self.store.query("""
+                SELECT * FROM learned_patterns WHERE pattern_type = ?
+                ORDER BY confidence DESC
+            """, (pattern_type,))
+        else:
+            rows = self.store.query("""
+                SELECT * FROM learned_patterns
+                ORDER BY confidence DESC
+            """)
+        
+        patterns = []
+        for row in rows:
+            patterns.append(LearnedPattern(
+                pattern_id=row[0],
+                pattern_type=row[1],
+                conditions=json.loads(row[2]),
+                action=json.loads(row[3]),
+                confidence=row[4],
+                support_count=row[5],
+                last_updated=datetime.fromisoformat(row[6])
+            ))
+        
+        return patterns
     
     def update_user_preferences(self, user_id: str, preferences: Dict[str, Any]):
         """Update user preferences."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO user_preferences VALUES (?, ?, ?)
-            """, (
-                user_id,
-                json.dumps(preferences),
-                datetime.now().isoformat()
-            ))
+        self.store.queue_write("""
+            INSERT OR REPLACE INTO user_preferences VALUES (?, ?, ?)
+        """, (
+            user_id,
+            json.dumps(preferences),
+            datetime.now().isoformat()
+        ))
     
     def get_user_preferences(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user preferences."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT preferences FROM user_preferences WHERE user_id = ?
-            """, (user_id,))
-            
-            row = cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-            return None
+        row = self.store.query_one("""
+            SELECT preferences FROM user_preferences WHERE user_id = ?
+        """, (user_id,))
+        
+        if row:
+            return json.loads(row[0])
+        return None
 
 
 class FeedbackCollector:
@@ -438,53 +441,52 @@ class LearningEngine:
         patterns = []
         
         # Analyze acceptance rates by suggestion type
-        with sqlite3.connect(self.db.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT suggestion_type, feedback_type, COUNT(*) as count
-                FROM feedback
-                GROUP BY suggestion_type, feedback_type
-                HAVING count >= ?
-            """, (min_support,))
+        rows = self.db.store.query("""
+            SELECT suggestion_type, feedback_type, COUNT(*) as count
+            FROM feedback
+            GROUP BY suggestion_type, feedback_type
+            HAVING count >= ?
+        """, (min_support,))
+        
+        type_feedback = defaultdict(Counter)
+        for row in rows:
+            suggestion_type = row[0]
+            feedback_type = row[1]
+            count = row[2]
+            type_feedback[suggestion_type][feedback_type] = count
+        
+        # Create patterns for high acceptance rates
+        for sug_type, feedback_counts in type_feedback.items():
+            total = sum(feedback_counts.values())
+            accepted = feedback_counts.get(FeedbackType.ACCEPTED.value, 0)
+            rejection_rate = feedback_counts.get(FeedbackType.REJECTED.value, 0) / total
             
-            type_feedback = defaultdict(Counter)
-            for row in cursor:
-                suggestion_type = row[0]
-                feedback_type = row[1]
-                count = row[2]
-                type_feedback[suggestion_type][feedback_type] = count
-            
-            # Create patterns for high acceptance rates
-            for sug_type, feedback_counts in type_feedback.items():
-                total = sum(feedback_counts.values())
-                accepted = feedback_counts.get(FeedbackType.ACCEPTED.value, 0)
-                rejection_rate = feedback_counts.get(FeedbackType.REJECTED.value, 0) / total
-                
-                if accepted / total >= min_confidence:
-                    patterns.append(LearnedPattern(
-                        pattern_id=f"pref_{sug_type}_accepted",
-                        pattern_type="suggestion_preference",
-                        conditions={"suggestion_type": sug_type},
-                        action={
-                            "boost_priority": 1.2,
-                            "auto_suggest": True
-                        },
-                        confidence=accepted / total,
-                        support_count=accepted,
-                        last_updated=datetime.now()
-                    ))
-                elif rejection_rate >= min_confidence:
-                    patterns.append(LearnedPattern(
-                        pattern_id=f"pref_{sug_type}_rejected",
-                        pattern_type="suggestion_preference",
-                        conditions={"suggestion_type": sug_type},
-                        action={
-                            "reduce_priority": 0.5,
-                            "require_confirmation": True
-                        },
-                        confidence=rejection_rate,
-                        support_count=feedback_counts[FeedbackType.REJECTED.value],
-                        last_updated=datetime.now()
-                    ))
+            if accepted / total >= min_confidence:
+                patterns.append(LearnedPattern(
+                    pattern_id=f"pref_{sug_type}_accepted",
+                    pattern_type="suggestion_preference",
+                    conditions={"suggestion_type": sug_type},
+                    action={
+                        "boost_priority": 1.2,
+                        "auto_suggest": True
+                    },
+                    confidence=accepted / total,
+                    support_count=accepted,
+                    last_updated=datetime.now()
+                ))
+            elif rejection_rate >= min_confidence:
+                patterns.append(LearnedPattern(
+                    pattern_id=f"pref_{sug_type}_rejected",
+                    pattern_type="suggestion_preference",
+                    conditions={"suggestion_type": sug_type},
+                    action={
+                        "reduce_priority": 0.5,
+                        "require_confirmation": True
+                    },
+                    confidence=rejection_rate,
+                    support_count=feedback_counts[FeedbackType.REJECTED.value],
+                    last_updated=datetime.now()
+                ))
         
         return patterns
     
@@ -497,44 +499,43 @@ class LearningEngine:
         patterns = []
         
         # Analyze refactoring feedback
-        with sqlite3.connect(self.db.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT context, feedback_type, reasons, COUNT(*) as count
-                FROM feedback
-                WHERE suggestion_type = 'refactoring'
-                GROUP BY context, feedback_type
-                HAVING count >= ?
-            """, (min_support,))
+        rows = self.db.store.query("""
+            SELECT context, feedback_type, reasons, COUNT(*) as count
+            FROM feedback
+            WHERE suggestion_type = 'refactoring'
+            GROUP BY context, feedback_type
+            HAVING count >= ?
+        """, (min_support,))
+        
+        refactoring_patterns = defaultdict(lambda: defaultdict(int))
+        for row in rows:
+            context = json.loads(row[0])
+            feedback_type = row[1]
+            reasons = json.loads(row[2])
+            count = row[3]
             
-            refactoring_patterns = defaultdict(lambda: defaultdict(int))
-            for row in cursor:
-                context = json.loads(row[0])
-                feedback_type = row[1]
-                reasons = json.loads(row[2])
-                count = row[3]
+            if 'refactoring_type' in context:
+                ref_type = context['refactoring_type']
+                refactoring_patterns[ref_type][feedback_type] += count
                 
-                if 'refactoring_type' in context:
-                    ref_type = context['refactoring_type']
-                    refactoring_patterns[ref_type][feedback_type] += count
-                    
-                    # Look for specific reason patterns
-                    for reason in reasons:
-                        if reason == FeedbackReason.TOO_RISKY.value:
-                            patterns.append(LearnedPattern(
-                                pattern_id=f"refactor_{ref_type}_risky",
-                                pattern_type="refactoring_preference",
-                                conditions={
-                                    "refactoring_type": ref_type,
-                                    "risk_score_min": 0.7
-                                },
-                                action={
-                                    "reduce_priority": 0.3,
-                                    "add_warning": "User finds this type of refactoring risky"
-                                },
-                                confidence=0.8,
-                                support_count=count,
-                                last_updated=datetime.now()
-                            ))
+                # Look for specific reason patterns
+                for reason in reasons:
+                    if reason == FeedbackReason.TOO_RISKY.value:
+                        patterns.append(LearnedPattern(
+                            pattern_id=f"refactor_{ref_type}_risky",
+                            pattern_type="refactoring_preference",
+                            conditions={
+                                "refactoring_type": ref_type,
+                                "risk_score_min": 0.7
+                            },
+                            action={
+                                "reduce_priority": 0.3,
+                                "add_warning": "User finds this type of refactoring risky"
+                            },
+                            confidence=0.8,
+                            support_count=count,
+                            last_updated=datetime.now()
+                        ))
         
         return patterns
     
@@ -547,47 +548,46 @@ class LearningEngine:
         patterns = []
         
         # Analyze context-based patterns
-        with sqlite3.connect(self.db.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT file_path, suggestion_type, feedback_type, COUNT(*) as count
-                FROM feedback
-                GROUP BY file_path, suggestion_type, feedback_type
-                HAVING count >= ?
-            """, (min_support,))
+        rows = self.db.store.query("""
+            SELECT file_path, suggestion_type, feedback_type, COUNT(*) as count
+            FROM feedback
+            GROUP BY file_path, suggestion_type, feedback_type
+            HAVING count >= ?
+        """, (min_support,))
+        
+        file_patterns = defaultdict(lambda: defaultdict(Counter))
+        for row in rows:
+            file_path = row[0]
+            suggestion_type = row[1]
+            feedback_type = row[2]
+            count = row[3]
             
-            file_patterns = defaultdict(lambda: defaultdict(Counter))
-            for row in cursor:
-                file_path = row[0]
-                suggestion_type = row[1]
-                feedback_type = row[2]
-                count = row[3]
+            # Extract file type
+            file_ext = Path(file_path).suffix
+            file_patterns[file_ext][suggestion_type][feedback_type] = count
+        
+        # Create patterns for file type preferences
+        for file_ext, type_feedback in file_patterns.items():
+            for sug_type, feedback_counts in type_feedback.items():
+                total = sum(feedback_counts.values())
+                accepted = feedback_counts.get(FeedbackType.ACCEPTED.value, 0)
                 
-                # Extract file type
-                file_ext = Path(file_path).suffix
-                file_patterns[file_ext][suggestion_type][feedback_type] = count
-            
-            # Create patterns for file type preferences
-            for file_ext, type_feedback in file_patterns.items():
-                for sug_type, feedback_counts in type_feedback.items():
-                    total = sum(feedback_counts.values())
-                    accepted = feedback_counts.get(FeedbackType.ACCEPTED.value, 0)
-                    
-                    if total >= min_support and accepted / total >= min_confidence:
-                        patterns.append(LearnedPattern(
-                            pattern_id=f"context_{file_ext}_{sug_type}",
-                            pattern_type="context_preference",
-                            conditions={
-                                "file_extension": file_ext,
-                                "suggestion_type": sug_type
-                            },
-                            action={
-                                "boost_priority": 1.1,
-                                "confidence_multiplier": accepted / total
-                            },
-                            confidence=accepted / total,
-                            support_count=accepted,
-                            last_updated=datetime.now()
-                        ))
+                if total >= min_support and accepted / total >= min_confidence:
+                    patterns.append(LearnedPattern(
+                        pattern_id=f"context_{file_ext}_{sug_type}",
+                        pattern_type="context_preference",
+                        conditions={
+                            "file_extension": file_ext,
+                            "suggestion_type": sug_type
+                        },
+                        action={
+                            "boost_priority": 1.1,
+                            "confidence_multiplier": accepted / total
+                        },
+                        confidence=accepted / total,
+                        support_count=accepted,
+                        last_updated=datetime.now()
+                    ))
         
         return patterns
     
@@ -645,44 +645,43 @@ class LearningEngine:
     def update_user_model(self, user_id: str):
         """Update personalized model for a user."""
         # Get user's feedback history
-        with sqlite3.connect(self.db.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT suggestion_type, severity, feedback_type, reasons
-                FROM feedback
-                WHERE user_id = ?
-                ORDER BY timestamp DESC
-                LIMIT 1000
-            """, (user_id,))
-            
-            # Build user profile
-            user_profile = {
-                "preferred_types": Counter(),
-                "rejected_types": Counter(),
-                "severity_preferences": defaultdict(Counter),
-                "common_reasons": Counter()
-            }
+        rows = self.db.store.query("""
+            SELECT suggestion_type, severity, feedback_type, reasons
+            FROM feedback
+            WHERE user_id = ?
+            ORDER BY timestamp DESC
+            LIMIT 1000
+        """, (user_id,))
+        
+        # Build user profile
+        user_profile = {
+            "preferred_types": Counter(),
+            "rejected_types": Counter(),
+            "severity_preferences": defaultdict(Counter),
+            "common_reasons": Counter()
+        }
+        
+        for row in rows:
+            suggestion_type = row[0]
+            severity = row[1]
+            feedback_type = row[2]
+            reasons = json.loads(row[3])
             
-            for row in cursor:
-                suggestion_type = row[0]
-                severity = row[1]
-                feedback_type = row[2]
-                reasons = json.loads(row[3])
-                
-                if feedback_type == FeedbackType.ACCEPTED.value:
-                    user_profile["preferred_types"][suggestion_type] += 1
-                    user_profile["severity_preferences"][severity]["accepted"] += 1
-                elif feedback_type == FeedbackType.REJECTED.value:
-                    user_profile["rejected_types"][suggestion_type] += 1
-                    user_profile["severity_preferences"][severity]["rejected"] += 1
-                
-                for reason in reasons:
-                    user_profile["common_reasons"][reason] += 1
+            if feedback_type == FeedbackType.ACCEPTED.value:
+                user_profile["preferred_types"][suggestion_type] += 1
+                user_profile["severity_preferences"][severity]["accepted"] += 1
+            elif feedback_type == FeedbackType.REJECTED.value:
+                user_profile["rejected_types"][suggestion_type] += 1
+                user_profile["severity_preferences"][severity]["rejected"] += 1
             
-            # Store user preferences
-            self.db.update_user_preferences(user_id, {
-                "profile": user_profile,
-                "last_updated": datetime.now().isoformat()
-            })
+            for reason in reasons:
+                user_profile["common_reasons"][reason] += 1
+        
+        # Store user preferences
+        self.db.update_user_preferences(user_id, {
+            "profile": user_profile,
+            "last_updated": datetime.now().isoformat()
+        })
 
 
 class TeamLearningAggregator:
@@ -705,56 +704,55 @@ class TeamLearningAggregator:
         team_members = self._get_team_members(team_id)
         
         # Aggregate feedback across team
-        with sqlite3.connect(self.db.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT suggestion_type, feedback_type, COUNT(DISTINCT user_id) as users,
-                       COUNT(*) as total_count
-                FROM feedback
-                WHERE user_id IN ({})
-                GROUP BY suggestion_type, feedback_type
-                HAVING users >= ?
-            """.format(','.join('?' * len(team_members))), 
-            team_members + [int(len(team_members) * min_agreement)])
+        rows = self.db.store.query("""
+            SELECT suggestion_type, feedback_type, COUNT(DISTINCT user_id) as users,
+                   COUNT(*) as total_count
+            FROM feedback
+            WHERE user_id IN ({})
+            GROUP BY suggestion_type, feedback_type
+            HAVING users >= ?
+        """.format(','.join('?' * len(team_members))), 
+        team_members + [int(len(team_members) * min_agreement)])
+        
+        for row in rows:
+            suggestion_type = row[0]
+            feedback_type = row[1]
+            user_count = row[2]
+            total_count = row[3]
+            
+            agreement_rate = user_count / len(team_members)
             
-            for row in cursor:
-                suggestion_type = row[0]
-                feedback_type = row[1]
-                user_count = row[2]
-                total_count = row[3]
+            if agreement_rate >= min_agreement and total_count >= min_support:
+                pattern_id = f"team_{team_id}_{suggestion_type}_{feedback_type}"
                 
-                agreement_rate = user_count / len(team_members)
+                patterns.append(LearnedPattern(
+                    pattern_id=pattern_id,
+                    pattern_type="team_preference",
+                    conditions={
+                        "suggestion_type": suggestion_type,
+                        "team_id": team_id
+                    },
+                    action={
+                        "team_preference": feedback_type,
+                        "agreement_rate": agreement_rate,
+                        "apply_to_all": True
+                    },
+                    confidence=agreement_rate,
+                    support_count=total_count,
+                    last_updated=datetime.now()
+                ))
                 
-                if agreement_rate >= min_agreement and total_count >= min_support:
-                    pattern_id = f"team_{team_id}_{suggestion_type}_{feedback_type}"
-                    
-                    patterns.append(LearnedPattern(
-                        pattern_id=pattern_id,
-                        pattern_type="team_preference",
-                        conditions={
-                            "suggestion_type": suggestion_type,
-                            "team_id": team_id
-                        },
-                        action={
-                            "team_preference": feedback_type,
-                            "agreement_rate": agreement_rate,
-                            "apply_to_all": True
-                        },
-                        confidence=agreement_rate,
-                        support_count=total_count,
-                        last_updated=datetime.now()
+                # Store team pattern
+                with sqlite3.connect(self.db.db_path) as store_conn:
+                    store_self.db.store.queue_write("""
+                        INSERT OR REPLACE INTO team_patterns VALUES (?, ?, ?, ?, ?)
+                    """, (
+                        pattern_id,
+                        json.dumps(asdict(patterns[-1])),
+                        team_id,
+                        agreement_rate,
+                        datetime.now().isoformat()
                     ))
-                    
-                    # Store team pattern
-                    with sqlite3.connect(self.db.db_path) as store_conn:
-                        store_conn.execute("""
-                            INSERT OR REPLACE INTO team_patterns VALUES (?, ?, ?, ?, ?)
-                        """, (
-                            pattern_id,
-                            json.dumps(asdict(patterns[-1])),
-                            team_id,
-                            agreement_rate,
-                            datetime.now().isoformat()
-                        ))
         
         return patterns
     
@@ -766,33 +764,32 @@ class TeamLearningAggregator:
     
     def get_team_preferences(self, team_id: str) -> Dict[str, Any]:
         """Get aggregated team preferences."""
-        with sqlite3.connect(self.db.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT pattern_data FROM team_patterns
-                WHERE team_id = ?
-                ORDER BY confidence DESC
-            """, (team_id,))
-            
-            preferences = {
-                "patterns": [],
-                "consensus_areas": [],
-                "disagreement_areas": []
-            }
-            
-            for row in cursor:
-                pattern_data = json.loads(row[0])
-                preferences["patterns"].append(pattern_data)
-                
-                if pattern_data["confidence"] >= 0.8:
-                    preferences["consensus_areas"].append(
-                        pattern_data["conditions"]["suggestion_type"]
-                    )
-                elif pattern_data["confidence"] <= 0.6:
-                    preferences["disagreement_areas"].append(
-                        pattern_data["conditions"]["suggestion_type"]
-                    )
+        rows = self.db.store.query("""
+            SELECT pattern_data FROM team_patterns
+            WHERE team_id = ?
+            ORDER BY confidence DESC
+        """, (team_id,))
+        
+        preferences = {
+            "patterns": [],
+            "consensus_areas": [],
+            "disagreement_areas": []
+        }
+        
+        for row in rows:
+            pattern_data = json.loads(row[0])
+            preferences["patterns"].append(pattern_data)
             
-            return preferences
+            if pattern_data["confidence"] >= 0.8:
+                preferences["consensus_areas"].append(
+                    pattern_data["conditions"]["suggestion_type"]
+                )
+            elif pattern_data["confidence"] <= 0.6:
+                preferences["disagreement_areas"].append(
+                    pattern_data["conditions"]["suggestion_type"]
+                )
+        
+        return preferences
 
 
 class AdaptiveSuggestionEngine:
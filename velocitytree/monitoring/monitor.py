@@ -5,20 +5,29 @@ Background monitoring process for Velocitytree.
 import time
 import threading
 import json
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Set
+from typing import Dict, Any, Iterable, List, Optional, Set, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from enum import Enum
 
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+
 from ..utils import logger
+from ..discovery import FileDiscovery, FileMatcher
 from ..git_manager import GitManager
-from ..code_analysis import CodeAnalyzer
-from ..progress_tracking import ProgressTracker
+from ..code_analysis import CodeAnalyzer, CodeMetrics, IssueCategory
+from ..code_analysis.analyzer import DEFAULT_FILE_PATTERNS
+from ..code_analysis.streaming import MetricsAccumulator
 from .drift_detector import DriftDetector
 from .alert_system import AlertManager, Alert, AlertSeverity, AlertConfig
 
 
+# Files whose stat time is sampled to measure file I/O performance
+PERFORMANCE_SAMPLE_SIZE = 200
+
+
 class MonitoringStatus(Enum):
     """Status of the monitoring process."""
     IDLE = "idle"
@@ -35,6 +44,7 @@ class MonitoringConfig:
     enable_code_monitoring: bool = True
     enable_performance_monitoring: bool = True
     enable_drift_detection: bool = True
+    enable_file_watching: bool = True  # Collect changed files from file system events
     alert_threshold: int = 3  # Number of issues before alerting
     log_file: Optional[Path] = None
     metrics_file: Optional[Path] = None
@@ -65,8 +75,40 @@ class MonitoringMetrics:
         }
 
 
+@dataclass
+class FileMetrics:
+    """Cached code metrics of a single file."""
+    metrics: CodeMetrics
+    functions: int = 0
+    documented_functions: int = 0
+
+
+class DirtyFileHandler(FileSystemEventHandler):
+    """Marks files changed on disk as dirty for the next monitoring check."""
+    
+    def __init__(self, monitor: 'BackgroundMonitor'):
+        self.monitor = monitor
+    
+    def on_any_event(self, event: FileSystemEvent):
+        """Handle creation, modification, deletion and move events."""
+        if event.is_directory or event.event_type not in ('created', 'modified', 'deleted', 'moved'):
+            return
+        
+        self.monitor.mark_dirty(event.src_path)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.monitor.mark_dirty(dest_path)
+
+
 class BackgroundMonitor:
-    """Background monitoring process for code quality and project health."""
+    """Background monitoring process for code quality and project health.
+    
+    The project is walked and analyzed once when monitoring starts. After
+    that, each check only re-analyzes the files that changed since the
+    previous one, as reported by file system events and by ``git diff``
+    against the last checked commit, and project metrics are recomputed
+    from the cached per-file metrics.
+    """
     
     def __init__(self, project_path: Path, config: Optional[MonitoringConfig] = None):
         self.project_path = project_path
@@ -78,7 +120,6 @@ class BackgroundMonitor:
         # Initialize components
         self.git_manager = GitManager(project_path)
         self.code_analyzer = CodeAnalyzer()
-        self.progress_tracker = ProgressTracker()
         self.drift_detector = DriftDetector(project_path)
         
         # Initialize alert manager
@@ -92,6 +133,16 @@ class BackgroundMonitor:
         self.issues: List[Dict[str, Any]] = []
         self.baselines: Dict[str, Any] = {}
         
+        # Incremental state: known files, per-file metrics and changed files
+        self.discovery = FileDiscovery(project_path)
+        self.code_matcher = FileMatcher(DEFAULT_FILE_PATTERNS)
+        self.known_files: Set[Path] = set()
+        self.file_metrics: Dict[Path, FileMetrics] = {}
+        self.dirty_files: Set[Path] = set()
+        self.last_checked_commit: Optional[str] = None
+        self.observer = None  # watchdog Observer while monitoring
+        self._dirty_lock = threading.Lock()
+        
         # Initialize log file
         if self.config.log_file:
             self.config.log_file.parent.mkdir(parents=True, exist_ok=True)
@@ -108,6 +159,10 @@ class BackgroundMonitor:
         # Initialize baselines
         self._initialize_baselines()
         
+        # Collect changed files between checks
+        if self.config.enable_file_watching:
+            self._start_watching()
+        
         # Start monitoring thread
         self.monitor_thread = threading.Thread(target=self._monitor_loop)
         self.monitor_thread.daemon = True
@@ -127,8 +182,42 @@ class BackgroundMonitor:
         if self.monitor_thread:
             self.monitor_thread.join(timeout=10)
         
+        self._stop_watching()
+        
         logger.info("Background monitor stopped")
     
+    def mark_dirty(self, path: Union[str, Path]):
+        """Mark a file as changed so that the next check re-analyzes it.
+        
+        Args:
+            path: Path of the changed file; ignored files are skipped
+        """
+        path = Path(path)
+        if self.discovery.is_ignored(path):
+            return
+        with self._dirty_lock:
+            self.dirty_files.add(path)
+    
+    def _start_watching(self):
+        """Start feeding file system events into the dirty set."""
+        try:
+            from watchdog.observers import Observer
+            
+            self.observer = Observer()
+            self.observer.schedule(DirtyFileHandler(self), str(self.project_path), recursive=True)
+            self.observer.start()
+        except Exception as e:
+            # Changes still come from git
+            logger.warning(f"File watching unavailable: {e}")
+            self.observer = None
+    
+    def _stop_watching(self):
+        """Stop the file system observer."""
+        if self.observer:
+            self.observer.stop()
+            self.observer.join(timeout=10)
+            self.observer = None
+    
     def _monitor_loop(self):
         """Main monitoring loop running in background thread."""
         while not self.stop_event.is_set():
@@ -150,22 +239,22 @@ class BackgroundMonitor:
     def _initialize_baselines(self):
         """Initialize baseline metrics for comparison."""
         try:
+            # The only full walk; later checks update the file set from changes
+            self.known_files = set(self.discovery.find_files())
+            self.last_checked_commit = self._head_commit()
+            
             # Code metrics baseline
             if self.config.enable_code_monitoring:
-                analysis = self.code_analyzer.analyze_project(self.project_path)
-                self.baselines['code_metrics'] = {
-                    'complexity': analysis.metrics.average_complexity,
-                    'maintainability': analysis.metrics.maintainability_index,
-                    'test_coverage': analysis.metrics.test_coverage,
-                    'documentation_coverage': analysis.metrics.documentation_coverage
-                }
+                self.file_metrics.clear()
+                self._update_file_metrics(self.known_files)
+                self.baselines['code_metrics'] = self._project_code_metrics()
             
             # Git baseline
             if self.config.enable_git_monitoring:
                 self.baselines['git_state'] = {
                     'current_branch': self.git_manager.current_branch,
                     'last_commit': self.git_manager.get_latest_commit(),
-                    'file_count': len(list(self.project_path.rglob('*')))
+                    'file_count': len(self.known_files)
                 }
             
             # Performance baseline
@@ -181,6 +270,7 @@ class BackgroundMonitor:
         """Perform a monitoring check across all enabled monitors."""
         logger.debug("Starting monitoring check")
         issues_before = len(self.issues)
+        changed_files = self._collect_changed_files()
         
         # Git monitoring
         if self.config.enable_git_monitoring:
@@ -188,7 +278,7 @@ class BackgroundMonitor:
         
         # Code quality monitoring
         if self.config.enable_code_monitoring:
-            self._check_code_quality()
+            self._check_code_quality(changed_files)
         
         # Performance monitoring
         if self.config.enable_performance_monitoring:
@@ -248,17 +338,124 @@ class BackgroundMonitor:
         except Exception as e:
             logger.error(f"Error checking git state: {e}")
     
-    def _check_code_quality(self):
-        """Check for code quality changes."""
+    def _collect_changed_files(self) -> Set[Path]:
+        """Take the files changed since the previous check.
+        
+        Combines the files marked dirty by file system events with
+        ``git diff --name-only`` between the last checked commit and the
+        work tree, which also catches changes made while no watcher ran.
+        The set of known files is updated for created and deleted files.
+        """
+        with self._dirty_lock:
+            changed = self.dirty_files
+            self.dirty_files = set()
+        
+        changed.update(self._git_changed_files())
+        for path in changed:
+            if path.is_file():
+                self.known_files.add(path)
+            else:
+                self.known_files.discard(path)
+        return changed
+    
+    def _git_changed_files(self) -> Set[Path]:
+        """List files changed since the last checked commit according to git."""
+        repo = self.git_manager.repo
+        if repo is None:
+            return set()
+        
         try:
-            # Analyze current code
-            analysis = self.code_analyzer.analyze_project(self.project_path)
-            current_metrics = {
-                'complexity': analysis.metrics.average_complexity,
-                'maintainability': analysis.metrics.maintainability_index,
-                'test_coverage': analysis.metrics.test_coverage,
-                'documentation_coverage': analysis.metrics.documentation_coverage
-            }
+            head = self._head_commit()
+            names = repo.git.diff('--name-only', self.last_checked_commit or 'HEAD').splitlines()
+        except Exception as e:
+            logger.debug(f"git diff unavailable: {e}")
+            return set()
+        self.last_checked_commit = head
+        
+        root = Path(repo.working_tree_dir).resolve()
+        project = self.project_path.resolve()
+        changed = set()
+        for name in names:
+            try:
+                path = self.project_path / (root / name).relative_to(project)
+            except ValueError:
+                continue
+            if not self.discovery.is_ignored(path):
+                changed.add(path)
+        return changed
+    
+    def _head_commit(self) -> Optional[str]:
+        """Get the hash of the checked out commit, if there is one."""
+        try:
+            return self.git_manager.repo.head.commit.hexsha
+        except Exception:
+            return None
+    
+    def _update_file_metrics(self, paths: Iterable[Path]) -> List[Any]:
+        """Re-analyze files and update their cached metrics.
+        
+        Files that no longer exist or cannot be analyzed are dropped from
+        the cache.
+        
+        Returns:
+            Security issues found in the analyzed files
+        """
+        security_issues = []
+        for path in paths:
+            if not self.code_matcher(path.name):
+                continue
+            
+            analysis = self.code_analyzer.analyze_file(path) if path.is_file() else None
+            if analysis is None or analysis.metrics is None:
+                self.file_metrics.pop(path, None)
+                continue
+            
+            functions = analysis.functions + [m for c in analysis.classes for m in c.methods]
+            self.file_metrics[path] = FileMetrics(
+                metrics=analysis.metrics,
+                functions=len(functions),
+                documented_functions=sum(1 for f in functions if f.docstring)
+            )
+            security_issues.extend(
+                issue for issue in analysis.issues if issue.category == IssueCategory.SECURITY
+            )
+        return security_issues
+    
+    def _project_code_metrics(self) -> Dict[str, float]:
+        """Compute project-level code metrics from the cached per-file metrics."""
+        accumulator = MetricsAccumulator()
+        functions = 0
+        documented = 0
+        coverages = []
+        for entry in self.file_metrics.values():
+            accumulator.add(entry.metrics)
+            functions += entry.functions
+            documented += entry.documented_functions
+            if entry.metrics.test_coverage is not None:
+                coverages.append(entry.metrics.test_coverage)
+        
+        metrics = accumulator.result()
+        return {
+            'complexity': metrics.cyclomatic_complexity,
+            'maintainability': metrics.maintainability_index,
+            'test_coverage': sum(coverages) / len(coverages) if coverages else 0.0,
+            'documentation_coverage': documented / functions * 100 if functions else 0.0
+        }
+    
+    def _check_code_quality(self, changed_files: Optional[Set[Path]] = None):
+        """Check for code quality changes.
+        
+        Args:
+            changed_files: Files changed since the previous check, collected
+                if omitted; only these are analyzed again
+        """
+        try:
+            if changed_files is None:
+                changed_files = self._collect_changed_files()
+            
+            # Analyze changed code and combine it with the cached metrics
+            security_issues = self._update_file_metrics(changed_files)
+            current_metrics = self._project_code_metrics()
             
             baseline = self.baselines.get('code_metrics', {})
             
@@ -286,15 +483,19 @@ class BackgroundMonitor:
                     severity='error'
                 )
             
-            # Check for security issues
-            if analysis.security_issues:
-                for issue in analysis.security_issues:
-                    self._add_issue(
-                        'security_vulnerability',
-                        f"Security issue: {issue.vulnerability_type} in {issue.file_path}:{issue.line_number}",
-                        severity='critical',
-                        details=issue.to_dict()
-                    )
+            # Check for security issues in the changed files
+            for issue in security_issues:
+                self._add_issue(
+                    'security_vulnerability',
+                    f"Security issue: {issue.message} in {issue.location.file_path}:{issue.location.line_start}",
+                    severity='critical',
+                    details={
+                        'rule_id': issue.rule_id,
+                        'file_path': issue.location.file_path,
+                        'line_number': issue.location.line_start,
+                        'suggestion': issue.suggestion
+                    }
+                )
             
         except Exception as e:
             logger.error(f"Error checking code quality: {e}")
@@ -361,14 +562,22 @@ class BackgroundMonitor:
             logger.error(f"Error checking for drift: {e}")
     
     def _measure_performance(self) -> Dict[str, float]:
-        """Measure current performance metrics."""
+        """Measure current performance metrics.
+        
+        File I/O time is the mean time to stat a bounded sample of the
+        known files, so measuring does not walk the project.
+        """
         import psutil
-        import time
         
         # File I/O performance
-        start_time = time.time()
-        list(self.project_path.rglob('*.py'))
-        file_io_time = time.time() - start_time
+        sample = list(islice(self.known_files, PERFORMANCE_SAMPLE_SIZE))
+        start_time = time.perf_counter()
+        for path in sample:
+            try:
+                path.stat()
+            except OSError:
+                pass
+        file_io_time = (time.perf_counter() - start_time) / len(sample) if sample else 0.0
         
         # Memory usage
         process = psutil.Process()
@@ -578,19 +578,22 @@ Happy automating! 🚀
         console.print("[green]✓ Configuration reset[/green]")
         
 
+@click.command()
+@click.option('--reset', is_flag=True, help='Reset configuration and start fresh')
+@click.option('--web', is_flag=True, help='Use web-based interface (coming soon)')
+@click.pass_context
+def onboard(ctx, reset, web):
+    """Interactive setup wizard for new users."""
+    if web:
+        console.print("[yellow]Web interface coming soon! Using terminal interface for now.[/yellow]")
+        
+    wizard = OnboardingWizard(ctx.obj['config'])
+    wizard.run(reset=reset)
+
+
 def create_onboarding_command(cli):
-    """Create the onboarding command for the CLI."""
-    @cli.command()
-    @click.option('--reset', is_flag=True, help='Reset configuration and start fresh')
-    @click.option('--web', is_flag=True, help='Use web-based interface (coming soon)')
-    @click.pass_context
-    def onboard(ctx, reset, web):
-        """Interactive setup wizard for new users."""
-        if web:
-            console.print("[yellow]Web interface coming soon! Using terminal interface for now.[/yellow]")
-            
-        wizard = OnboardingWizard(ctx.obj['config'])
-        wizard.run(reset=reset)
+    """Add the onboarding command to the CLI."""
+    cli.add_command(onboard)
 
 
 # Additional onboarding utilities
@@ -0,0 +1,324 @@
+"""
+Persistent index of project files for context generation.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .constants import DEFAULT_BINARY_EXTENSIONS
+from .discovery import FileDiscovery
+from .utils import logger
+
+
+# Bump when the stored columns or their meaning change
+INDEX_FORMAT_VERSION = 1
+
+DEFAULT_INDEX_PATH = Path('.velocitytree') / 'project_index.db'
+
+# Files larger than this are indexed by size only
+MAX_INDEXED_SIZE = 16 * 1024 * 1024
+
+LANGUAGE_BY_EXTENSION = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.c': 'c',
+    '.h': 'c',
+    '.cpp': 'cpp',
+    '.cc': 'cpp',
+    '.hpp': 'cpp',
+    '.cs': 'csharp',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.swift': 'swift',
+    '.kt': 'kotlin',
+    '.scala': 'scala',
+    '.sh': 'shell',
+    '.md': 'markdown',
+    '.rst': 'restructuredtext',
+    '.json': 'json',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.toml': 'toml',
+    '.html': 'html',
+    '.css': 'css',
+    '.sql': 'sql',
+}
+
+
+@dataclass
+class IndexedFile:
+    """A file recorded in the project index."""
+    path: str  # relative to the project root, '/'-separated
+    size: int
+    mtime_ns: int
+    lines: int
+    language: Optional[str]
+    extension: str
+    content_hash: Optional[str]
+
+
+class ProjectIndex:
+    """Index of project paths, sizes, line counts, languages and hashes.
+    
+    The index is built with one gitignore-aware walk and stored in a SQLite
+    database under ``.velocitytree/``. Later refreshes only stat files and
+    re-read those whose size or mtime changed, so context generation for an
+    unchanged project needs no file reads at all.
+    """
+    
+    def __init__(
+        self,
+        project_root: Union[str, Path],
+        db_path: Optional[Union[str, Path]] = None,
+        persist: bool = True,
+        refresh_interval: float = 0.0
+    ):
+        """Initialize the project index.
+        
+        Args:
+            project_root: Root directory of the project
+            db_path: Index database, defaults to .velocitytree/project_index.db
+                under the project root
+            persist: Store the index on disk; otherwise keep it in memory
+            refresh_interval: Seconds during which a refreshed index is reused
+                without walking the tree again
+        """
+        self.project_root = Path(project_root)
+        self.refresh_interval = refresh_interval
+        self.db_path = Path(db_path) if db_path else self.project_root / DEFAULT_INDEX_PATH
+        
+        self._lock = threading.Lock()
+        self._files: Dict[str, IndexedFile] = {}
+        self._directories: List[str] = []
+        self._refreshed_at: Optional[float] = None
+        self._stats = {
+            "refreshes": 0,
+            "files_read": 0,
+            "files_reused": 0,
+            "files_removed": 0
+        }
+        
+        database = ':memory:'
+        if persist:
+            try:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                database = str(self.db_path)
+            except OSError as e:
+                logger.debug(f"Keeping project index in memory: {e}")
+        self._conn = sqlite3.connect(database, timeout=30, check_same_thread=False)
+        self._init_database()
+        self._load()
+    
+    def _init_database(self):
+        """Initialize database schema."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()
+            if row is None or row[0] != str(INDEX_FORMAT_VERSION):
+                self._conn.execute("DROP TABLE IF EXISTS files")
+                self._conn.execute("DROP TABLE IF EXISTS directories")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                    (str(INDEX_FORMAT_VERSION),)
+                )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    lines INTEGER NOT NULL,
+                    language TEXT,
+                    extension TEXT NOT NULL,
+                    content_hash TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS directories (
+                    path TEXT PRIMARY KEY
+                )
+            """)
+            self._conn.commit()
+    
+    def _load(self):
+        """Load the stored index into memory."""
+        with self._lock:
+            self._files = {
+                row[0]: IndexedFile(*row)
+                for row in self._conn.execute(
+                    "SELECT path, size, mtime_ns, lines, language, extension, content_hash FROM files"
+                )
+            }
+            self._directories = [
+                row[0] for row in self._conn.execute("SELECT path FROM directories ORDER BY path")
+            ]
+    
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """Bring the index up to date with the file system.
+        
+        Args:
+            force: Walk the tree even within the refresh interval
+        
+        Returns:
+            Counts of files read, reused and removed by this refresh
+        """
+        with self._lock:
+            if (not force and self._refreshed_at is not None
+                    and time.time() - self._refreshed_at < self.refresh_interval):
+                return {"files_read": 0, "files_reused": len(self._files), "files_removed": 0}
+            
+            changed: List[IndexedFile] = []
+            files: Dict[str, IndexedFile] = {}
+            directories = []
+            reused = 0
+            
+            discovery = FileDiscovery(self.project_root)
+            for path, rel_path, is_dir in discovery.walk(include_dirs=True):
+                if is_dir:
+                    directories.append(rel_path)
+                    continue
+                
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                
+                entry = self._files.get(rel_path)
+                if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                    files[rel_path] = entry
+                    reused += 1
+                    continue
+                
+                entry = self._index_file(path, rel_path, stat)
+                files[rel_path] = entry
+                changed.append(entry)
+            
+            removed = [(p,) for p in self._files.keys() - files.keys()]
+            directories.sort()
+            
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files "
+                "(path, size, mtime_ns, lines, language, extension, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(e.path, e.size, e.mtime_ns, e.lines, e.language, e.extension, e.content_hash)
+                 for e in changed]
+            )
+            self._conn.executemany("DELETE FROM files WHERE path = ?", removed)
+            if directories != self._directories:
+                self._conn.execute("DELETE FROM directories")
+                self._conn.executemany(
+                    "INSERT INTO directories (path) VALUES (?)", [(d,) for d in directories]
+                )
+            self._conn.commit()
+            
+            self._files = files
+            self._directories = directories
+            self._refreshed_at = time.time()
+            self._stats["refreshes"] += 1
+            self._stats["files_read"] += len(changed)
+            self._stats["files_reused"] += reused
+            self._stats["files_removed"] += len(removed)
+            
+            return {"files_read": len(changed), "files_reused": reused, "files_removed": len(removed)}
+    
+    def _index_file(self, path: str, rel_path: str, stat: os.stat_result) -> IndexedFile:
+        """Read a file and compute its index entry."""
+        extension = os.path.splitext(rel_path)[1].lower()
+        lines = 0
+        digest = None
+        
+        if stat.st_size <= MAX_INDEXED_SIZE:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                if extension not in DEFAULT_BINARY_EXTENSIONS and b'\0' not in data[:8192]:
+                    lines = data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+            except OSError as e:
+                logger.debug(f"Could not index {path}: {e}")
+        
+        return IndexedFile(
+            path=rel_path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            lines=lines,
+            language=LANGUAGE_BY_EXTENSION.get(extension),
+            extension=extension,
+            content_hash=digest
+        )
+    
+    def files(self) -> List[IndexedFile]:
+        """Get all indexed files sorted by path."""
+        with self._lock:
+            return [self._files[path] for path in sorted(self._files)]
+    
+    def directories(self) -> List[str]:
+        """Get all indexed directories sorted by path."""
+        with self._lock:
+            return list(self._directories)
+    
+    def get(self, rel_path: str) -> Optional[IndexedFile]:
+        """Get the entry for a path relative to the project root."""
+        with self._lock:
+            return self._files.get(rel_path)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            stats = self._stats.copy()
+            stats.update({
+                "files": len(self._files),
+                "directories": len(self._directories),
+                "total_size": sum(f.size for f in self._files.values())
+            })
+        return stats
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Indexes shared by everything that builds context in this process
+_indexes: Dict[str, ProjectIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_project_index(project_root: Union[str, Path], refresh: bool = True) -> ProjectIndex:
+    """Get the shared index for a project, refreshing it if needed.
+    
+    Args:
+        project_root: Root directory of the project
+        refresh: Bring the index up to date before returning it
+    
+    Returns:
+        Project index shared by all callers in this process
+    """
+    key = str(Path(project_root).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ProjectIndex(key)
+    if refresh:
+        index.refresh()
+    return index
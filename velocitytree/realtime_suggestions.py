@@ -3,8 +3,11 @@ Real-time code suggestions engine for VelocityTree.
 Provides IDE-style live analysis and contextual suggestions.
 """
 
+import ast
 import asyncio
-from dataclasses import dataclass, field
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, Any
@@ -12,8 +15,10 @@ from datetime import datetime
 import difflib
 
 from velocitytree.code_analysis.analyzer import CodeAnalyzer
+from velocitytree.code_analysis.cache import content_hash
+from velocitytree.code_analysis.source import top_level_spans
 from velocitytree.code_analysis.models import (
-    ModuleAnalysis, Pattern, Severity,
+    ModuleAnalysis, FunctionAnalysis, LanguageSupport, Pattern, Severity,
     CodeMetrics as ComplexityMetrics, CodeIssue as Issue, CodeLocation
 )
 from velocitytree.documentation.quality import DocQualityChecker
@@ -109,6 +114,66 @@ class CodeSuggestion:
                (-other.priority, other.severity.value, other.range.start)
 
 
+# Refactorings that compare definitions with each other or concern the
+# file as a whole, so they are recommended for the file rather than per block
+FILE_LEVEL_REFACTORINGS = {"replace_magic_number", "consolidate_duplicate"}
+
+
+@dataclass
+class BlockAnalysis:
+    """Suggestions for one top-level block, with lines relative to the block."""
+    suggestions: List[CodeSuggestion]
+    module_suggestions: List[CodeSuggestion]
+    metrics: Optional[ComplexityMetrics]
+    functions: List[FunctionAnalysis]
+    function_complexities: List[float]
+    language: Optional[LanguageSupport] = None
+    syntax_error: bool = False
+
+
+def _parses(content: str) -> bool:
+    """Check whether Python source is free of syntax errors."""
+    try:
+        ast.parse(content)
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+
+def _shift_range(range: CodeRange, offset: int) -> CodeRange:
+    """Move a range down by offset lines; line 0 (whole file) stays put."""
+    def shift(position: CodePosition) -> CodePosition:
+        if position.line <= 0:
+            return position
+        return CodePosition(position.line + offset, position.column)
+    
+    return CodeRange(start=shift(range.start), end=shift(range.end))
+
+
+def _shift_suggestion(suggestion: CodeSuggestion, offset: int) -> CodeSuggestion:
+    """Copy a block-relative suggestion to its position in the file."""
+    return CodeSuggestion(
+        type=suggestion.type,
+        severity=suggestion.severity,
+        message=suggestion.message,
+        range=_shift_range(suggestion.range, offset),
+        file_path=suggestion.file_path,
+        quick_fixes=[
+            QuickFix(
+                type=fix.type,
+                title=fix.title,
+                description=fix.description,
+                range=_shift_range(fix.range, offset),
+                replacement=fix.replacement,
+                preview=fix.preview
+            )
+            for fix in suggestion.quick_fixes
+        ],
+        metadata=dict(suggestion.metadata),
+        priority=suggestion.priority
+    )
+
+
 class SuggestionPrioritizer:
     """Prioritizes suggestions based on various factors."""
     
@@ -186,7 +251,13 @@ class SuggestionPrioritizer:
 
 
 class RealTimeSuggestionEngine:
-    """Engine for generating real-time code suggestions."""
+    """Engine for generating real-time code suggestions.
+    
+    The editor buffer is analyzed in memory and never read from disk.
+    Python sources are split into top-level blocks, and each block's
+    suggestions are cached by the hash of its text, so an edit only
+    reanalyzes the definitions it touched.
+    """
     
     def __init__(
         self,
@@ -205,7 +276,11 @@ class RealTimeSuggestionEngine:
         self._learning_engine = learning_engine
         self._adaptive_engine = None
         self.prioritizer = SuggestionPrioritizer(self.analyzer)
+        # File path -> (content hash, suggestions)
         self.cache: Dict[Path, Tuple[str, List[CodeSuggestion]]] = {}
+        self.block_cache: "OrderedDict[Tuple[Path, str], BlockAnalysis]" = OrderedDict()
+        self.max_cached_blocks = 4096
+        self._block_lock = threading.Lock()
         self.debounce_timers: Dict[Path, asyncio.Task] = {}
         self.debounce_delay = 0.5  # seconds
     
@@ -272,9 +347,10 @@ class RealTimeSuggestionEngine:
             content = file_path.read_text()
             
         cache_key = file_path
+        digest = content_hash(content)
         if cache_key in self.cache:
-            cached_content, cached_suggestions = self.cache[cache_key]
-            if cached_content == content:
+            cached_digest, cached_suggestions = self.cache[cache_key]
+            if cached_digest == digest:
                 # Apply adaptive learning to cached suggestions
                 adapted_suggestions = self._apply_adaptive_learning(cached_suggestions)
                 return adapted_suggestions
@@ -290,7 +366,7 @@ class RealTimeSuggestionEngine:
         )
         
         # Cache results
-        self.cache[cache_key] = (content, suggestions)
+        self.cache[cache_key] = (digest, suggestions)
         
         # Update file heat
         self.prioritizer.update_file_heat(file_path)
@@ -304,10 +380,81 @@ class RealTimeSuggestionEngine:
         context: Optional[Dict[str, Any]] = None
     ) -> List[CodeSuggestion]:
         """Synchronous analysis implementation."""
+        suggestions = self._collect_suggestions(file_path, content)
+        
+        # Calculate priorities
+        for suggestion in suggestions:
+            suggestion.priority = self.prioritizer.calculate_priority(
+                suggestion, context
+            )
+        
+        # Sort by priority
+        suggestions.sort()
+        
+        # Apply adaptive learning
+        adapted_suggestions = self._apply_adaptive_learning(suggestions)
+        
+        return adapted_suggestions
+    
+    def _collect_suggestions(self, file_path: Path, content: str) -> List[CodeSuggestion]:
+        """Gather the suggestions for some content, reanalyzing only changed blocks."""
+        lines = content.splitlines()
+        spans = top_level_spans(content) if file_path.suffix == '.py' else []
+        blocks = [(start, '\n'.join(lines[start - 1:end])) for start, end in spans] or [(1, content)]
+        results = [self._analyze_block(file_path, text) for _, text in blocks]
+        
+        # A block that does not parse on its own although the whole file
+        # does means the split was wrong, so fall back to the whole file
+        if len(blocks) > 1 and any(r.syntax_error for r in results) and _parses(content):
+            blocks = [(1, content)]
+            results = [self._analyze_block(file_path, content)]
+        
         suggestions = []
+        for index, ((start, _), result) in enumerate(zip(blocks, results)):
+            # Every block looks like a module; only the first one's
+            # module-level findings describe the file
+            block_suggestions = result.suggestions + (result.module_suggestions if index == 0 else [])
+            suggestions.extend(_shift_suggestion(s, start - 1) for s in block_suggestions)
+        
+        # Add complexity-based suggestions
+        suggestions.extend(self._generate_complexity_suggestions(
+            self._combine_metrics(results), file_path
+        ))
         
+        # Add refactorings that compare definitions across blocks
+        suggestions.extend(self._generate_file_refactoring_suggestions(
+            blocks, results, file_path
+        ))
+        
+        return suggestions
+    
+    def _analyze_block(self, file_path: Path, text: str) -> BlockAnalysis:
+        """Analyze one top-level block, reusing the result for unchanged text."""
+        key = (file_path, content_hash(text))
+        with self._block_lock:
+            cached = self.block_cache.get(key)
+            if cached is not None:
+                self.block_cache.move_to_end(key)
+                return cached
+        
+        result = self._analyze_text(file_path, text)
+        
+        with self._block_lock:
+            self.block_cache[key] = result
+            while len(self.block_cache) > self.max_cached_blocks:
+                self.block_cache.popitem(last=False)
+        return result
+    
+    def _analyze_text(self, file_path: Path, text: str) -> BlockAnalysis:
+        """Generate every suggestion except complexity ones for a piece of source."""
         # Analyze code
-        analysis = self.analyzer.analyze_file(file_path)
+        analysis = self.analyzer.analyze_source(file_path, text, cache=False)
+        if analysis is None:
+            return BlockAnalysis(
+                suggestions=[], module_suggestions=[], metrics=None, functions=[], function_complexities=[]
+            )
+        
+        suggestions = []
         
         # Convert issues to suggestions
         suggestions.extend(self._convert_issues_to_suggestions(
@@ -319,16 +466,14 @@ class RealTimeSuggestionEngine:
             analysis.patterns, file_path
         ))
         
-        # Add complexity-based suggestions
-        suggestions.extend(self._generate_complexity_suggestions(
-            analysis.metrics, file_path
-        ))
-        
         # Add documentation quality suggestions
         doc_report = self.quality_checker.check_quality(analysis)
         suggestions.extend(self._convert_doc_issues_to_suggestions(
-            doc_report.issues, file_path
+            [issue for issue in doc_report.issues if issue.location != 'Module'], file_path
         ))
+        module_suggestions = self._convert_doc_issues_to_suggestions(
+            [issue for issue in doc_report.issues if issue.location == 'Module'], file_path
+        )
         
         # Generate refactoring suggestions
         suggestions.extend(self._generate_refactoring_suggestions(
@@ -337,22 +482,92 @@ class RealTimeSuggestionEngine:
         
         # Add advanced refactoring recommendations
         suggestions.extend(self._generate_advanced_refactoring_suggestions(
-            analysis, file_path
+            analysis, file_path, types=self._block_refactoring_types()
         ))
         
-        # Calculate priorities
-        for suggestion in suggestions:
-            suggestion.priority = self.prioritizer.calculate_priority(
-                suggestion, context
-            )
+        methods = [m for c in analysis.classes for m in c.methods]
+        return BlockAnalysis(
+            suggestions=suggestions,
+            module_suggestions=module_suggestions,
+            metrics=analysis.metrics,
+            functions=analysis.functions,
+            function_complexities=[f.complexity for f in analysis.functions + methods],
+            language=analysis.language,
+            syntax_error=any(issue.rule_id == 'syntax-error' for issue in analysis.issues)
+        )
+    
+    def _block_refactoring_types(self) -> Set[Any]:
+        """Kinds of refactoring that can be recommended from a single block."""
+        from velocitytree.refactoring import RefactoringType
+        return {t for t in RefactoringType if t.value not in FILE_LEVEL_REFACTORINGS}
+    
+    def _generate_file_refactoring_suggestions(
+        self,
+        blocks: List[Tuple[int, str]],
+        results: List[BlockAnalysis],
+        file_path: Path
+    ) -> List[CodeSuggestion]:
+        """Recommend the refactorings that span blocks from all blocks' definitions."""
+        language = next((r.language for r in results if r.language is not None), None)
+        if language is None:
+            return []
         
-        # Sort by priority
-        suggestions.sort()
+        functions = [
+            replace(func, location=replace(
+                func.location,
+                line_start=func.location.line_start + start - 1,
+                line_end=func.location.line_end + start - 1 if func.location.line_end else func.location.line_end
+            ))
+            for (start, _), result in zip(blocks, results)
+            for func in result.functions
+        ]
+        analysis = ModuleAnalysis(
+            file_path=str(file_path),
+            language=language,
+            imports=[],
+            functions=functions,
+            classes=[],
+            global_variables=[],
+            docstring=None,
+            metrics=self._combine_metrics(results)
+        )
         
-        # Apply adaptive learning
-        adapted_suggestions = self._apply_adaptive_learning(suggestions)
+        from velocitytree.refactoring import RefactoringType
+        return self._generate_advanced_refactoring_suggestions(
+            analysis, file_path, types={RefactoringType(t) for t in FILE_LEVEL_REFACTORINGS}
+        )
+    
+    def _combine_metrics(self, results: List[BlockAnalysis]) -> Optional[ComplexityMetrics]:
+        """Combine block metrics into the metrics of the whole file.
         
-        return adapted_suggestions
+        As for a whole module, cyclomatic complexity is the average over all
+        functions, or that of the module code if there are none; cognitive
+        complexity adds up.
+        """
+        metrics = [r.metrics for r in results if r.metrics is not None]
+        if not metrics:
+            return None
+        
+        complexities = [c for r in results for c in r.function_complexities]
+        if complexities:
+            cyclomatic = sum(complexities) / len(complexities)
+        else:
+            cyclomatic = 1 + sum(m.cyclomatic_complexity - 1 for m in metrics)
+        lines_of_code = sum(m.lines_of_code for m in metrics)
+        
+        return ComplexityMetrics(
+            lines_of_code=lines_of_code,
+            lines_of_comments=sum(m.lines_of_comments for m in metrics),
+            cyclomatic_complexity=cyclomatic,
+            cognitive_complexity=sum(m.cognitive_complexity for m in metrics),
+            maintainability_index=(
+                sum(m.maintainability_index * m.lines_of_code for m in metrics) / lines_of_code
+                if lines_of_code else metrics[0].maintainability_index
+            ),
+            duplicate_lines=sum(m.duplicate_lines for m in metrics),
+            number_of_functions=sum(m.number_of_functions for m in metrics),
+            number_of_classes=sum(m.number_of_classes for m in metrics)
+        )
     
     def _convert_issues_to_suggestions(
         self, 
@@ -695,7 +910,8 @@ class RealTimeSuggestionEngine:
     def _generate_advanced_refactoring_suggestions(
         self,
         analysis: ModuleAnalysis,
-        file_path: Path
+        file_path: Path,
+        types: Optional[Set[Any]] = None
     ) -> List[CodeSuggestion]:
         """Generate advanced refactoring suggestions using the refactoring engine."""
         suggestions = []
@@ -704,7 +920,9 @@ class RealTimeSuggestionEngine:
             # Get refactoring recommendations
             recommendations = self.refactoring_engine.analyze_and_recommend(
                 file_path,
-                file_path.parent  # Use parent as codebase path
+                file_path.parent,  # Use parent as codebase path
+                analysis=analysis,
+                types=types
             )
             
             # Convert to suggestions
@@ -762,5 +980,10 @@ class RealTimeSuggestionEngine:
         if file_path:
             if file_path in self.cache:
                 del self.cache[file_path]
+            with self._block_lock:
+                for key in [k for k in self.block_cache if k[0] == file_path]:
+                    del self.block_cache[key]
         else:
-            self.cache.clear()
\ No newline at end of file
+            self.cache.clear()
+            with self._block_lock:
+                self.block_cache.clear()
\ No newline at end of file
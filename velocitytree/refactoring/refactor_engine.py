@@ -16,6 +16,7 @@ from velocitytree.code_analysis.models import (
     CodeLocation, CodeMetrics
 )
 from velocitytree.code_analysis.analyzer import CodeAnalyzer
+from velocitytree.discovery import discover_files
 
 
 class RefactoringType(Enum):
@@ -910,7 +911,7 @@ class ImpactAnalyzer:
         """Find all files importing a given class."""
         affected_files = []
         
-        for py_file in codebase_path.rglob("*.py"):
+        for py_file in discover_files(codebase_path, ['*.py']):
             try:
                 content = py_file.read_text()
                 if f"from .* import.*{class_name}" in content or f"import.*{class_name}" in content:
@@ -924,7 +925,7 @@ class ImpactAnalyzer:
         """Find all references to a function."""
         references = []
         
-        for py_file in codebase_path.rglob("*.py"):
+        for py_file in discover_files(codebase_path, ['*.py']):
             try:
                 content = py_file.read_text()
                 if func_name in content:
@@ -954,14 +955,27 @@ class RefactoringRecommendationEngine:
     def analyze_and_recommend(
         self,
         file_path: Path,
-        codebase_path: Optional[Path] = None
+        codebase_path: Optional[Path] = None,
+        analysis: Optional[ModuleAnalysis] = None,
+        types: Optional[Set[RefactoringType]] = None
     ) -> List[Tuple[RefactoringCandidate, RefactoringPlan, ImpactAnalysis]]:
-        """Analyze a file and generate refactoring recommendations."""
+        """Analyze a file and generate refactoring recommendations.
+        
+        Args:
+            file_path: File to analyze
+            codebase_path: Root searched for references, defaults to the file's directory
+            analysis: Existing analysis of the file, e.g. of unsaved content;
+                the file is analyzed from disk if omitted
+            types: Only recommend these kinds of refactoring
+        """
         # Analyze the file
-        analysis = self.analyzer.analyze_file(file_path)
+        if analysis is None:
+            analysis = self.analyzer.analyze_file(file_path)
         
         # Detect refactoring opportunities
         candidates = self.detector.detect_refactoring_opportunities(analysis)
+        if types is not None:
+            candidates = [c for c in candidates if c.type in types]
         
         # Create plans and analyze impact
         recommendations = []
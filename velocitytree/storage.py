@@ -0,0 +1,303 @@
+"""
+Shared SQLite persistence layer with per-thread connections and group commits.
+"""
+
+import atexit
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .utils import logger
+
+
+# Queued writes are committed after this many seconds or rows, whichever comes first
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_BATCH_SIZE = 500
+
+# Prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+
+class SQLiteStore:
+    """SQLite database shared by every thread of a process.
+    
+    Each thread gets a long-lived connection in WAL mode, so readers never
+    wait for the writer and statements stay prepared in the connection's
+    statement cache. Writes that need not be visible at once go through
+    ``queue_write``: a background thread commits them in groups every
+    ``flush_interval`` seconds or ``batch_size`` rows, running consecutive
+    rows of the same statement with ``executemany``. Reads and immediate
+    writes flush the queue first, so callers always see their own writes.
+    
+    The database must be a file; ``:memory:`` databases are not shared
+    between connections.
+    """
+    
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """Open the store.
+        
+        Args:
+            db_path: SQLite database file, created if missing
+            flush_interval: Seconds queued writes may wait before committing
+            batch_size: Queued rows that trigger a commit without waiting
+        """
+        self.db_path = Path(db_path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
+        self._pending: List[Tuple[str, Sequence[Any]]] = []
+        self._pending_lock = threading.Lock()
+        self._pending_changed = threading.Condition(self._pending_lock)
+        self._flush_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        
+        self._id_blocks: Dict[str, Iterator[int]] = {}
+        self._id_lock = threading.Lock()
+        
+        _open_stores.add(self)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Store {self.db_path} is closed")
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=30,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one committed transaction after flushing the queue.
+        
+        Yields:
+            The calling thread's connection; the transaction is rolled back
+            if the block raises
+        """
+        self.flush()
+        conn = self._connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def executescript(self, script: str):
+        """Run a script of schema statements."""
+        self._connection().executescript(script)
+    
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Run a write statement and commit it.
+        
+        Returns:
+            Cursor with the statement's rowcount and lastrowid
+        """
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+    
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        """Run a write statement for many rows in a single transaction.
+        
+        Returns:
+            Number of rows changed
+        """
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+    
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        """Run a query and fetch all rows."""
+        self.flush()
+        return self._connection().execute(sql, params).fetchall()
+    
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[Tuple]:
+        """Run a query and fetch its first row, if any."""
+        self.flush()
+        return self._connection().execute(sql, params).fetchone()
+    
+    def queue_write(self, sql: str, params: Sequence[Any] = ()):
+        """Queue a write statement for the next group commit.
+        
+        Queued statements run in order. A row that fails is logged and
+        skipped without affecting the rest of its group.
+        """
+        with self._pending_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Store {self.db_path} is closed")
+            self._pending.append((sql, params))
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_behind, name=f"sqlite-writer-{self.db_path.name}"
+                )
+                self._writer.daemon = True
+                self._writer.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._pending_changed.notify()
+    
+    def _write_behind(self):
+        """Commit queued writes in groups until the store is closed."""
+        while True:
+            with self._pending_lock:
+                while not self._pending and not self._closed:
+                    self._pending_changed.wait()
+                if self._closed:
+                    return
+                if len(self._pending) < self.batch_size:
+                    self._pending_changed.wait(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                # Keep the writer alive, e.g. if the database file went away
+                logger.error(f"Dropped queued writes to {self.db_path}: {e}")
+    
+    def flush(self):
+        """Commit all queued writes now."""
+        # Serialized so that groups are committed in queue order
+        with self._flush_lock:
+            with self._pending_lock:
+                pending = self._pending
+                self._pending = []
+            if not pending:
+                return
+            
+            conn = self._connection()
+            try:
+                for sql, rows in _group_statements(pending):
+                    conn.executemany(sql, rows)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.debug(f"Group commit to {self.db_path} failed, retrying rows: {e}")
+                self._write_rows(conn, pending)
+    
+    def _write_rows(self, conn: sqlite3.Connection, pending: List[Tuple[str, Sequence[Any]]]):
+        """Write queued statements one at a time, skipping the ones that fail."""
+        for sql, params in pending:
+            try:
+                conn.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error(f"Dropped write to {self.db_path}: {e}")
+        conn.commit()
+    
+    def next_id(self, table: str) -> int:
+        """Reserve the next AUTOINCREMENT id of a table.
+        
+        Lets queued inserts carry their id before they are written. Ids are
+        reserved from the table's sqlite_sequence entry in blocks of
+        ``batch_size``, so other connections and processes never hand out
+        the same ids; unused ids of a block are skipped.
+        """
+        with self._id_lock:
+            block = self._id_blocks.get(table)
+            next_id = next(block, None) if block is not None else None
+            if next_id is None:
+                block = self._id_blocks[table] = iter(self._reserve_ids(table, self.batch_size))
+                next_id = next(block)
+            return next_id
+    
+    def _reserve_ids(self, table: str, count: int) -> range:
+        """Advance a table's sqlite_sequence entry past a block of ids."""
+        with self.transaction() as conn:
+            # Take the write lock before reading the sequence
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+            if row is None:
+                last = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, last + count))
+            else:
+                last = row[0]
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (last + count, table))
+        return range(last + 1, last + count + 1)
+    
+    def close(self):
+        """Commit queued writes and close every connection."""
+        self.flush()
+        with self._pending_lock:
+            self._closed = True
+            self._pending_changed.notify_all()
+        if self._writer and self._writer is not threading.current_thread():
+            self._writer.join(timeout=10)
+        self.flush()
+        
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+        _open_stores.discard(self)
+        with _stores_lock:
+            if _stores.get(str(self.db_path)) is self:
+                del _stores[str(self.db_path)]
+
+
+def _group_statements(
+    pending: List[Tuple[str, Sequence[Any]]]
+) -> Iterator[Tuple[str, List[Sequence[Any]]]]:
+    """Group consecutive queued writes of the same statement."""
+    sql, rows = None, []
+    for statement, params in pending:
+        if statement != sql and rows:
+            yield sql, rows
+            rows = []
+        sql = statement
+        rows.append(params)
+    if rows:
+        yield sql, rows
+
+
+# Stores shared by everything that persists to the same file in this process
+_stores: Dict[str, SQLiteStore] = {}
+_stores_lock = threading.Lock()
+
+# Every open store, so that queued writes survive interpreter shutdown
+_open_stores: 'weakref.WeakSet[SQLiteStore]' = weakref.WeakSet()
+
+
+def get_store(db_path: Union[str, Path]) -> SQLiteStore:
+    """Get the shared store for a database file.
+    
+    Args:
+        db_path: SQLite database file
+    
+    Returns:
+        Store shared by all callers in this process
+    """
+    path = str(Path(db_path))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SQLiteStore(path)
+    return store
+
+
+@atexit.register
+def _flush_open_stores():
+    """Commit the queued writes of every open store."""
+    for store in list(_open_stores):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Could not flush {store.db_path} at exit: {e}")
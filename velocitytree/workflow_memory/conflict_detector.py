@@ -3,16 +3,26 @@ Conflict detector for identifying and resolving contradictory decisions.
 Helps maintain consistency in workflow decisions over time.
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime, timedelta
+from bisect import bisect_right
+from collections import Counter, defaultdict
 
 from .memory_store import MemoryStore, WorkflowDecision, DecisionType
 from .precedent_engine import PrecedentEngine
 from ..utils import logger
 
 
+# Context keys that identify the entity a decision is about
+ENTITY_KEYS = ['id', 'name', 'resource', 'target', 'entity']
+
+# Lowest context similarity at which a rule reports a conflict
+# (_check_policy_violations); less similar pairs are not compared on context
+MIN_CONFLICT_SIMILARITY = 0.7
+
+
 class ConflictType(Enum):
     """Types of decision conflicts."""
     CONTRADICTORY_OUTCOME = "contradictory_outcome"
@@ -41,7 +51,14 @@ class DecisionConflict:
 
 
 class ConflictDetector:
-    """Detects and helps resolve conflicts between workflow decisions."""
+    """Detects and helps resolve conflicts between workflow decisions.
+    
+    Decisions are bucketed before the conflict rules run, and rules only
+    compare decisions that share a bucket: a shared resource, entity,
+    precedent link, or enough identical context values to reach
+    MIN_CONFLICT_SIMILARITY. Every pair a built-in rule can report shares
+    a bucket, so the result is the same as comparing all pairs.
+    """
     
     def __init__(
         self,
@@ -86,31 +103,77 @@ class ConflictDetector:
         Returns:
             List of detected conflicts
         """
-        # Get relevant existing decisions
-        existing_decisions = self.memory_store.get_decisions(
-            decision_type=new_decision.decision_type,
-            project_id=project_id or new_decision.project_id,
-            start_date=datetime.now() - timedelta(days=check_window_days)
-        )
+        return self.detect_conflicts_batch(
+            [new_decision],
+            check_window_days=check_window_days,
+            project_id=project_id
+        )[new_decision.id]
+    
+    def detect_conflicts_batch(
+        self,
+        new_decisions: List[WorkflowDecision],
+        check_window_days: int = 30,
+        project_id: Optional[str] = None
+    ) -> Dict[str, List[DecisionConflict]]:
+        """Detect conflicts between many new decisions and existing ones in one pass.
         
-        conflicts = []
+        Existing decisions are fetched and bucketed once per decision type
+        and project, then each new decision is compared only with the
+        decisions in its buckets.
         
-        # Check against each existing decision
-        for existing in existing_decisions:
-            if existing.id == new_decision.id:
-                continue  # Skip self
+        Args:
+            new_decisions: The new decisions to check
+            check_window_days: Number of days to look back for conflicts
+            project_id: Optional project filter
             
-            # Apply each conflict detection rule
-            for conflict_type, check_func in self.conflict_rules.items():
-                conflict = check_func(new_decision, existing)
+        Returns:
+            Detected conflicts by new decision ID
+        """
+        groups = defaultdict(list)
+        for new_decision in new_decisions:
+            groups[(new_decision.decision_type, project_id or new_decision.project_id)].append(new_decision)
+        
+        start_date = datetime.now() - timedelta(days=check_window_days)
+        results = {}
+        
+        for (decision_type, group_project), group in groups.items():
+            # Get relevant existing decisions
+            existing_decisions = self.memory_store.get_decisions(
+                decision_type=decision_type,
+                project_id=group_project,
+                start_date=start_date
+            )
+            
+            ranks = self._rank_context_tokens(existing_decisions + group)
+            buckets = self._build_buckets(existing_decisions, ranks)
+            
+            for new_decision in group:
+                candidates = sorted({
+                    index
+                    for key in self._blocking_keys(new_decision, ranks)
+                    for index in buckets.get(key, ())
+                })
                 
-                if conflict and conflict.severity >= self.severity_threshold:
-                    conflicts.append(conflict)
-        
-        # Sort by severity
-        conflicts.sort(key=lambda c: c.severity, reverse=True)
+                conflicts = []
+                
+                # Check against each existing decision that shares a bucket
+                for index in candidates:
+                    existing = existing_decisions[index]
+                    if existing.id == new_decision.id:
+                        continue  # Skip self
+                    
+                    # Apply each conflict detection rule
+                    for conflict_type, check_func in self.conflict_rules.items():
+                        conflict = check_func(new_decision, existing)
+                        
+                        if conflict and conflict.severity >= self.severity_threshold:
+                            conflicts.append(conflict)
+                
+                # Sort by severity
+                conflicts.sort(key=lambda c: c.severity, reverse=True)
+                results[new_decision.id] = conflicts
         
-        return conflicts
+        return results
     
     def resolve_conflict(
         self,
@@ -213,9 +276,19 @@ class ConflictDetector:
         all_conflicts = []
         conflict_matrix = {}
         
-        # Check all pairs of decisions
+        ranks = self._rank_context_tokens(decisions)
+        blocking_keys = [self._blocking_keys(decision, ranks) for decision in decisions]
+        buckets = self._build_buckets(decisions, ranks)
+        
+        # Check all pairs of decisions that share a bucket
         for i, decision1 in enumerate(decisions):
-            for decision2 in decisions[i+1:]:
+            partners = set()
+            for key in blocking_keys[i]:
+                bucket = buckets[key]
+                partners.update(bucket[bisect_right(bucket, i):])
+            
+            for j in sorted(partners):
+                decision2 = decisions[j]
                 conflicts = []
                 
                 # Check each conflict type
@@ -264,6 +337,84 @@ class ConflictDetector:
             )
         }
     
+    def _rank_context_tokens(
+        self,
+        decisions: List[WorkflowDecision]
+    ) -> Dict[Tuple[str, Any], int]:
+        """Order context key/value pairs from rarest to most common."""
+        counts = Counter(
+            token
+            for decision in decisions
+            for token in set(self._context_tokens(decision.context))
+        )
+        return {
+            token: rank
+            for rank, token in enumerate(sorted(counts, key=counts.get))
+        }
+    
+    def _context_tokens(self, context: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        """Hashable key/value pairs of a context; equal values give equal pairs."""
+        return [(key, self._bucket_value(value)) for key, value in context.items()]
+    
+    def _bucket_value(self, value: Any) -> Any:
+        """Hashable stand-in for a context value; equal values map to equal stand-ins."""
+        if isinstance(value, (bool, int, float)):
+            return float(value)
+        if isinstance(value, (list, tuple)):
+            return tuple(self._bucket_value(item) for item in value)
+        if isinstance(value, dict):
+            return tuple(sorted(
+                ((str(key), self._bucket_value(item)) for key, item in value.items()),
+                key=lambda pair: pair[0]
+            ))
+        return value
+    
+    def _blocking_keys(
+        self,
+        decision: WorkflowDecision,
+        ranks: Dict[Tuple[str, Any], int]
+    ) -> Set[Tuple]:
+        """Buckets a decision belongs to; conflicting decisions share one."""
+        keys = set()
+        
+        # Context similarity above MIN_CONFLICT_SIMILARITY needs more than
+        # (2 * MIN_CONFLICT_SIMILARITY - 1) of the keys to have equal values,
+        # as partial matches count half. Two decisions sharing that many
+        # values share one of their rarest (n - required + 1) values.
+        tokens = sorted(set(self._context_tokens(decision.context)), key=lambda t: ranks.get(t, -1))
+        if tokens:
+            required = int((2 * MIN_CONFLICT_SIMILARITY - 1) * len(tokens)) + 1
+            prefix = max(len(tokens) - required + 1, 1)
+            keys.update(('context',) + token for token in tokens[:prefix])
+        
+        # Temporal inconsistencies need a shared entity
+        for key in ENTITY_KEYS:
+            if key in decision.context:
+                keys.add(('entity', key, self._bucket_value(decision.context[key])))
+        
+        # Resource conflicts need a shared resource
+        for resource in self._extract_resources(decision.context):
+            keys.add(('resource', resource))
+        
+        # Context and dependency conflicts need a precedent link
+        keys.add(('decision', decision.id))
+        for precedent_id in decision.precedents:
+            keys.add(('decision', precedent_id))
+        
+        return keys
+    
+    def _build_buckets(
+        self,
+        decisions: List[WorkflowDecision],
+        ranks: Dict[Tuple[str, Any], int]
+    ) -> Dict[Tuple, List[int]]:
+        """Map each bucket to the ascending indices of its decisions."""
+        buckets = defaultdict(list)
+        for index, decision in enumerate(decisions):
+            for key in self._blocking_keys(decision, ranks):
+                buckets[key].append(index)
+        return buckets
+    
     def _check_contradictory_outcomes(
         self,
         decision1: WorkflowDecision,
@@ -611,9 +762,7 @@ class ConflictDetector:
     ) -> Optional[str]:
         """Check if contexts refer to the same entity."""
         # Look for common entity identifiers
-        entity_keys = ['id', 'name', 'resource', 'target', 'entity']
-        
-        for key in entity_keys:
+        for key in ENTITY_KEYS:
             if key in context1 and key in context2:
                 if context1[key] == context2[key]:
                     return f"{key}:{context1[key]}"
@@ -0,0 +1,185 @@
+"""
+Similarity index over decision contexts.
+Finds the decisions whose contexts best match a query across the whole history.
+"""
+
+import json
+import math
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+FEATURE_DTYPE = np.uint32
+
+# Initial capacity of the per-decision and per-feature arrays
+INITIAL_CAPACITY = 64
+
+
+def _feature(text: str) -> int:
+    """Hash a feature string to a stable 32-bit id."""
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def _canonical(value: Any) -> str:
+    """Canonical text of a context value for exact matching."""
+    if isinstance(value, str):
+        return value.lower()
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def context_features(context: Dict[str, Any]) -> np.ndarray:
+    """Hash the key/value pairs of a context to a set of feature ids.
+    
+    Each key contributes its presence and its exact value. String values
+    also contribute their words, lists their items and numbers their order
+    of magnitude, so that partially matching values share features.
+    
+    Args:
+        context: Decision context
+    
+    Returns:
+        Sorted unique feature ids
+    """
+    features = []
+    for key, value in (context or {}).items():
+        features.append(_feature(f"k:{key}"))
+        features.append(_feature(f"v:{key}={_canonical(value)}"))
+        
+        if isinstance(value, str):
+            for token in value.lower().split():
+                features.append(_feature(f"t:{key}={token}"))
+        elif isinstance(value, list):
+            for item in value:
+                features.append(_feature(f"t:{key}={item}"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            magnitude = math.frexp(abs(value) + 1)[1]
+            features.append(_feature(f"n:{key}={'-' if value < 0 else ''}{magnitude}"))
+    
+    return np.unique(np.array(features, dtype=FEATURE_DTYPE))
+
+
+class _GrowableArray:
+    """Append-only NumPy array with amortized growth."""
+    
+    def __init__(self, dtype, capacity: int = INITIAL_CAPACITY):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+    
+    def append(self, value):
+        if self.size == len(self.data):
+            self.data = np.resize(self.data, len(self.data) * 2)
+        self.data[self.size] = value
+        self.size += 1
+    
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class ContextIndex:
+    """Inverted index from context features to decisions.
+    
+    Scoring a query gathers the posting lists of its features and counts
+    shared features per decision with ``np.bincount``, so a search costs
+    time proportional to the matching postings rather than to the number
+    of stored decisions. Scores are the Jaccard similarity of the feature
+    sets; decisions that share no feature with the query are never
+    returned.
+    """
+    
+    def __init__(self):
+        self._ids: List[str] = []
+        self._sizes = _GrowableArray(np.int32)
+        self._types = _GrowableArray(np.int32)
+        self._projects = _GrowableArray(np.int32)
+        self._postings: Dict[int, _GrowableArray] = {}
+        
+        # Codes of decision types and projects, for vectorized filtering
+        self._type_codes: Dict[Optional[str], int] = {}
+        self._project_codes: Dict[Optional[str], int] = {}
+        
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def add(
+        self,
+        decision_id: str,
+        features: np.ndarray,
+        decision_type: Optional[str] = None,
+        project_id: Optional[str] = None
+    ):
+        """Add a decision's context features to the index.
+        
+        Args:
+            decision_id: ID of the decision
+            features: Feature ids from ``context_features``
+            decision_type: Decision type value, for filtering
+            project_id: Project of the decision, for filtering
+        """
+        with self._lock:
+            row = len(self._ids)
+            self._ids.append(decision_id)
+            self._sizes.append(len(features))
+            self._types.append(self._type_codes.setdefault(decision_type, len(self._type_codes)))
+            self._projects.append(self._project_codes.setdefault(project_id, len(self._project_codes)))
+            
+            for feature in features.tolist():
+                postings = self._postings.get(feature)
+                if postings is None:
+                    postings = self._postings[feature] = _GrowableArray(np.int32, capacity=4)
+                postings.append(row)
+    
+    def search(
+        self,
+        context: Dict[str, Any],
+        limit: int = 10,
+        decision_type: Optional[str] = None,
+        project_id: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Find the decisions whose contexts best match a context.
+        
+        Args:
+            context: Context to match
+            limit: Maximum number of results
+            decision_type: Only return decisions of this type
+            project_id: Only return decisions of this project
+        
+        Returns:
+            (decision_id, similarity) pairs, best match first
+        """
+        query = context_features(context)
+        
+        with self._lock:
+            postings = [
+                self._postings[feature].view()
+                for feature in query.tolist()
+                if feature in self._postings
+            ]
+            if not postings:
+                return []
+            
+            shared = np.bincount(np.concatenate(postings), minlength=len(self._ids))
+            rows = np.flatnonzero(shared)
+            
+            if decision_type is not None:
+                code = self._type_codes.get(decision_type, -1)
+                rows = rows[self._types.view()[rows] == code]
+            if project_id is not None:
+                code = self._project_codes.get(project_id, -1)
+                rows = rows[self._projects.view()[rows] == code]
+            if not len(rows):
+                return []
+            
+            counts = shared[rows]
+            scores = counts / (len(query) + self._sizes.view()[rows] - counts)
+            
+            if len(rows) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                rows, scores = rows[top], scores[top]
+            order = np.argsort(-scores, kind='stable')
+            
+            return [(self._ids[rows[i]], float(scores[i])) for i in order]
@@ -12,6 +12,10 @@ from .memory_store import MemoryStore, WorkflowDecision, DecisionType
 from ..utils import logger
 
 
+# Candidates taken from the context index and from recent decisions before scoring
+SIMILAR_CANDIDATES = 100
+
+
 class DecisionTracker:
     """Tracks and analyzes workflow decisions over time."""
     
@@ -176,10 +180,11 @@ class DecisionTracker:
         Returns:
             List of similar decisions sorted by relevance
         """
-        # Get candidate decisions
-        candidates = self.memory_store.get_decisions(
+        # Similar contexts from the whole history plus the latest decisions
+        candidates = self.memory_store.find_candidates(
+            context,
             decision_type=decision_type,
-            limit=100  # Get more candidates for filtering
+            limit=max(limit, SIMILAR_CANDIDATES)  # Get more candidates for filtering
         )
         
         # Calculate similarity scores
@@ -3,8 +3,8 @@ Memory store for workflow decisions and history.
 Provides persistent storage and retrieval of decision data.
 """
 
-import sqlite3
 import json
+import threading
 from pathlib import Path
 from datetime import datetime
 from dataclasses import dataclass, field
@@ -12,7 +12,11 @@ from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 import uuid
 
+import numpy as np
+
+from ..storage import get_store
 from ..utils import logger
+from .context_index import FEATURE_DTYPE, ContextIndex, context_features
 
 
 class DecisionType(Enum):
@@ -81,8 +85,31 @@ class WorkflowDecision:
         )
 
 
+_INSERT_DECISION = """
+    INSERT INTO decisions (
+        id, timestamp, decision_type, context, decision,
+        rationale, outcome, confidence, precedents, tags,
+        user_id, project_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_FEATURES = """
+    INSERT INTO decision_features (
+        decision_id, decision_type, project_id, features
+    ) VALUES (?, ?, ?, ?)
+"""
+
+
 class MemoryStore:
-    """Persistent storage for workflow decisions."""
+    """Persistent storage for workflow decisions.
+    
+    New decisions, outcomes and relationships are written behind and
+    committed in groups by the shared store; reads see them at once.
+    
+    The hashed context features of each decision are stored next to it
+    and loaded into a ContextIndex on the first similarity search, which
+    then picks up new rows incrementally.
+    """
     
     def __init__(self, db_path: Optional[Path] = None):
         """Initialize memory store.
@@ -94,17 +121,18 @@ class MemoryStore:
             db_path = Path.home() / ".velocitytree" / "workflow_memory.db"
         
         self.db_path = db_path
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.store = get_store(db_path)
+        
+        self._index: Optional[ContextIndex] = None
+        self._indexed_rowid = 0
+        self._index_lock = threading.Lock()
         
         self._init_database()
     
     def _init_database(self):
         """Initialize database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create decisions table
-        cursor.execute("""
+        self.store.executescript("""
+            -- Decisions table
             CREATE TABLE IF NOT EXISTS decisions (
                 id TEXT PRIMARY KEY,
                 timestamp TEXT NOT NULL,
@@ -119,32 +147,22 @@ class MemoryStore:
                 user_id TEXT,
                 project_id TEXT,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create indexes for efficient querying
-        cursor.execute("""
+            );
+            
+            -- Indexes for efficient querying
             CREATE INDEX IF NOT EXISTS idx_decisions_timestamp 
-            ON decisions(timestamp)
-        """)
-        
-        cursor.execute("""
+            ON decisions(timestamp);
+            
             CREATE INDEX IF NOT EXISTS idx_decisions_type 
-            ON decisions(decision_type)
-        """)
-        
-        cursor.execute("""
+            ON decisions(decision_type);
+            
             CREATE INDEX IF NOT EXISTS idx_decisions_project 
-            ON decisions(project_id)
-        """)
-        
-        cursor.execute("""
+            ON decisions(project_id);
+            
             CREATE INDEX IF NOT EXISTS idx_decisions_user 
-            ON decisions(user_id)
-        """)
-        
-        # Create decision_outcomes table for tracking results
-        cursor.execute("""
+            ON decisions(user_id);
+            
+            -- Decision outcomes for tracking results
             CREATE TABLE IF NOT EXISTS decision_outcomes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 decision_id TEXT NOT NULL,
@@ -153,11 +171,9 @@ class MemoryStore:
                 metrics TEXT,
                 feedback TEXT,
                 FOREIGN KEY (decision_id) REFERENCES decisions(id)
-            )
-        """)
-        
-        # Create decision_relationships table
-        cursor.execute("""
+            );
+            
+            -- Relationships between decisions
             CREATE TABLE IF NOT EXISTS decision_relationships (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 parent_id TEXT NOT NULL,
@@ -166,11 +182,17 @@ class MemoryStore:
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (parent_id) REFERENCES decisions(id),
                 FOREIGN KEY (child_id) REFERENCES decisions(id)
-            )
+            );
+            
+            -- Hashed context features for similarity search
+            CREATE TABLE IF NOT EXISTS decision_features (
+                decision_id TEXT PRIMARY KEY,
+                decision_type TEXT NOT NULL,
+                project_id TEXT,
+                features BLOB NOT NULL,
+                FOREIGN KEY (decision_id) REFERENCES decisions(id)
+            );
         """)
-        
-        conn.commit()
-        conn.close()
     
     def add_decision(self, decision: WorkflowDecision) -> bool:
         """Add a new decision to the store.
@@ -179,29 +201,11 @@ class MemoryStore:
             decision: WorkflowDecision to store
             
         Returns:
-            True if successful, False otherwise
+            True if the decision was queued, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            data = decision.to_dict()
-            
-            cursor.execute("""
-                INSERT INTO decisions (
-                    id, timestamp, decision_type, context, decision,
-                    rationale, outcome, confidence, precedents, tags,
-                    user_id, project_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                data['id'], data['timestamp'], data['decision_type'],
-                data['context'], data['decision'], data['rationale'],
-                data['outcome'], data['confidence'], data['precedents'],
-                data['tags'], data['user_id'], data['project_id']
-            ))
-            
-            conn.commit()
-            conn.close()
+            self.store.queue_write(_INSERT_DECISION, self._decision_row(decision))
+            self.store.queue_write(_INSERT_FEATURES, self._features_row(decision))
             
             logger.debug(f"Added decision {decision.id} to memory store")
             return True
@@ -210,6 +214,175 @@ class MemoryStore:
             logger.error(f"Failed to add decision: {e}")
             return False
     
+    def add_decisions(self, decisions: List[WorkflowDecision]) -> int:
+        """Add many decisions in a single transaction.
+        
+        Args:
+            decisions: WorkflowDecisions to store
+        
+        Returns:
+            Number of decisions stored
+        """
+        try:
+            with self.store.transaction() as conn:
+                count = conn.executemany(
+                    _INSERT_DECISION, [self._decision_row(d) for d in decisions]
+                ).rowcount
+                conn.executemany(
+                    _INSERT_FEATURES, [self._features_row(d) for d in decisions]
+                )
+            
+            logger.debug(f"Added {count} decisions to memory store")
+            return count
+        
+        except Exception as e:
+            logger.error(f"Failed to add decisions: {e}")
+            return 0
+    
+    def _decision_row(self, decision: WorkflowDecision) -> Tuple:
+        """Convert a decision to a row of the decisions table."""
+        data = decision.to_dict()
+        return (
+            data['id'], data['timestamp'], data['decision_type'],
+            data['context'], data['decision'], data['rationale'],
+            data['outcome'], data['confidence'], data['precedents'],
+            data['tags'], data['user_id'], data['project_id']
+        )
+    
+    def _features_row(self, decision: WorkflowDecision) -> Tuple:
+        """Convert a decision to a row of the decision_features table."""
+        return (
+            decision.id,
+            decision.decision_type.value,
+            decision.project_id,
+            context_features(decision.context).tobytes()
+        )
+    
+    def find_similar(
+        self,
+        context: Dict[str, Any],
+        decision_type: Optional[DecisionType] = None,
+        project_id: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[WorkflowDecision, float]]:
+        """Find the decisions with the most similar contexts in the whole history.
+        
+        Similarity is the overlap of hashed context features; decisions
+        that share no context key with the query are not returned.
+        
+        Args:
+            context: Context to match
+            decision_type: Filter by decision type
+            project_id: Filter by project
+            limit: Maximum number of results
+        
+        Returns:
+            (decision, similarity) pairs, most similar first
+        """
+        try:
+            matches = self._sync_index().search(
+                context,
+                limit=limit,
+                decision_type=decision_type.value if decision_type else None,
+                project_id=project_id
+            )
+            if not matches:
+                return []
+            
+            ids = [decision_id for decision_id, _ in matches]
+            rows = self.store.query(
+                f"SELECT * FROM decisions WHERE id IN ({','.join('?' * len(ids))})", ids
+            )
+            decisions = {row[0]: self._row_to_decision(row) for row in rows}
+            
+            return [
+                (decisions[decision_id], similarity)
+                for decision_id, similarity in matches
+                if decision_id in decisions
+            ]
+        
+        except Exception as e:
+            logger.error(f"Failed to find similar decisions: {e}")
+            return []
+    
+    def find_candidates(
+        self,
+        context: Dict[str, Any],
+        decision_type: Optional[DecisionType] = None,
+        project_id: Optional[str] = None,
+        limit: int = 100
+    ) -> List[WorkflowDecision]:
+        """Collect decisions worth scoring against a context.
+        
+        Combines the ``limit`` most similar contexts in the whole history
+        with the ``limit`` most recent decisions, which can be relevant
+        through recency, success or confidence without sharing any
+        context feature with the query.
+        
+        Args:
+            context: Context to match
+            decision_type: Filter by decision type
+            project_id: Filter by project
+            limit: Candidates taken from each source
+        
+        Returns:
+            Distinct decisions, similar ones first
+        """
+        candidates = {
+            decision.id: decision
+            for decision, _ in self.find_similar(
+                context, decision_type=decision_type, project_id=project_id, limit=limit
+            )
+        }
+        for decision in self.get_decisions(
+            decision_type=decision_type, project_id=project_id, limit=limit
+        ):
+            candidates.setdefault(decision.id, decision)
+        return list(candidates.values())
+    
+    def _sync_index(self) -> ContextIndex:
+        """Load the context index, adding rows written since the last search."""
+        with self._index_lock:
+            if self._index is None:
+                self._backfill_features()
+                self._index = ContextIndex()
+            
+            rows = self.store.query("""
+                SELECT rowid, decision_id, decision_type, project_id, features
+                FROM decision_features WHERE rowid > ? ORDER BY rowid
+            """, (self._indexed_rowid,))
+            
+            for rowid, decision_id, decision_type, project_id, features in rows:
+                self._index.add(
+                    decision_id,
+                    np.frombuffer(features, dtype=FEATURE_DTYPE),
+                    decision_type,
+                    project_id
+                )
+                self._indexed_rowid = rowid
+            
+            return self._index
+    
+    def _backfill_features(self):
+        """Compute features for decisions stored before the index existed."""
+        rows = self.store.query("""
+            SELECT d.id, d.decision_type, d.project_id, d.context
+            FROM decisions d
+            LEFT JOIN decision_features f ON f.decision_id = d.id
+            WHERE f.decision_id IS NULL
+        """)
+        if rows:
+            self.store.executemany(_INSERT_FEATURES, [
+                (
+                    decision_id,
+                    decision_type,
+                    project_id,
+                    context_features(json.loads(context) if context else {}).tobytes()
+                )
+                for decision_id, decision_type, project_id, context in rows
+            ])
+            logger.debug(f"Indexed contexts of {len(rows)} stored decisions")
+    
     def get_decision(self, decision_id: str) -> Optional[WorkflowDecision]:
         """Retrieve a specific decision by ID.
         
@@ -220,16 +393,10 @@ class MemoryStore:
             WorkflowDecision if found, None otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            row = self.store.query_one("""
                 SELECT * FROM decisions WHERE id = ?
             """, (decision_id,))
             
-            row = cursor.fetchone()
-            conn.close()
-            
             if row:
                 return self._row_to_decision(row)
             return None
@@ -263,9 +430,6 @@ class MemoryStore:
             List of matching WorkflowDecisions
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             query = "SELECT * FROM decisions WHERE 1=1"
             params = []
             
@@ -303,9 +467,7 @@ class MemoryStore:
                 query += " LIMIT ?"
                 params.append(limit)
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
+            rows = self.store.query(query, params)
             
             return [self._row_to_decision(row) for row in rows]
             
@@ -331,19 +493,16 @@ class MemoryStore:
             feedback: Optional feedback text
             
         Returns:
-            True if successful, False otherwise
+            True if the update was queued, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Update the decision outcome
-            cursor.execute("""
+            self.store.queue_write("""
                 UPDATE decisions SET outcome = ? WHERE id = ?
             """, (outcome, decision_id))
             
             # Add outcome record
-            cursor.execute("""
+            self.store.queue_write("""
                 INSERT INTO decision_outcomes (
                     decision_id, outcome_timestamp, success, metrics, feedback
                 ) VALUES (?, ?, ?, ?, ?)
@@ -355,9 +514,6 @@ class MemoryStore:
                 feedback
             ))
             
-            conn.commit()
-            conn.close()
-            
             logger.debug(f"Updated outcome for decision {decision_id}")
             return True
             
@@ -379,21 +535,15 @@ class MemoryStore:
             relationship_type: Type of relationship
             
         Returns:
-            True if successful, False otherwise
+            True if the relationship was queued, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            self.store.queue_write("""
                 INSERT INTO decision_relationships (
                     parent_id, child_id, relationship_type
                 ) VALUES (?, ?, ?)
             """, (parent_id, child_id, relationship_type))
             
-            conn.commit()
-            conn.close()
-            
             logger.debug(f"Added relationship {parent_id} -> {child_id}")
             return True
             
@@ -418,9 +568,6 @@ class MemoryStore:
             List of related decisions
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             related_ids = set()
             
             # Get parent relationships
@@ -435,8 +582,7 @@ class MemoryStore:
                     query += " AND relationship_type = ?"
                     params.append(relationship_type)
                 
-                cursor.execute(query, params)
-                parent_ids = cursor.fetchall()
+                parent_ids = self.store.query(query, params)
                 related_ids.update(row[0] for row in parent_ids)
             
             # Get child relationships
@@ -451,8 +597,7 @@ class MemoryStore:
                     query += " AND relationship_type = ?"
                     params.append(relationship_type)
                 
-                cursor.execute(query, params)
-                child_ids = cursor.fetchall()
+                child_ids = self.store.query(query, params)
                 related_ids.update(row[0] for row in child_ids)
             
             # Get the actual decisions
@@ -462,7 +607,6 @@ class MemoryStore:
                 if decision:
                     decisions.append(decision)
             
-            conn.close()
             return decisions
             
         except Exception as e:
@@ -484,9 +628,6 @@ class MemoryStore:
             Dictionary of statistics
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             conditions = ["1=1"]
             params = []
             
@@ -501,22 +642,20 @@ class MemoryStore:
             where_clause = " AND ".join(conditions)
             
             # Total decisions
-            cursor.execute(f"""
+            total_decisions = self.store.query_one(f"""
                 SELECT COUNT(*) FROM decisions WHERE {where_clause}
-            """, params)
-            total_decisions = cursor.fetchone()[0]
+            """, params)[0]
             
             # Decisions by type
-            cursor.execute(f"""
+            decisions_by_type = dict(self.store.query(f"""
                 SELECT decision_type, COUNT(*) 
                 FROM decisions 
                 WHERE {where_clause}
                 GROUP BY decision_type
-            """, params)
-            decisions_by_type = dict(cursor.fetchall())
+            """, params))
             
             # Success rate
-            cursor.execute(f"""
+            success_data = self.store.query_one(f"""
                 SELECT 
                     COUNT(CASE WHEN o.success = 1 THEN 1 END) as successful,
                     COUNT(o.id) as total
@@ -524,19 +663,14 @@ class MemoryStore:
                 JOIN decision_outcomes o ON d.id = o.decision_id
                 WHERE {where_clause}
             """, params)
-            
-            success_data = cursor.fetchone()
             success_rate = (
                 success_data[0] / success_data[1] if success_data[1] > 0 else 0
             )
             
             # Average confidence
-            cursor.execute(f"""
+            avg_confidence = self.store.query_one(f"""
                 SELECT AVG(confidence) FROM decisions WHERE {where_clause}
-            """, params)
-            avg_confidence = cursor.fetchone()[0] or 0
-            
-            conn.close()
+            """, params)[0] or 0
             
             return {
                 'total_decisions': total_decisions,
@@ -14,6 +14,10 @@ from .decision_tracker import DecisionTracker
 from ..utils import logger
 
 
+# Candidates taken from the context index and from recent decisions before scoring
+PRECEDENT_CANDIDATES = 100
+
+
 @dataclass
 class Precedent:
     """Represents a precedent decision with relevance score."""
@@ -70,11 +74,12 @@ class PrecedentEngine:
         Returns:
             List of relevant precedents sorted by relevance
         """
-        # Get candidate decisions
-        candidates = self.memory_store.get_decisions(
+        # Similar contexts from the whole history plus the latest decisions
+        candidates = self.memory_store.find_candidates(
+            context,
             decision_type=decision_type,
             project_id=project_id,
-            limit=100  # Get more candidates for scoring
+            limit=max(limit, PRECEDENT_CANDIDATES)  # Get more candidates for scoring
         )
         
         # Score each candidate